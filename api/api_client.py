@@ -1,21 +1,195 @@
+import contextvars
+import functools
+import threading
 import requests
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+from requests.adapters import HTTPAdapter
+from api.cancellation import run_cancellable
+from api.conditional_get import CONDITIONAL_CACHE
+from api.json_decoder import Fields, decode_response, loads, select
+from api.metrics import API_REQUEST_SECONDS
+from api.persistent_cache import PersistentCache, default_cache
+from api.profiling import profile_api_call
+from api.rate_limiter import TokenBucket
+from api.resilience import RESILIENCE
+from api.response_cache import RESPONSE_CACHE, ResponseCache, make_key
+from api.single_flight import REQUEST_FLIGHTS
+
+# (connect, read) timeout in seconds of all requests of the API clients
+DEFAULT_TIMEOUT = (3.05, 10.0)
+# Number of keep-alive connections kept open per host
+DEFAULT_POOL_SIZE = 4
+
+# Number of threads of the pool shared by all fan-out calls (see fan_out)
+DEFAULT_FAN_OUT_WORKERS = 8
+
+Timeout = Union[float, Tuple[float, float]]
+T = TypeVar("T")
+
+_fan_out_pool: Optional[ThreadPoolExecutor] = None
+_fan_out_lock = threading.Lock()
+_fan_out_worker = threading.local()
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Creates a session that keeps the connections to the API hosts open (keep-alive), so only the
+    first request to a host pays for the TCP and TLS handshake.
+
+    :param pool_size: Number of connections kept open per host.
+    :return: Session with pooled adapters mounted for http and https.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _fan_out_executor() -> ThreadPoolExecutor:
+    global _fan_out_pool
+    if _fan_out_pool is None:
+        with _fan_out_lock:
+            if _fan_out_pool is None:
+                _fan_out_pool = ThreadPoolExecutor(max_workers=DEFAULT_FAN_OUT_WORKERS, thread_name_prefix="api-fan-out",
+                                                   initializer=setattr, initargs=(_fan_out_worker, "active", True))
+    return _fan_out_pool
+
+
+def fan_out(calls: Sequence[Callable[[], T]], return_errors: bool = True) -> List[Union[T, Exception]]:
+    """
+    Runs independent blocking calls (e.g. requests of the API clients) at the same time on a bounded thread pool
+    shared by all callers, so they take one round-trip instead of one per call.
+    The calls see the context of the caller, i.e. its cancellation token and request priority.
+    Calls from inside a pool thread run one after another, so nested fan-outs cannot use up the pool.
+
+    :param calls: Functions without arguments, e.g. `lambda: api.company_overview(symbol)`.
+    :param return_errors: If True, the error of a failed call takes the place of its result,
+        otherwise the first error is raised once all calls are done.
+    :return: Results in the order of the calls.
+    :raises OperationCancelled: If a call was cancelled.
+    """
+    if len(calls) <= 1 or getattr(_fan_out_worker, "active", False):
+        runs = [_capture(call) for call in calls]
+    else:
+        executor = _fan_out_executor()
+        futures = [executor.submit(contextvars.copy_context().run, _capture, call) for call in calls]
+        runs = [future.result() for future in futures]
+
+    results = []
+    for ok, value in runs:
+        if not ok and (not isinstance(value, Exception) or not return_errors):
+            raise value
+        results.append(value)
+    return results
+
+
+def _capture(call: Callable[[], T]) -> Tuple[bool, Union[T, BaseException]]:
+    try:
+        return True, call()
+    except BaseException as e:
+        return False, e
+
 
 class APIClient(ABC):
     """
     Abstract base class for API clients to handle common operations.
     """
 
-    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None):
+    # Seconds the GET responses of an endpoint are cached, keyed by endpoint prefix (longest prefix wins).
+    # Endpoints without an entry are not cached.
+    cache_ttls: Dict[str, float] = {}
+    # Quota of the API, set by the APIFactory (see api.rate_limiter). Requests are not limited if None.
+    rate_limit: Optional[TokenBucket] = None
+    # Send a duplicate of a GET request that takes longer than the p95 latency of the client (see api.resilience)
+    hedge_requests = False
+    # Decoder of the JSON responses, orjson if it is installed (see api.json_decoder)
+    decode_json: Callable[[bytes], Any] = staticmethod(loads)
+    # Fields of the GET responses that are kept (see api.json_decoder.select), keyed by endpoint prefix (longest prefix
+    # wins). Endpoints without an entry keep the whole response.
+    response_fields: Dict[str, Fields] = {}
+
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None, timeout: Timeout = DEFAULT_TIMEOUT,
+                 pool_size: int = DEFAULT_POOL_SIZE, session: Optional[requests.Session] = None,
+                 cache: Optional[ResponseCache] = None, persistent_cache: Optional[PersistentCache] = None):
         """
         Initializes the API client with a base URL and optional headers.
 
         :param base_url: The base URL for the API.
         :param headers: Optional HTTP headers to include in requests.
+        :param timeout: Connect and read timeout of the requests in seconds (one value for both or a tuple).
+        :param pool_size: Number of keep-alive connections of the session per host.
+        :param session: Session to send the requests with, a pooled session is created if None.
+        :param cache: Cache of the GET responses, defaults to the cache shared by all clients.
+        :param persistent_cache: Cache on disk behind `cache`, defaults to api.persistent_cache.default_cache().
         """
         self.base_url = base_url
         self.headers = headers or {}
+        self.timeout = timeout
+        self.session = session or create_session(pool_size)
+        self.cache = cache if cache is not None else RESPONSE_CACHE
+        self.persistent_cache = persistent_cache
+
+    def cache_ttl(self, endpoint: str, params: Optional[Dict] = None) -> Optional[float]:
+        """
+        Returns how long the response of a GET request may be cached, looked up in `cache_ttls`.
+        Subclasses override this if the policy depends on the parameters (e.g. the Alpha Vantage function).
+
+        :param endpoint: API endpoint (relative to base_url).
+        :param params: Query parameters of the request.
+        :return: Time to live in seconds, None if the response is not cached.
+        """
+        endpoint = endpoint.strip('/')
+        matches = [prefix for prefix in self.cache_ttls if endpoint.startswith(prefix)]
+        return self.cache_ttls[max(matches, key=len)] if matches else None
+
+    def fields_for(self, endpoint: str) -> Optional[Fields]:
+        """
+        :return: Fields of the responses of the endpoint that are kept, looked up in `response_fields`
+            (None keeps the whole response).
+        """
+        endpoint = endpoint.strip('/')
+        matches = [prefix for prefix in self.response_fields if endpoint.startswith(prefix)]
+        return self.response_fields[max(matches, key=len)] if matches else None
+
+    def is_cacheable(self, data) -> bool:
+        """
+        Checks a successful response before it is cached, e.g. to skip error messages sent with status 200.
+        """
+        return data is not None
+
+    def check_quota(self, data):
+        """
+        Checks a successful response for a message that the quota of the API is used up, for APIs that report it with
+        status 200. Subclasses raise RateLimitExceeded (after `rate_limit.exhaust()`) if it is.
+        """
+        pass
+
+    def _consume_quota(self):
+        # Takes a token of the rate limit before a request is sent, blocked requests are never sent
+        if self.rate_limit is not None:
+            self.rate_limit.acquire()
+
+    def configure_http(self, timeout: Optional[Timeout] = None, pool_size: Optional[int] = None):
+        """
+        Changes the timeout and the connection pool of the client (used by the APIFactory).
+
+        :param timeout: New connect and read timeout, unchanged if None.
+        :param pool_size: New number of keep-alive connections per host, unchanged if None.
+        """
+        if timeout is not None:
+            self.timeout = timeout
+        if pool_size is not None:
+            old_session, self.session = self.session, create_session(pool_size)
+            old_session.close()
+
+    def close(self):
+        """
+        Closes the open connections of the session.
+        """
+        self.session.close()
 
     @abstractmethod
     def authenticate(self):
@@ -25,18 +199,84 @@ class APIClient(ABC):
         """
         pass
 
-    def get(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+    def get(self, endpoint: str, params: Optional[Dict] = None, use_cache: bool = True) -> Dict:
         """
         Sends a GET request to the specified endpoint.
+        All requests can be interrupted with the cancellation token of the running state (see api.cancellation)
+        and are retried if they fail temporarily (see api.resilience).
+        Responses of endpoints with a cache policy (see `cache_ttl`) are served from the response cache while valid
+        and revalidated with a conditional request afterwards (see api.conditional_get).
+        If the rate limit blocks the request, the persistent cache serves the last stored response (if enabled).
 
         :param endpoint: API endpoint (relative to base_url).
         :param params: Query parameters for the GET request.
+        :param use_cache: If False, the request is always sent (the response is still cached).
         :return: JSON response as a dictionary.
         """
+        ttl = self.cache_ttl(endpoint, params)
+        key = make_key(type(self).__name__, endpoint, params) if ttl else None
+        if key is not None and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        persistent_cache = self.persistent_cache or default_cache()
+        if key is None or persistent_cache is None:
+            result = self._fetch_json(endpoint, params, key)
+            if key is not None and self.is_cacheable(result):
+                self.cache.put(key, result, ttl)
+            return result
+
+        # The persistent cache serves the last known response after a restart and if the request fails
+        if use_cache:
+            entry = persistent_cache.get_or_fetch(repr(key), lambda: self._fetch_json(endpoint, params, key), ttl,
+                                                  is_valid=self.is_cacheable)
+        else:
+            result = self._fetch_json(endpoint, params, key)
+            if not self.is_cacheable(result):
+                return result
+            entry = persistent_cache.put(repr(key), result, ttl)
+        if entry.fresh:
+            self.cache.put(key, entry.value, entry.ttl_left())
+        return entry.value
+
+    def get_many(self, jobs: Sequence[Tuple[str, Optional[Dict]]], use_cache: bool = True) -> List[Union[Dict, Exception]]:
+        """
+        Sends independent GET requests at the same time (see fan_out), each like `get`.
+
+        :param jobs: (endpoint, params) of each request.
+        :param use_cache: If False, the requests are always sent.
+        :return: JSON responses in the order of the jobs, the error of a failed request takes the place of its response.
+        :raises OperationCancelled: If the requests were cancelled.
+        """
+        return fan_out([functools.partial(self.get, endpoint, params, use_cache) for endpoint, params in jobs])
+
+    def _fetch_json(self, endpoint: str, params: Optional[Dict] = None, key=None) -> Dict:
+        # Identical requests of this client in flight at the same time are sent once (see api.single_flight).
+        # The key has all params (incl. credentials), the headers are the same for all requests of the client.
+        flight_key = (id(self),) + make_key(type(self).__name__, endpoint, params, exclude=())
+        return REQUEST_FLIGHTS.do(flight_key, lambda: self._send_get(endpoint, params, key), type(self).__name__)
+
+    def _send_get(self, endpoint: str, params: Optional[Dict] = None, key=None) -> Dict:
+        self._consume_quota()
         url = f"{self.base_url}/{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params)
+        latency = API_REQUEST_SECONDS.labels(type(self).__name__, "GET")
+        # Retries, circuit breaker and hedging (see api.resilience)
+        send = functools.partial(RESILIENCE.send, self.session.get, latency=latency if self.hedge_requests else None)
+        parse = functools.partial(self._parse_json, fields=self.fields_for(endpoint))
+        with latency.time(), profile_api_call(type(self).__name__, endpoint):
+            if key is not None:
+                # Cached endpoints are revalidated with the ETag / Last-Modified of the last response
+                result = run_cancellable(CONDITIONAL_CACHE.get, send, url, parse, key=key,
+                                         headers=self.headers, params=params, timeout=self.timeout)
+            else:
+                result = parse(run_cancellable(send, url, headers=self.headers, params=params, timeout=self.timeout))
+        self.check_quota(result)
+        return result
+
+    def _parse_json(self, response: requests.Response, fields: Optional[Fields] = None) -> Dict:
         response.raise_for_status()
-        return response.json()
+        return select(decode_response(response, self.decode_json), fields)
 
     def post(self, endpoint: str, data: Optional[Dict] = None, json: Optional[Dict] = None) -> Dict:
         """
@@ -47,10 +287,13 @@ class APIClient(ABC):
         :param json: JSON data to include in the POST request.
         :return: JSON response as a dictionary.
         """
+        self._consume_quota()
         url = f"{self.base_url}/{endpoint}"
-        response = requests.post(url, headers=self.headers, data=data, json=json)
+        with API_REQUEST_SECONDS.time(type(self).__name__, "POST"):
+            response = run_cancellable(RESILIENCE.send, self.session.post, url, idempotent=False, headers=self.headers,
+                                       data=data, json=json, timeout=self.timeout)
         response.raise_for_status()
-        return response.json()
+        return decode_response(response, self.decode_json)
 
     def put(self, endpoint: str, data: Optional[Dict] = None) -> Dict:
         """
@@ -60,12 +303,15 @@ class APIClient(ABC):
         :param data: Data to include in the PUT request.
         :return: JSON response as a dictionary.
         """
+        self._consume_quota()
         url = f"{self.base_url}/{endpoint}"
-        response = requests.put(url, headers=self.headers, data=data)
+        with API_REQUEST_SECONDS.time(type(self).__name__, "PUT"):
+            response = run_cancellable(RESILIENCE.send, self.session.put, url, headers=self.headers, data=data,
+                                       timeout=self.timeout)
         response.raise_for_status()
 
         try:
-            return response.json()
+            return decode_response(response, self.decode_json)
         except ValueError:
             return response
 
@@ -76,7 +322,9 @@ class APIClient(ABC):
         :param endpoint: API endpoint (relative to base_url).
         :return: JSON response as a dictionary.
         """
+        self._consume_quota()
         url = f"{self.base_url}/{endpoint}"
-        response = requests.delete(url, headers=self.headers)
+        with API_REQUEST_SECONDS.time(type(self).__name__, "DELETE"):
+            response = run_cancellable(RESILIENCE.send, self.session.delete, url, headers=self.headers, timeout=self.timeout)
         response.raise_for_status()
-        return response.json()
\ No newline at end of file
+        return decode_response(response, self.decode_json)
@@ -1 +1 @@
-from .main import APIFactory
\ No newline at end of file
+from .main import APIFactory, LazyAPIProxy
\ No newline at end of file
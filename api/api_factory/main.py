@@ -1,59 +1,250 @@
-from typing import Dict
-from api.api_client import APIClient
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from loguru import logger
+from api.api_client import APIClient, Timeout
+from api.async_api_client import AsyncAPIClient
+from api.rate_limiter import RateLimiter
+from api.service_redirect import redirect_url
+from api.llm_api import LLMApi
 from api.news_api import NewsAPI
-from api.weather_api import WeatherAPI
+from api.weather_api import WeatherAPI, AsyncWeatherAPI
 from api.news_api import NewsAPI
 from api.weather_api import WeatherAPI
-from api.finance_api import FinanceAPI
-from api.spotify_api import SpotifyAPI
-from api.fitbit_api import FitbitAPI
+from api.finance_api import FinanceAPI, AsyncFinanceAPI
+from api.spotify_api import SpotifyAPI, AsyncSpotifyAPI
+from api.spotify_api.spotify_auth import TOKEN_URL as SPOTIFY_TOKEN_URL
+from api.fitbit_api import FitbitAPI, AsyncFitbitAPI
 
 from api.calendar_api import RaplaAPI
 from api.tts_api import TTSAPI
 from api.vvs_api import VVSAPI
-from api.vvs_api import VVSAPI
+from api.vvs_api import VVSAPI, AsyncVVSAPI
+
+class LazyAPIProxy:
+    """
+    Stand-in for an API client that is created on first use.
+
+    Attribute access (and assignment) is forwarded to the real client, which is built through the
+    factory the first time it is needed. Clients like RaplaAPI scrape the calendar in their constructor,
+    so building them lazily keeps the startup of the application fast.
+    """
+
+    def __init__(self, factory: 'APIFactory', api_type: str, state_machine=None):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_api_type', api_type)
+        object.__setattr__(self, '_state_machine', state_machine)
+
+    def _resolve(self) -> APIClient:
+        return self._factory.get_instance(self._api_type, self._state_machine)
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self) -> str:
+        state = "created" if self._api_type in self._factory._instances else "not created"
+        return f"LazyAPIProxy({self._api_type}, {state})"
+
 
 class APIFactory:
     """
     Factory class to create instances of different API clients.
     """
     _instances = {}
-    _instances = {}
+    _api_types = ('weather', 'finance', 'spotify', 'fitbit', 'rapla', 'tts', 'vvs', 'news')
+    # Clients of the async runtime on the shared httpx client (see api.async_api_client)
+    _async_instances = {}
+    _async_api_types = ('weather', 'finance', 'spotify', 'fitbit', 'vvs')
+    _locks_lock = threading.Lock()
+    _locks: Dict[str, threading.Lock] = {}
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, lazy: bool = False, timeout: Optional[Timeout] = None, pool_size: Optional[int] = None,
+                 rate_limiter: Optional[RateLimiter] = None, base_url: Optional[str] = None):
+        """
+        :param config: Configuration with the API keys (see config.CONFIG).
+        :param lazy: If True, create_api returns proxies and the clients are created on first use.
+        :param timeout: Connect and read timeout of the HTTP clients, defaults to api.api_client.DEFAULT_TIMEOUT.
+        :param pool_size: Keep-alive connections per host of the HTTP clients, defaults to api.api_client.DEFAULT_POOL_SIZE.
+        :param rate_limiter: Quotas of the APIs (see api.rate_limiter), the requests are not limited if None.
+        :param base_url: Base URL of a stand-in server (see benchmarks.stand_in) the clients of this factory send their
+            requests to instead of the external services, defaults to config['api_base_url']. The clients get the
+            URLs on the stand-in at construction (see api.service_redirect) and are not shared with other factories.
+        """
         self.config = config
+        self.lazy = lazy
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url if base_url is not None else config.get('api_base_url')
+        if self.base_url:
+            self._instances = {}
+            self._async_instances = {}
+        self._requested: Dict[str, object] = {}  # api_type -> state_machine of the first request
 
     def create_api(self, api_type: str, state_machine=None) -> APIClient:
         """
         Creates and returns an instance of the specified API client.
 
         :param api_type: Type of API client to create (e.g., 'weather').
+        :return: Instance of a subclass of APIClient (or a LazyAPIProxy for it, if the factory is lazy).
+        :raises ValueError: If the api_type is not supported.
+        """
+        if not self.lazy:
+            return self.get_instance(api_type, state_machine)
+        if api_type not in self._api_types:
+            raise ValueError(f"API type '{api_type}' is not supported.")
+        self._requested.setdefault(api_type, state_machine)
+        return LazyAPIProxy(self, api_type, state_machine)
+
+    def get_instance(self, api_type: str, state_machine=None) -> APIClient:
+        """
+        Returns the shared instance of the specified API client and creates it if necessary.
+        Thread-safe, different clients can be created in parallel.
+
+        :param api_type: Type of API client (e.g., 'weather').
         :return: Instance of a subclass of APIClient.
         :raises ValueError: If the api_type is not supported.
         """
-        if api_type not in self._instances:
-            if api_type == 'weather':
-                self._instances[api_type] = WeatherAPI(self.config['weather_api_key'])
-            elif api_type == 'finance':
-                self._instances[api_type] = FinanceAPI(self.config['finance_api_key'])
-            elif api_type == 'spotify':
-                self._instances[api_type] = SpotifyAPI(
-                    client_id=self.config['spotify_client_id'],
-                    client_secret=self.config['spotify_client_secret']
-                )
-            elif api_type == 'fitbit':
-                self._instances[api_type] =  FitbitAPI(
-                    self.config['fitbit_client_id'], 
-                    self.config['fitbit_client_secret']
-                )
-            elif api_type == 'rapla':
-                self._instances[api_type] = RaplaAPI(self.config['rapla_url'])
-            elif api_type == 'tts':
-                self._instances[api_type] = TTSAPI(self.config['elevenlabs_key'], state_machine)
-            elif api_type == 'vvs':
-                self._instances[api_type] = VVSAPI()
-            elif api_type == 'news':
-                self._instances[api_type] = NewsAPI()
-            else:
-                raise ValueError(f"API type '{api_type}' is not supported.")
-        return self._instances[api_type]
\ No newline at end of file
+        if api_type in self._instances:
+            return self._instances[api_type]
+        with self._locks_lock:
+            lock = self._locks.setdefault(api_type, threading.Lock())
+        with lock:
+            if api_type not in self._instances:
+                start = time.perf_counter()
+                instance = self._create_instance(api_type, state_machine)
+                if isinstance(instance, APIClient) and (self.timeout is not None or self.pool_size is not None):
+                    instance.configure_http(self.timeout, self.pool_size)
+                if self.rate_limiter is not None:
+                    instance.rate_limit = self.rate_limiter.bucket(api_type)
+                self._instances[api_type] = instance
+                logger.debug(f"Created {api_type} API in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return self._instances[api_type]
+
+    def create_async_api(self, api_type: str) -> AsyncAPIClient:
+        """
+        Returns the shared async client of the specified API and creates it if necessary. It has the same timeout and
+        takes from the same quota as the client returned by create_api.
+
+        :param api_type: Type of API client (e.g., 'weather').
+        :return: Instance of a subclass of AsyncAPIClient.
+        :raises ValueError: If there is no async client for the api_type.
+        """
+        if api_type in self._async_instances:
+            return self._async_instances[api_type]
+        with self._locks_lock:
+            lock = self._locks.setdefault(f"async-{api_type}", threading.Lock())
+        with lock:
+            if api_type not in self._async_instances:
+                instance = self._create_async_instance(api_type)
+                if self.timeout is not None:
+                    instance.configure_http(self.timeout)
+                if self.rate_limiter is not None:
+                    instance.rate_limit = self.rate_limiter.bucket(api_type)
+                self._async_instances[api_type] = instance
+        return self._async_instances[api_type]
+
+    def configure_rate_limits(self, rate_limiter: Optional[RateLimiter]):
+        """
+        Sets the quotas of the APIs, also of the clients that were already created.
+
+        :param rate_limiter: Rate limiter with a bucket per API type, None removes the limits.
+        """
+        self.rate_limiter = rate_limiter
+        for instances in (self._instances, self._async_instances):
+            for api_type, instance in list(instances.items()):
+                instance.rate_limit = rate_limiter.bucket(api_type) if rate_limiter is not None else None
+
+    def warm_up(self, api_types: Optional[Iterable[str]] = None, max_workers: int = 4) -> Dict[str, float]:
+        """
+        Creates API clients in parallel, e.g. in a background thread after the window is shown.
+        Errors are logged, the client is then created (and the error raised) on first use.
+
+        :param api_types: Types to create, defaults to all types requested through create_api so far.
+        :param max_workers: Number of clients created at the same time.
+        :return: Seconds it took to create each client that was not created yet.
+        """
+        api_types = [api_type for api_type in (api_types if api_types is not None else list(self._requested))
+                     if api_type not in self._instances]
+        durations = {}
+
+        def create(api_type):
+            start = time.perf_counter()
+            try:
+                self.get_instance(api_type, self._requested.get(api_type))
+                durations[api_type] = time.perf_counter() - start
+            except Exception as e:
+                logger.error(f"Error warming up {api_type} API: {e}")
+
+        if api_types:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-warm-up") as executor:
+                list(executor.map(create, api_types))
+            logger.info("Warmed up APIs: " + ", ".join(f"{t} ({d * 1000:.0f} ms)" for t, d in durations.items()))
+        return durations
+
+    def service_url(self, url: str) -> str:
+        """
+        :param url: URL or base URL of an external service.
+        :return: The URL the clients of this factory use for it, on the stand-in server if the factory has a base URL.
+        """
+        return redirect_url(url, self.base_url or None)
+
+    def _create_instance(self, api_type: str, state_machine=None) -> APIClient:
+        """
+        Creates a new instance of the specified API client.
+        """
+        if api_type == 'weather':
+            return WeatherAPI(self.config['weather_api_key'], base_url=self.service_url(WeatherAPI.BASE_URL))
+        elif api_type == 'finance':
+            return FinanceAPI(self.config['finance_api_key'], base_url=self.service_url(FinanceAPI.BASE_URL))
+        elif api_type == 'spotify':
+            return SpotifyAPI(
+                client_id=self.config['spotify_client_id'],
+                client_secret=self.config['spotify_client_secret'],
+                base_url=self.service_url(SpotifyAPI.BASE_URL),
+                token_url=self.service_url(SPOTIFY_TOKEN_URL)
+            )
+        elif api_type == 'fitbit':
+            return FitbitAPI(
+                self.config['fitbit_client_id'], 
+                self.config['fitbit_client_secret'],
+                base_url=self.service_url(FitbitAPI.BASE_URL)
+            )
+        elif api_type == 'rapla':
+            return RaplaAPI(self.service_url(self.config['rapla_url']))
+        elif api_type == 'tts':
+            return TTSAPI(self.config['elevenlabs_key'], state_machine, base_url=self.service_url(TTSAPI.BASE_URL))
+        elif api_type == 'vvs':
+            return VVSAPI(base_url=self.service_url(VVSAPI.BASE_URL))
+        elif api_type == 'news':
+            if not self.base_url:
+                return NewsAPI()
+            return NewsAPI(base_url=self.service_url(NewsAPI.BASE_URL),
+                           articles_base_url=self.service_url(NewsAPI.ARTICLES_URL),
+                           llm_host=self.service_url(LLMApi.DEFAULT_HOST))
+        else:
+            raise ValueError(f"API type '{api_type}' is not supported.")
+
+    def _create_async_instance(self, api_type: str) -> AsyncAPIClient:
+        """
+        Creates a new instance of the specified async API client.
+        """
+        if api_type == 'weather':
+            return AsyncWeatherAPI(self.config['weather_api_key'], base_url=self.service_url(WeatherAPI.BASE_URL))
+        elif api_type == 'finance':
+            return AsyncFinanceAPI(self.config['finance_api_key'], base_url=self.service_url(FinanceAPI.BASE_URL))
+        elif api_type == 'spotify':
+            return AsyncSpotifyAPI(self.config['spotify_client_id'], self.config['spotify_client_secret'],
+                                   base_url=self.service_url(SpotifyAPI.BASE_URL),
+                                   token_url=self.service_url(SPOTIFY_TOKEN_URL))
+        elif api_type == 'fitbit':
+            return AsyncFitbitAPI(self.config['fitbit_client_id'], self.config['fitbit_client_secret'],
+                                  base_url=self.service_url(FitbitAPI.BASE_URL))
+        elif api_type == 'vvs':
+            return AsyncVVSAPI(base_url=self.service_url(VVSAPI.BASE_URL))
+        else:
+            raise ValueError(f"API type '{api_type}' has no async client.")
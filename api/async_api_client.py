@@ -0,0 +1,249 @@
+import asyncio
+import functools
+import importlib.util
+import weakref
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+import httpx
+from api.api_client import APIClient, DEFAULT_TIMEOUT, Timeout
+from api.cancellation import await_cancellable
+from api.conditional_get import CONDITIONAL_CACHE
+from api.json_decoder import Fields, decode_response, loads
+from api.metrics import API_REQUEST_SECONDS
+from api.persistent_cache import PersistentCache, default_cache
+from api.rate_limiter import TokenBucket
+from api.resilience import RESILIENCE
+from api.response_cache import RESPONSE_CACHE, ResponseCache, make_key
+from api.single_flight import REQUEST_FLIGHTS
+
+# Connections of the shared client, all async API clients of an event loop share them
+DEFAULT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+
+def http2_available() -> bool:
+    """
+    :return: True if the h2 package (httpx[http2]) is installed, httpx falls back to HTTP/1.1 otherwise.
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def httpx_timeout(timeout: Timeout) -> httpx.Timeout:
+    """
+    :param timeout: Connect and read timeout in seconds (one value for both or a tuple), as used by the sync clients.
+    :return: The same timeout for httpx.
+    """
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return httpx.Timeout(read, connect=connect)
+
+
+def create_async_client(timeout: Timeout = DEFAULT_TIMEOUT, limits: httpx.Limits = DEFAULT_LIMITS) -> httpx.AsyncClient:
+    """
+    Creates an httpx client with HTTP/2 (if available), keep-alive and the given connection limits.
+
+    :param timeout: Connect and read timeout in seconds (one value for both or a tuple).
+    :param limits: Maximum number of (keep-alive) connections.
+    """
+    return httpx.AsyncClient(http2=http2_available(), limits=limits, timeout=httpx_timeout(timeout))
+
+
+# httpx clients are bound to the event loop they are used on, so there is one shared client per loop
+_shared_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+
+
+def shared_async_client() -> httpx.AsyncClient:
+    """
+    :return: The httpx client shared by the async API clients on the running event loop (created on first use).
+    """
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _shared_clients[loop] = create_async_client()
+    return client
+
+
+async def close_shared_async_client():
+    """
+    Closes the shared client of the running event loop (e.g. before the loop is stopped).
+    """
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+class AsyncAPIClient(ABC):
+    """
+    Abstract base class for async API clients, with the same surface as APIClient.
+
+    All requests run on one shared httpx.AsyncClient, so many requests can be in flight on the thread of the
+    event loop. They go through the same layers as the requests of the sync clients: rate limit, response and
+    persistent cache, single-flight, conditional requests, retries and circuit breakers, and cancellation.
+    """
+
+    cache_ttls: Dict[str, float] = {}
+    # Quota of the API, set by the APIFactory and shared with the sync client of the API (see api.rate_limiter)
+    rate_limit: Optional[TokenBucket] = None
+    # Send a duplicate of a GET request that takes longer than the p95 latency of the client (see api.resilience)
+    hedge_requests = False
+    decode_json: Callable[[bytes], Any] = staticmethod(loads)
+    response_fields: Dict[str, Fields] = {}
+    # Same cache policy lookup, quota checks and field selection as the sync clients
+    cache_ttl = APIClient.cache_ttl
+    fields_for = APIClient.fields_for
+    is_cacheable = APIClient.is_cacheable
+    check_quota = APIClient.check_quota
+    _consume_quota = APIClient._consume_quota
+    _parse_json = APIClient._parse_json
+
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None, timeout: Timeout = DEFAULT_TIMEOUT,
+                 client: Optional[httpx.AsyncClient] = None, cache: Optional[ResponseCache] = None,
+                 persistent_cache: Optional[PersistentCache] = None):
+        """
+        :param base_url: The base URL for the API.
+        :param headers: Optional HTTP headers to include in requests.
+        :param timeout: Connect and read timeout of the requests in seconds (one value for both or a tuple).
+        :param client: httpx client to send the requests with, defaults to the shared client of the running loop.
+        :param cache: Cache of the GET responses, defaults to the cache shared by all clients.
+        :param persistent_cache: Cache on disk behind `cache`, defaults to api.persistent_cache.default_cache().
+        """
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self._client = client
+        self.cache = cache if cache is not None else RESPONSE_CACHE
+        self.persistent_cache = persistent_cache
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client if self._client is not None else shared_async_client()
+
+    def configure_http(self, timeout: Optional[Timeout] = None, pool_size: Optional[int] = None):
+        """
+        Changes the timeout of the client (used by the APIFactory). The connections belong to the shared client,
+        so `pool_size` is ignored.
+        """
+        if timeout is not None:
+            self.timeout = timeout
+
+    @abstractmethod
+    def authenticate(self):
+        """
+        Handle authentication for the API client.
+        Must be implemented by subclasses.
+        """
+        pass
+
+    async def get(self, endpoint: str, params: Optional[Dict] = None, use_cache: bool = True) -> Dict:
+        """
+        Sends a GET request to the specified endpoint, with the same caching, retries and cancellation as
+        APIClient.get.
+
+        :param endpoint: API endpoint (relative to base_url).
+        :param params: Query parameters for the GET request.
+        :param use_cache: If False, the request is always sent (the response is still cached).
+        :return: JSON response as a dictionary.
+        """
+        ttl = self.cache_ttl(endpoint, params)
+        key = make_key(type(self).__name__, endpoint, params) if ttl else None
+        if key is not None and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        persistent_cache = self.persistent_cache or default_cache()
+        if key is None or persistent_cache is None:
+            result = await self._fetch_json(endpoint, params, key)
+            if key is not None and self.is_cacheable(result):
+                self.cache.put(key, result, ttl)
+            return result
+
+        # The persistent cache serves the last known response after a restart and if the request fails
+        if use_cache:
+            entry = await persistent_cache.get_or_fetch_async(repr(key), lambda: self._fetch_json(endpoint, params, key),
+                                                              ttl, is_valid=self.is_cacheable)
+        else:
+            result = await self._fetch_json(endpoint, params, key)
+            if not self.is_cacheable(result):
+                return result
+            entry = persistent_cache.put(repr(key), result, ttl)
+        if entry.fresh:
+            self.cache.put(key, entry.value, entry.ttl_left())
+        return entry.value
+
+    async def _fetch_json(self, endpoint: str, params: Optional[Dict] = None, key=None) -> Dict:
+        # Identical requests of this client in flight at the same time are sent once (see api.single_flight)
+        flight_key = (id(self),) + make_key(type(self).__name__, endpoint, params, exclude=())
+        return await REQUEST_FLIGHTS.do_async(flight_key, lambda: self._send_get(endpoint, params, key),
+                                              type(self).__name__)
+
+    async def _send_get(self, endpoint: str, params: Optional[Dict] = None, key=None) -> Dict:
+        self._consume_quota()
+        url = f"{self.base_url}/{endpoint}"
+        latency = API_REQUEST_SECONDS.labels(type(self).__name__, "GET")
+        # Retries, circuit breaker and hedging (see api.resilience)
+        send = functools.partial(RESILIENCE.send_async, self.client.get,
+                                 latency=latency if self.hedge_requests else None)
+        parse = functools.partial(self._parse_json, fields=self.fields_for(endpoint))
+        with latency.time():
+            if key is not None:
+                # Cached endpoints are revalidated with the ETag / Last-Modified of the last response
+                result = await await_cancellable(CONDITIONAL_CACHE.get_async(
+                    send, url, parse, key=key, headers=self.headers, params=params, timeout=httpx_timeout(self.timeout)))
+            else:
+                result = parse(await await_cancellable(
+                    send(url, headers=self.headers, params=params, timeout=httpx_timeout(self.timeout))))
+        self.check_quota(result)
+        return result
+
+    async def post(self, endpoint: str, data: Optional[Dict] = None, json: Optional[Dict] = None) -> Dict:
+        """
+        Sends a POST request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative to base_url).
+        :param data: Form data to include in the POST request.
+        :param json: JSON data to include in the POST request.
+        :return: JSON response as a dictionary.
+        """
+        self._consume_quota()
+        url = f"{self.base_url}/{endpoint}"
+        with API_REQUEST_SECONDS.time(type(self).__name__, "POST"):
+            response = await await_cancellable(RESILIENCE.send_async(
+                self.client.post, url, idempotent=False, headers=self.headers, data=data, json=json,
+                timeout=httpx_timeout(self.timeout)))
+        response.raise_for_status()
+        return decode_response(response, self.decode_json)
+
+    async def put(self, endpoint: str, data=None) -> Dict:
+        """
+        Sends a PUT request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative to base_url).
+        :param data: Data to include in the PUT request (a dict is sent form encoded, a str as it is).
+        :return: JSON response as a dictionary, the response itself if it has no JSON body.
+        """
+        self._consume_quota()
+        url = f"{self.base_url}/{endpoint}"
+        body = {"content": data} if isinstance(data, (str, bytes)) else {"data": data}
+        with API_REQUEST_SECONDS.time(type(self).__name__, "PUT"):
+            response = await await_cancellable(RESILIENCE.send_async(
+                self.client.put, url, headers=self.headers, timeout=httpx_timeout(self.timeout), **body))
+        response.raise_for_status()
+
+        try:
+            return decode_response(response, self.decode_json)
+        except ValueError:
+            return response
+
+    async def delete(self, endpoint: str) -> Dict:
+        """
+        Sends a DELETE request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative to base_url).
+        :return: JSON response as a dictionary.
+        """
+        self._consume_quota()
+        url = f"{self.base_url}/{endpoint}"
+        with API_REQUEST_SECONDS.time(type(self).__name__, "DELETE"):
+            response = await await_cancellable(RESILIENCE.send_async(
+                self.client.delete, url, headers=self.headers, timeout=httpx_timeout(self.timeout)))
+        response.raise_for_status()
+        return decode_response(response, self.decode_json)
@@ -1,4 +1,5 @@
 from typing import Dict
+import asyncio
 import datetime
 from typing import Dict, List
 import json
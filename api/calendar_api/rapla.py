@@ -1,3 +1,4 @@
+import functools
 import json
 import requests
 from bs4 import BeautifulSoup
@@ -5,7 +6,32 @@ import re
 import datetime
 from loguru import logger
 
+from api.api_client import DEFAULT_TIMEOUT
 from api.calendar_api.cal import Calendar, Lecture, Appointment
+from api.conditional_get import CONDITIONAL_CACHE
+from api.persistent_cache import cached_fetch
+from api.resilience import RESILIENCE
+
+# Seconds the rapla page is cached (see api.persistent_cache), the calendar changes only a few times a week
+RAPLA_CACHE_TTL = 6 * 60 * 60
+
+# Number of pages whose parsed lectures are kept, the lectures are reused as long as a page does not change
+PARSED_PAGES_MAX = 4
+
+
+def _page_text(res) -> str:
+    if res.status_code != 200:
+        raise requests.HTTPError(f"status code: {res.status_code}")
+    return res.text
+
+
+def fetch_rapla_page(url: str) -> str:
+    '''
+    - ``url``: str: rapla url
+    - return: str: html of the page, the last page if rapla answers 304 Not Modified (conditional request)
+    - raises requests.HTTPError if the page could not be loaded
+    '''
+    return CONDITIONAL_CACHE.get(functools.partial(RESILIENCE.send, requests.get), url, _page_text, timeout=DEFAULT_TIMEOUT)
 
 
 
@@ -14,17 +40,30 @@ def create_calendar_from_rapla(url:str, cal:Calendar=Calendar()):
     - ``url``: str: rapla url
     - return: Calendar: Calendar object with all lectures sorted by ``datetime_start`` (ascending)
     '''
-    seps_empty = ["week_smallseparatorcell", "week_emptycell", "week_separatorcell"]
-    seps_block_head = ["week_smallseparatorcell", "week_block", "week_separatorcell"]
-    seps_block_tail = ["week_smallseparatorcell", "week_separatorcell", "week_smallseparatorcell"]
     year = url.split("year=")[1].split("&")[0] if "year=" in url else str(datetime.datetime.now().year)
     
     logger.info(f"Fetching data from URL: {url}")
-    res = requests.get(url)
-    if res.status_code != 200:
-        logger.error(f"Failed to fetch data from URL: {url} with status code: {res.status_code}")
+    try:
+        page = cached_fetch(f"rapla:{url}", lambda: fetch_rapla_page(url), RAPLA_CACHE_TTL)
+    except requests.HTTPError as e:
+        logger.error(f"Failed to fetch data from URL: {url} with {e}")
         return None
-    soup = BeautifulSoup(res.text, 'html.parser')
+    cal.add_appointments(list(_parse_lectures(page, year)))
+    return cal
+
+
+@functools.lru_cache(maxsize=PARSED_PAGES_MAX)
+def _parse_lectures(page: str, year: str) -> tuple:
+    '''
+    - ``page``: str: html of a rapla page
+    - ``year``: str: year of the dates on the page
+    - return: tuple: lectures of the page in page order
+    '''
+    seps_empty = ["week_smallseparatorcell", "week_emptycell", "week_separatorcell"]
+    seps_block_head = ["week_smallseparatorcell", "week_block", "week_separatorcell"]
+    seps_block_tail = ["week_smallseparatorcell", "week_separatorcell", "week_smallseparatorcell"]
+    soup = BeautifulSoup(page, 'html.parser')
+    lectures = []
 
     
     # Wochenübersichten
@@ -72,7 +111,7 @@ def create_calendar_from_rapla(url:str, cal:Calendar=Calendar()):
                                           color=color, 
                                           lecturer=lecturer, 
                                           room=room)
-                        cal.add_appointments([lecture])
+                        lectures.append(lecture)
                         logger.info(f"Added lecture: {lecture}")
                         td_index += 3
                     elif classes == seps_block_tail:
@@ -80,7 +119,7 @@ def create_calendar_from_rapla(url:str, cal:Calendar=Calendar()):
                         td_index += 2  # dont skip over last td cause its already from the next day
                 except Exception as e:
                     logger.error(f"Error processing table row: {e}")
-    return cal
+    return tuple(lectures)
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, Optional, TypeVar
+from loguru import logger
+
+T = TypeVar("T")
+
+# Workers of the cancellable calls. An abandoned call keeps its worker until it returns (at most the timeout of its
+# request), so there are more workers than calls that run at the same time.
+DEFAULT_WORKERS = 8
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _cancellable_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DEFAULT_WORKERS, thread_name_prefix="cancellable-call")
+    return _executor
+
+
+class OperationCancelled(BaseException):
+    """
+    Raised when the cancellation token of the running operation was cancelled.
+
+    Derives from BaseException (like asyncio.CancelledError), so the `except Exception` blocks in the
+    states and API clients do not swallow a user interrupt.
+    """
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation token.
+
+    The state machine creates one token per entered state. Blocking work checks the token (or registers a
+    callback to abort e.g. the audio output) and raises OperationCancelled once it was cancelled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: Optional[str] = None):
+        """
+        Cancels the token and runs the registered callbacks (once).
+
+        :param reason: Optional reason, used for logging.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        logger.info(f"Operation cancelled: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in cancellation callback: {e}")
+
+    def raise_if_cancelled(self):
+        """
+        :raises OperationCancelled: If the token was cancelled.
+        """
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the token is cancelled or the timeout expires (interruptible replacement for time.sleep).
+
+        :return: True if the token was cancelled.
+        """
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]):
+        """
+        Registers a function that is called when the token is cancelled (immediately if it already was).
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Runs a blocking call that cannot be interrupted itself (HTTP request, LLM call) on a shared worker pool
+        and returns as soon as the call is done or the token is cancelled. A cancelled call that has not started
+        yet does not run, one that is running is abandoned and its result is discarded.
+
+        :raises OperationCancelled: If the token is cancelled before the call is done.
+        """
+        self.raise_if_cancelled()
+        # Set by the worker when the call is done or by the token when it is cancelled
+        wake_up = threading.Event()
+        outcome = {}
+
+        def target():
+            # Nested cancellable calls run directly in this worker, it is abandoned as a whole
+            _current_token.set(None)
+            try:
+                outcome["result"] = func(*args, **kwargs)
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                outcome["done"] = True
+                wake_up.set()
+
+        self.add_callback(wake_up.set)
+        context = contextvars.copy_context()
+        future = _cancellable_executor().submit(context.run, target)
+        try:
+            wake_up.wait()
+        finally:
+            self.remove_callback(wake_up.set)
+
+        if not outcome.get("done"):
+            future.cancel()
+            raise OperationCancelled(self.reason)
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+
+_current_token: contextvars.ContextVar = contextvars.ContextVar("cancellation_token", default=None)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """
+    :return: Token of the operation running in the current context (thread or task), None if there is none.
+    """
+    return _current_token.get()
+
+
+def set_current_token(token: Optional[CancellationToken]):
+    """
+    Sets the token of the operation running in the current context. Worker threads started with
+    asyncio.to_thread and tasks of the async state runtime inherit it.
+    """
+    _current_token.set(token)
+
+
+def run_cancellable(func: Callable[..., T], *args, token: Optional[CancellationToken] = None, **kwargs) -> T:
+    """
+    Runs a blocking call so it can be interrupted with the given (or the current) token.
+    Without a token the call runs directly in the calling thread.
+
+    :raises OperationCancelled: If the token is cancelled before the call is done.
+    """
+    token = token or current_token()
+    if token is None:
+        return func(*args, **kwargs)
+    return token.run(func, *args, **kwargs)
+
+
+async def await_cancellable(awaitable: Awaitable[T], token: Optional[CancellationToken] = None) -> T:
+    """
+    Awaits a coroutine (or future) so it can be interrupted with the given (or the current) token, the async
+    counterpart of run_cancellable. A cancelled token cancels the task of the awaitable, no worker thread is used.
+
+    :raises OperationCancelled: If the token is cancelled before the awaitable is done.
+    """
+    token = token or current_token()
+    if token is None:
+        return await awaitable
+    if token.cancelled:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise OperationCancelled(token.reason)
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(awaitable)
+
+    def cancel():
+        # Called by the thread that cancels the token
+        loop.call_soon_threadsafe(task.cancel)
+
+    token.add_callback(cancel)
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if token.cancelled:
+            raise OperationCancelled(token.reason) from None
+        raise
+    finally:
+        token.remove_callback(cancel)
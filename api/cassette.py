@@ -0,0 +1,252 @@
+import asyncio
+import base64
+import contextlib
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from loguru import logger
+from api.response_cache import CREDENTIAL_PARAMS
+
+RECORD = "record"
+REPLAY = "replay"
+# Replay latency: wait as long as the recorded request took
+RECORDED_LATENCY = "recorded"
+
+# Response headers that are not stored: cookies, and headers that describe the encoding of the original transfer
+# (the body is stored decoded)
+_DROPPED_HEADERS = frozenset({"set-cookie", "content-encoding", "content-length", "transfer-encoding", "connection"})
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """
+    Raised in replay mode for a request that is not on the cassette. Derives from ConnectionError, so the clients
+    handle it like an unreachable host.
+    """
+
+    def __init__(self, method: str, url: str):
+        super().__init__(f"No recorded response for {method} {url}")
+        self.method = method
+        self.url = url
+
+
+def normalize_url(url: str) -> str:
+    """
+    :return: The URL with sorted query parameters and without credentials, so recordings can be replayed with
+        other keys.
+    """
+    parts = urlsplit(url)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key not in CREDENTIAL_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _body_hash(body: Union[bytes, str, None]) -> str:
+    if not body:
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha1(body).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded HTTP responses in a gzip compressed JSON file. Requests are matched by method, URL (see normalize_url)
+    and a hash of the body, with the URL alone as fallback (e.g. a token refresh with another refresh token).
+    Identical requests get their recorded responses in the recorded order, the last one is repeated.
+    Request headers and bodies are not stored.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, latency: Union[str, float] = RECORDED_LATENCY):
+        """
+        :param path: Cassette file, e.g. "benchmarks/cassettes/morning.json.gz".
+        :param mode: RECORD to send the requests and store the responses, REPLAY to serve the stored responses.
+        :param latency: Replay delay: RECORDED_LATENCY for the recorded duration or a fixed number of seconds.
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.interactions = []
+        self._by_request: Dict[tuple, deque] = defaultdict(deque)
+        self._by_url: Dict[tuple, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        if mode == REPLAY:
+            self.load()
+
+    def load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            self.interactions = json.load(f)["interactions"]
+        for interaction in self.interactions:
+            request = interaction["request"]
+            self._by_request[(request["method"], request["url"], request["body"])].append(interaction)
+            self._by_url[(request["method"], request["url"])].append(interaction)
+        logger.info(f"Replaying {len(self.interactions)} recorded responses from {self.path}")
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            interactions = list(self.interactions)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump({"version": 1, "interactions": interactions}, f)
+        logger.info(f"Recorded {len(interactions)} responses to {self.path}")
+
+    def record(self, method: str, url: str, body, status: int, headers, content: bytes, elapsed: float):
+        """
+        Stores a response.
+
+        :param elapsed: Seconds the request took incl. the transfer of the body.
+        """
+        interaction = {
+            "request": {"method": method.upper(), "url": normalize_url(url), "body": _body_hash(body)},
+            "response": {
+                "status": status,
+                "headers": {key: value for key, value in headers.items() if key.lower() not in _DROPPED_HEADERS},
+                "body": base64.b64encode(content).decode("ascii"),
+                "elapsed": elapsed,
+            },
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def play(self, method: str, url: str, body) -> dict:
+        """
+        :return: The recorded response of the request (status, headers, body as bytes, elapsed).
+        :raises CassetteMiss: If the request was not recorded.
+        """
+        method, url = method.upper(), normalize_url(url)
+        with self._lock:
+            queue = self._by_request.get((method, url, _body_hash(body))) or self._by_url.get((method, url))
+            if not queue:
+                raise CassetteMiss(method, url)
+            interaction = queue.popleft() if len(queue) > 1 else queue[0]
+        response = dict(interaction["response"])
+        response["body"] = base64.b64decode(response["body"])
+        return response
+
+    def delay(self, response: dict) -> float:
+        """
+        :return: Seconds the replayed response is delayed.
+        """
+        if self.latency == RECORDED_LATENCY:
+            return response["elapsed"]
+        return float(self.latency or 0)
+
+
+# Cassette of the running recording or replay, the transports of requests and httpx are patched while it is set
+_active: Optional[Cassette] = None
+_install_lock = threading.Lock()
+_original_requests_send = HTTPAdapter.send
+_original_httpx_send = httpx.HTTPTransport.handle_request
+_original_httpx_send_async = httpx.AsyncHTTPTransport.handle_async_request
+
+
+def _requests_send(adapter, request, **kwargs):
+    cassette = _active
+    if cassette is None:
+        return _original_requests_send(adapter, request, **kwargs)
+    if cassette.mode == RECORD:
+        start = time.perf_counter()
+        response = _original_requests_send(adapter, request, **kwargs)
+        content = response.content
+        cassette.record(request.method, request.url, request.body, response.status_code, response.headers, content,
+                        time.perf_counter() - start)
+        return response
+
+    recorded = cassette.play(request.method, request.url, request.body)
+    time.sleep(cassette.delay(recorded))
+    response = requests.Response()
+    response.status_code = recorded["status"]
+    response.headers = CaseInsensitiveDict(recorded["headers"])
+    response._content = recorded["body"]
+    response._content_consumed = True
+    response.url = request.url
+    response.request = request
+    response.reason = "Replayed"
+    response.elapsed = datetime.timedelta(seconds=recorded["elapsed"])
+    response.connection = adapter
+    return response
+
+
+def _httpx_response(request: httpx.Request, recorded: dict) -> httpx.Response:
+    return httpx.Response(recorded["status"], headers=recorded["headers"], content=recorded["body"], request=request)
+
+
+def _httpx_send(transport, request: httpx.Request) -> httpx.Response:
+    cassette = _active
+    if cassette is None:
+        return _original_httpx_send(transport, request)
+    if cassette.mode == RECORD:
+        start = time.perf_counter()
+        response = _original_httpx_send(transport, request)
+        content = response.read()
+        cassette.record(request.method, str(request.url), request.read(), response.status_code, response.headers,
+                        content, time.perf_counter() - start)
+        return httpx.Response(response.status_code, headers=response.headers, content=content, request=request)
+
+    recorded = cassette.play(request.method, str(request.url), request.read())
+    time.sleep(cassette.delay(recorded))
+    return _httpx_response(request, recorded)
+
+
+async def _httpx_send_async(transport, request: httpx.Request) -> httpx.Response:
+    cassette = _active
+    if cassette is None:
+        return await _original_httpx_send_async(transport, request)
+    if cassette.mode == RECORD:
+        start = time.perf_counter()
+        response = await _original_httpx_send_async(transport, request)
+        content = await response.aread()
+        cassette.record(request.method, str(request.url), await request.aread(), response.status_code,
+                        response.headers, content, time.perf_counter() - start)
+        return httpx.Response(response.status_code, headers=response.headers, content=content, request=request)
+
+    recorded = cassette.play(request.method, str(request.url), await request.aread())
+    await asyncio.sleep(cassette.delay(recorded))
+    return _httpx_response(request, recorded)
+
+
+@contextlib.contextmanager
+def use_cassette(path: str, mode: str = REPLAY, latency: Union[str, float] = RECORDED_LATENCY):
+    """
+    Records or replays all HTTP requests sent in the block: the API clients, get_trips, the NewsAPI client, the
+    Rapla and clever-tanken scrapers (requests) as well as Ollama and the async clients (httpx).
+    In replay mode no request leaves the machine, unknown requests raise CassetteMiss. The recording is saved when
+    the block is left.
+
+    :param path: Cassette file (gzip compressed JSON).
+    :param mode: RECORD or REPLAY.
+    :param latency: Replay delay, RECORDED_LATENCY or a fixed number of seconds (0 to replay as fast as possible).
+    :return: The cassette.
+    """
+    global _active
+    cassette = Cassette(path, mode, latency)
+    with _install_lock:
+        if _active is not None:
+            raise RuntimeError(f"Cassette {_active.path} is already in use")
+        _active = cassette
+        HTTPAdapter.send = _requests_send
+        httpx.HTTPTransport.handle_request = _httpx_send
+        httpx.AsyncHTTPTransport.handle_async_request = _httpx_send_async
+    try:
+        yield cassette
+    finally:
+        with _install_lock:
+            HTTPAdapter.send = _original_requests_send
+            httpx.HTTPTransport.handle_request = _original_httpx_send
+            httpx.AsyncHTTPTransport.handle_async_request = _original_httpx_send_async
+            _active = None
+        if mode == RECORD:
+            cassette.save()
@@ -0,0 +1,149 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import httpx
+import requests
+
+# Number of responses whose validators (and parsed value) are kept
+DEFAULT_MAX_ENTRIES = 256
+
+
+class _Validated:
+    """
+    Validators of a response (ETag / Last-Modified) and the value parsed from it.
+    """
+
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], value: Any):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.value = value
+
+
+class ConditionalGetCache:
+    """
+    Remembers the validators of responses to send conditional requests (If-None-Match / If-Modified-Since).
+    If the server answers 304 Not Modified, the value parsed from the last full response is returned, so
+    neither the body is transferred nor parsed again.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        :param max_entries: Number of entries after which the least recently used one is dropped.
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, _Validated]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.modified = 0
+
+    def request_headers(self, key: Hashable) -> Dict[str, str]:
+        """
+        :return: Conditional request headers for the stored validators of the key (empty if there are none).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def get(self, send: Callable[..., requests.Response], url: str, parse: Callable[[requests.Response], Any],
+            key: Optional[Hashable] = None, headers: Optional[Dict[str, str]] = None, **kwargs):
+        """
+        Sends a conditional GET request.
+
+        :param send: Function sending the request, e.g. requests.get or session.get.
+        :param url: URL of the request.
+        :param parse: Turns a full response into the value (may raise, e.g. for an error status).
+        :param key: Key of the validators, defaults to the URL (use a key with the params if they are passed separately).
+        :param headers: Headers of the request, the conditional headers are added.
+        :return: The parsed value, the stored value if the server answered 304 Not Modified.
+        """
+        key = url if key is None else key
+        conditional_headers = self.request_headers(key)
+        request_headers = {**(headers or {}), **conditional_headers} if conditional_headers else headers
+        response = self._send(send, url, request_headers, **kwargs)
+
+        if response.status_code == 304:
+            entry = self._not_modified(key)
+            if entry is not None:
+                return entry.value
+            if conditional_headers:
+                # The entry was dropped after the validators were sent, the full response is needed
+                response = self._send(send, url, headers, **kwargs)
+        return self._parsed(key, response, parse)
+
+    async def get_async(self, send: Callable[..., Awaitable[httpx.Response]], url: str,
+                        parse: Callable[[httpx.Response], Any], key: Optional[Hashable] = None,
+                        headers: Optional[Dict[str, str]] = None, **kwargs):
+        """
+        Coroutine variant of `get` for the async API clients.
+
+        :param send: Coroutine function sending the request, e.g. client.get of an httpx.AsyncClient.
+        """
+        key = url if key is None else key
+        conditional_headers = self.request_headers(key)
+        request_headers = {**(headers or {}), **conditional_headers} if conditional_headers else headers
+        response = await self._send(send, url, request_headers, **kwargs)
+
+        if response.status_code == 304:
+            entry = self._not_modified(key)
+            if entry is not None:
+                return entry.value
+            if conditional_headers:
+                # The entry was dropped after the validators were sent, the full response is needed
+                response = await self._send(send, url, headers, **kwargs)
+        return self._parsed(key, response, parse)
+
+    def _not_modified(self, key: Hashable) -> Optional[_Validated]:
+        # Entry whose value is returned for a 304 response, None if it was dropped
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.not_modified += 1
+            return entry
+
+    def _parsed(self, key: Hashable, response, parse: Callable[[Any], Any]):
+        value = parse(response)
+        self.modified += 1
+        if value is not None:
+            self.store(key, response, value)
+        return value
+
+    @staticmethod
+    def _send(send: Callable[..., requests.Response], url: str, headers: Optional[Dict[str, str]], **kwargs):
+        return send(url, headers=headers, **kwargs) if headers is not None else send(url, **kwargs)
+
+    def store(self, key: Hashable, response: requests.Response, value: Any):
+        """
+        Stores the validators of a successful response with the value parsed from it.
+        Responses without validators are not stored.
+        """
+        if response.status_code != 200:
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            if etag is None and last_modified is None:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = _Validated(etag, last_modified, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.not_modified = self.modified = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Validators shared by the API clients and the scrapers
+CONDITIONAL_CACHE = ConditionalGetCache()
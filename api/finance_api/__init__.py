@@ -1 +1 @@
-from .main import FinanceAPI, Interval
\ No newline at end of file
+from .main import FinanceAPI, AsyncFinanceAPI, Interval
\ No newline at end of file
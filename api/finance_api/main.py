@@ -1,5 +1,8 @@
-from typing import Dict
+from typing import Dict, Optional
+import httpx
 from api.api_client import APIClient
+from api.async_api_client import AsyncAPIClient
+from api.rate_limiter import RateLimitExceeded
 from enum import Enum
     
 class Interval(Enum):
@@ -24,21 +27,35 @@ class FinanceAPI(APIClient):
     """
     API client for accessing financial data from Alpha Vantage.
     """
-    _instance = None
+    BASE_URL = 'https://www.alphavantage.co'
+    # One instance per base URL, like WeatherAPI
+    _instances = {}
+    # Seconds the responses are cached per Alpha Vantage function (all requests go to the same endpoint)
+    cache_ttls_by_function = {
+        'TIME_SERIES_INTRADAY': 60,
+        'GLOBAL_QUOTE': 60,
+        'TIME_SERIES_DAILY': 60 * 60,
+        'MARKET_STATUS': 5 * 60,
+        'TOP_GAINERS_LOSERS': 15 * 60,
+        'SYMBOL_SEARCH': 24 * 60 * 60,
+        'OVERVIEW': 7 * 24 * 60 * 60,
+    }
 
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super(FinanceAPI, cls).__new__(cls)
-        return cls._instance
+        base_url = kwargs.get('base_url', cls.BASE_URL)
+        if base_url not in cls._instances:
+            cls._instances[base_url] = super(FinanceAPI, cls).__new__(cls)
+        return cls._instances[base_url]
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = BASE_URL):
         """
         Initializes the AlphaVantageAPI client with the provided API key.
 
         :param api_key: Alpha Vantage API key.
+        :param base_url: Base URL of Alpha Vantage (or of a stand-in server).
         """
         if not hasattr(self, 'initialized'):  # Ensure __init__ is only called once
-            super().__init__('https://www.alphavantage.co')
+            super().__init__(base_url)
             self.api_key = api_key
             self.initialized = True
 
@@ -49,6 +66,29 @@ class FinanceAPI(APIClient):
         """
         pass  # Authentication handled via API key in parameters
 
+    def cache_ttl(self, endpoint: str, params: Optional[Dict] = None) -> Optional[float]:
+        """
+        Looks up the cache policy by the `function` parameter of the request.
+        """
+        return self.cache_ttls_by_function.get((params or {}).get('function'))
+
+    def is_cacheable(self, data) -> bool:
+        """
+        Alpha Vantage reports exceeded limits and invalid calls with status 200, these responses are not cached.
+        """
+        return isinstance(data, dict) and not any(key in data for key in ('Note', 'Information', 'Error Message'))
+
+    def check_quota(self, data):
+        """
+        Alpha Vantage answers with status 200 and a "Note" or "Information" message once the daily limit is reached.
+
+        :raises RateLimitExceeded: If the response is such a message, the rate limit of the client is emptied.
+        """
+        if isinstance(data, dict) and ('Note' in data or 'rate limit' in str(data.get('Information', ''))):
+            if self.rate_limit is not None:
+                self.rate_limit.exhaust()
+            raise RateLimitExceeded('finance')
+
     def get_stock_intraday(self, symbol: str, interval: Interval) -> Dict[str, any]:
         """
         Retrieves stock data for the specified symbol.
@@ -145,4 +185,37 @@ class FinanceAPI(APIClient):
             'symbol': symbol,
             'apikey': self.api_key
         }
-        return self.get('query', params=params)
\ No newline at end of file
+        return self.get('query', params=params)
+
+
+class AsyncFinanceAPI(AsyncAPIClient):
+    """
+    Async client for Alpha Vantage on the shared httpx client (see api.async_api_client).
+
+    The query methods of FinanceAPI only build the params and return `self.get(...)`, which on this client is a
+    coroutine, so they are reused as they are and have to be awaited.
+    """
+    cache_ttls_by_function = FinanceAPI.cache_ttls_by_function
+    cache_ttl = FinanceAPI.cache_ttl
+    is_cacheable = FinanceAPI.is_cacheable
+    check_quota = FinanceAPI.check_quota
+
+    get_stock_intraday = FinanceAPI.get_stock_intraday
+    get_stock_daily = FinanceAPI.get_stock_daily
+    get_stock_latest = FinanceAPI.get_stock_latest
+    search_symbols = FinanceAPI.search_symbols
+    get_market_status = FinanceAPI.get_market_status
+    get_top_gainers_losers = FinanceAPI.get_top_gainers_losers
+    company_overview = FinanceAPI.company_overview
+
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None, base_url: str = FinanceAPI.BASE_URL):
+        """
+        :param api_key: Alpha Vantage API key.
+        :param client: httpx client, defaults to the shared client of the running event loop.
+        :param base_url: Base URL of Alpha Vantage (or of a stand-in server).
+        """
+        super().__init__(base_url, client=client)
+        self.api_key = api_key
+
+    def authenticate(self):
+        pass  # Authentication handled via API key in parameters
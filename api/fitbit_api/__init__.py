@@ -1 +1 @@
-from .main import FitbitAPI
\ No newline at end of file
+from .main import FitbitAPI, AsyncFitbitAPI
\ No newline at end of file
@@ -20,21 +20,23 @@ class FitbitAuth:
     TOKEN_URL = "https://api.fitbit.com/oauth2/token"
     SCOPE = ["profile", "heartrate", "activity", "sleep", "weight", "location"]
     REDIRECT_URI = "https://127.0.0.1:8080"
+    TOKEN_FILE = os.path.join(os.path.dirname(__file__), "fitbit_tokens.json")
 
-    def __init__(self, client_id: str, client_secret: str):
+    def __init__(self, client_id: str, client_secret: str, base_url: str = None):
         """
         Initializes the FitbitAuth instance and loads any previously saved tokens from file.
 
+        :param base_url: Base URL of the Fitbit API (e.g. of a stand-in server) the tokens are refreshed at,
+            defaults to TOKEN_URL.
         :return: None
         """
+        if base_url is not None:
+            self.TOKEN_URL = f"{base_url}/oauth2/token"
         self.client_id = client_id
         self.client_secret = client_secret
         self.access_token = None
         self.refresh_token = None
         self.expires_at = None
-        self.TOKEN_FILE = os.path.join(
-            os.path.dirname(__file__), "fitbit_tokens.json"
-        )  
         self.load_tokens()
 
     def save_tokens(self, tokens):
@@ -1,6 +1,10 @@
+import asyncio
+from typing import Optional
+import httpx
 import requests
 from api.fitbit_api.fitbit_auth import FitbitAuth  
 from api.api_client import APIClient
+from api.async_api_client import AsyncAPIClient
 
 class FitbitAPI(APIClient):
     """
@@ -11,16 +15,24 @@ class FitbitAPI(APIClient):
     API_URL_STEPS = '1/user/-/activities/steps/date/{}/1d/1min.json'
     API_URL_SLEEP = '1.2/user/-/sleep/date/{}.json'
 
-    def __init__(self, client_id: str, client_secret: str):
+    # The intraday data of the current day grows every few minutes, the sleep data only once a day
+    cache_ttls = {
+        '1/user/-/activities': 5 * 60,
+        '1.2/user/-/sleep': 30 * 60,
+    }
+
+    BASE_URL = "https://api.fitbit.com"
+
+    def __init__(self, client_id: str, client_secret: str, base_url: str = BASE_URL):
         """
         Initializes the FitbitAPI client with the provided credentials.
         :param client_id: Fitbit API Client ID.
         :param client_secret: Fitbit API Client Secret.
+        :param base_url: Base URL of the Fitbit API (or of a stand-in server).
         """
         self.client_id=client_id
         self.client_secret=client_secret
-        self.auth = FitbitAuth(self.client_id, self.client_secret)
-        base_url = "https://api.fitbit.com"
+        self.auth = FitbitAuth(self.client_id, self.client_secret, base_url)
         super().__init__(base_url) 
 
     def authenticate(self):
@@ -55,4 +67,57 @@ class FitbitAPI(APIClient):
         :return: JSON response with detailed sleep data for the specified day.
         """
         self.authenticate()
-        return self.get(self.API_URL_SLEEP.format(date))
\ No newline at end of file
+        return self.get(self.API_URL_SLEEP.format(date))
+
+
+class AsyncFitbitAPI(AsyncAPIClient):
+    """
+    Async client for Fitbit on the shared httpx client (see api.async_api_client).
+    """
+    API_URL_HEART = FitbitAPI.API_URL_HEART
+    API_URL_STEPS = FitbitAPI.API_URL_STEPS
+    API_URL_SLEEP = FitbitAPI.API_URL_SLEEP
+    cache_ttls = FitbitAPI.cache_ttls
+
+    def __init__(self, client_id: str, client_secret: str, client: Optional[httpx.AsyncClient] = None,
+                 base_url: str = FitbitAPI.BASE_URL):
+        """
+        :param client_id: Fitbit API Client ID.
+        :param client_secret: Fitbit API Client Secret.
+        :param client: httpx client, defaults to the shared client of the running event loop.
+        :param base_url: Base URL of the Fitbit API (or of a stand-in server).
+        """
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.auth = FitbitAuth(self.client_id, self.client_secret, base_url)
+        super().__init__(base_url, client=client)
+
+    def authenticate(self):
+        """
+        Updates headers with the current access token.
+        """
+        access_token = self.auth.get_access_token()
+        self.headers.update({'Authorization': f'Bearer {access_token}'})
+
+    async def _get_authenticated(self, endpoint: str) -> dict:
+        # Refreshing the token is a blocking request, it runs in a worker thread
+        await asyncio.to_thread(self.authenticate)
+        return await self.get(endpoint)
+
+    async def get_heart_data(self, date: str) -> dict:
+        """
+        Retrieves heart rate data for a specific date ('YYYY-MM-DD').
+        """
+        return await self._get_authenticated(self.API_URL_HEART.format(date))
+
+    async def get_steps_data(self, date: str) -> dict:
+        """
+        Retrieves step count data for a specific date ('YYYY-MM-DD').
+        """
+        return await self._get_authenticated(self.API_URL_STEPS.format(date))
+
+    async def get_sleep_data(self, date: str) -> dict:
+        """
+        Retrieves sleep data for a specific date ('YYYY-MM-DD').
+        """
+        return await self._get_authenticated(self.API_URL_SLEEP.format(date))
@@ -0,0 +1,49 @@
+import json
+from typing import Any, Callable, Dict, Optional, Union
+import requests
+
+try:
+    import orjson
+except ImportError:  # optional, the standard library decoder is used without it
+    orjson = None
+
+# Fields of a response that are kept: a dict of key -> fields of the value (None keeps the whole value).
+# Lists are selected item by item, so {'list': {'dt_txt': None}} keeps the dt_txt of every forecast entry.
+Fields = Dict[str, Optional["Fields"]]
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """
+    Decodes a JSON document with orjson if it is installed (several times faster for large payloads like the
+    Fitbit intraday data or VVS trips), with the json module otherwise.
+
+    :raises json.JSONDecodeError: If the document is invalid (orjson.JSONDecodeError derives from it).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_response(response: requests.Response, decode: Callable[[bytes], Any] = loads) -> Any:
+    """
+    Decodes the raw JSON body of a response with the given decoder, as UTF-8 (the encoding of JSON).
+    """
+    return decode(response.content)
+
+
+def select(data: Any, fields: Optional[Fields]) -> Any:
+    """
+    Builds a copy of the decoded response with only the given fields, so large responses that are cached or
+    turned into objects only keep what their callers use. Missing keys are skipped.
+
+    :param data: Decoded JSON response.
+    :param fields: Fields to keep (see Fields), None keeps everything.
+    :return: The selected fields.
+    """
+    if fields is None:
+        return data
+    if isinstance(data, list):
+        return [select(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: select(data[key], sub_fields) for key, sub_fields in fields.items() if key in data}
@@ -1,5 +1,6 @@
 import ollama
 from loguru import logger
+from api.metrics import LLM_REQUEST_SECONDS
 
 class LLMApi:
     """This class acts as API to chat with API-models. It uses ollama's REST-API.
@@ -12,6 +13,17 @@ class LLMApi:
     This command also attaches a volume to the container so your downloaded models are not lost on shutdown.
     """
 
+    # Address of a local ollama instance, as used by the ollama module
+    DEFAULT_HOST = "http://127.0.0.1:11434"
+
+    def __init__(self, host: str = None):
+        """
+        Args:
+            host (str): URL of the ollama instance (e.g. of a stand-in server), defaults to the local instance
+                (or OLLAMA_HOST) used by the ollama module
+        """
+        self._ollama = ollama.Client(host=host) if host else ollama
+
     def add_model(self, model: str):
         """Adds a model to the list of available models in ollama.
         The model will be downloaded (be wary of long downloads!).
@@ -21,7 +33,7 @@ class LLMApi:
         Args:
             model (str): name of the model as string (check ollama website for correct nomenclature)
         """
-        ollama.pull(model)
+        self._ollama.pull(model)
 
     def remove_model(self, model: str):
         """Removes a model from the list of available models in ollama.
@@ -32,7 +44,7 @@ class LLMApi:
         Args:
             model (str): name of the model as string (check ollama website for correct nomenclature)
         """
-        ollama.delete(model)
+        self._ollama.delete(model)
 
     def list_available_models(self):
         """Returns a list of all available models in your ollama container.
@@ -53,7 +65,7 @@ class LLMApi:
                     - 'parameter_size' (str): Number of parameters, e.g., '1.2B'.
                     - 'quantization_level' (str): Quantization level applied to the model, e.g., 'Q8_0'.
         """
-        return ollama.list()
+        return self._ollama.list()
 
     def get_response(self, model: str, message_content: str):
         """Send a message to ollama and get the response.
@@ -66,7 +78,8 @@ class LLMApi:
             str: only the parsed answer gets returned as a string
         """
         logger.info(f"Sending Prompt: {message_content}")
-        response = ollama.chat(
-            model=model, messages=[{"role": "user", "content": message_content}]
-        )
+        with LLM_REQUEST_SECONDS.time(model):
+            response = self._ollama.chat(
+                model=model, messages=[{"role": "user", "content": message_content}]
+            )
         return response["message"]["content"]
@@ -0,0 +1,399 @@
+import bisect
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from loguru import logger
+
+# Upper bounds of the histogram buckets in seconds (from a cached response up to a long LLM summary)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _HistogramChild:
+    """
+    Histogram of one label combination. Observing a value is a bisect and an increment under a lock.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # Last slot counts the values above the largest bucket
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """
+        Context manager that observes the duration of the block (also if it raises).
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def collect(self) -> Tuple[List[int], float]:
+        """
+        :return: Cumulative bucket counts (incl. +Inf) and the sum of all observed values.
+        """
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a quantile (e.g. 0.95 for the p95 latency) as the upper bound of the bucket it falls into.
+
+        :return: The estimate in seconds, None if nothing was observed or it lies above the largest bucket.
+        """
+        cumulative, _ = self.collect()
+        if not cumulative[-1]:
+            return None
+        index = bisect.bisect_left(cumulative, q * cumulative[-1])
+        return self._buckets[index] if index < len(self._buckets) else None
+
+
+class Histogram:
+    """
+    Latency histogram with labels, exported in the Prometheus text format.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        :param name: Metric name, e.g. "api_request_seconds".
+        :param documentation: Help text of the metric.
+        :param label_names: Names of the labels, values are passed to `labels` in the same order.
+        :param buckets: Sorted upper bounds of the buckets in seconds.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], _HistogramChild] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *label_values) -> _HistogramChild:
+        """
+        :return: The histogram of the given label values (created on first use).
+        """
+        key = tuple(str(value) for value in label_values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value: float, *label_values):
+        self.labels(*label_values).observe(value)
+
+    def time(self, *label_values):
+        return self.labels(*label_values).time()
+
+    def samples(self):
+        """
+        :return: List of (label dict, cumulative bucket counts, sum) per label combination.
+        """
+        with self._lock:
+            children = list(self._children.items())
+        return [(dict(zip(self.label_names, key)), *child.collect()) for key, child in children]
+
+
+class Counter:
+    """
+    Monotonic counter with labels (e.g. the number of coalesced requests), exported in the Prometheus text format.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        """
+        :param name: Metric name, e.g. "api_coalesced_requests_total".
+        :param documentation: Help text of the metric.
+        :param label_names: Names of the labels, values are passed to `inc` in the same order.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        key = tuple(str(value) for value in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values) -> float:
+        """
+        :return: Current value of the given label values (0 if they were never counted).
+        """
+        return self._values.get(tuple(str(value) for value in label_values), 0)
+
+    def samples(self):
+        """
+        :return: List of (label dict, value) per label combination.
+        """
+        with self._lock:
+            values = list(self._values.items())
+        return [(dict(zip(self.label_names, key)), value) for key, value in values]
+
+
+class MetricsRegistry:
+    """
+    Collection of histograms and counters that are exported together.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Histogram, Counter]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Returns the histogram with the given name and creates it if necessary.
+        """
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, label_names, buckets)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """
+        Returns the counter with the given name and creates it if necessary.
+        """
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, documentation, label_names)
+            return self._metrics[name]
+
+    def render_prometheus(self) -> str:
+        """
+        :return: All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            if isinstance(metric, Counter):
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} counter")
+                for labels, count in metric.samples():
+                    label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+                    lines.append(f"{metric.name}{{{label_text}}} {count}" if label_text else f"{metric.name} {count}")
+                continue
+            histogram = metric
+            lines.append(f"# HELP {histogram.name} {histogram.documentation}")
+            lines.append(f"# TYPE {histogram.name} histogram")
+            for labels, cumulative, total in histogram.samples():
+                label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+                prefix = label_text + "," if label_text else ""
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], cumulative):
+                    lines.append(f'{histogram.name}_bucket{{{prefix}le="{bound}"}} {count}')
+                suffix = "{" + label_text + "}" if label_text else ""
+                lines.append(f"{histogram.name}_sum{suffix} {total}")
+                lines.append(f"{histogram.name}_count{suffix} {cumulative[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        """
+        :return: All metrics as a JSON serializable dictionary.
+        """
+        result = {}
+        for metric in list(self._metrics.values()):
+            if isinstance(metric, Counter):
+                result[metric.name] = [{"labels": labels, "value": value} for labels, value in metric.samples()]
+                continue
+            histogram = metric
+            result[histogram.name] = [
+                {
+                    "labels": labels,
+                    "count": cumulative[-1],
+                    "sum": total,
+                    "buckets": dict(zip([str(bound) for bound in histogram.buckets] + ["+Inf"], cumulative)),
+                }
+                for labels, cumulative, total in histogram.samples()
+            ]
+        return result
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Registry and metrics used by the state machine and the API clients
+REGISTRY = MetricsRegistry()
+STATE_DISPATCH_SECONDS = REGISTRY.histogram(
+    "state_dispatch_seconds", "Time from the transition until the on_enter method of the state is called.", ["state"])
+STATE_ON_ENTER_SECONDS = REGISTRY.histogram(
+    "state_on_enter_seconds", "Duration of the on_enter method of a state.", ["state"])
+STATE_FIRST_SPEECH_SECONDS = REGISTRY.histogram(
+    "state_first_speech_seconds", "Time from entering a state until its first speech output starts.", ["state"])
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "api_request_seconds", "Duration of the HTTP requests of the API clients.", ["client", "method"])
+TTS_SECONDS = REGISTRY.histogram(
+    "tts_seconds", "Duration of the speech output and speech recognition.", ["operation"])
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_request_seconds", "Duration of the LLM requests.", ["model"])
+API_COALESCED_REQUESTS = REGISTRY.counter(
+    "api_coalesced_requests_total", "Requests that waited for an identical request in flight instead of sending their own.",
+    ["client"])
+
+
+def timed(histogram: Histogram, *label_values):
+    """
+    Decorator that observes the duration of every call of the function.
+    """
+    def decorator(func):
+        child = histogram.labels(*label_values)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class _StateSpan:
+    """
+    Remembers when the current state was entered, to measure the time until its first speech output.
+    """
+
+    def __init__(self):
+        self.state: Optional[str] = None
+        self.entered_at = 0.0
+        self.spoken = True
+
+    def begin(self, state: str):
+        self.state, self.entered_at, self.spoken = state, time.perf_counter(), False
+
+    def first_speech(self):
+        if not self.spoken:
+            self.spoken = True
+            STATE_FIRST_SPEECH_SECONDS.observe(time.perf_counter() - self.entered_at, self.state)
+
+
+_state_span = _StateSpan()
+
+
+def begin_state(state: str):
+    """
+    Marks the start of a state (called by the state machine).
+    """
+    _state_span.begin(state)
+
+
+def record_first_speech():
+    """
+    Records the time from entering the current state until now, once per state (called by the speech output).
+    """
+    _state_span.first_speech()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the log
+        pass
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint serving the metrics in the Prometheus text format at /metrics.
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = "127.0.0.1", port: int = 9464):
+        """
+        :param registry: Registry to export.
+        :param host: Interface to bind to, only the local machine by default.
+        :param port: Port to listen on, 0 picks a free port.
+        """
+        handler = type("MetricsRequestHandler", (_MetricsRequestHandler,), {"registry": registry})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True)
+        self.thread.start()
+        logger.info(f"Metrics endpoint listening on http://{self.server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JsonlMetricsWriter:
+    """
+    Appends a snapshot of all metrics to a JSONL file in a fixed interval.
+    """
+
+    def __init__(self, path: str, registry: MetricsRegistry = REGISTRY, interval: float = 60.0):
+        """
+        :param path: File to append to.
+        :param registry: Registry to write.
+        :param interval: Seconds between two snapshots.
+        """
+        self.path = path
+        self.registry = registry
+        self.interval = interval
+        self._stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def write(self):
+        """
+        Appends one snapshot.
+        """
+        line = json.dumps({"time": time.time(), "metrics": self.registry.snapshot()})
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                logger.error(f"Error writing metrics to {self.path}: {e}")
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the writer and writes a last snapshot.
+        """
+        self._stopped.set()
+        try:
+            self.write()
+        except OSError as e:
+            logger.error(f"Error writing metrics to {self.path}: {e}")
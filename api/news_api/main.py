@@ -1,48 +1,84 @@
 
+import functools
 import os
 from dotenv import load_dotenv
 from loguru import logger
 from newsapi.newsapi_client import NewsApiClient
+from api.api_client import DEFAULT_TIMEOUT
 from api.llm_api import LLMApi
+from api.cancellation import run_cancellable
+from api.conditional_get import CONDITIONAL_CACHE
+from api.persistent_cache import cached_fetch
+from api.resilience import RESILIENCE
+from api.service_redirect import with_base_url
 import html
 import requests
 import json
 
 
+class _BaseURLSession(requests.Session):
+    """
+    Session of the NewsApiClient, which has the URLs of newsapi.org built in, that sends its requests to another
+    base URL (e.g. of a stand-in server).
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, with_base_url(url, self.base_url), *args, **kwargs)
+
+
 class NewsAPI():
     """
     API client for accessing news articles using NewsAPI and summarizing them with an LLM model.
 
     Attributes:
-        _instance (NewsAPI): Singleton instance of the NewsAPI class.
+        _instances (dict): Instance of the NewsAPI class per base URL (Singleton pattern).
         client (NewsApiClient): The client to interact with the NewsAPI service.
         date (str): The date for filtering news articles (not currently used).
         headlines (list): List of top news headlines retrieved from the NewsAPI.
         llmclient (LLMApi): The LLM client for summarizing articles.
     """
-    _instance = None
+    BASE_URL = 'https://newsapi.org'
+    # Host of the article pages of the source
+    ARTICLES_URL = 'https://www.zeit.de'
+    _instances = {}
     client = None
     date = None
     headlines = None
     llmclient = LLMApi()
+    # Seconds the headlines and the article texts are cached (see api.persistent_cache), saves the daily quota
+    HEADLINES_CACHE_TTL = 30 * 60
+    ARTICLE_CACHE_TTL = 7 * 24 * 60 * 60
+    # Daily quota of NewsAPI, set by the APIFactory (see api.rate_limiter)
+    rate_limit = None
 
     def __new__(cls, *args, **kwargs):
         """
-        Ensures that only one instance of the NewsAPI client is created (Singleton pattern).
+        Ensures that only one instance of the NewsAPI client is created per base URL (Singleton pattern),
+        e.g. one for the real service and one for a stand-in server (see api.service_redirect).
 
         Returns:
             NewsAPI: The singleton instance of the NewsAPI class.
         """
-        if cls._instance is None:
-            cls._instance = super(NewsAPI, cls).__new__(cls)
+        base_url = kwargs.get('base_url', cls.BASE_URL)
+        if base_url not in cls._instances:
+            cls._instances[base_url] = super(NewsAPI, cls).__new__(cls)
             load_dotenv()  # Load environment variables from the .env file
-        return cls._instance
+        return cls._instances[base_url]
 
-    def __init__(self) -> None:
+    def __init__(self, base_url: str = BASE_URL, articles_base_url: str = None, llm_host: str = None) -> None:
         """
         Initializes the NewsAPI client, retrieves the API key from environment variables,
         and fetches the top headlines.
 
+        Args:
+            base_url (str): Base URL of NewsAPI (or of a stand-in server).
+            articles_base_url (str): Base URL the article pages are loaded from instead of their own host, if set.
+            llm_host (str): URL of the ollama instance that summarizes the articles, if not the local one.
+
         Raises:
             ValueError: If the API key is not found in the .env file.
         """
@@ -57,7 +93,11 @@ class NewsAPI():
             raise ValueError("API key not found. Please check your .env file.")
         
         # Initialize the NewsAPI client with the retrieved API key
-        self.client = NewsApiClient(api_key=api_key)
+        session = _BaseURLSession(base_url) if base_url != self.BASE_URL else None
+        self.client = NewsApiClient(api_key=api_key, session=session)
+        self.articles_base_url = articles_base_url
+        if llm_host is not None:
+            self.llmclient = LLMApi(llm_host)
         
         # Log that the instance was successfully initialized
         logger.info("NewsAPI instance initialized.")
@@ -71,7 +111,8 @@ class NewsAPI():
 
     def fetch_top_headlines(self):
         '''return and refresh the articles with the top headlines'''
-        response = self.client.get_top_headlines(language='de', sources=self.source)
+        response = cached_fetch(f"NewsAPI:top_headlines:{self.source}", self.load_top_headlines,
+                                self.HEADLINES_CACHE_TTL, is_valid=lambda data: data.get('status') == 'ok')
         if response['status'] == 'ok':
             self.articles = response['articles']
             for article in self.articles:
@@ -88,8 +129,24 @@ class NewsAPI():
 #        """
 #        return self.headlines
     
+    def load_top_headlines(self):
+        # Blocked by the rate limit, the persistent cache then serves the last stored headlines
+        if self.rate_limit is not None:
+            self.rate_limit.acquire()
+        return self.client.get_top_headlines(language='de', sources=self.source)
+
     def get_article(self, url: str):
-        article_response = requests.get(url)
+        return cached_fetch(f"NewsAPI:article:{url}", lambda: self.load_article(url), self.ARTICLE_CACHE_TTL,
+                            is_valid=lambda article: article is not None)
+
+    def load_article(self, url: str):
+        if self.articles_base_url is not None:
+            url = with_base_url(url, self.articles_base_url)
+        # Conditional request, the article text of the last response is reused on 304 Not Modified
+        return run_cancellable(CONDITIONAL_CACHE.get, functools.partial(RESILIENCE.send, requests.get), url,
+                               self.parse_article, timeout=DEFAULT_TIMEOUT)
+
+    def parse_article(self, article_response):
         if article_response.status_code != 200:
             print(f"Failed to retrieve article. Status code: {article_response.status_code}")
             return
@@ -113,7 +170,9 @@ class NewsAPI():
             str: The summarized version of the provided article content.
         """
         # Send the content to the LLM model to summarize the article
-        return self.llmclient.get_response(
+        # The LLM call takes seconds, it can be interrupted with the cancellation token of the running state
+        return run_cancellable(
+            self.llmclient.get_response,
             model="llama3.2:1b",
             message_content=f"Fasse diesn Artikel in 1-4 Sätzen auf deutsch zusammen. Verwende keine Sonderzeichen:\n{content}"
         )
\ No newline at end of file
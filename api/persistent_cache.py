@@ -0,0 +1,284 @@
+import asyncio
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+from loguru import logger
+
+# Directory for data that is kept between runs (the API cache), can be changed with the ASWE_DATA_DIR variable
+DATA_DIR = os.environ.get("ASWE_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "data"))
+DEFAULT_CACHE_PATH = os.path.join(DATA_DIR, "api_cache.sqlite3")
+# Seconds after its expiry an entry is still served (while it is refreshed in the background)
+DEFAULT_MAX_STALE = 24 * 60 * 60
+
+
+class CacheEntry:
+    """
+    Value stored in the persistent cache with the time it was stored and the time it expires (Unix time).
+    """
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def ttl_left(self) -> float:
+        """
+        :return: Seconds until the entry expires (0 if it already is stale).
+        """
+        return max(0.0, self.expires_at - time.time())
+
+
+class PersistentCache:
+    """
+    Cache of API responses in a SQLite database (WAL mode), so the last known data survives a restart.
+
+    Expired entries are served stale-while-revalidate: the stored value is returned immediately and refreshed in a
+    background thread. If a request fails (or returns e.g. a rate limit message), the last stored value is used.
+    Values have to be JSON serializable.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_stale: float = DEFAULT_MAX_STALE):
+        """
+        :param path: SQLite file, created with its directory on first use.
+        :param max_stale: Seconds after its expiry an entry is served while it is refreshed.
+        """
+        self.path = path
+        self.max_stale = max_stale
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._refresh_tasks = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held, the database is opened on first use so creating the cache costs nothing
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)")
+            connection.commit()
+            self._connection = connection
+            logger.debug(f"Opened API cache {self.path}")
+        return self._connection
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        :return: The stored entry (fresh or stale), None if there is none.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, stored_at, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
+
+    def put(self, key: str, value: Any, ttl: float) -> CacheEntry:
+        """
+        Stores a value.
+
+        :param ttl: Seconds the value is fresh.
+        :return: The stored entry.
+        """
+        now = time.time()
+        entry = CacheEntry(value, now, now + ttl)
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            connection = self._connect()
+            connection.execute("INSERT OR REPLACE INTO entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                               (key, data, entry.stored_at, entry.expires_at))
+            connection.commit()
+        return entry
+
+    def delete(self, key: str):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            connection.commit()
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM entries")
+            connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], ttl: float,
+                     is_valid: Optional[Callable[[Any], bool]] = None) -> CacheEntry:
+        """
+        Returns the stored entry of the key and fetches (and stores) it if necessary.
+
+        - fresh entry: returned as it is
+        - entry expired less than `max_stale` seconds ago: returned, and refreshed in a background thread
+        - no entry or older: fetched now, the old entry is only used if the fetch fails
+
+        :param key: Key of the entry.
+        :param fetch: Function that loads the current value.
+        :param ttl: Seconds a fetched value is fresh.
+        :param is_valid: Check of a fetched value, invalid values (e.g. rate limit messages) are not stored.
+        :return: The entry, a not stored entry that is already expired if the fetched value is invalid.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            if entry.fresh:
+                return entry
+            if time.time() - entry.expires_at < self.max_stale:
+                self.revalidate(key, fetch, ttl, is_valid)
+                return entry
+
+        try:
+            value = fetch()
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Using cached data for {key} from {time.ctime(entry.stored_at)}: {e}")
+            return entry
+        return self._fetched(key, entry, value, ttl, is_valid)
+
+    async def get_or_fetch_async(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float,
+                                 is_valid: Optional[Callable[[Any], bool]] = None) -> CacheEntry:
+        """
+        Coroutine variant of `get_or_fetch` for the async API clients, a stale entry is refreshed in a task of the
+        running event loop instead of a thread.
+
+        :param fetch: Coroutine function that loads the current value.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            if entry.fresh:
+                return entry
+            if time.time() - entry.expires_at < self.max_stale:
+                self.revalidate_async(key, fetch, ttl, is_valid)
+                return entry
+
+        try:
+            value = await fetch()
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Using cached data for {key} from {time.ctime(entry.stored_at)}: {e}")
+            return entry
+        return self._fetched(key, entry, value, ttl, is_valid)
+
+    def _fetched(self, key: str, entry: Optional[CacheEntry], value: Any, ttl: float,
+                 is_valid: Optional[Callable[[Any], bool]]) -> CacheEntry:
+        # Stores a fetched value, an invalid one is replaced by the old entry if there is one
+        if is_valid is not None and not is_valid(value):
+            if entry is not None:
+                logger.warning(f"Using cached data for {key} from {time.ctime(entry.stored_at)}, the response was invalid")
+                return entry
+            now = time.time()
+            return CacheEntry(value, now, now)
+        return self.put(key, value, ttl)
+
+    def revalidate(self, key: str, fetch: Callable[[], Any], ttl: float,
+                   is_valid: Optional[Callable[[Any], bool]] = None) -> bool:
+        """
+        Refreshes an entry in a background thread (at most one refresh per key at a time).
+        The refresh runs in the context of the caller, so it keeps its request priority and cancellation token.
+
+        :return: False if the entry is already being refreshed.
+        """
+        if not self._start_revalidating(key):
+            return False
+
+        def refresh():
+            try:
+                self._refreshed(key, fetch(), ttl, is_valid)
+            except Exception as e:
+                logger.warning(f"Error refreshing cached data for {key}: {e}")
+            finally:
+                self._finish_revalidating(key)
+
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(refresh,), name="api-cache-refresh", daemon=True).start()
+        return True
+
+    def revalidate_async(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float,
+                         is_valid: Optional[Callable[[Any], bool]] = None) -> bool:
+        """
+        Refreshes an entry in a task of the running event loop (at most one refresh per key at a time).
+        The task copies the context of the caller, so it keeps its request priority and cancellation token.
+
+        :return: False if the entry is already being refreshed.
+        """
+        if not self._start_revalidating(key):
+            return False
+
+        async def refresh():
+            try:
+                self._refreshed(key, await fetch(), ttl, is_valid)
+            except Exception as e:
+                logger.warning(f"Error refreshing cached data for {key}: {e}")
+            finally:
+                self._finish_revalidating(key)
+
+        task = asyncio.ensure_future(refresh())
+        # The event loop only keeps a weak reference to its tasks
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+        return True
+
+    def _start_revalidating(self, key: str) -> bool:
+        with self._lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+            return True
+
+    def _finish_revalidating(self, key: str):
+        with self._lock:
+            self._revalidating.discard(key)
+
+    def _refreshed(self, key: str, value: Any, ttl: float, is_valid: Optional[Callable[[Any], bool]]):
+        if is_valid is None or is_valid(value):
+            self.put(key, value, ttl)
+
+
+_default_cache: Optional[PersistentCache] = None
+
+
+def default_cache() -> Optional[PersistentCache]:
+    """
+    :return: The persistent cache used by all API clients and scrapers, None if it is disabled.
+    """
+    return _default_cache
+
+
+def set_default_cache(cache: Optional[PersistentCache]):
+    """
+    Sets the persistent cache used by all API clients and scrapers (None disables it). It is disabled until the
+    application enables it at startup, so tests never read or write the cache file.
+    """
+    global _default_cache
+    if _default_cache is not None and _default_cache is not cache:
+        _default_cache.close()
+    _default_cache = cache
+
+
+def cached_fetch(key: str, fetch: Callable[[], Any], ttl: float, is_valid: Optional[Callable[[Any], bool]] = None,
+                 cache: Optional[PersistentCache] = None):
+    """
+    Loads a value through the given (or the default) persistent cache, directly if there is none.
+
+    :return: The fetched or cached value.
+    """
+    cache = cache or default_cache()
+    if cache is None:
+        return fetch()
+    return cache.get_or_fetch(key, fetch, ttl, is_valid).value
@@ -1,16 +1,17 @@
 from typing import Dict
 
-from .petrol import get_gas_stations
+from .petrol import BASE_URL, get_gas_stations
 
 class PetrolAPI():
     """
     API client for accessing petrol prices.
     """
 
-    def __init__(self, city:str="Stuttgart", fuel_name:str="super-e10", range_km:int=5):
+    def __init__(self, city:str="Stuttgart", fuel_name:str="super-e10", range_km:int=5, base_url:str=BASE_URL):
         self.city = city  # can be a city name or a postal code
         self.fuel_name = fuel_name
         self.range_km = range_km
+        self.base_url = base_url  # clever-tanken or a stand-in server
         self.stations = []
 
 
@@ -18,7 +19,7 @@ class PetrolAPI():
         """
         Updates the petrol stations.
         """
-        self.stations = get_gas_stations(self.city, self.fuel_name, self.range_km)
+        self.stations = get_gas_stations(self.city, self.fuel_name, self.range_km, self.base_url)
 
     
     def get_current_lowest_price(self):
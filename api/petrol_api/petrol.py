@@ -1,5 +1,19 @@
+import functools
 import requests
 from bs4 import BeautifulSoup
+from api.api_client import DEFAULT_TIMEOUT
+from api.conditional_get import CONDITIONAL_CACHE
+from api.persistent_cache import cached_fetch
+from api.resilience import RESILIENCE
+
+# Origin of the price lists, a stand-in server can be passed instead (see api.service_redirect)
+BASE_URL = "https://www.clever-tanken.de"
+
+# Seconds a price list is cached (see api.persistent_cache)
+PETROL_CACHE_TTL = 10 * 60
+
+# Number of pages whose extracted prices are kept, the results are reused as long as a page does not change
+PARSED_PAGES_MAX = 16
 
 
 class GasStation:
@@ -23,17 +37,59 @@ fuels  = {
     }
 
 
-def get_soup(city, fuel_name, range_km):
+def _page_text(response) -> str:
+    # Error and maintenance pages must not be cached
+    response.raise_for_status()
+    return response.text
+
+
+def get_page(city, fuel_name, range_km, base_url=BASE_URL) -> str:
     city = city.replace(" ", "+")
     fuel_type = fuels.get(fuel_name)
     assert fuel_type, f"Fuel type {fuel_name} not found. Choose from {list(fuels.keys())}"
-    url = f"https://www.clever-tanken.de/tankstelle_liste?ort={city}&spritsorte={fuel_type}&r={range_km}"
-    response = requests.get(url)
-    return BeautifulSoup(response.text, "html.parser")
+    url = f"{base_url}/tankstelle_liste?ort={city}&spritsorte={fuel_type}&r={range_km}"
+    # Conditional request, the last page is reused if clever-tanken answers 304 Not Modified
+    send = functools.partial(RESILIENCE.send, requests.get)
+    return cached_fetch(f"petrol:{url}", lambda: CONDITIONAL_CACHE.get(send, url, _page_text, timeout=DEFAULT_TIMEOUT),
+                        PETROL_CACHE_TTL)
+
 
+def get_soup(city, fuel_name, range_km, base_url=BASE_URL):
+    return BeautifulSoup(get_page(city, fuel_name, range_km, base_url), "html.parser")
 
 
-def get_average_price(city, fuel_name, range_km):
+@functools.lru_cache(maxsize=PARSED_PAGES_MAX)
+def _average_price(page: str) -> tuple:
+    soup = BeautifulSoup(page, "html.parser")
+    average_obj = soup.find("div", class_="city-price-average")
+    avg_fuel = average_obj.find("span").text
+    avg_city = average_obj.find_all("span")[1].text
+    avg_price = average_obj.find("div", class_="city-price-average-text").text
+    avg_price = float(avg_price.replace(",", "."))
+    # print(f"{avg_fuel} in {avg_city} is {avg_price}")
+    return avg_city, avg_fuel, avg_price
+
+
+@functools.lru_cache(maxsize=PARSED_PAGES_MAX)
+def _station_prices(page: str) -> tuple:
+    soup = BeautifulSoup(page, "html.parser")
+    stations = []
+    # Get data from script-element
+    script = [script for script in soup.find_all("script") if "addPoi" in script.text][0].text
+    lines = [l for l in script.split("\n") if "addPoi" in l and "Standort" not in l]
+    # Add stations to list
+    for line in lines:
+        if len(line.split("\'")) < 10: continue
+        name = line.split("\'")[7]
+        price = line.split("\'")[9].replace(",", ".")
+        stations.append((name, float(price)))
+    # sort by price (lowest first)
+    stations.sort(key=lambda x: x[1])
+    return tuple(stations)
+
+
+
+def get_average_price(city, fuel_name, range_km, base_url=BASE_URL):
     '''
     Get average gas price for a city and fuel type
     - param `city`: City name
@@ -45,20 +101,14 @@ def get_average_price(city, fuel_name, range_km):
         - lkw-diesel
         - lpg
     - param `range_km`: Range in km
+    - param `base_url`: Origin the page is loaded from
     - return: Tuple of (city, fuel, average price)
     '''
-    soup = get_soup(city, fuel_name, range_km)
-    average_obj = soup.find("div", class_="city-price-average")
-    avg_fuel = average_obj.find("span").text
-    avg_city = average_obj.find_all("span")[1].text
-    avg_price = average_obj.find("div", class_="city-price-average-text").text
-    avg_price = float(avg_price.replace(",", "."))
-    # print(f"{avg_fuel} in {avg_city} is {avg_price}")
-    return avg_city, avg_fuel, avg_price
+    return _average_price(get_page(city, fuel_name, range_km, base_url))
 
 
 
-def get_gas_stations(city, fuel_name, range_km):
+def get_gas_stations(city, fuel_name, range_km, base_url=BASE_URL):
     '''
     Get gas prices for a city and fuel type
     - param `city`: City name
@@ -70,19 +120,8 @@ def get_gas_stations(city, fuel_name, range_km):
         - lkw-diesel
         - lpg
     - param `range_km`: Range in km
+    - param `base_url`: Origin the page is loaded from
     - return: List of stations (lowest price first)
     '''
-    soup = get_soup(city, fuel_name, range_km)
-    stations = []
-    # Get data from script-element
-    script = [script for script in soup.find_all("script") if "addPoi" in script.text][0].text
-    lines = [l for l in script.split("\n") if "addPoi" in l and "Standort" not in l]
-    # Add stations to list
-    for line in lines:
-        if len(line.split("\'")) < 10: continue
-        name = line.split("\'")[7]
-        price = line.split("\'")[9].replace(",", ".")
-        stations.append(GasStation(name, float(price)))
-    # sort by price (lowest first)
-    if stations: stations.sort(key=lambda x: x.price)
-    return stations
\ No newline at end of file
+    # New objects for every caller, only the extracted prices are shared
+    return [GasStation(name, price) for name, price in _station_prices(get_page(city, fuel_name, range_km, base_url))]
\ No newline at end of file
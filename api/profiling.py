@@ -0,0 +1,174 @@
+import contextlib
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import re
+import threading
+import time
+from typing import ContextManager, Dict, Iterable, Optional
+from loguru import logger
+
+# Environment variables that enable the profiling without changing the preferences, e.g. for a run in the field
+PROFILE_DIR_VARIABLE = "ASWE_PROFILE_DIR"
+PROFILE_API_CALLS_VARIABLE = "ASWE_PROFILE_API_CALLS"
+
+# Number of profiles kept in the directory, older ones are deleted
+DEFAULT_KEEP = 20
+# Number of functions in the summary of a profile
+DEFAULT_TOP = 25
+
+# Returned by the hooks while profiling is disabled, so they cost one function call
+_DISABLED = contextlib.nullcontext()
+
+
+class Profiler:
+    """
+    Records a cProfile profile per state entry (and per selected API call) and writes it to a directory, together with
+    a text summary of the top functions. Only the thread that runs the state or the call is profiled; a call inside a
+    profiled state of the same thread is part of the profile of the state.
+    """
+
+    def __init__(self, directory: str, keep: int = DEFAULT_KEEP, top: int = DEFAULT_TOP,
+                 api_clients: Iterable[str] = ()):
+        """
+        :param directory: Directory of the profiles (`.prof`, readable with pstats or snakeviz) and summaries (`.txt`).
+        :param keep: Number of profiles kept, the oldest ones are deleted.
+        :param top: Number of functions listed in each summary.
+        :param api_clients: Class names of the API clients whose requests are profiled (e.g. "WeatherAPI"), "*" for all.
+        """
+        self.directory = directory
+        self.keep = keep
+        self.top = top
+        self.api_clients = frozenset(api_clients)
+        self._active = threading.local()
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def profiles_api_calls_of(self, client: str) -> bool:
+        return "*" in self.api_clients or client in self.api_clients
+
+    @contextlib.contextmanager
+    def profile(self, kind: str, name: str):
+        """
+        Profiles the block and writes the profile when it is left.
+
+        :param kind: "state" or "api".
+        :param name: Name of the state or the API call.
+        """
+        if getattr(self._active, "profiling", False):
+            # Nested in a profiled block of this thread, it is part of that profile
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows one at a time), the block runs unprofiled
+            yield
+            return
+        self._active.profiling = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active.profiling = False
+            self._write(profile, kind, name, time.perf_counter() - start)
+
+    def _write(self, profile: cProfile.Profile, kind: str, name: str, duration: float):
+        """
+        Writes the profile and its summary and deletes the oldest profiles. Errors are logged, the profiled code is
+        never affected.
+        """
+        try:
+            safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)[:80]
+            base = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self._sequence):05}-"
+                                                f"{kind}-{safe_name}")
+            profile.dump_stats(base + ".prof")
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(self.summary(profile, f"{kind} {name}", duration))
+            self._rotate()
+            logger.info(f"Profile of {kind} {name} ({duration * 1000:.0f} ms) written to {base}.prof")
+        except OSError as e:
+            logger.error(f"Could not write profile of {kind} {name}: {e}")
+
+    def summary(self, profile: cProfile.Profile, title: str, duration: float) -> str:
+        """
+        :return: The top functions of the profile by cumulative and by own time.
+        """
+        stream = io.StringIO()
+        stream.write(f"{title}: {duration * 1000:.1f} ms\n")
+        stats = pstats.Stats(profile, stream=stream)
+        for sort in ("cumulative", "tottime"):
+            stream.write(f"\nTop {self.top} functions by {sort} time\n")
+            stats.sort_stats(sort).print_stats(self.top)
+        return stream.getvalue()
+
+    def _rotate(self):
+        with self._lock:
+            profiles = sorted(name for name in os.listdir(self.directory) if name.endswith(".prof"))
+            for name in profiles[:max(0, len(profiles) - self.keep)]:
+                base = os.path.join(self.directory, name[:-len(".prof")])
+                for path in (base + ".prof", base + ".txt"):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(path)
+
+
+# Profiler of the process, None while profiling is disabled
+_profiler: Optional[Profiler] = None
+
+
+def enable_profiling(directory: str, keep: int = DEFAULT_KEEP, top: int = DEFAULT_TOP,
+                     api_clients: Iterable[str] = ()) -> Profiler:
+    """
+    Enables the profiling hooks of the state machine and the API clients, see Profiler.
+    """
+    global _profiler
+    _profiler = Profiler(directory, keep, top, api_clients)
+    logger.warning(f"Profiling state entries into {directory}")
+    return _profiler
+
+
+def disable_profiling():
+    global _profiler
+    _profiler = None
+
+
+def configure_profiling(preferences: Dict) -> Optional[Profiler]:
+    """
+    Enables the profiling if the ASWE_PROFILE_DIR variable or the "profile_dir" preference is set.
+    The API clients to profile are read from ASWE_PROFILE_API_CALLS or the "profile_api_calls" preference
+    (comma separated class names).
+
+    :return: The profiler, None if profiling is disabled.
+    """
+    directory = os.environ.get(PROFILE_DIR_VARIABLE) or preferences.get("profile_dir", "")
+    if not directory:
+        return None
+    api_clients = os.environ.get(PROFILE_API_CALLS_VARIABLE, preferences.get("profile_api_calls", ""))
+    return enable_profiling(directory, int(preferences.get("profile_keep", DEFAULT_KEEP)),
+                            api_clients=[client.strip() for client in api_clients.split(",") if client.strip()])
+
+
+def profile_state(state: str) -> ContextManager:
+    """
+    :return: Context that profiles the entry of the state, a no-op while profiling is disabled.
+    """
+    profiler = _profiler
+    if profiler is None:
+        return _DISABLED
+    return profiler.profile("state", state)
+
+
+def profile_api_call(client: str, endpoint: str) -> ContextManager:
+    """
+    :return: Context that profiles a request of the API client, a no-op while profiling is disabled or the client is
+        not selected.
+    """
+    profiler = _profiler
+    if profiler is None or not profiler.profiles_api_calls_of(client):
+        return _DISABLED
+    return profiler.profile("api", f"{client}.{endpoint}")
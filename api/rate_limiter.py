@@ -0,0 +1,274 @@
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Dict, Optional
+from loguru import logger
+from api.metrics import REGISTRY
+from api.persistent_cache import DATA_DIR
+
+DEFAULT_LEDGER_PATH = os.path.join(DATA_DIR, "rate_limits.sqlite3")
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+API_RATE_LIMITED = REGISTRY.counter(
+    "api_rate_limited_total", "Requests that were blocked by the rate limiter of an API.", ["api", "priority"])
+
+
+class Priority(IntEnum):
+    """
+    Priority class of a request. Prefetch requests may only use the share of a quota above the reserve of the
+    interactive requests, so background jobs back off long before the user is denied.
+    """
+    INTERACTIVE = 0
+    PREFETCH = 1
+
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    """
+    :return: Priority of the requests sent in the current context (thread or task), interactive by default.
+    """
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """
+    Sends the requests of the block with the given priority, e.g. `with request_priority(Priority.PREFETCH):`
+    in background jobs. Worker threads of cancellable calls inherit it.
+    """
+    reset_token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(reset_token)
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when the quota of an API is used up (by the rate limiter or as reported by the API itself).
+    Derives from Exception, so the persistent cache serves the last stored response instead (see api.persistent_cache).
+    """
+
+    def __init__(self, api: str, retry_after: Optional[float] = None, priority: Priority = Priority.INTERACTIVE):
+        """
+        :param api: Name of the API, e.g. "finance".
+        :param retry_after: Seconds until the request would be allowed again, None if unknown.
+        :param priority: Priority class of the blocked request.
+        """
+        message = f"Rate limit of the {api} API reached"
+        if retry_after is not None:
+            message += f", retry in {retry_after:.0f}s"
+        super().__init__(message)
+        self.api = api
+        self.retry_after = retry_after
+        self.priority = priority
+
+
+class RateLimit:
+    """
+    Quota of an API: `capacity` units (requests, characters) per `period` seconds.
+    """
+
+    def __init__(self, capacity: float, period: float, prefetch_reserve: float = 0.5):
+        """
+        :param capacity: Units per period, the bucket can hold at most this many tokens.
+        :param period: Seconds in which the bucket is refilled completely.
+        :param prefetch_reserve: Share of the capacity that is reserved for interactive requests.
+        """
+        self.capacity = capacity
+        self.period = period
+        self.prefetch_reserve = prefetch_reserve
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.period
+
+    def __repr__(self) -> str:
+        return f"RateLimit({self.capacity}/{self.period}s)"
+
+
+# Free tier quotas of the APIs, by API type of the APIFactory
+DEFAULT_RATE_LIMITS = {
+    'finance': RateLimit(25, DAY),           # Alpha Vantage: 25 requests per day
+    'news': RateLimit(100, DAY),             # NewsAPI developer plan: 100 requests per day
+    'fitbit': RateLimit(150, HOUR),          # Fitbit: 150 requests per user and hour
+    'tts': RateLimit(10_000, 30 * DAY),      # ElevenLabs free plan: 10,000 characters per month
+}
+
+
+class RequestLedger:
+    """
+    Fill levels of the token buckets in a SQLite database, so used quota is still used after a restart.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH):
+        """
+        :param path: SQLite file, created with its directory on first use.
+        """
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(api TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, used REAL NOT NULL DEFAULT 0)")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def load(self, api: str) -> Optional[tuple]:
+        """
+        :return: (tokens, updated_at as Unix time, units used in total) of the API, None if it has no entry.
+        """
+        with self._lock:
+            return self._connect().execute(
+                "SELECT tokens, updated_at, used FROM buckets WHERE api = ?", (api,)).fetchone()
+
+    def save(self, api: str, tokens: float, updated_at: float, used: float):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("INSERT OR REPLACE INTO buckets (api, tokens, updated_at, used) VALUES (?, ?, ?, ?)",
+                               (api, tokens, updated_at, used))
+            connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class TokenBucket:
+    """
+    Token bucket of one API. Each request takes `cost` tokens, the bucket refills continuously with the rate of its
+    limit. Interactive requests may empty the bucket, prefetch requests stop at the reserve.
+    """
+
+    def __init__(self, api: str, limit: RateLimit, ledger: Optional[RequestLedger] = None):
+        """
+        :param api: Name of the API (key in the ledger).
+        :param limit: Quota of the API.
+        :param ledger: Ledger the fill level is stored in, kept in memory only if None.
+        """
+        self.api = api
+        self.limit = limit
+        self.ledger = ledger
+        self._lock = threading.Lock()
+        self._tokens = float(limit.capacity)
+        self._updated_at = time.time()
+        self.used = 0.0
+        if ledger is not None:
+            stored = ledger.load(api)
+            if stored is not None:
+                self._tokens, self._updated_at, self.used = min(stored[0], limit.capacity), stored[1], stored[2]
+
+    def _refill(self, now: float):
+        # Called with the lock held. Wall clock time, so the bucket also refills while the application is not running.
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self.limit.capacity, self._tokens + elapsed * self.limit.refill_rate)
+        self._updated_at = now
+
+    def _floor(self, priority: Priority) -> float:
+        return self.limit.capacity * self.limit.prefetch_reserve if priority >= Priority.PREFETCH else 0.0
+
+    def available(self, priority: Optional[Priority] = None) -> float:
+        """
+        :return: Tokens the given (or the current) priority class may still use.
+        """
+        priority = current_priority() if priority is None else priority
+        with self._lock:
+            self._refill(time.time())
+            return max(0.0, self._tokens - self._floor(priority))
+
+    def try_acquire(self, cost: float = 1, priority: Optional[Priority] = None) -> bool:
+        """
+        Takes `cost` tokens if the priority class may use them.
+
+        :param cost: Units of the request (1 per request, or e.g. the number of characters).
+        :param priority: Priority class, defaults to the priority of the current context.
+        :return: False if the request has to be blocked.
+        """
+        priority = current_priority() if priority is None else priority
+        with self._lock:
+            now = time.time()
+            self._refill(now)
+            if self._tokens - cost < self._floor(priority):
+                allowed = False
+            else:
+                self._tokens -= cost
+                self.used += cost
+                allowed = True
+            state = (self._tokens, self._updated_at, self.used)
+        if allowed and self.ledger is not None:
+            self.ledger.save(self.api, *state)
+        if not allowed:
+            API_RATE_LIMITED.inc(self.api, priority.name.lower())
+        return allowed
+
+    def acquire(self, cost: float = 1, priority: Optional[Priority] = None):
+        """
+        Like `try_acquire`, but raises if the request has to be blocked.
+
+        :raises RateLimitExceeded: With the seconds until the request would be allowed.
+        """
+        priority = current_priority() if priority is None else priority
+        if not self.try_acquire(cost, priority):
+            missing = max(0.0, cost - self.available(priority))
+            raise RateLimitExceeded(self.api, missing / self.limit.refill_rate, priority)
+
+    def exhaust(self):
+        """
+        Empties the bucket, e.g. when the API reports that its quota is used up (it was used by another device).
+        """
+        with self._lock:
+            self._refill(time.time())
+            self._tokens = 0.0
+            state = (self._tokens, self._updated_at, self.used)
+        logger.warning(f"Quota of the {self.api} API is used up")
+        if self.ledger is not None:
+            self.ledger.save(self.api, *state)
+
+
+class RateLimiter:
+    """
+    Token buckets of all rate limited APIs with a shared ledger (configured in the APIFactory).
+    """
+
+    def __init__(self, limits: Optional[Dict[str, RateLimit]] = None, ledger: Optional[RequestLedger] = None):
+        """
+        :param limits: Quota by API type, defaults to DEFAULT_RATE_LIMITS.
+        :param ledger: Ledger to persist the buckets in, kept in memory only if None.
+        """
+        self.limits = dict(DEFAULT_RATE_LIMITS if limits is None else limits)
+        self.ledger = ledger
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, api: str) -> Optional[TokenBucket]:
+        """
+        :return: The bucket of the API (created on first use), None if the API has no limit.
+        """
+        if api not in self.limits:
+            return None
+        with self._lock:
+            if api not in self._buckets:
+                self._buckets[api] = TokenBucket(api, self.limits[api], self.ledger)
+            return self._buckets[api]
+
+    def close(self):
+        if self.ledger is not None:
+            self.ledger.close()
@@ -0,0 +1,321 @@
+import asyncio
+import contextvars
+import email.utils
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+import requests
+from loguru import logger
+from api.metrics import REGISTRY
+
+# Statuses that are retried: rate limited (429) and temporary errors of a gateway or an overloaded server
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Errors of requests (sync clients) and httpx (async clients) that count as a failure of the host and are retried
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, httpx.TimeoutException,
+                    httpx.NetworkError)
+
+API_RESILIENCE_EVENTS = REGISTRY.counter(
+    "api_resilience_events_total", "Retries, hedged requests and requests rejected by an open circuit breaker.",
+    ["host", "event"])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of sending a request while the circuit breaker of the host is open.
+    Derives from ConnectionError, so callers handle it like an unreachable host (e.g. the persistent cache
+    serves the last stored response).
+    """
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Circuit breaker of {host} is open, retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one host. After `failure_threshold` failures in a row (connection errors, timeouts and 5xx
+    responses) the circuit opens and requests fail immediately for `reset_timeout` seconds. Then a single trial
+    request is let through (half-open): its success closes the circuit, its failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        :param host: Host name, used for logging.
+        :param failure_threshold: Failures in a row after which the circuit opens.
+        :param reset_timeout: Seconds the circuit stays open before a trial request is sent.
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        :raises CircuitOpenError: If the circuit is open (or a trial request is already running).
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            waited = time.monotonic() - self._opened_at
+            if self.state == self.OPEN and waited >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        API_RESILIENCE_EVENTS.inc(self.host, "circuit_open")
+        raise CircuitOpenError(self.host, max(0.0, self.reset_timeout - waited))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit breaker of {self.host} closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def release(self):
+        """
+        Ends a trial request that neither succeeded nor failed (e.g. it was cancelled), so the next one is let through.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker of {self.host} opened after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """
+    :return: Seconds from the Retry-After header (delay or HTTP date), None if there is none.
+    """
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Resilience:
+    """
+    Resilience layer of the HTTP requests of the API clients and scrapers: a circuit breaker per host, bounded
+    retries with exponential backoff and full jitter, Retry-After handling of 429 responses and optional hedged
+    requests (a duplicate of a slow idempotent GET is sent once it takes longer than the p95 latency).
+    """
+
+    def __init__(self, max_attempts: int = 3, backoff: float = 0.2, max_backoff: float = 2.0,
+                 max_retry_after: float = 10.0, hedge_min_samples: int = 20, hedge_min_delay: float = 0.05,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        :param max_attempts: Attempts of a request incl. the first one.
+        :param backoff: Upper bound of the first retry delay in seconds, doubled with each retry.
+        :param max_backoff: Upper bound of the retry delays in seconds.
+        :param max_retry_after: Longest Retry-After that is waited for, the response is returned if it is longer.
+        :param hedge_min_samples: Observed latencies needed before requests are hedged.
+        :param hedge_min_delay: Shortest delay in seconds after which a duplicate request is sent.
+        :param failure_threshold: Failures in a row after which the circuit of a host opens.
+        :param reset_timeout: Seconds a circuit stays open.
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """
+        :return: The circuit breaker of the host of the URL (created on first use).
+        """
+        host = urlsplit(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    host, CircuitBreaker(host, self.failure_threshold, self.reset_timeout))
+        return breaker
+
+    def reset(self):
+        """
+        Closes all circuits (e.g. after the network came back).
+        """
+        with self._lock:
+            self._breakers.clear()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        :param attempt: Number of the retry, starting at 0.
+        :return: Random delay between 0 and the exponential bound (full jitter), so clients do not retry in sync.
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def send(self, send: Callable[..., requests.Response], url: str, idempotent: bool = True, latency=None,
+             **kwargs) -> requests.Response:
+        """
+        Sends a request through the circuit breaker of the host and retries it if it fails temporarily.
+
+        Idempotent requests are retried on connection errors, timeouts and the statuses in RETRY_STATUSES, other
+        requests only on 429 (the server did not process them). The last response is returned as it is, the
+        caller checks its status.
+
+        :param send: Function sending the request, e.g. session.get or requests.post.
+        :param url: URL of the request.
+        :param idempotent: False for requests that must not be sent twice.
+        :param latency: Latency histogram of the request (e.g. API_REQUEST_SECONDS.labels(client, "GET")), if set an
+            idempotent request is hedged once it takes longer than the p95 latency.
+        :raises CircuitOpenError: If the circuit of the host is open.
+        """
+        breaker = self.breaker(url)
+        for attempt in range(self.max_attempts):
+            breaker.before_call()
+            try:
+                delay = self._hedge_delay(latency) if idempotent else None
+                response = self._hedged(send, url, delay, kwargs) if delay is not None else send(url, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                wait_for = self._after_error(breaker, url, attempt, idempotent, e)
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                wait_for = self._after_response(breaker, url, attempt, idempotent, response)
+                if wait_for is None:
+                    return response
+            time.sleep(wait_for)
+
+    async def send_async(self, send: Callable[..., Awaitable], url: str, idempotent: bool = True, latency=None,
+                         **kwargs):
+        """
+        Coroutine variant of `send` for the httpx clients (see api.async_api_client), with the same circuit breakers,
+        retries and hedging. The retry delays do not block the event loop.
+
+        :param send: Coroutine function sending the request, e.g. client.get of an httpx.AsyncClient.
+        :raises CircuitOpenError: If the circuit of the host is open.
+        """
+        breaker = self.breaker(url)
+        for attempt in range(self.max_attempts):
+            breaker.before_call()
+            try:
+                delay = self._hedge_delay(latency) if idempotent else None
+                if delay is not None:
+                    response = await self._hedged_async(send, url, delay, kwargs)
+                else:
+                    response = await send(url, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                wait_for = self._after_error(breaker, url, attempt, idempotent, e)
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                wait_for = self._after_response(breaker, url, attempt, idempotent, response)
+                if wait_for is None:
+                    return response
+            await asyncio.sleep(wait_for)
+
+    def _after_error(self, breaker: CircuitBreaker, url: str, attempt: int, idempotent: bool, error: Exception) -> float:
+        # Called in the except block of a failed attempt: raises the error again if it is not retried
+        breaker.record_failure()
+        if attempt == self.max_attempts - 1 or not idempotent:
+            raise error
+        wait_for = self.backoff_delay(attempt)
+        logger.warning(f"Retrying {url} in {wait_for:.2f}s: {error}")
+        API_RESILIENCE_EVENTS.inc(breaker.host, "retry")
+        return wait_for
+
+    def _after_response(self, breaker: CircuitBreaker, url: str, attempt: int, idempotent: bool,
+                        response) -> Optional[float]:
+        # Seconds until the request is retried, None if the response is returned
+        status = response.status_code
+        if status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if status not in RETRY_STATUSES or attempt == self.max_attempts - 1 or (not idempotent and status != 429):
+            return None
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return None
+        wait_for = retry_after if retry_after is not None else self.backoff_delay(attempt)
+        logger.warning(f"Retrying {url} in {wait_for:.2f}s: status {status}")
+        API_RESILIENCE_EVENTS.inc(breaker.host, "retry")
+        return wait_for
+
+    def _hedge_delay(self, latency) -> Optional[float]:
+        if latency is None or latency.count < self.hedge_min_samples:
+            return None
+        p95 = latency.quantile(0.95)
+        return max(self.hedge_min_delay, p95) if p95 is not None else None
+
+    def _hedged(self, send: Callable[..., requests.Response], url: str, delay: float, kwargs: Dict) -> requests.Response:
+        if self._hedge_pool is None:
+            with self._lock:
+                if self._hedge_pool is None:
+                    self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="api-hedge")
+        context = contextvars.copy_context()
+        first = self._hedge_pool.submit(context.run, send, url, **kwargs)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        API_RESILIENCE_EVENTS.inc(urlsplit(url).netloc, "hedge")
+        second = self._hedge_pool.submit(contextvars.copy_context().run, send, url, **kwargs)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        # Both failed, the error of the original request is raised
+        return first.result()
+
+    async def _hedged_async(self, send: Callable[..., Awaitable], url: str, delay: float, kwargs: Dict):
+        first = asyncio.ensure_future(send(url, **kwargs))
+        done, _ = await asyncio.wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        API_RESILIENCE_EVENTS.inc(urlsplit(url).netloc, "hedge")
+        second = asyncio.ensure_future(send(url, **kwargs))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+            # Both failed, the error of the original request is raised
+            return first.result()
+        finally:
+            # Unlike the threads of the sync variant, the slower request is aborted
+            for future in pending:
+                future.cancel()
+
+
+# Resilience layer shared by all API clients and scrapers
+RESILIENCE = Resilience()
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+# Query parameters that carry credentials. They are not part of the cache keys, so no API key ends up in a
+# key (and a rotated key does not empty the cache).
+CREDENTIAL_PARAMS = frozenset({'appid', 'apikey', 'api_key', 'apiKey', 'key', 'token', 'access_token', 'client_secret'})
+
+# Number of responses kept in memory by default
+DEFAULT_MAX_ENTRIES = 512
+
+_MISSING = object()
+
+
+def make_key(namespace: str, endpoint: str, params: Optional[Dict] = None,
+             exclude: Iterable[str] = CREDENTIAL_PARAMS) -> Tuple:
+    """
+    Builds the cache key of a request. The order of the parameters does not matter and credentials are left out.
+
+    :param namespace: Name of the client (e.g. "WeatherAPI"), so equal endpoints of different APIs do not collide.
+    :param endpoint: Endpoint relative to the base URL.
+    :param params: Query parameters of the request.
+    :param exclude: Parameter names that are not part of the key.
+    :return: Hashable key.
+    """
+    excluded = exclude if isinstance(exclude, (set, frozenset)) else frozenset(exclude)
+    normalized = tuple(sorted(
+        (str(name), _normalize(value)) for name, value in (params or {}).items()
+        if name not in excluded and value is not None
+    ))
+    return namespace, endpoint.strip('/'), normalized
+
+
+def _normalize(value) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if hasattr(value, 'value') and not isinstance(value, (str, bytes)):  # Enums like finance_api.Interval
+        return str(value.value)
+    return str(value)
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache of parsed API responses, each entry with its own time to live.
+
+    The cached objects are returned as they are (no copy), callers must not modify them.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        :param max_entries: Number of entries after which the least recently used one is evicted.
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default=None):
+        """
+        :return: The cached value of the key, `default` if there is none or it expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= now:
+                if entry is not _MISSING:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value, ttl: float):
+        """
+        Stores a value and evicts the least recently used entries if the cache is full.
+
+        :param ttl: Seconds the value stays valid.
+        """
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: Number of entries, hits, misses and evictions.
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+# Cache shared by all API clients
+RESPONSE_CACHE = ResponseCache()
@@ -0,0 +1,46 @@
+from typing import Optional
+from urllib.parse import urlsplit
+
+# Origins of the external services and the path prefix they are served under by a stand-in server
+# (see benchmarks.stand_in), e.g. https://api.openweathermap.org/data/2.5/weather -> {base_url}/weather/data/2.5/weather
+SERVICE_ORIGINS = {
+    "https://api.openweathermap.org": "weather",
+    "https://www.alphavantage.co": "finance",
+    "https://www3.vvs.de": "vvs",
+    "https://newsapi.org": "news",
+    "https://www.zeit.de": "articles",
+    "https://api.fitbit.com": "fitbit",
+    "https://api.spotify.com": "spotify",
+    "https://accounts.spotify.com": "spotify-accounts",
+    "https://api.elevenlabs.io": "elevenlabs",
+    "http://127.0.0.1:11434": "ollama",
+    "http://localhost:11434": "ollama",
+    "https://rapla.dhbw.de": "rapla",
+    "https://www.clever-tanken.de": "petrol",
+}
+
+
+def with_base_url(url: str, base_url: str) -> str:
+    """
+    :return: The URL with its scheme and host replaced by the base URL (which may have a path).
+    """
+    parts = urlsplit(url)
+    return f"{base_url.rstrip('/')}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def redirect_url(url: str, base_url: Optional[str]) -> str:
+    """
+    Maps a URL of an external service (SERVICE_ORIGINS) to the stand-in server. The APIFactory passes the mapped URLs
+    to the clients it creates, e.g. for load tests of the real code paths.
+
+    :param url: URL or base URL of an external service, e.g. "https://api.openweathermap.org".
+    :param base_url: Base URL of the stand-in server, e.g. "http://127.0.0.1:8765". None keeps the real services.
+    :return: The URL on the stand-in server, the URL itself if there is no stand-in or it is no external service.
+    """
+    if base_url is None:
+        return url
+    parts = urlsplit(url)
+    service = SERVICE_ORIGINS.get(f"{parts.scheme}://{parts.netloc}")
+    if service is None:
+        return url
+    return with_base_url(url, f"{base_url.rstrip('/')}/{service}")
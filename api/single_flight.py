@@ -0,0 +1,142 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from api.cancellation import OperationCancelled, await_cancellable, current_token
+from api.metrics import API_COALESCED_REQUESTS
+from api.rate_limiter import RateLimitExceeded, current_priority
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls (single-flight): while a call for a key is in flight, further calls for the
+    same key wait for it and share its result (or its error) instead of sending their own request.
+
+    The callers get the same result object, so they must not modify it (like the responses of the response cache).
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fetch: Callable[[], T], label: str = "unknown") -> T:
+        """
+        Runs `fetch` unless a call for the key is already in flight, in which case its result is returned.
+
+        :param key: Key of the call, equal keys must send equal requests.
+        :param fetch: Function that sends the request.
+        :param label: Client name the coalesced calls are counted for (api_coalesced_requests_total).
+        :return: Result of the own or the shared call.
+        :raises OperationCancelled: If the cancellation token of the waiting caller is cancelled.
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = Future()
+            if leader:
+                return self._run(key, future, fetch)
+
+            API_COALESCED_REQUESTS.inc(label)
+            try:
+                return self._wait(future)
+            except (RateLimitExceeded, OperationCancelled) as e:
+                if not self._send_again(e):
+                    raise
+
+    async def do_async(self, key: Hashable, fetch: Callable[[], Awaitable[T]], label: str = "unknown") -> T:
+        """
+        Coroutine variant of `do` for the async API clients. Waiting callers do not block the event loop, a caller
+        waiting for a call of another thread (or loop) is woken up through its future.
+
+        :param fetch: Coroutine function that sends the request.
+        :raises OperationCancelled: If the cancellation token of the waiting caller is cancelled.
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = Future()
+            if leader:
+                return await self._run_async(key, future, fetch)
+
+            API_COALESCED_REQUESTS.inc(label)
+            try:
+                # Shielded, so a cancelled waiter does not cancel the call of the other callers
+                return await await_cancellable(asyncio.shield(asyncio.wrap_future(future)))
+            except (RateLimitExceeded, OperationCancelled) as e:
+                if not self._send_again(e):
+                    raise
+
+    @staticmethod
+    def _send_again(error: BaseException) -> bool:
+        # Whether a waiting caller sends the call again instead of raising the error of the shared call
+        if isinstance(error, RateLimitExceeded):
+            # Blocked for the priority of the caller that sent it (e.g. a prefetch job), ours may be allowed
+            return error.priority != current_priority()
+        # The call was cancelled by the token of the caller that sent it, not by ours: send it again
+        token = current_token()
+        return token is None or not token.cancelled
+
+    def _run(self, key: Hashable, future: Future, fetch: Callable[[], T]) -> T:
+        try:
+            result = fetch()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    async def _run_async(self, key: Hashable, future: Future, fetch: Callable[[], Awaitable[T]]) -> T:
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            self._finish(key)
+            # The waiting callers send the call again, like after a call cancelled by another token
+            future.set_exception(OperationCancelled("task cancelled"))
+            raise
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: Hashable):
+        # Removed before the waiting callers are woken up, so calls after this one send a new request
+        with self._lock:
+            self._calls.pop(key, None)
+
+    @staticmethod
+    def _wait(future: Future):
+        token = current_token()
+        if token is None:
+            return future.result()
+        # Wake up when the call is done or the token of this caller is cancelled
+        wake_up = threading.Event()
+        future.add_done_callback(lambda _: wake_up.set())
+        token.add_callback(wake_up.set)
+        try:
+            wake_up.wait()
+        finally:
+            token.remove_callback(wake_up.set)
+        if not future.done():
+            raise OperationCancelled(token.reason)
+        return future.result()
+
+    def in_flight(self) -> int:
+        """
+        :return: Number of calls currently in flight.
+        """
+        return len(self._calls)
+
+
+# Identical concurrent GET requests of the API clients
+REQUEST_FLIGHTS = SingleFlight()
@@ -1 +1 @@
-from .main import SpotifyAPI
\ No newline at end of file
+from .main import SpotifyAPI, AsyncSpotifyAPI
\ No newline at end of file
@@ -1,9 +1,12 @@
 from typing import Dict, Optional, List
+import asyncio
 import json
+import httpx
 import requests
 from loguru import logger
-from api.spotify_api.spotify_auth import get_access_token
+from api.spotify_api.spotify_auth import TOKEN_URL, get_access_token
 from api.api_client import APIClient
+from api.async_api_client import AsyncAPIClient
 
 class SpotifyAPI(APIClient):
     """
@@ -11,13 +14,18 @@ class SpotifyAPI(APIClient):
     Automatically updates the token before each request.
     """
 
-    def __init__(self, client_id, client_secret):
+    BASE_URL = "https://api.spotify.com/v1"
+
+    def __init__(self, client_id, client_secret, base_url=BASE_URL, token_url=TOKEN_URL):
         """
         Initializes the Spotify API client with the base URL.
+
+        :param base_url: Base URL of the Web API (or of a stand-in server).
+        :param token_url: Token endpoint of the accounts service (or of a stand-in server).
         """
-        base_url = "https://api.spotify.com/v1"
         self.client_id = client_id
         self.client_secret = client_secret
+        self.token_url = token_url
         super().__init__(base_url=base_url)
         self.update_token()
 
@@ -26,7 +34,7 @@ class SpotifyAPI(APIClient):
         Authenticates with the Spotify API by retrieving an access token.
         :return: Access token as a string.
         """
-        return get_access_token(self.client_id, self.client_secret)
+        return get_access_token(self.client_id, self.client_secret, self.token_url)
 
     def update_token(self):
         """
@@ -123,3 +131,78 @@ class SpotifyAPI(APIClient):
                 response_json = None
 
             raise Exception(f"Failed to pause playback: {response_json or 'No response content'}")
+
+
+class AsyncSpotifyAPI(AsyncAPIClient):
+    """
+    Async Spotify client on the shared httpx client (see api.async_api_client).
+    The token is updated in a worker thread, it may have to be refreshed with a blocking request.
+    """
+
+    def __init__(self, client_id, client_secret, client: Optional[httpx.AsyncClient] = None,
+                 base_url=SpotifyAPI.BASE_URL, token_url=TOKEN_URL):
+        """
+        :param client: httpx client, defaults to the shared client of the running event loop.
+        :param base_url: Base URL of the Web API (or of a stand-in server).
+        :param token_url: Token endpoint of the accounts service (or of a stand-in server).
+        """
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        super().__init__(base_url=base_url, client=client)
+
+    def authenticate(self) -> str:
+        """
+        Retrieves an access token (see SpotifyAPI.authenticate).
+        """
+        return get_access_token(self.client_id, self.client_secret, self.token_url)
+
+    async def update_token(self):
+        """
+        Updates the access token and refreshes headers with the new token.
+        """
+        self.access_token = await asyncio.to_thread(self.authenticate)
+        self.headers = {"Authorization": f"Bearer {self.access_token}"}
+
+    async def get_user_playlists(self) -> List[Dict]:
+        """
+        Retrieves the current user's playlists.
+        """
+        await self.update_token()
+        response = await self.get("me/playlists", params={"limit": 5, "offset": 0})
+        return response['items']
+
+    async def get_available_devices(self) -> List[Dict]:
+        """
+        Retrieves a list of available devices for playback.
+        """
+        await self.update_token()
+        response = await self.get("me/player/devices")
+        return response['devices']
+
+    async def start_playback(self, playlist_id: str, device_id: Optional[str] = None) -> None:
+        """
+        Starts playback of a specified playlist on the user's active device.
+        """
+        data = {"context_uri": f"spotify:playlist:{playlist_id}", "position_ms": 0}
+        if device_id:
+            data["device_id"] = device_id
+        await self.update_token()
+        try:
+            await self.put("me/player/play", data=json.dumps(data))
+        except httpx.HTTPStatusError as e:
+            logger.error(f"ERROR playing music: Device '{device_id}' is not active ({e.response.status_code}).")
+            return
+        logger.info("Playback started successfully!")
+
+    async def pause_playback(self, device_id: Optional[str] = None) -> None:
+        """
+        Pauses the current playback on the user's active device.
+        """
+        await self.update_token()
+        try:
+            await self.put("me/player/pause", data={"device_id": device_id})
+        except httpx.HTTPStatusError as e:
+            logger.error(f"ERROR stopping music: Device '{device_id}' is not active ({e.response.status_code}).")
+            return
+        logger.info("Playback paused successfully!")
@@ -58,10 +58,12 @@ def get_initial_token(auth_code, client_id, client_secret):
         print("Error retrieving the token:", response.status_code)
         print(response.json())
 
-def refresh_token(client_id, client_secret):
+def refresh_token(client_id, client_secret, token_url=TOKEN_URL):
     """
     Refreshes the access token using the stored refresh token.
     Updates the local token file with the new access token.
+
+    :param token_url: Token endpoint of the Spotify accounts service (or of a stand-in server).
     """
     logger.info("Refreshing access token")
     with open(TOKEN_FILE, 'r') as f:
@@ -78,7 +80,7 @@ def refresh_token(client_id, client_secret):
         'refresh_token': token_data['refresh_token']
     }
 
-    response = requests.post(TOKEN_URL, headers=headers, data=data)
+    response = requests.post(token_url, headers=headers, data=data)
 
     if response.status_code == 200:
         response_data = response.json()
@@ -106,11 +108,12 @@ def save_token(data):
     with open(TOKEN_FILE, 'w') as f:
         json.dump(data, f)
 
-def get_access_token(client_id, client_secret):
+def get_access_token(client_id, client_secret, token_url=TOKEN_URL):
     """
     Retrieves the current access token, refreshing it if it has expired.
     Raises an error if the token file does not exist.
 
+    :param token_url: Token endpoint the token is refreshed at.
     :return: The current access token as a string.
     """
     logger.info("Retrieving current access token")
@@ -119,7 +122,7 @@ def get_access_token(client_id, client_secret):
             token_data = json.load(f)
 
         if token_data['expires_at'] < time.time():
-            refresh_token(client_id, client_secret)
+            refresh_token(client_id, client_secret, token_url)
             with open(TOKEN_FILE, 'r') as f:
                 token_data = json.load(f)
 
@@ -1,3 +1,4 @@
+import asyncio
 import pyttsx3
 import requests
 import speech_recognition as sr
@@ -5,18 +6,31 @@ from loguru import logger
 import threading
 import pygame
 import numpy as np
+from api.api_client import DEFAULT_TIMEOUT
+from api.cancellation import OperationCancelled, current_token, run_cancellable
+from api.metrics import TTS_SECONDS, record_first_speech, timed
+from api.resilience import RESILIENCE
+
+# ElevenLabs sends the audio once the whole text is synthesized, long texts take longer than the read timeout of the
+# other APIs. The local voice is used if it is exceeded.
+SYNTHESIS_TIMEOUT = (DEFAULT_TIMEOUT[0], 60.0)
 
 
 class TTSAPI:
-    _instance = None
+    BASE_URL = "https://api.elevenlabs.io"
+    # One instance per base URL, like WeatherAPI
+    _instances = {}
+    # Character quota of ElevenLabs, set by the APIFactory (see api.rate_limiter)
+    rate_limit = None
 
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super(TTSAPI, cls).__new__(cls)
-            cls._instance.__initialized = False
-        return cls._instance
+        base_url = kwargs.get("base_url", cls.BASE_URL)
+        if base_url not in cls._instances:
+            cls._instances[base_url] = super(TTSAPI, cls).__new__(cls)
+            cls._instances[base_url].__initialized = False
+        return cls._instances[base_url]
 
-    def __init__(self, api_key, state_machine):
+    def __init__(self, api_key, state_machine, base_url=BASE_URL):
         if self.__initialized:
             return
         
@@ -45,7 +59,7 @@ class TTSAPI:
         self.api_key = api_key
 
         self.CHUNK_SIZE = 1024
-        self.url = "https://api.elevenlabs.io/v1/text-to-speech/pqHfZKP75CvOlQylNhV4"
+        self.url = f"{base_url}/v1/text-to-speech/pqHfZKP75CvOlQylNhV4"
         self.headers = {
               "Accept": "audio/mpeg",
               "Content-Type": "application/json",
@@ -90,14 +104,21 @@ class TTSAPI:
             if mic_name_part.lower() in mic.lower():
                 return i
 
+    @timed(TTS_SECONDS, "speak")
     def speak(self, text: str):
         """
-        Converts the input text into a voice output
+        Converts the input text into a voice output.
+        The synthesis request and the playback stop when the cancellation token of the running state is cancelled.
         """
         if not isinstance(text, str) or not text.strip():
             raise ValueError("Text input must be a non-empty string.")
 
-        if self.toggle_elevenlabs:
+        token = current_token()
+        if token is not None:
+            token.raise_if_cancelled()
+        record_first_speech()
+
+        if self.toggle_elevenlabs and self._elevenlabs_quota_left(text):
             # Restart the pygame mixer to avoid issues with the sound output
             pygame.init()
             
@@ -109,7 +130,15 @@ class TTSAPI:
                   "similarity_boost": 0.5
                 }
             }
-            response = requests.post(self.url, json=data, headers=self.headers)
+            # Not retried unless ElevenLabs rate limits it (429), the characters of a processed request are billed
+            try:
+                response = run_cancellable(RESILIENCE.send, requests.post, self.url, idempotent=False, json=data,
+                                           headers=self.headers, timeout=SYNTHESIS_TIMEOUT, token=token)
+            except requests.Timeout:
+                logger.warning("ElevenLabs synthesis timed out, using the local voice")
+                pygame.quit()
+                self._speak_local(text, token)
+                return
             response.raise_for_status()
             try:
                 with open('output.mp3', 'wb') as f:
@@ -121,19 +150,68 @@ class TTSAPI:
                 
                 pygame.mixer.music.load("output.mp3")
                 pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    pass
+                self._wait_for_playback(token)
             except Exception as e:
                 logger.error(f"Error during speaking with Elevenlabs: {e}")
             finally:
                 pygame.quit()
-        else:    
-            logger.debug(f"Speaking text: {text}")
-            with self.engine_lock:  # Use the lock to ensure only one thread accesses the engine at a time
-                self.engine.say(text)
+        else:
+            self._speak_local(text, token)
+
+    def _speak_local(self, text: str, token=None):
+        """
+        Speaks the text with the local pyttsx3 voice.
+
+        :param token: Cancellation token, the speech output is stopped as soon as it is cancelled.
+        :raises OperationCancelled: If the speech output was stopped because the token was cancelled.
+        """
+        logger.debug(f"Speaking text: {text}")
+        with self.engine_lock:  # Use the lock to ensure only one thread accesses the engine at a time
+            self.engine.say(text)
+        if token is None:
             self.engine.runAndWait()
+            return
+        # engine.stop ends runAndWait from the thread that cancels the token
+        token.add_callback(self.engine.stop)
+        try:
+            self.engine.runAndWait()
+        finally:
+            token.remove_callback(self.engine.stop)
+        token.raise_if_cancelled()
+
+    def _elevenlabs_quota_left(self, text: str) -> bool:
+        """
+        Takes the characters of the text from the ElevenLabs quota.
+
+        :return: False if the quota is used up, the text is then spoken with the local voice.
+        """
+        if self.rate_limit is None or self.rate_limit.try_acquire(len(text)):
+            return True
+        logger.warning("ElevenLabs quota used up, using the local voice")
+        return False
+
+    def _wait_for_playback(self, token=None, poll_interval: float = 0.02):
+        """
+        Blocks until the pygame music playback is finished.
+
+        :param token: Cancellation token, the playback is stopped as soon as it is cancelled.
+        :raises OperationCancelled: If the playback was stopped because the token was cancelled.
+        """
+        while pygame.mixer.music.get_busy():
+            if token is None:
+                pygame.time.wait(int(poll_interval * 1000))
+            elif token.wait(poll_interval):
+                pygame.mixer.music.stop()
+                raise OperationCancelled(token.reason)
+
 
+    async def speak_async(self, text: str):
+        """
+        Awaitable variant of `speak`, the audio output runs in a worker thread.
+        """
+        await asyncio.to_thread(self.speak, text)
 
+    @timed(TTS_SECONDS, "listen")
     def listen(self, timeout=None):
         try:
             mic_index = self.state_machine.preferences["mic_id"] or self.get_specific_micindex_by_name("jabra") or 1
@@ -199,6 +277,12 @@ class TTSAPI:
             text = "Entschuldigung, ich habe Ihre Antwort nicht verstanden. Bitte antworten Sie mit ja oder nein."
         return False
         
+    async def ask_yes_no_async(self, text, retries=3, timeout=5):
+        """
+        Awaitable variant of `ask_yes_no`.
+        """
+        return await asyncio.to_thread(self.ask_yes_no, text, retries, timeout)
+        
     def play_sound(self, sound:str):
         """
         Plays a sound
@@ -215,8 +299,7 @@ class TTSAPI:
             pygame.mixer.init()  # Initialize the mixer
             pygame.mixer.music.load(sound_path)
             pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pass
+            self._wait_for_playback(current_token())
         except Exception as e:
             logger.error(f"Error playing ping sound: {e}")
         finally:
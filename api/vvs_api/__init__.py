@@ -1,2 +1,2 @@
-from .main import VVSAPI
+from .main import VVSAPI, AsyncVVSAPI
 from .stop import VSSStationType, Stop
\ No newline at end of file
@@ -1,16 +1,20 @@
 import requests  # Add requests import
-from typing import List
+from typing import List, Optional
+import httpx
 from vvspy.enums import Station
 import vvspy
 from vvspy.models import Trip
 import logging
 import datetime
 from api.api_client import APIClient
+from api.async_api_client import AsyncAPIClient, httpx_timeout
+from api.service_redirect import with_base_url
+from api.single_flight import REQUEST_FLIGHTS
 
 from .stop import Stop, VSSStationType
 
 # Import the get_trips function with added arrival flags
-from .vvs_api_lib_fix import get_trips
+from .vvs_api_lib_fix import TRIP_FIELDS, TRIPS_URL, get_trips, get_trips_async, trip_params
 # Replace the get_trips function in the vvspy module with the one with added arrival flags
 vvspy.get_trips = get_trips
 
@@ -21,18 +25,24 @@ class VVSAPI(APIClient):
     """
     API client for accessing public transportation data.
     """
-    _instance = None
+    BASE_URL = "https://www3.vvs.de"
+    # One instance per base URL, like WeatherAPI
+    _instances = {}
 
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super(VVSAPI, cls).__new__(cls)
-        return cls._instance
+        base_url = kwargs.get("base_url", cls.BASE_URL)
+        if base_url not in cls._instances:
+            cls._instances[base_url] = super(VVSAPI, cls).__new__(cls)
+        return cls._instances[base_url]
 
-    def __init__(self):
+    def __init__(self, base_url: str = BASE_URL):
         """
         Initializes the VVSAPI client with the base URL.
+
+        :param base_url: Base URL of the VVS (or of a stand-in server).
         """
-        super().__init__("https://www3.vvs.de/vvs/")
+        super().__init__(f"{base_url}/vvs/")
+        self.trips_url = with_base_url(TRIPS_URL, base_url)
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(level=logging.DEBUG)
     
@@ -96,10 +106,27 @@ class VVSAPI(APIClient):
         return parsed_response
     
 
+    def _request_options(self) -> dict:
+        """
+        Arguments for get_trips, so the trip requests reuse the pooled session of the client
+        and only keep the fields the Trip objects are built from.
+        """
+        return {"session": self.session, "request_params": {"timeout": self.timeout}, "fields": TRIP_FIELDS,
+                "url": self.trips_url}
+
+    def _get_trips(self, start_station: Station, end_station: Station, **kwargs) -> List[Trip]:
+        """
+        Calls get_trips with the pooled session of the client. Identical trip requests that are in flight at the
+        same time (e.g. prefetch and the commute state) are sent once (see api.single_flight).
+        """
+        flight_key = (type(self).__name__, self.trips_url) + tuple(sorted(trip_params(start_station, end_station, **kwargs).items()))
+        return REQUEST_FLIGHTS.do(flight_key, lambda: get_trips(start_station, end_station, **kwargs, **self._request_options()),
+                                  type(self).__name__)
+
     def calc_trip_time(self, start_station: Station, end_station: Station) -> List[Trip]:
-        trips = get_trips(start_station, end_station)
+        trips = self._get_trips(start_station, end_station)
         if trips is None:
-            trips = get_trips(end_station, start_station)
+            trips = self._get_trips(end_station, start_station)
         return trips if trips is not None else -1  # Return -1 if no trips are found
     
     def calc_trip(self, start_station: Station, end_station: Station, departure_time: datetime = None, arrival_time: datetime = None) -> Trip:
@@ -109,9 +136,9 @@ class VVSAPI(APIClient):
             
         def get_trip_wrapper(start_station: Station, end_station: Station, departure_time: datetime = None, arrival_time: datetime = None) -> Trip:
             if departure_time is not None and arrival_time is None:
-                return get_trips(start_station, end_station, check_time=departure_time, itdDateTimeDepArr="dep", itdTripDateTimeDepArr="dep")
+                return self._get_trips(start_station, end_station, check_time=departure_time, itdDateTimeDepArr="dep", itdTripDateTimeDepArr="dep")
             elif arrival_time is not None and departure_time is None:
-                return get_trips(start_station, end_station, check_time=arrival_time, itdDateTimeDepArr="arr", itdTripDateTimeDepArr="arr")
+                return self._get_trips(start_station, end_station, check_time=arrival_time, itdDateTimeDepArr="arr", itdTripDateTimeDepArr="arr")
             else:
                 raise ValueError("Either departure_time or arrival_time must be set.")
         
@@ -145,4 +172,75 @@ class VVSAPI(APIClient):
             for connection in trip.connections:
                 print(f"Start: {connection.origin.departure_time_estimated}, End: {connection.destination.arrival_time_estimated}")
             print("Next trip")
-        return trips[-1]
\ No newline at end of file
+        return trips[-1]
+
+
+class AsyncVVSAPI(AsyncAPIClient):
+    """
+    Async client for the VVS API on the shared httpx client (see api.async_api_client).
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, base_url: str = VVSAPI.BASE_URL):
+        """
+        :param client: httpx client, defaults to the shared client of the running event loop.
+        :param base_url: Base URL of the VVS (or of a stand-in server).
+        """
+        super().__init__(f"{base_url}/vvs/", client=client)
+        self.trips_url = with_base_url(TRIPS_URL, base_url)
+
+    def authenticate(self):
+        pass
+
+    async def get_stations_by_name(self, name: str, **kwargs) -> List[Stop]:
+        """
+        Get stations from the VVS API by searching for the name (see VVSAPI.get_stations_by_name).
+        """
+        params = {
+            "coordOutputFormat": kwargs.get("coordOutputFormat", "WGS84[DD.ddddd]"),
+            "name_sf": name,
+            "outputFormat": "rapidJSON",
+            "type_sf": kwargs.get("type_sf", "any"),
+        }
+        return VVSAPI._parse_response(self, await self.get("XML_STOPFINDER_REQUEST", params=params))
+
+    async def search_station(self, station_name: str, station_type: VSSStationType) -> List[Station]:
+        """
+        Search for stations by name and filter by station type.
+        """
+        stations = await self.get_stations_by_name(station_name)
+        return [station for station in stations if station.type == station_type.value]
+
+    async def _get_trips(self, start_station: Station, end_station: Station, **kwargs) -> List[Trip]:
+        """
+        Calls get_trips_async on the httpx client of this client, coalesced like VVSAPI._get_trips.
+        """
+        flight_key = (type(self).__name__, self.trips_url) + tuple(sorted(trip_params(start_station, end_station, **kwargs).items()))
+        return await REQUEST_FLIGHTS.do_async(
+            flight_key, lambda: get_trips_async(start_station, end_station, self.client, fields=TRIP_FIELDS, url=self.trips_url,
+                                                request_params={"timeout": httpx_timeout(self.timeout)}, **kwargs),
+            type(self).__name__)
+
+    async def calc_trip(self, start_station: Station, end_station: Station, departure_time: datetime = None, arrival_time: datetime = None) -> List[Trip]:
+        """
+        Calculate the trips between two stations (see VVSAPI.calc_trip).
+        """
+        if departure_time is not None and arrival_time is None:
+            options = {"check_time": departure_time, "itdDateTimeDepArr": "dep", "itdTripDateTimeDepArr": "dep"}
+        elif arrival_time is not None and departure_time is None:
+            options = {"check_time": arrival_time, "itdDateTimeDepArr": "arr", "itdTripDateTimeDepArr": "arr"}
+        else:
+            raise ValueError("Either departure_time or arrival_time must be set.")
+
+        trips = await self._get_trips(start_station, end_station, **options)
+        if trips is None:
+            trips = await self._get_trips(end_station, start_station, **options)
+        if trips is None:
+            raise ValueError("No trip time found.")
+        return trips
+
+    async def get_best_trip(self, start_station: Station, end_station: Station, latest_arrival_time: datetime) -> Trip:
+        """
+        Get the latest trip that arrives before the given time.
+        """
+        trips = await self.calc_trip(start_station, end_station, arrival_time=latest_arrival_time)
+        return trips[-1] if trips else None
@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+import httpx
 import requests
 from requests.models import Response
 import json
@@ -8,66 +9,45 @@ from vvspy.enums import Station
 from vvspy.models import Trip
 from vvspy.trip import __API_URL, __logger, _parse_response
 
+from api.cancellation import await_cancellable
+from api.json_decoder import Fields, decode_response, select
+from api.metrics import API_REQUEST_SECONDS
+from api.resilience import RESILIENCE
+
+# Trip endpoint of the EFA backend of the VVS
+TRIPS_URL = __API_URL
+
+# Fields of a station of a trip leg that the Origin / Destination models of vvspy read
+_TRIP_STOP_FIELDS = {key: None for key in ("isGlobalId", "id", "name", "disassembledName", "type", "pointType", "coord",
+                                           "niveau", "departureTimePlanned", "departureTimeEstimated",
+                                           "arrivalTimePlanned", "arrivalTimeEstimated")}
+# Fields of a trip response the Trip objects are built from. The coordinates, stop sequences and infos of the legs
+# make up most of a rapidJSON response and are not used, so they are dropped after decoding.
+TRIP_FIELDS: Fields = {
+    "journeys": {
+        "legs": {
+            "duration": None,
+            "isRealtimeControlled": None,
+            "origin": _TRIP_STOP_FIELDS,
+            "destination": _TRIP_STOP_FIELDS,
+            "transportation": None,
+        },
+        "fare": {"zones": None},
+    },
+}
 
-# Added option for getting trips with arrival time not possible in library
 
-def get_trips(
-    origin_station_id: Union[str, int, Station],
-    destination_station_id: Union[str, int, Station],
-    check_time: datetime = None,
-    limit: int = 100,
-    request_params: dict = None,
-    return_response: bool = False,
-    session: requests.Session = None,
-    **kwargs,
-) -> Union[List[Trip], Response, None]:
-    r"""
-
-    Returns: List[:class:`vvspy.models.Trip`]
-    Returns none on webrequest errors.
-
-    Examples
-    --------
-    Basic usage:
-
-    .. code-block:: python
-
-        results = vvspy.get_trips("5006115", "5006465", limit=3)  # Stuttgart main station to Zuffenhausen
-
-    Set proxy for request:
-
-    .. code-block:: python
-
-        proxies = {}  # see https://stackoverflow.com/a/8287752/9850709
-        results = vvspy.get_arrivals("5006115", "5006465", request_params={"proxies": proxies})
+# Added option for getting trips with arrival time not possible in library
 
-    Parameters
-    ----------
-        station_id Union[:class:`int`, :class:`str`, :class:`vvspy.enums.Station`]
-            Station you want to get trips from.
-        check_time Optional[:class:`datetime.datetime`]
-            Time you want to check.
-            default datetime.now()
-        limit Optional[:class:`int`]
-            Limit request/result on this integer.
-            default 100
-        request_params Optional[:class:`dict`]
-            params parsed to the api request (e.g. proxies)
-            default {}
-        return_response Optional[:class:`bool`]
-            if set, the function returns the response object of the API request.
-        session Optional[:class:`requests.Session`]
-            if set, uses a given requests.session object for requests
-        kwargs Optional[:class:`dict`]
-            Check trips.py to see all available kwargs.
+def trip_params(origin_station_id: Union[str, int, Station], destination_station_id: Union[str, int, Station],
+                check_time: datetime = None, **kwargs) -> dict:
+    """
+    Query parameters of a trip request (shared by get_trips and get_trips_async).
     """
-
     if not check_time:
         check_time = datetime.now()
-    if request_params is None:
-        request_params = dict()
 
-    params = {
+    return {
         "SpEncId": kwargs.get("SpEncId", "0"),
         "calcOneDirection": kwargs.get("calcOneDirection", "1"),
         "changeSpeed": kwargs.get("changeSpeed", "normal"),
@@ -119,10 +99,74 @@ def get_trips(
         "w_regPrefAm": kwargs.get("w_regPrefAm", "1"),
     }
 
-    if session:
-        r = session.get(__API_URL, **{**request_params, **{"params": params}})
-    else:
-        r = requests.get(__API_URL, **{**request_params, **{"params": params}})
+
+def get_trips(
+    origin_station_id: Union[str, int, Station],
+    destination_station_id: Union[str, int, Station],
+    check_time: datetime = None,
+    limit: int = 100,
+    request_params: dict = None,
+    return_response: bool = False,
+    session: requests.Session = None,
+    fields: Fields = None,
+    url: str = TRIPS_URL,
+    **kwargs,
+) -> Union[List[Trip], Response, None]:
+    r"""
+
+    Returns: List[:class:`vvspy.models.Trip`]
+    Returns none on webrequest errors.
+
+    Examples
+    --------
+    Basic usage:
+
+    .. code-block:: python
+
+        results = vvspy.get_trips("5006115", "5006465", limit=3)  # Stuttgart main station to Zuffenhausen
+
+    Set proxy for request:
+
+    .. code-block:: python
+
+        proxies = {}  # see https://stackoverflow.com/a/8287752/9850709
+        results = vvspy.get_arrivals("5006115", "5006465", request_params={"proxies": proxies})
+
+    Parameters
+    ----------
+        station_id Union[:class:`int`, :class:`str`, :class:`vvspy.enums.Station`]
+            Station you want to get trips from.
+        check_time Optional[:class:`datetime.datetime`]
+            Time you want to check.
+            default datetime.now()
+        limit Optional[:class:`int`]
+            Limit request/result on this integer.
+            default 100
+        request_params Optional[:class:`dict`]
+            params parsed to the api request (e.g. proxies)
+            default {}
+        return_response Optional[:class:`bool`]
+            if set, the function returns the response object of the API request.
+        session Optional[:class:`requests.Session`]
+            if set, uses a given requests.session object for requests
+        fields Optional[:class:`dict`]
+            if set, only these fields of the response are kept (e.g. TRIP_FIELDS, see api.json_decoder.select)
+        url Optional[:class:`str`]
+            trip endpoint the request is sent to (e.g. of a stand-in server).
+            default TRIPS_URL
+        kwargs Optional[:class:`dict`]
+            Check trips.py to see all available kwargs.
+    """
+
+    if request_params is None:
+        request_params = dict()
+    params = trip_params(origin_station_id, destination_station_id, check_time, **kwargs)
+
+    send = session.get if session else requests.get
+    latency = API_REQUEST_SECONDS.labels("VVSAPI", "trips")
+    # Retried if the EFA backend fails temporarily, hedged once it is slower than its p95 latency
+    with latency.time():
+        r = RESILIENCE.send(send, url, latency=latency, **{**request_params, **{"params": params}})
 
     __logger.debug(f"Request took {r.elapsed.total_seconds()}s and returned {r.status_code}")
 
@@ -139,8 +183,46 @@ def get_trips(
 
     try:
         r.encoding = "UTF-8"
-        return _parse_response(r.json(), limit)
+        # Decoded with orjson if it is installed (see api.json_decoder)
+        return _parse_response(select(decode_response(r), fields), limit)
     except json.decoder.JSONDecodeError as e:
         __logger.error("Error in API request. Received invalid JSON. Status code: %s", r.status_code)
         raise e
 
+
+async def get_trips_async(
+    origin_station_id: Union[str, int, Station],
+    destination_station_id: Union[str, int, Station],
+    client: httpx.AsyncClient,
+    check_time: datetime = None,
+    limit: int = 100,
+    request_params: dict = None,
+    fields: Fields = None,
+    url: str = TRIPS_URL,
+    **kwargs,
+) -> Union[List[Trip], None]:
+    r"""
+    Awaitable variant of :func:`get_trips` on an httpx.AsyncClient, the request does not block a thread.
+    It is retried and hedged like the request of :func:`get_trips` and can be interrupted with the cancellation token
+    of the running state. Takes the same kwargs as :func:`get_trips`.
+    """
+    if request_params is None:
+        request_params = dict()
+    params = trip_params(origin_station_id, destination_station_id, check_time, **kwargs)
+
+    latency = API_REQUEST_SECONDS.labels("VVSAPI", "trips")
+    with latency.time():
+        r = await await_cancellable(
+            RESILIENCE.send_async(client.get, url, latency=latency, **{**request_params, **{"params": params}}))
+
+    if r.status_code != 200:
+        __logger.error("Error in API request")
+        __logger.error(f"Request: {r.status_code}")
+        __logger.error(f"{r.text}")
+        raise requests.exceptions.HTTPError(f"Error in API request: {r.status_code}")
+
+    try:
+        return _parse_response(select(decode_response(r), fields), limit)
+    except json.decoder.JSONDecodeError as e:
+        __logger.error("Error in API request. Received invalid JSON. Status code: %s", r.status_code)
+        raise e
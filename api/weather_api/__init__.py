@@ -1 +1 @@
-from .main import WeatherAPI
\ No newline at end of file
+from .main import WeatherAPI, AsyncWeatherAPI
\ No newline at end of file
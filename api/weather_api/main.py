@@ -1,27 +1,45 @@
 import datetime
-from typing import Dict
+from typing import Dict, Optional
+import httpx
 from api.api_client import APIClient
+from api.async_api_client import AsyncAPIClient
 from .weather_conditions import weather_conditions
 
 class WeatherAPI(APIClient):
     """
     API client for accessing weather data from OpenWeatherMap.
     """
-    _instance = None
+    BASE_URL = 'https://api.openweathermap.org'
+    # One client per base URL, e.g. of the real service and of a stand-in server (see api.service_redirect)
+    _instances = {}
+    # Forecasts are updated every 3 hours, the current weather every 10 minutes
+    cache_ttls = {
+        'data/2.5/forecast': 3 * 60 * 60,
+        'data/2.5/weather': 10 * 60,
+        'geo/1.0/direct': 30 * 24 * 60 * 60,
+    }
+    # The forecast is on the critical path of the morning briefing, slow requests are sent twice
+    hedge_requests = True
+    # Only the fields read by summarize_forecast / daily_forecast_from are kept of the 40 forecast entries
+    response_fields = {
+        'data/2.5/forecast': {'city': None, 'list': {'dt': None, 'dt_txt': None, 'main': None, 'weather': None}},
+    }
 
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super(WeatherAPI, cls).__new__(cls)
-        return cls._instance
+        base_url = kwargs.get('base_url', cls.BASE_URL)
+        if base_url not in cls._instances:
+            cls._instances[base_url] = super(WeatherAPI, cls).__new__(cls)
+        return cls._instances[base_url]
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = BASE_URL):
         """
         Initializes the WeatherAPI client with the provided API key.
 
         :param api_key: OpenWeatherMap API key.
+        :param base_url: Base URL of OpenWeatherMap (or of a stand-in server).
         """
         if not hasattr(self, 'initialized'):  # Ensure __init__ is only called once
-            super().__init__('https://api.openweathermap.org')
+            super().__init__(base_url)
             self.api_key = api_key
             self.initialized = True
 
@@ -46,7 +64,7 @@ class WeatherAPI(APIClient):
             'appid': self.api_key
         }
         return self.get('data/2.5/weather', params=params)
-    
+
     def get_forecast(self, city: str, units: str = 'metric') -> Dict:
         """
         Retrieves weather forecast data for the specified city.
@@ -71,7 +89,16 @@ class WeatherAPI(APIClient):
         :param units: Units of measurement ('metric', 'imperial', or 'standard').
         :return: Formatted weather forecast as a string.
         """
-        response = self.get_forecast(city, units)
+        return self.summarize_forecast(self.get_forecast(city, units))
+
+    @staticmethod
+    def summarize_forecast(response: Dict) -> str:
+        """
+        Formats the forecast of the first day as a sentence (used by get_formatted_forecast).
+
+        :param response: Weather forecast as returned by get_forecast.
+        :return: Formatted weather forecast as a string.
+        """
         daily_forecast = {}
         for item in response['list']:
             date = item['dt_txt'].split(' ')[0]
@@ -102,7 +129,17 @@ class WeatherAPI(APIClient):
         """
         
         # GEt 5day/3hr forecast
-        forecast = self.get_forecast(city, units)
+        return self.daily_forecast_from(self.get_forecast(city, units), date)
+
+    @staticmethod
+    def daily_forecast_from(forecast: Dict, date: datetime.date) -> Dict:
+        """
+        Calcs the daily weather forecast from the 5 day / 3 hour forecast (used by get_daily_forecast).
+
+        :param forecast: Weather forecast as returned by get_forecast.
+        :param date: Date for the forecast.
+        :return: Daily weather forecast as a dictionary (empty if the forecast has no data for the date).
+        """
         # Get all forcast windows for the given date
         date_str = date.strftime('%Y-%m-%d')
         weather = None
@@ -201,4 +238,56 @@ class WeatherAPI(APIClient):
                 'lat': response[0]['lat'],
                 'lon': response[0]['lon']
             }
-        return coords
\ No newline at end of file
+        return coords
+
+
+class AsyncWeatherAPI(AsyncAPIClient):
+    """
+    Async client for OpenWeatherMap on the shared httpx client (see api.async_api_client).
+    """
+    cache_ttls = WeatherAPI.cache_ttls
+    response_fields = WeatherAPI.response_fields
+
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None, base_url: str = WeatherAPI.BASE_URL):
+        """
+        :param api_key: OpenWeatherMap API key.
+        :param client: httpx client, defaults to the shared client of the running event loop.
+        :param base_url: Base URL of OpenWeatherMap (or of a stand-in server).
+        """
+        super().__init__(base_url, client=client)
+        self.api_key = api_key
+
+    def authenticate(self):
+        pass  # Authentication handled via API key in parameters
+
+    async def get_weather(self, city: str, units: str = 'metric') -> Dict:
+        """
+        Retrieves current weather data for the specified city.
+        """
+        return await self.get('data/2.5/weather', params={'q': city, 'units': units, 'appid': self.api_key})
+
+    async def get_forecast(self, city: str, units: str = 'metric') -> Dict:
+        """
+        Retrieves the 5 day / 3 hour weather forecast for the specified city.
+        """
+        return await self.get('data/2.5/forecast', params={'q': city, 'appid': self.api_key, 'units': units})
+
+    async def get_formatted_forecast(self, city: str, units: str = 'metric') -> str:
+        """
+        Retrieves the formatted weather forecast for the specified city (see WeatherAPI.get_formatted_forecast).
+        """
+        return WeatherAPI.summarize_forecast(await self.get_forecast(city, units))
+
+    async def get_daily_forecast(self, city: str, date: datetime.date = None, units: str = 'metric') -> Dict:
+        """
+        Calcs the daily weather forecast for the given location (see WeatherAPI.get_daily_forecast).
+        """
+        date = date if date is not None else datetime.datetime.today()
+        return WeatherAPI.daily_forecast_from(await self.get_forecast(city, units), date)
+
+    async def get_city_coords(self, city: str) -> Dict:
+        """
+        Retrieves the coordinates of the specified city.
+        """
+        response = await self.get('geo/1.0/direct', params={'q': city, 'appid': self.api_key})
+        return {'lat': response[0]['lat'], 'lon': response[0]['lon']}
@@ -0,0 +1,4 @@
+"""
+Benchmarks of the backend, run as modules from the project root, e.g. `python -m benchmarks.json_decode`.
+They are not collected by pytest.
+"""
@@ -0,0 +1,113 @@
+"""
+Stand-ins for the speech input and output, so the usecases can be timed without audio devices.
+"""
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+# Placeholder credentials for runs without network access (replayed requests do not check them)
+CREDENTIAL_VARIABLES = ("WEATHER_API_KEY", "FINANCE_API_KEY", "NEWS_API_KEY", "SPOTIFY_CLIENT_ID",
+                        "SPOTIFY_CLIENT_SECRET", "FITBIT_CLIENT_ID", "FITBIT_CLIENT_SECRET", "ELEVENLABS_API_KEY")
+
+
+def use_placeholder_credentials():
+    """
+    Sets the missing API keys to placeholders, before config is imported.
+    """
+    for variable in CREDENTIAL_VARIABLES:
+        os.environ.setdefault(variable, "offline")
+
+
+@contextlib.contextmanager
+def use_token_copies():
+    """
+    Points the Fitbit and Spotify clients to copies of their token files in a temporary directory, so token refreshes
+    answered by a stand-in server or a cassette do not overwrite the real tokens.
+    """
+    from api.fitbit_api.fitbit_auth import FitbitAuth
+    from api.spotify_api import spotify_auth
+
+    originals = (FitbitAuth.TOKEN_FILE, spotify_auth.TOKEN_FILE)
+    with tempfile.TemporaryDirectory(prefix="benchmark-tokens-") as directory:
+        copies = []
+        for original in originals:
+            copy = os.path.join(directory, os.path.basename(original))
+            if os.path.exists(original):
+                shutil.copyfile(original, copy)
+            copies.append(copy)
+        FitbitAuth.TOKEN_FILE, spotify_auth.TOKEN_FILE = copies
+        try:
+            yield
+        finally:
+            FitbitAuth.TOKEN_FILE, spotify_auth.TOKEN_FILE = originals
+
+
+class ScriptedTTS:
+    """
+    Replaces TTSAPI: speech output is only recorded (with its time) and speech input is answered from a script.
+    """
+    toggle_elevenlabs = False
+
+    def __init__(self, answers: Iterable[Optional[str]] = (), yes_no: bool = False):
+        """
+        :param answers: Results of `listen` in order, None (no input) once they are used up.
+        :param yes_no: Answer of all yes / no questions.
+        """
+        self.answers = deque(answers)
+        self.yes_no = yes_no
+        self.utterances: List[Tuple[float, str]] = []
+
+    def speak(self, text: str):
+        self.utterances.append((time.perf_counter(), text))
+
+    async def speak_async(self, text: str):
+        self.speak(text)
+
+    def listen(self, timeout=None) -> Optional[str]:
+        return self.answers.popleft() if self.answers else None
+
+    def ask_yes_no(self, text: str, retries: int = 3, timeout: int = 5) -> bool:
+        self.speak(text)
+        return self.yes_no
+
+    async def ask_yes_no_async(self, text: str, retries: int = 3, timeout: int = 5) -> bool:
+        return self.ask_yes_no(text, retries, timeout)
+
+    def reset(self, answers: Iterable[Optional[str]] = (), yes_no: Optional[bool] = None):
+        """
+        Forgets the recorded speech output and sets the answers of the next run, e.g. between two runs of a state
+        machine whose states keep this object.
+        """
+        self.answers = deque(answers)
+        if yes_no is not None:
+            self.yes_no = yes_no
+        self.utterances = []
+
+    def first_utterance_at(self) -> Optional[float]:
+        """
+        :return: perf_counter time of the first speech output, None if nothing was said.
+        """
+        return self.utterances[0][0] if self.utterances else None
+
+
+class BenchmarkFactory:
+    """
+    APIFactory of the benchmarks: the real API clients, with the speech output replaced by a ScriptedTTS.
+    """
+
+    def __init__(self, api_factory, tts: ScriptedTTS):
+        self.api_factory = api_factory
+        self.tts = tts
+
+    def create_api(self, api_type: str, state_machine=None):
+        if api_type == "tts":
+            return self.tts
+        return self.api_factory.create_api(api_type, state_machine)
+
+    def __getattr__(self, name):
+        # warm_up, configure_rate_limits, ... of the wrapped factory
+        return getattr(self.api_factory, name)
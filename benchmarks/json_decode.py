@@ -0,0 +1,98 @@
+"""
+Decode time and retained memory of the large API responses with the json module, orjson and selective extraction
+(see api.json_decoder).
+
+    python -m benchmarks.json_decode [--repeat 50] [--payload vvs=recorded_trips.json] [--json results.json]
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+from vvspy.trip import _parse_response
+
+from api.json_decoder import Fields, orjson, select
+from api.vvs_api.vvs_api_lib_fix import TRIP_FIELDS
+from api.weather_api.main import WeatherAPI
+from benchmarks import payloads
+from benchmarks.timing import measure, summarize
+
+PAYLOADS = {
+    "vvs": (lambda: payloads.encode(payloads.vvs_trips(100)), TRIP_FIELDS, _parse_response),
+    "fitbit_heart": (lambda: payloads.encode(payloads.fitbit_intraday("heart")), None, None),
+    "fitbit_steps": (lambda: payloads.encode(payloads.fitbit_intraday("steps")), None, None),
+    "weather": (lambda: payloads.encode(payloads.weather_forecast()),
+                WeatherAPI.response_fields['data/2.5/forecast'], None),
+}
+
+
+def retained_bytes(build: Callable[[], object]) -> int:
+    """
+    :return: Bytes still allocated by the object the function builds.
+    """
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        result = build()
+        size = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def bench_payload(body: bytes, fields: Optional[Fields], parse: Optional[Callable], repeat: int) -> Dict[str, Dict]:
+    """
+    :return: Timings (and the retained memory) by decoding variant.
+    """
+    variants = {"json": lambda: json.loads(body)}
+    if orjson is not None:
+        variants["orjson"] = lambda: orjson.loads(body)
+    loads = orjson.loads if orjson is not None else json.loads
+    if fields is not None:
+        variants["selected"] = lambda: select(loads(body), fields)
+    if parse is not None:
+        variants["json+objects"] = lambda: parse(json.loads(body))
+        if fields is not None:
+            variants["selected+objects"] = lambda: parse(select(loads(body), fields))
+
+    results = {}
+    for name, build in variants.items():
+        results[name] = {**summarize(measure(build, repeat)), "retained_kb": retained_bytes(build) / 1024}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=30, help="Measured runs per variant (default: 30).")
+    parser.add_argument("--payload", action="append", default=[], metavar="NAME=FILE",
+                        help="Use a recorded response body instead of the built payload, e.g. vvs=trips.json.")
+    parser.add_argument("--json", default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    recorded = dict(option.split("=", 1) for option in args.payload)
+    if orjson is None:
+        print("orjson is not installed, only the json module is measured", file=sys.stderr)
+
+    report = {}
+    for name, (build_body, fields, parse) in PAYLOADS.items():
+        if name in recorded:
+            with open(recorded[name], "rb") as f:
+                body = f.read()
+        else:
+            body = build_body()
+        report[name] = {"size_kb": len(body) / 1024, "variants": bench_payload(body, fields, parse, args.repeat)}
+
+        print(f"{name} ({report[name]['size_kb']:.0f} KiB)")
+        for variant, result in report[name]["variants"].items():
+            print(f"  {variant:<17} median {result['median_ms']:8.2f} ms   p95 {result['p95_ms']:8.2f} ms   "
+                  f"retained {result['retained_kb']:9.0f} KiB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Micro-benchmarks of the parsing and aggregation hot paths with growing inputs, so the complexity curve is visible and
+not only a single timing: the Rapla HTML parser, the clever-tanken scraper, the daily weather forecast, the stress
+level of the activity state, the VVS stop finder response and the sorting of the calendar.
+The network is not used, the inputs are built by benchmarks.payloads (or read from recorded responses).
+
+    python -m benchmarks.parsing [--cases rapla,stress] [--repeat 10] [--fixture rapla=page.html] [--json results.json]
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import math
+import random
+import tempfile
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+from unittest.mock import MagicMock, patch
+
+from loguru import logger
+
+from api.calendar_api import rapla
+from api.calendar_api.cal import Calendar, Lecture
+from api.petrol_api import petrol
+from api.vvs_api.main import VVSAPI
+from api.weather_api.main import WeatherAPI
+from benchmarks import payloads
+from benchmarks.timing import measure, summarize
+from usecases.activity_state import ActivityState
+
+RAPLA_URL = "https://rapla.dhbw.de/rapla/internal_calendar?file=22A&day=2&month=12&year=2024&pages=20"
+LECTURES_PER_WEEK = 8
+
+
+class Case(NamedTuple):
+    unit: str  # of the input size, singular
+    sizes: Sequence[int]
+    build: Callable[[int], Any]  # size -> input
+    load: Optional[Callable[[str], Any]]  # recorded response file -> input
+    run: Callable[[Any], object]  # input -> result, the measured call
+
+
+def _rapla(page: str):
+    # The page is returned by the patched cache lookup instead of the network, the lectures parsed last are not reused
+    rapla._parse_lectures.cache_clear()
+    with patch.object(rapla, "cached_fetch", lambda key, fetch, ttl: page):
+        return rapla.create_calendar_from_rapla(RAPLA_URL, Calendar([]))
+
+
+def _petrol(page: str):
+    petrol._station_prices.cache_clear()
+    with patch.object(petrol, "cached_fetch", lambda key, fetch, ttl: page):
+        return petrol.get_gas_stations("Stuttgart", "super-e10", 5)
+
+
+def _fitbit_days(days: int) -> tuple:
+    return (payloads.fitbit_intraday("heart", points=1440 * days), payloads.fitbit_intraday("steps", points=1440 * days))
+
+
+_activity_state = None
+
+
+def _stress(intraday: tuple):
+    global _activity_state
+    if _activity_state is None:
+        _activity_state = ActivityState(MagicMock())
+    heart, steps = intraday
+    _activity_state.fitbit_api.get_heart_data.return_value = heart
+    _activity_state.fitbit_api.get_steps_data.return_value = steps
+    return _activity_state.calculate_daily_stress_level("2024-11-25")
+
+
+def lectures(weeks: int, seed: int = 9) -> List[Lecture]:
+    """
+    :return: LECTURES_PER_WEEK lectures per week in random order, like the lectures of several Rapla pages.
+    """
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 12, 2, 9, 0).astimezone()
+    result = []
+    for index in range(weeks * LECTURES_PER_WEEK):
+        begin = start + datetime.timedelta(days=index // 2 + index // 10 * 2, hours=4 * (index % 2))
+        result.append(Lecture(f"Vorlesung {index}", begin, begin + datetime.timedelta(hours=3, minutes=15),
+                              "#8fc7e8", f"Dozent {rng.randint(1, 10)}", f"Raum {rng.randint(100, 500)}"))
+    rng.shuffle(result)
+    return result
+
+
+def _calendar_add(batches: List[List[Lecture]]):
+    calendar = Calendar([])
+    for batch in batches:
+        calendar.add_appointments(list(batch))
+    return calendar
+
+
+def _load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+CASES: Dict[str, Case] = {
+    "rapla": Case("week", (1, 5, 10, 25, 50, 100), payloads.rapla_page, _load_text, _rapla),
+    "petrol": Case("station", (10, 50, 100, 500), payloads.petrol_page, _load_text, _petrol),
+    "weather": Case("entry", (40, 400, 4000), lambda entries: payloads.weather_forecast(entries), _load_json,
+                    lambda forecast: WeatherAPI.daily_forecast_from(forecast, payloads.START.date())),
+    "stress": Case("day", (1, 2, 7, 14, 30), _fitbit_days, None, _stress),
+    "vvs_stops": Case("stop", (10, 100, 1000), lambda stops: payloads.vvs_stops("Hauptbahnhof", stops), _load_json,
+                      lambda result: VVSAPI._parse_response(None, result)),
+    # One add_appointments per week, as the calendar grows (each call sorts all appointments)
+    "calendar_add": Case("week", (1, 10, 50, 100),
+                         lambda weeks: [lectures(1, seed=week) for week in range(weeks)], None, _calendar_add),
+    "calendar_sort": Case("week", (1, 10, 50, 100), lectures, None,
+                          lambda appointments: Calendar(list(appointments))),
+}
+
+
+def growth_exponent(points: List[tuple]) -> Optional[float]:
+    """
+    :param points: (size, duration) from the smallest to the largest input.
+    :return: Exponent k of the fitted n^k between the first and the last point, None if it cannot be computed.
+    """
+    (small, small_time), (large, large_time) = points[0], points[-1]
+    if large == small or small_time <= 0 or large_time <= 0:
+        return None
+    return math.log(large_time / small_time) / math.log(large / small)
+
+
+def bench_case(case: Case, repeat: int, recorded: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    :param recorded: File of a recorded response, measured instead of the built inputs.
+    :return: Timings by input size (by "recorded" for a recorded response).
+    """
+    inputs = {"recorded": case.load(recorded)} if recorded else {str(size): case.build(size) for size in case.sizes}
+    results = {}
+    for size, value in inputs.items():
+        durations = measure(lambda: case.run(value), repeat, warm_up=1)
+        results[size] = summarize(durations)
+        if size != "recorded":
+            results[size]["per_unit_ms"] = results[size]["median_ms"] / int(size)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma separated cases (default: all).")
+    parser.add_argument("--repeat", type=int, default=10, help="Measured runs per input size (default: 10).")
+    parser.add_argument("--fixture", action="append", default=[], metavar="NAME=FILE",
+                        help="Measure a recorded response instead of the built inputs, e.g. rapla=page.html.")
+    parser.add_argument("--json", default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    recorded = dict(option.split("=", 1) for option in args.fixture)
+    # The per lecture / per request log lines would dominate the timings and the output
+    logger.disable("api")
+    logger.disable("usecases")
+    report = {}
+    with contextlib.ExitStack() as stack:
+        # calculate_daily_stress_level writes the activity data as CSV file
+        data_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="benchmark-activity-"))
+        stack.enter_context(patch.object(ActivityState, "DATA_DIR", data_dir))
+        for name in [name for name in args.cases.split(",") if name]:
+            case = CASES[name]
+            results = bench_case(case, args.repeat, recorded.get(name) if case.load else None)
+            report[name] = {"unit": case.unit, "sizes": results}
+            print(f"{name} (size in {case.unit} units)")
+            for size, result in results.items():
+                per_unit = f"   {result['per_unit_ms']:8.4f} ms per {case.unit}" if "per_unit_ms" in result else ""
+                print(f"  {size:>8}   median {result['median_ms']:9.2f} ms   p95 {result['p95_ms']:9.2f} ms{per_unit}")
+            sized = [(int(size), result["median_ms"]) for size, result in results.items() if size != "recorded"]
+            exponent = growth_exponent(sized) if len(sized) > 1 else None
+            if exponent is not None:
+                report[name]["growth_exponent"] = exponent
+                print(f"  grows with ~n^{exponent:.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
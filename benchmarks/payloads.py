@@ -0,0 +1,284 @@
+"""
+Payloads with the structure and size of the real API responses, built deterministically so the benchmarks run
+offline and give comparable numbers between commits. A recorded response body can be used instead with the
+`--payload` option of the benchmarks.
+"""
+import datetime
+import json
+import random
+
+START = datetime.datetime(2024, 11, 25, 6, 0)
+
+
+def _efa_time(time: datetime.datetime) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _stop(rng: random.Random, stop_id: int, time: datetime.datetime, prefix: str) -> dict:
+    return {
+        "isGlobalId": True,
+        "id": f"de:08111:{stop_id}",
+        "name": f"Stuttgart, Haltestelle {stop_id}",
+        "disassembledName": f"Haltestelle {stop_id}",
+        "type": "platform",
+        "pointType": "Bussteig",
+        "coord": [48.7 + rng.random() / 10, 9.1 + rng.random() / 10],
+        "niveau": 0,
+        "parent": {"id": f"de:08111:{stop_id}", "name": f"Haltestelle {stop_id}", "type": "stop",
+                   "parent": {"id": "placeID:8111000:52", "name": "Stuttgart", "type": "locality"},
+                   "properties": {"stopId": str(stop_id)}},
+        f"{prefix}TimePlanned": _efa_time(time),
+        f"{prefix}TimeEstimated": _efa_time(time + datetime.timedelta(minutes=rng.randint(0, 3))),
+        "properties": {"platform": str(rng.randint(1, 8)), "zone": "1", "AREA_NIVEAU_DIVA": "0"},
+    }
+
+
+def vvs_trips(journeys: int = 100, seed: int = 1) -> dict:
+    """
+    :return: rapidJSON trip response of the VVS EFA API (XML_TRIP_REQUEST2) with the given number of journeys.
+    """
+    rng = random.Random(seed)
+    result = {"version": "10.2.10.139", "systemMessages": [], "journeys": []}
+    for journey in range(journeys):
+        departure = START + datetime.timedelta(minutes=5 * journey)
+        legs = []
+        for leg in range(rng.randint(1, 3)):
+            duration = rng.randint(3, 25) * 60
+            arrival = departure + datetime.timedelta(seconds=duration)
+            stops = [_stop(rng, 5000000 + rng.randint(0, 9999), departure + datetime.timedelta(minutes=i), "departure")
+                     for i in range(rng.randint(4, 14))]
+            legs.append({
+                "duration": duration,
+                "isRealtimeControlled": True,
+                "origin": _stop(rng, 5006115 + leg, departure, "departure"),
+                "destination": _stop(rng, 5006465 + leg, arrival, "arrival"),
+                "transportation": {
+                    "id": f"vvs:1000{leg}: :H:j24", "name": f"Stadtbahn U{leg + 5}", "disassembledName": f"U{leg + 5}",
+                    "number": f"U{leg + 5}", "description": "Leinfelden Bahnhof - Killesberg",
+                    "product": {"id": 3, "class": 4, "name": "Stadtbahn", "iconId": 4},
+                    "operator": {"code": "01", "id": "01", "name": "SSB"},
+                    "destination": {"id": "5006465", "name": "Killesberg", "type": "stop"},
+                    "properties": {"trainNumber": str(rng.randint(100, 999)), "isROP": True},
+                },
+                "stopSequence": stops,
+                "coords": [[48.7 + rng.random() / 10, 9.1 + rng.random() / 10] for _ in range(rng.randint(50, 150))],
+                "infos": [{"priority": "normal", "id": f"info-{journey}-{leg}", "urlText": "Baustelle",
+                           "content": "Wegen Bauarbeiten kommt es zu Verspätungen. " * 4}],
+                "footPathInfo": [{"position": "AFTER", "duration": 120}],
+                "interchange": {"desc": "Fussweg", "type": 100, "coords": [[48.78, 9.18], [48.79, 9.19]]},
+                "properties": {"vehicleAccess": ["LEVEL_ENTRY"], "PlanLowFloorVehicle": "1"},
+            })
+            departure = arrival + datetime.timedelta(minutes=rng.randint(2, 8))
+        result["journeys"].append({
+            "rating": 0, "isAdditional": False, "interchanges": len(legs) - 1, "legs": legs,
+            "fare": {"tickets": [{"id": f"ticket-{i}", "name": "Einzelticket", "priceBrutto": 3.1, "currency": "EUR",
+                                  "properties": {"riderCategoryName": "Erwachsener"}} for i in range(6)],
+                     "zones": [{"net": "vvs", "toLeg": len(legs) - 1, "fromLeg": 0, "zones": [["1"]]}]},
+        })
+    return result
+
+
+def fitbit_intraday(resource: str = "heart", points: int = 1440, seed: int = 2) -> dict:
+    """
+    :param resource: "heart" or "steps".
+    :param points: Number of intraday data points (1440 for a day in 1 minute resolution).
+    :return: Intraday response of the Fitbit API for one day.
+    """
+    rng = random.Random(seed)
+    dataset = []
+    for minute in range(points):
+        time = f"{minute // 60 % 24:02}:{minute % 60:02}:00"
+        value = rng.randint(55, 140) if resource == "heart" else rng.choice([0, 0, 0, rng.randint(1, 120)])
+        dataset.append({"time": time, "value": value})
+    if resource == "heart":
+        summary = [{"dateTime": "2024-11-25", "value": {
+            "customHeartRateZones": [], "restingHeartRate": 62,
+            "heartRateZones": [{"caloriesOut": 1800.5, "max": 101, "min": 30, "minutes": 1200, "name": "Out of Range"},
+                               {"caloriesOut": 300.2, "max": 141, "min": 101, "minutes": 40, "name": "Fat Burn"}]}}]
+    else:
+        summary = [{"dateTime": "2024-11-25", "value": str(sum(point["value"] for point in dataset))}]
+    return {f"activities-{resource}": summary,
+            f"activities-{resource}-intraday": {"dataset": dataset, "datasetInterval": 1, "datasetType": "minute"}}
+
+
+def weather_forecast(entries: int = 40, seed: int = 3) -> dict:
+    """
+    :return: 5 day / 3 hour forecast of OpenWeatherMap (data/2.5/forecast) with the given number of entries.
+    """
+    rng = random.Random(seed)
+    forecast = []
+    for entry in range(entries):
+        time = START + datetime.timedelta(hours=3 * entry)
+        temp = round(rng.uniform(-2, 12), 2)
+        forecast.append({
+            "dt": int(time.replace(tzinfo=datetime.timezone.utc).timestamp()),
+            "main": {"temp": temp, "feels_like": temp - 2, "temp_min": temp - 1, "temp_max": temp + 1,
+                     "pressure": 1015, "sea_level": 1015, "grnd_level": 970, "humidity": rng.randint(50, 99),
+                     "temp_kf": 0.5},
+            "weather": [{"id": 803, "main": "Clouds", "description": "überwiegend bewölkt", "icon": "04d"}],
+            "clouds": {"all": rng.randint(0, 100)},
+            "wind": {"speed": rng.uniform(0, 8), "deg": rng.randint(0, 359), "gust": rng.uniform(0, 12)},
+            "visibility": 10000,
+            "pop": rng.random(),
+            "sys": {"pod": "d"},
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    return {"cod": "200", "message": 0, "cnt": entries, "list": forecast,
+            "city": {"id": 2825297, "name": "Stuttgart", "coord": {"lat": 48.7823, "lon": 9.177}, "country": "DE",
+                     "population": 589793, "timezone": 3600, "sunrise": 1732517000, "sunset": 1732548000}}
+
+
+def weather_current(seed: int = 4) -> dict:
+    """
+    :return: Current weather of OpenWeatherMap (data/2.5/weather).
+    """
+    rng = random.Random(seed)
+    temp = round(rng.uniform(-2, 12), 2)
+    return {"coord": {"lon": 9.177, "lat": 48.7823},
+            "weather": [{"id": 803, "main": "Clouds", "description": "überwiegend bewölkt", "icon": "04d"}],
+            "base": "stations",
+            "main": {"temp": temp, "feels_like": temp - 2, "temp_min": temp - 1, "temp_max": temp + 1,
+                     "pressure": 1015, "humidity": rng.randint(50, 99)},
+            "visibility": 10000, "wind": {"speed": rng.uniform(0, 8), "deg": rng.randint(0, 359)},
+            "clouds": {"all": rng.randint(0, 100)}, "dt": 1732517000,
+            "sys": {"country": "DE", "sunrise": 1732517000, "sunset": 1732548000},
+            "timezone": 3600, "id": 2825297, "name": "Stuttgart", "cod": 200}
+
+
+def finance_top_movers(tickers: int = 20, seed: int = 5) -> dict:
+    """
+    :return: TOP_GAINERS_LOSERS response of Alpha Vantage with the given number of tickers per list.
+    """
+    rng = random.Random(seed)
+
+    def ticker(index: int) -> dict:
+        price = rng.uniform(1, 500)
+        change = rng.uniform(-0.2, 0.2) * price
+        return {"ticker": f"T{index:03}", "price": f"{price:.4f}", "change_amount": f"{change:.4f}",
+                "change_percentage": f"{change / price * 100:.4f}%", "volume": str(rng.randint(10 ** 5, 10 ** 9))}
+
+    return {"metadata": "Top gainers, losers, and most actively traded US tickers",
+            "last_updated": "2024-11-25 16:15:59 US/Eastern",
+            "top_gainers": [ticker(i) for i in range(tickers)],
+            "top_losers": [ticker(i) for i in range(tickers, 2 * tickers)],
+            "most_actively_traded": [ticker(i) for i in range(2 * tickers, 3 * tickers)]}
+
+
+def finance_overview(symbol: str) -> dict:
+    """
+    :return: OVERVIEW response of Alpha Vantage for the symbol.
+    """
+    return {"Symbol": symbol, "AssetType": "Common Stock", "Name": f"{symbol} Incorporated", "Exchange": "NASDAQ",
+            "Currency": "USD", "Country": "USA", "Sector": "TECHNOLOGY",
+            "Description": f"{symbol} Incorporated is a company used in the benchmarks. " * 10}
+
+
+def vvs_stops(name: str, stops: int = 10, seed: int = 6) -> dict:
+    """
+    :return: rapidJSON stop finder response of the VVS EFA API (XML_STOPFINDER_REQUEST).
+    """
+    rng = random.Random(seed)
+    locations = []
+    for index in range(stops):
+        stop_id = 5006115 + index
+        locations.append({
+            "id": f"de:08111:{stop_id}", "isGlobalId": True, "name": f"Stuttgart, {name} {index}",
+            "disassembledName": f"{name} {index}", "coord": [48.7 + rng.random() / 10, 9.1 + rng.random() / 10],
+            "type": "stop", "matchQuality": 1000 - index, "isBest": index == 0, "productClasses": [1, 3, 5],
+            "parent": {"id": "placeID:8111000:52", "name": "Stuttgart", "type": "locality"},
+            "properties": {"stopId": str(stop_id)},
+        })
+    return {"version": "10.2.10.139", "systemMessages": [], "locations": locations}
+
+
+def news_headlines(articles: int = 10) -> dict:
+    """
+    :return: top-headlines response of NewsAPI, the article URLs point to www.zeit.de.
+    """
+    return {"status": "ok", "totalResults": articles, "articles": [{
+        "source": {"id": "die-zeit", "name": "Zeit Online"}, "author": "ZEIT ONLINE",
+        "title": f"Schlagzeile {index} &amp; Meldung", "description": f"Beschreibung der Meldung {index}.",
+        "url": f"https://www.zeit.de/news/2024-11/25/meldung-{index}",
+        "urlToImage": None, "publishedAt": "2024-11-25T06:00:00Z", "content": f"Inhalt der Meldung {index}",
+    } for index in range(articles)]}
+
+
+def news_article(paragraphs: int = 10) -> str:
+    """
+    :return: HTML page of an article with the `articleBody` line the NewsAPI client extracts.
+    """
+    body = "Der Text der Meldung geht weiter. " * 10 * paragraphs
+    return ("<html><head><script type=\"application/ld+json\">\n{\n"
+            f'  "articleBody": "{body}© dpa-infocom",\n'
+            "}\n</script></head><body>" + "<p>Absatz</p>" * paragraphs + "</body></html>")
+
+
+def fitbit_sleep(date: str = "2024-11-25") -> dict:
+    """
+    :return: Sleep log of the Fitbit API (1.2/user/-/sleep/date/{date}.json).
+    """
+    day = datetime.date.fromisoformat(date)
+    start = datetime.datetime.combine(day - datetime.timedelta(days=1), datetime.time(23, 10))
+    return {"sleep": [{"dateOfSleep": date, "duration": 27000000, "efficiency": 93, "isMainSleep": True,
+                       "startTime": start.strftime("%Y-%m-%dT%H:%M:%S.000"),
+                       "endTime": (start + datetime.timedelta(hours=7.5)).strftime("%Y-%m-%dT%H:%M:%S.000"),
+                       "minutesAsleep": 420, "minutesAwake": 30, "timeInBed": 450, "type": "stages"}],
+            "summary": {"totalMinutesAsleep": 420, "totalSleepRecords": 1, "totalTimeInBed": 450}}
+
+
+def rapla_page(weeks: int = 20, seed: int = 7, first_monday: datetime.date = datetime.date(2024, 12, 2)) -> str:
+    """
+    :return: HTML of a Rapla calendar with the given number of week tables, in the structure
+        api.calendar_api.rapla parses (one to two lectures per day).
+    """
+    rng = random.Random(seed)
+    tables = []
+    for week in range(weeks):
+        monday = first_monday + datetime.timedelta(weeks=week)
+        header = "".join(f'<td class="week_header">{name} {(monday + datetime.timedelta(days=day)):%d.%m.}</td>'
+                         for day, name in enumerate(["Mo", "Di", "Mi", "Do", "Fr"]))
+        rows = [f"<tr>{header}</tr>", '<tr><td class="week_number">KW</td></tr>']
+        for start, end in (("09:00", "12:15"), ("13:00", "16:15")):
+            cells = []
+            for day in range(5):
+                if rng.random() < 0.8:
+                    cells.append('<td class="week_smallseparatorcell"></td>'
+                                 f'<td class="week_block" style="background-color:#{rng.randint(0, 0xffffff):06x}">'
+                                 f'<a href="#">{start} -{end}Vorlesung {rng.randint(1, 30)}</a>'
+                                 f'<span class="person">Dozent {rng.randint(1, 10)}</span>'
+                                 f'<span class="resource">Raum {rng.randint(100, 500)}</span></td>'
+                                 '<td class="week_separatorcell"></td>')
+                else:
+                    cells.append('<td class="week_smallseparatorcell"></td><td class="week_emptycell"></td>'
+                                 '<td class="week_separatorcell"></td>')
+            rows.append(f"<tr>{''.join(cells)}</tr>")
+        tables.append(f'<table class="week_table">{"".join(rows)}</table>')
+    return f"<html><body>{''.join(tables)}</body></html>"
+
+
+def _german_number(value: float, digits: int) -> str:
+    return f"{value:.{digits}f}".replace(".", ",")
+
+
+def petrol_page(stations: int = 20, seed: int = 8) -> str:
+    """
+    :return: HTML of a clever-tanken price list with the average price and the map script api.petrol_api.petrol
+        parses.
+    """
+    rng = random.Random(seed)
+    prices = [rng.uniform(1.55, 1.95) for _ in range(stations)]
+    average = sum(prices) / len(prices) if prices else 0
+    pois = "\n".join(f"    map.addPoi('{index}', '48.{rng.randint(0, 9999)}', '9.{rng.randint(0, 9999)}', "
+                     f"'Tankstelle {index}', '{_german_number(price, 3)}');" for index, price in enumerate(prices))
+    entries = "".join(f'<div class="price-entry">Tankstelle {index}</div>' for index in range(stations))
+    return ('<html><body><div class="city-price-average"><span>Super E10</span><span>Stuttgart</span>'
+            f'<div class="city-price-average-text">{_german_number(average, 2)}</div></div>'
+            f'<div class="list">{entries}</div>'
+            f"<script>\n    map.addPoi('Standort', '48.78', '9.18');\n{pois}\n</script></body></html>")
+
+
+def encode(payload: dict) -> bytes:
+    """
+    :return: The payload as the UTF-8 JSON body of a response.
+    """
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
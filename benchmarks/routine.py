@@ -0,0 +1,202 @@
+"""
+End-to-end benchmark of the routines: drives the StateMachine through idle -> welcome -> news -> idle (morning) and
+idle -> activity -> idle (activity) with scripted speech in- and output, and reports the time until the first
+speech output and the duration of each state as p50 / p95 / p99 over N runs.
+
+The network I/O is served by an in-process stand-in server (default, see benchmarks.stand_in), an external stand-in
+(--base-url) or a recorded cassette (--cassette, see api.cassette; recorded on the same day, the Fitbit requests
+contain the date):
+    python -m benchmarks.routine --runs 50 --latency 0.05 --json results/routine.json
+    python -m benchmarks.routine --runs 50 --baseline results/routine.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.harness import BenchmarkFactory, ScriptedTTS, use_placeholder_credentials, use_token_copies
+from benchmarks.timing import summarize
+
+# Trigger that starts the routine from idle and the states it passes through
+ROUTES = {
+    "morning": ("start", ("welcome", "news", "idle")),
+    "activity": ("idle_activity", ("activity", "idle")),
+}
+# Answers of the user: listen to the news, no article summary, play the suggested music
+ANSWERS = ["nein"]
+YES_NO = True
+
+
+def clear_caches(state_machine):
+    """
+    Empties the response caches and the briefing of the welcome state, so every run sends its requests.
+    """
+    from api.conditional_get import CONDITIONAL_CACHE
+    from api.response_cache import RESPONSE_CACHE
+    RESPONSE_CACHE.clear()
+    CONDITIONAL_CACHE.clear()
+    if "welcome" in state_machine.__dict__:
+        state_machine.welcome.briefing.clear()
+
+
+def create_state_machine(tts: ScriptedTTS, events: List, base_url: Optional[str] = None):
+    """
+    :param events: Receives (perf_counter time, state) of every state change.
+    :param base_url: Base URL of the stand-in server the API clients send their requests to, None for the real services
+        (e.g. replayed from a cassette).
+    :return: A state machine with the real states and API clients, whose idle state returns immediately.
+    """
+    from usecases.event_sink import EVENT_STATE_CHANGED, CallbackEventSink
+    from usecases.idle_state import IdleState
+    from usecases.state_machine import StateMachine
+
+    def on_event(event, data):
+        if event == EVENT_STATE_CHANGED:
+            events.append((time.perf_counter(), data))
+
+    # The idle state is a singleton, it would keep the state machine of an earlier run
+    IdleState._instance = None
+    state_machine = StateMachine(event_sinks=[CallbackEventSink(on_event)], api_base_url=base_url)
+    # The idle state returns instead of waiting for triggers, the benchmark fires them
+    state_machine.testing = True
+    state_machine.api_factory = BenchmarkFactory(state_machine.api_factory, tts)
+    return state_machine
+
+
+def run_route(state_machine, tts: ScriptedTTS, events: List, route: str) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Runs a routine once, starting in idle.
+
+    :return: Per state of the route (and "total") the seconds until the first speech output ("first_speech", None if
+        nothing was said) and until the next state was entered ("duration").
+    :raises RuntimeError: If the states differ from the route, e.g. because a request failed.
+    """
+    trigger, expected_states = ROUTES[route]
+    clear_caches(state_machine)
+    tts.reset(ANSWERS, YES_NO)
+    events.clear()
+    start = time.perf_counter()
+    getattr(state_machine, trigger)()
+    end = time.perf_counter()
+
+    states = [state for _, state in events]
+    if tuple(states) != expected_states:
+        raise RuntimeError(f"Route {route} passed through {states} instead of {list(expected_states)}")
+    speech = [at for at, _ in tts.utterances]
+    result = {}
+    entries = [at for at, _ in events] + [end]
+    for (entered, state), left in zip(events, entries[1:]):
+        first = next((at for at in speech if entered <= at < left), None)
+        result[state] = {"first_speech": first - entered if first is not None else None, "duration": left - entered}
+    result["total"] = {"first_speech": speech[0] - start if speech else None, "duration": end - start}
+    return result
+
+
+def aggregate(runs: List[Dict[str, Dict[str, Optional[float]]]]) -> Dict[str, Dict[str, Optional[dict]]]:
+    """
+    :return: Per state the summary (see benchmarks.timing.summarize) of the first speech and the duration.
+    """
+    report = {}
+    for state in runs[0]:
+        report[state] = {}
+        for metric in ("first_speech", "duration"):
+            values = [run[state][metric] for run in runs if run[state][metric] is not None]
+            report[state][metric] = summarize(values) if values else None
+    return report
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    for route, states in report["routes"].items():
+        print(f"{route} ({report['runs']} runs)")
+        for state, metrics in states.items():
+            for metric, summary in metrics.items():
+                if summary is None:
+                    continue
+                line = (f"  {state:<9} {metric:<13} p50 {summary['median_ms']:8.1f} ms   p95 {summary['p95_ms']:8.1f} ms"
+                        f"   p99 {summary['p99_ms']:8.1f} ms")
+                previous = ((baseline or {}).get("routes", {}).get(route, {}).get(state, {}) or {}).get(metric)
+                if previous:
+                    change = (summary["median_ms"] - previous["median_ms"]) / previous["median_ms"] * 100
+                    line += f"   p50 {change:+6.1f} % vs {baseline.get('commit') or 'baseline'}"
+                print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", default=",".join(ROUTES), help="Comma separated routes (default: all).")
+    parser.add_argument("--runs", type=int, default=20, help="Measured runs per route (default: 20).")
+    parser.add_argument("--warm-up", type=int, default=1,
+                        help="Runs per route that are not measured, they build the states and clients (default: 1).")
+    parser.add_argument("--cassette", default=None, help="Replay this cassette instead of using a stand-in server.")
+    parser.add_argument("--cassette-latency", default="recorded", help='"recorded" or seconds (default: recorded).')
+    parser.add_argument("--base-url", default=None, help="Use a running stand-in server instead of starting one.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latency of the stand-in server in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Additional random latency of the stand-in server.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Error rate of the stand-in server (0 to 1).")
+    parser.add_argument("--scale", type=int, default=1, help="Payload scale of the stand-in server.")
+    parser.add_argument("--json", default=None, help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare the p50 with.")
+    args = parser.parse_args(argv)
+
+    use_placeholder_credentials()
+    from api.cassette import RECORDED_LATENCY, REPLAY, use_cassette
+    from benchmarks.stand_in import StandInServer
+
+    routes = [route for route in args.routes.split(",") if route]
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(use_token_copies())
+        base_url = None
+        if args.cassette:
+            latency = args.cassette_latency
+            stack.enter_context(use_cassette(args.cassette, REPLAY,
+                                             latency if latency == RECORDED_LATENCY else float(latency)))
+        else:
+            base_url = args.base_url
+            if base_url is None:
+                stand_in = stack.enter_context(StandInServer(latency=args.latency, jitter=args.jitter,
+                                                             error_rate=args.error_rate, scale=args.scale, seed=1))
+                base_url = stand_in.base_url
+
+        tts = ScriptedTTS()
+        events = []
+        state_machine = create_state_machine(tts, events, base_url)
+        results = {}
+        for route in routes:
+            for _ in range(args.warm_up):
+                run_route(state_machine, tts, events, route)
+            results[route] = aggregate([run_route(state_machine, tts, events, route) for _ in range(args.runs)])
+        state_machine.stop()
+
+    report = {
+        "benchmark": "routine",
+        "commit": git_commit(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "runs": args.runs,
+        "network": ({"cassette": args.cassette, "latency": args.cassette_latency} if args.cassette else
+                    {"base_url": args.base_url, "latency": args.latency, "jitter": args.jitter,
+                     "error_rate": args.error_rate, "scale": args.scale}),
+        "routes": results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
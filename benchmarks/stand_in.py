@@ -0,0 +1,261 @@
+"""
+Local stand-in for all external services (OpenWeatherMap, Alpha Vantage, VVS EFA, NewsAPI and the article pages,
+Fitbit, Spotify, ElevenLabs, Ollama, Rapla and clever-tanken), for concurrency and soak tests of the real code paths.
+Latency, error rate and payload size are configurable.
+
+Start it and point the application at it, the APIFactory then creates the clients with the URLs on the stand-in
+(see api.service_redirect):
+    python -m benchmarks.stand_in --port 8765 --latency 0.05 --jitter 0.02 --error-rate 0.01 --scale 2
+    API_BASE_URL=http://127.0.0.1:8765 python headless.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import payloads
+
+# (status, content type, body)
+Response = Tuple[int, str, bytes]
+
+JSON = "application/json"
+HTML = "text/html; charset=utf-8"
+AUDIO_CHUNK_SIZE = 4096
+
+
+def _json(payload, status: int = 200) -> Response:
+    return status, JSON, payloads.encode(payload)
+
+
+def _html(page: str) -> Response:
+    return 200, HTML, page.encode("utf-8")
+
+
+def _token() -> Response:
+    return _json({"access_token": "stand-in", "refresh_token": "stand-in", "token_type": "Bearer",
+                  "expires_in": 28800, "expires_at": time.time() + 28800})
+
+
+class StandInServer:
+    """
+    HTTP server that answers the requests of all API clients with generated payloads (see benchmarks.payloads).
+    The path of a request starts with the service (see api.service_redirect.SERVICE_ORIGINS), followed by the path of
+    the real service.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, scale: int = 1, seed: Optional[int] = None):
+        """
+        :param port: Port to listen on, 0 for a free port.
+        :param latency: Seconds each response is delayed.
+        :param jitter: Additional random delay of up to this many seconds.
+        :param error_rate: Share of the requests answered with error_status (0 to 1).
+        :param scale: Multiplies the size of the payloads (number of journeys, articles, stations, weeks, ...).
+        :param seed: Seed of the delays and errors, for repeatable runs.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.scale = scale
+        self.requests = Counter()  # service -> number of requests
+        self.errors = Counter()  # service -> number of injected errors
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.routes: Dict[str, Callable[[str, str, dict, bytes], Optional[Response]]] = {
+            "weather": self._weather,
+            "finance": self._finance,
+            "vvs": self._vvs,
+            "news": self._news,
+            "articles": self._article,
+            "fitbit": self._fitbit,
+            "spotify": self._spotify,
+            "spotify-accounts": lambda method, path, query, body: _token(),
+            "elevenlabs": self._elevenlabs,
+            "ollama": self._ollama,
+            "rapla": lambda method, path, query, body: _html(payloads.rapla_page(weeks=20 * self.scale)),
+            "petrol": lambda method, path, query, body: _html(payloads.petrol_page(stations=20 * self.scale)),
+        }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stand-in-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle(self, method: str, target: str, body: bytes) -> Response:
+        """
+        Answers a request, incl. the configured delay and errors.
+
+        :param target: Path and query of the request.
+        """
+        parts = urlsplit(target)
+        service, _, path = parts.path.lstrip("/").partition("/")
+        route = self.routes.get(service)
+        with self._lock:
+            self.requests[service] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.jitter else self.latency
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors[service] += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return _json({"error": "Injected error of the stand-in server"}, self.error_status)
+        response = route(method, "/" + path, parse_qs(parts.query), body) if route is not None else None
+        if response is None:
+            return _json({"error": f"Unknown endpoint {method} {parts.path}"}, 404)
+        return response
+
+    def _weather(self, method, path, query, body) -> Optional[Response]:
+        if path == "/data/2.5/weather":
+            return _json(payloads.weather_current())
+        if path == "/data/2.5/forecast":
+            return _json(payloads.weather_forecast(entries=40 * self.scale))
+        if path == "/geo/1.0/direct":
+            return _json([{"name": query.get("q", ["Stuttgart"])[0], "lat": 48.7823, "lon": 9.177, "country": "DE"}])
+        return None
+
+    def _finance(self, method, path, query, body) -> Optional[Response]:
+        function = query.get("function", [""])[0]
+        if function == "TOP_GAINERS_LOSERS":
+            return _json(payloads.finance_top_movers(tickers=20 * self.scale))
+        if function == "OVERVIEW":
+            return _json(payloads.finance_overview(query.get("symbol", ["IBM"])[0]))
+        return _json({})
+
+    def _vvs(self, method, path, query, body) -> Optional[Response]:
+        if path.endswith("/XML_STOPFINDER_REQUEST"):
+            return _json(payloads.vvs_stops(query.get("name_sf", ["Hauptbahnhof"])[0], stops=10 * self.scale))
+        if path.endswith("/XML_TRIP_REQUEST2"):
+            return _json(payloads.vvs_trips(journeys=6 * self.scale))
+        return None
+
+    def _news(self, method, path, query, body) -> Optional[Response]:
+        if path == "/v2/top-headlines":
+            return _json(payloads.news_headlines(articles=10 * self.scale))
+        return None
+
+    def _article(self, method, path, query, body) -> Response:
+        return _html(payloads.news_article(paragraphs=10 * self.scale))
+
+    def _fitbit(self, method, path, query, body) -> Optional[Response]:
+        if path == "/oauth2/token":
+            return _token()
+        match = re.match(r"^/1/user/-/activities/(heart|steps)/date/[\d-]+/1d/1min\.json$", path)
+        if match:
+            return _json(payloads.fitbit_intraday(match.group(1)))
+        match = re.match(r"^/1\.2/user/-/sleep/date/([\d-]+)\.json$", path)
+        if match:
+            return _json(payloads.fitbit_sleep(match.group(1)))
+        return None
+
+    def _spotify(self, method, path, query, body) -> Optional[Response]:
+        if path == "/v1/me/playlists":
+            return _json({"items": [{"id": f"playlist{index}", "name": f"Playlist {index}"}
+                                    for index in range(5 * self.scale)], "total": 5 * self.scale})
+        if path == "/v1/me/player/devices":
+            return _json({"devices": [{"id": "device0", "name": "Stand-in", "type": "Computer", "is_active": True}]})
+        if path in ("/v1/me/player/play", "/v1/me/player/pause"):
+            return 204, JSON, b""
+        return None
+
+    def _elevenlabs(self, method, path, query, body) -> Optional[Response]:
+        if method == "POST" and path.startswith("/v1/text-to-speech/"):
+            # Roughly the size of the MP3 of a spoken sentence, sent in chunks like the streaming endpoint
+            return 200, "audio/mpeg", bytes(32 * 1024 * self.scale)
+        return None
+
+    def _ollama(self, method, path, query, body) -> Optional[Response]:
+        if path == "/api/chat":
+            request = json.loads(body or b"{}")
+            return _json({"model": request.get("model", "llama3.2:1b"), "created_at": "2024-11-25T06:00:00Z",
+                          "message": {"role": "assistant",
+                                      "content": "Dies ist eine Zusammenfassung des Artikels. " * self.scale},
+                          "done_reason": "stop", "done": True})
+        if path == "/api/tags":
+            return _json({"models": [{"name": "llama3.2:1b", "model": "llama3.2:1b"}]})
+        return None
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the real services, so the connection pools of the clients are used
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, content_type, content = stand_in.handle(self.command, self.path, body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if content_type == "audio/mpeg":
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for start in range(0, len(content), AUDIO_CHUNK_SIZE):
+                        chunk = content[start:start + AUDIO_CHUNK_SIZE]
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each response is delayed.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Additional random delay in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failed requests (0 to 1).")
+    parser.add_argument("--error-status", type=int, default=503, help="Status of the failed requests.")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplies the size of the payloads.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = StandInServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status,
+                           args.scale, args.seed)
+    print(f"Stand-in server listening on {server.base_url} (API_BASE_URL={server.base_url})")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+        print("Requests: " + ", ".join(f"{service} {count}" for service, count in sorted(server.requests.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import statistics
+import time
+from typing import Callable, Dict, List
+
+
+def measure(func: Callable[[], object], repeat: int = 20, warm_up: int = 2) -> List[float]:
+    """
+    Calls the function `repeat` times after `warm_up` calls that are not measured.
+
+    :return: Duration of each call in seconds.
+    """
+    for _ in range(warm_up):
+        func()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    :param q: Quantile between 0 and 1, e.g. 0.95 for p95.
+    :return: Nearest-rank percentile of the values.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))]
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    """
+    :return: Median, p95, p99 and minimum of the durations in milliseconds.
+    """
+    return {
+        "median_ms": statistics.median(durations) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+        "min_ms": min(durations) * 1000,
+    }
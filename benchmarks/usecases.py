@@ -0,0 +1,109 @@
+"""
+Times the on_enter of the usecases with recorded network I/O (see api.cassette), so the numbers are reproducible
+on a machine without network access or API keys.
+
+Record once with live keys (Fitbit and Spotify also need their token files):
+    python -m benchmarks.usecases --mode record --cassette benchmarks/cassettes/usecases.json.gz
+Replay with the recorded latency, a fixed latency or none:
+    python -m benchmarks.usecases --cassette benchmarks/cassettes/usecases.json.gz --latency 0 --repeat 20
+"""
+import argparse
+import contextlib
+import json
+import time
+from unittest.mock import MagicMock
+
+from benchmarks.harness import BenchmarkFactory, ScriptedTTS, use_placeholder_credentials, use_token_copies
+from benchmarks.timing import summarize
+
+STATES = ("welcome", "finance", "news", "activity")
+
+
+def create_state(name: str, tts: ScriptedTTS):
+    from api.api_factory import APIFactory
+    from config import CONFIG
+    from config.preferences import load_preferences_file
+    from usecases.activity_state import ActivityState
+    from usecases.financetracker_state import FinanceState
+    from usecases.news_state import NewsState
+    from usecases.welcome_state import WelcomeState
+
+    state_classes = {"welcome": WelcomeState, "finance": FinanceState, "news": NewsState, "activity": ActivityState}
+    # The transitions the states trigger at their end are no-ops
+    state_machine = MagicMock()
+    state_machine.preferences = load_preferences_file()
+    state_machine.api_factory = BenchmarkFactory(APIFactory(CONFIG), tts)
+    return state_classes[name](state_machine)
+
+
+def clear_caches():
+    from api.conditional_get import CONDITIONAL_CACHE
+    from api.response_cache import RESPONSE_CACHE
+    RESPONSE_CACHE.clear()
+    CONDITIONAL_CACHE.clear()
+
+
+def run_state(name: str) -> dict:
+    """
+    Runs the on_enter of a new state object with cold caches.
+
+    :return: Seconds until the first speech output and until on_enter returned.
+    """
+    clear_caches()
+    tts = ScriptedTTS(answers=["nein"])
+    state = create_state(name, tts)
+    start = time.perf_counter()
+    state.on_enter()
+    end = time.perf_counter()
+    first = tts.first_utterance_at()
+    return {"first_speech": (first - start) if first is not None else None, "total": end - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default="benchmarks/cassettes/usecases.json.gz", help="Cassette file.")
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--latency", default="recorded",
+                        help='Replay delay per request: "recorded" or seconds (default: recorded).')
+    parser.add_argument("--states", default=",".join(STATES), help="Comma separated states (default: all).")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per state in replay mode (default: 5).")
+    parser.add_argument("--json", default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    if args.mode == "replay":
+        use_placeholder_credentials()
+    from api.cassette import RECORDED_LATENCY, use_cassette
+
+    latency = args.latency if args.latency == RECORDED_LATENCY else float(args.latency)
+    states = [state for state in args.states.split(",") if state]
+    repeat = 1 if args.mode == "record" else args.repeat
+
+    report = {}
+    # Replayed token refreshes must not overwrite the real tokens, recorded ones must be kept
+    tokens = use_token_copies() if args.mode == "replay" else contextlib.nullcontext()
+    with tokens, use_cassette(args.cassette, args.mode, latency):
+        for name in states:
+            try:
+                runs = [run_state(name) for _ in range(repeat)]
+            except Exception as e:
+                # E.g. a request that is not on the cassette (CassetteMiss)
+                print(f"{name:<9} failed: {e}")
+                report[name] = {"error": str(e)}
+                continue
+            first_speech = [run["first_speech"] for run in runs if run["first_speech"] is not None]
+            report[name] = {"total": summarize([run["total"] for run in runs]),
+                            "first_speech": summarize(first_speech) if first_speech else None}
+            print(f"{name:<9} total median {report[name]['total']['median_ms']:8.1f} ms   "
+                  f"p95 {report[name]['total']['p95_ms']:8.1f} ms", end="")
+            if first_speech:
+                print(f"   first speech median {report[name]['first_speech']['median_ms']:8.1f} ms")
+            else:
+                print()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
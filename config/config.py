@@ -22,4 +22,6 @@ CONFIG = {
     'fitbit_client_id': get_env_variable('FITBIT_CLIENT_ID'),
     'fitbit_client_secret': get_env_variable('FITBIT_CLIENT_SECRET'),
     'elevenlabs_key': get_env_variable('ELEVENLABS_API_KEY'),
+    # Optional: base URL of a stand-in server that answers instead of the external services (see benchmarks.stand_in)
+    'api_base_url': os.getenv('API_BASE_URL'),
 }
\ No newline at end of file
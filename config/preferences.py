@@ -0,0 +1,56 @@
+import json
+import os
+
+PREFERENCES_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'preferences.json')
+
+def load_preferences_file() -> dict:
+    """Loads and returns preferences from a JSON file.
+
+    This function loads the preferences stored in a JSON file and returns them as a dictionary. 
+    If the file is not found, or if the JSON is invalid, it returns an empty dictionary.
+
+    The dictionary returned contains the following possible keys and their corresponding types:
+        - "enable_elevenlabs" (bool): (0 / 1) Enable or disable the Elevenlabs API for text-to-speech.
+        - "enable_async_runtime" (bool): (0 / 1) Run states with an on_enter_async coroutine on the asyncio runtime.
+        - "enable_api_cache" (bool): (0 / 1) Keep the API responses in data/api_cache.sqlite3 to serve them after a restart.
+        - "enable_rate_limits" (bool): (0 / 1) Limit the requests to the free tier quotas of the APIs (ledger in data/rate_limits.sqlite3).
+        - "metrics_port" (int): Port of the local Prometheus metrics endpoint (0 disables it, e.g. 9464).
+        - "metrics_file" (str): JSONL file the latency histograms are appended to ("" disables it).
+        - "metrics_interval" (int): Seconds between two snapshots in the metrics file (e.g. 60).
+        - "profile_dir" (str): Directory for a cProfile profile of every state entry ("" disables it, see api.profiling).
+        - "profile_keep" (int): Number of profiles kept in the profile directory (e.g. 20).
+        - "profile_api_calls" (str): Comma separated API clients whose requests are profiled too (e.g. "WeatherAPI,VVSAPI", "*" for all).
+        - "mic_id" (int): ID of the microphone to use for speech recognition.
+        - "fuel_type" (str): Type of fuel (e.g., "diesel").
+        - "fuel_threshold" (float): Fuel threshold in € (e.g., 1.5).
+        - "fuel_step_size" (float): Step size for fuel threshold in € (e.g., 0.05).
+        - "fuel_radius" (float): Radius for fuel search in km (e.g., 5.0).
+        - "fuel_demo_price" (float): Price for fuel demo in € (0.0 indicates using the API).
+        - "alarm_time" (str): Alarm time in HH:MM format (e.g., "08:00").
+        - "default_alarm_time" (str): Default alarm time in HH:MM format (e.g., "08:00").
+        - "briefing_prefetch_lead_minutes" (int): Minutes before the default alarm time the morning briefing is prefetched (e.g., 10).
+        - "sleep_time" (str): Sleep time in HH:MM format (e.g., "22:00").
+        - "home_location" (dict): Details of the home location, including:
+            - "name" (str): Name of the location (e.g., "asperg").
+            - "vvs_code" (str): VVS code for the location (e.g., "de:08118:7400").
+            - "address" (dict): Address details, including:
+                - "street" (str): Street name (e.g., "Alleenstraße").
+                - "number" (str): Street number (e.g., "1").
+                - "zipcode" (str): Zipcode (e.g., "71679").
+                - "city" (str): City name (e.g., "Asperg").
+                - "country" (str): Country name (e.g., "Germany").
+            - "coordinates" (dict): Geographical coordinates, including:
+                - "latitude" (float): Latitude of the location (e.g., 48.907256).
+                - "longitude" (float): Longitude of the location (e.g., 9.147977).
+        - "default_destination" (dict): Details of the default destination, structured similarly to "home_location".
+
+    Returns:
+        dict: A dictionary containing the loaded preferences, or an empty dictionary if the file is not found or invalid.
+    """
+    try:
+        with open(PREFERENCES_FILE, 'r') as file:
+            preferences = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        preferences = {}
+        
+    return preferences
@@ -6,7 +6,9 @@ from loguru import logger
 
 from frontend.ui_templates.main_window import Ui_MainWindow
 from frontend.config_manager import ConfigManager
+from frontend.qt_event_sink import QtEventSink
 from usecases.state_machine import StateMachine
+from usecases.transition_queue import PRIORITY_USER
 
 class MainWindow(QtWidgets.QMainWindow):
 
@@ -68,6 +70,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.error_fuel_threshold = False
         self.error_fuel_demo_price = False
 
+        # Events of the state machine arrive from its thread, the signals hand them over to the UI thread
+        self.event_sink = QtEventSink()
+        self.event_sink.alarm_time_changed.connect(self.update_alarm_label)
+        self.state_machine.add_event_sink(self.event_sink)
+
     def on_bt_save_settings_clicked(self) -> None:
         """Saves preferences and toggles the view.
 
@@ -85,8 +92,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.movie.start()
         QTimer.singleShot(3000, self.stop_recording)  # Schedule stop recording after 3 seconds
         print("Speach to text button clicked")
-        # Queue the transition to the speach state
-        self.state_machine.queue_transition('to_speach')
+        # Interrupt the current usecase (e.g. the news being read) and switch to the speach state
+        self.state_machine.interrupt('to_speach', priority=PRIORITY_USER)
 
     def stop_recording(self) -> None:
         """Stop the recording and hide the GIF."""
@@ -0,0 +1,18 @@
+from typing import Any
+from PyQt5.QtCore import QObject, pyqtSignal
+from usecases.event_sink import EventSink, EVENT_STATE_CHANGED, EVENT_ALARM_TIME_CHANGED
+
+
+class QtEventSink(QObject, EventSink):
+    """
+    Event sink that re-emits the events of the state machine as Qt signals.
+    The state machine runs in its own thread, the signals deliver the events to the UI thread.
+    """
+    state_changed = pyqtSignal(str)
+    alarm_time_changed = pyqtSignal(object)
+
+    def on_event(self, event: str, data: Any = None):
+        if event == EVENT_STATE_CHANGED:
+            self.state_changed.emit(data)
+        elif event == EVENT_ALARM_TIME_CHANGED:
+            self.alarm_time_changed.emit(data)
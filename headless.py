@@ -0,0 +1,73 @@
+import argparse
+import sys
+import time
+from loguru import logger
+from usecases.event_sink import JsonLinesEventSink, LoggingEventSink
+from usecases.headless_runner import HeadlessRunner
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the assistant without the PyQt frontend.")
+    parser.add_argument("--events", choices=["log", "jsonl", "none"], default="log",
+                        help="Where to report state machine events (default: log).")
+    parser.add_argument("--events-file", default=None,
+                        help="File for the jsonl events (default: stdout).")
+    parser.add_argument("--trigger", action="append", default=[],
+                        help="Transition to queue after startup, can be given multiple times.")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Stop after this many seconds instead of reading commands from stdin.")
+    parser.add_argument("--no-warm-up", action="store_true",
+                        help="Do not create the states and API clients in the background.")
+    parser.add_argument("--cassette", default=None,
+                        help="Record the HTTP responses to or replay them from this file (see api/cassette.py).")
+    parser.add_argument("--cassette-mode", choices=["record", "replay"], default="replay",
+                        help="Whether the cassette is recorded or replayed (default: replay).")
+    parser.add_argument("--cassette-latency", default="recorded",
+                        help='Replay delay per request: "recorded" or seconds (default: recorded).')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.cassette:
+        from api.cassette import RECORDED_LATENCY, use_cassette
+        latency = args.cassette_latency if args.cassette_latency == RECORDED_LATENCY else float(args.cassette_latency)
+        with use_cassette(args.cassette, args.cassette_mode, latency):
+            run(args)
+    else:
+        run(args)
+
+
+def run(args):
+    startup_start = time.perf_counter()
+
+    events_file = None
+    event_sinks = []
+    if args.events == "log":
+        event_sinks.append(LoggingEventSink())
+    elif args.events == "jsonl":
+        events_file = open(args.events_file, "a", encoding="utf-8") if args.events_file else None
+        event_sinks.append(JsonLinesEventSink(events_file or sys.stdout))
+
+    runner = HeadlessRunner(event_sinks=event_sinks)
+    runner.start(warm_up=not args.no_warm_up)
+    logger.info(f"Headless startup took {(time.perf_counter() - startup_start) * 1000:.0f} ms")
+
+    for transition in args.trigger:
+        runner.trigger(transition)
+
+    try:
+        if args.duration is not None:
+            time.sleep(args.duration)
+        else:
+            runner.run_cli(sys.stdin, sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+        if events_file is not None:
+            events_file.close()
+
+
+if __name__ == "__main__":
+    main()
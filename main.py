@@ -1,12 +1,18 @@
 import sys
 import threading
+import time
 from loguru import logger
 from PyQt5 import QtWidgets
 from frontend.main_window import MainWindow
 from usecases.state_machine import StateMachine
 
+startup_start = time.perf_counter()
+
 # Start the backend & state machine
 sm = StateMachine()
+# Serve the data of the last run while the API clients refresh it
+sm.open_api_cache()
+sm.open_rate_limits()
 
 # Function to run the state machine
 def run_state_machine():
@@ -26,6 +32,10 @@ window.show()
 # Bring the window to the foreground
 window.raise_()
 window.activateWindow()
+logger.info(f"Window shown {(time.perf_counter() - startup_start) * 1000:.0f} ms after startup")
+
+# Create the remaining states and API clients in the background
+sm.start_warm_up()
 
 # Connect the aboutToQuit signal to the stop method
 app.aboutToQuit.connect(sm.stop)
@@ -1,12 +1,17 @@
 import sys
 from loguru import logger
 from datetime import datetime
+import threading
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
+import requests
 from api.api_factory.main import APIFactory
 from api.weather_api.main import WeatherAPI
-from api.api_client import APIClient
+from api.vvs_api.vvs_api_lib_fix import TRIP_FIELDS, TRIPS_URL
+from api.api_client import APIClient, DEFAULT_TIMEOUT, fan_out
+from api.cancellation import CancellationToken, OperationCancelled, run_cancellable, set_current_token
 from config.config import CONFIG
+from tests.api_tests.fake_responses import json_response
 
 class TestApiFactory(unittest.TestCase):
 
@@ -53,6 +58,40 @@ class TestApiFactory(unittest.TestCase):
         api = self.factory.create_api('fitbit')
         self.assertEqual(api.client_id, 'test_key5')
         self.assertEqual(api.client_secret, 'test_key6')
+
+    # test lazy api creation
+    @patch.dict(APIFactory._instances, clear=True)
+    @patch('api.api_factory.main.WeatherAPI')
+    def test_lazy_create_api(self, mock_weather_api):
+        factory = APIFactory(self.factory.config, lazy=True)
+        api = factory.create_api('weather')
+        mock_weather_api.assert_not_called()
+
+        api.get_weather('Stuttgart')
+        api.get_weather('Berlin')
+        mock_weather_api.assert_called_once_with('test_key', base_url=mock_weather_api.BASE_URL)
+        self.assertEqual(mock_weather_api.return_value.get_weather.call_count, 2)
+
+    def test_lazy_create_unsupported_api(self):
+        factory = APIFactory(self.factory.config, lazy=True)
+        with self.assertRaises(ValueError):
+            factory.create_api('maps')
+
+    # test parallel warm-up of the requested apis
+    @patch.dict(APIFactory._instances, clear=True)
+    @patch('api.api_factory.main.FinanceAPI')
+    @patch('api.api_factory.main.WeatherAPI')
+    def test_warm_up(self, mock_weather_api, mock_finance_api):
+        factory = APIFactory(self.factory.config, lazy=True)
+        factory.create_api('weather')
+        factory.create_api('finance')
+
+        durations = factory.warm_up()
+
+        self.assertEqual(set(durations), {'weather', 'finance'})
+        mock_weather_api.assert_called_once()
+        mock_finance_api.assert_called_once()
+        self.assertEqual(factory.warm_up(), {})
             
 
 class TestableAPIClient(APIClient):
@@ -67,49 +106,101 @@ class TestApiClient(unittest.TestCase):
         self.headers = {'Authorization': 'Bearer test_token'}
         self.client = TestableAPIClient(self.base_url, self.headers)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get(self, mock_get):
         logger.info("Testing GET request")
-        mock_response = MagicMock()
-        mock_response.json.return_value = {'key': 'value'}
+        mock_response = json_response({'key': 'value'})
         mock_get.return_value = mock_response
 
         response = self.client.get('endpoint')
         self.assertEqual(response, {'key': 'value'})
-        mock_get.assert_called_once_with(f'{self.base_url}/endpoint', headers=self.headers, params=None)
+        mock_get.assert_called_once_with(f'{self.base_url}/endpoint', headers=self.headers, params=None, timeout=DEFAULT_TIMEOUT)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_post(self, mock_post):
         logger.info("Testing POST request")
-        mock_response = MagicMock()
-        mock_response.json.return_value = {'key': 'value'}
+        mock_response = json_response({'key': 'value'})
         mock_post.return_value = mock_response
 
         response = self.client.post('endpoint', json={'data': 'value'})
         self.assertEqual(response, {'key': 'value'})
-        mock_post.assert_called_once_with(f'{self.base_url}/endpoint', headers=self.headers, data=None, json={'data': 'value'})
+        mock_post.assert_called_once_with(f'{self.base_url}/endpoint', headers=self.headers, data=None, json={'data': 'value'}, timeout=DEFAULT_TIMEOUT)
 
-    @patch('requests.put')
+    @patch('requests.Session.put')
     def test_put(self, mock_put):
         logger.info("Testing PUT request")
-        mock_response = MagicMock()
-        mock_response.json.return_value = {'key': 'value'}
+        mock_response = json_response({'key': 'value'})
         mock_put.return_value = mock_response
 
         response = self.client.put('endpoint', data={'data': 'value'})
         self.assertEqual(response, {'key': 'value'})
-        mock_put.assert_called_once_with(f'{self.base_url}/endpoint', headers=self.headers, data={'data': 'value'})
+        mock_put.assert_called_once_with(f'{self.base_url}/endpoint', headers=self.headers, data={'data': 'value'}, timeout=DEFAULT_TIMEOUT)
 
-    @patch('requests.delete')
+    @patch('requests.Session.delete')
     def test_delete(self, mock_delete):
         logger.info("Testing DELETE request")
-        mock_response = MagicMock()
-        mock_response.json.return_value = {'key': 'value'}
+        mock_response = json_response({'key': 'value'})
         mock_delete.return_value = mock_response
 
         response = self.client.delete('endpoint')
         self.assertEqual(response, {'key': 'value'})
-        mock_delete.assert_called_once_with(f'{self.base_url}/endpoint', headers=self.headers)
+        mock_delete.assert_called_once_with(f'{self.base_url}/endpoint', headers=self.headers, timeout=DEFAULT_TIMEOUT)
+
+    # test that all requests share the pooled session of the client
+    @patch('requests.Session.get')
+    def test_requests_reuse_session(self, mock_get):
+        mock_get.return_value = json_response({})
+        session = self.client.session
+        self.client.get('first')
+        self.client.get('second')
+
+        self.assertIs(self.client.session, session)
+        self.assertEqual(mock_get.call_count, 2)
+        adapter = session.get_adapter(self.base_url)
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 0)
+
+    # test the timeout and pool size configured through the factory
+    @patch.dict(APIFactory._instances, clear=True)
+    @patch('api.vvs_api.main.get_trips')
+    def test_factory_configures_http(self, mock_get_trips):
+        factory = APIFactory({}, timeout=(1, 5), pool_size=2)
+        api = factory.create_api('vvs')
+
+        self.assertEqual(api.timeout, (1, 5))
+        self.assertEqual(api.session.get_adapter('https://www3.vvs.de')._pool_maxsize, 2)
+        api.calc_trip_time('start', 'end')
+        mock_get_trips.assert_called_once_with('start', 'end', session=api.session, request_params={'timeout': (1, 5)},
+                                               fields=TRIP_FIELDS, url=TRIPS_URL)
+
+    # test that independent requests are sent at the same time, with results and errors in order
+    @patch('requests.Session.get')
+    def test_get_many(self, mock_get):
+        barrier = threading.Barrier(3, timeout=2)
+
+        def get(url, **kwargs):
+            barrier.wait()
+            if url.endswith('broken'):
+                raise requests.exceptions.HTTPError('404')
+            return json_response({'url': url})
+        mock_get.side_effect = get
+
+        results = self.client.get_many([('first', None), ('broken', None), ('third', {'q': 1})])
+
+        self.assertEqual(results[0], {'url': f'{self.base_url}/first'})
+        self.assertIsInstance(results[1], requests.exceptions.HTTPError)
+        self.assertEqual(results[2], {'url': f'{self.base_url}/third'})
+
+    # test that the cancellation token of the caller reaches the fan-out calls
+    def test_fan_out_keeps_context(self):
+        token = CancellationToken()
+        set_current_token(token)
+        self.addCleanup(set_current_token, None)
+        token.cancel('test')
+
+        with self.assertRaises(OperationCancelled):
+            fan_out([lambda: 1, lambda: run_cancellable(threading.Event().wait, 2)])
+        self.assertRaises(ValueError, fan_out, [lambda: 1, lambda: int('x')], return_errors=False)
 
 if __name__ == '__main__':
     logger.add(sys.stderr, format="{time} | {level} | {name}:{function}:{line} - {message}", level="INFO")
@@ -0,0 +1,270 @@
+import asyncio
+import datetime
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, AsyncMock
+import httpx
+from api.async_api_client import AsyncAPIClient, close_shared_async_client, shared_async_client
+from api.cancellation import CancellationToken, OperationCancelled, set_current_token
+from api.conditional_get import CONDITIONAL_CACHE
+from api.finance_api import AsyncFinanceAPI
+from api.persistent_cache import PersistentCache
+from api.rate_limiter import RateLimit, RateLimitExceeded, TokenBucket
+from api.resilience import RESILIENCE
+from api.response_cache import ResponseCache
+from api.spotify_api import AsyncSpotifyAPI
+from api.vvs_api import AsyncVVSAPI
+from api.vvs_api.vvs_api_lib_fix import trip_params
+from api.weather_api import AsyncWeatherAPI
+
+
+class EchoAPIClient(AsyncAPIClient):
+    cache_ttls = {'cached': 60}
+
+    def authenticate(self):
+        pass
+
+
+def mock_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestAsyncAPIClient(unittest.TestCase):
+
+    def test_concurrent_requests_share_one_client(self):
+        requests_seen = []
+
+        async def handler(request):
+            requests_seen.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={'path': request.url.path, 'q': request.url.params['q']})
+
+        async def run():
+            async with mock_client(handler) as client:
+                api = EchoAPIClient('https://api.example.com', headers={'X-Key': 'key'}, client=client, cache=ResponseCache())
+                return await asyncio.gather(*(api.get('items', {'q': str(i)}) for i in range(5)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual([result['q'] for result in results], ['0', '1', '2', '3', '4'])
+        self.assertTrue(all(request.headers['X-Key'] == 'key' for request in requests_seen))
+
+    def test_get_uses_cache_policy(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, json={'n': len(calls)})
+
+        async def run():
+            async with mock_client(handler) as client:
+                api = EchoAPIClient('https://api.example.com', client=client, cache=ResponseCache())
+                return [await api.get('cached'), await api.get('cached'), await api.get('other'), await api.get('other')]
+
+        self.assertEqual(asyncio.run(run()), [{'n': 1}, {'n': 1}, {'n': 2}, {'n': 3}])
+
+    def test_error_status_raises(self):
+        async def run():
+            async with mock_client(lambda request: httpx.Response(500)) as client:
+                await EchoAPIClient('https://api.example.com', client=client).delete('items/1')
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            asyncio.run(run())
+
+    def test_shared_client_per_event_loop(self):
+        async def run():
+            client = shared_async_client()
+            same = shared_async_client() is client
+            await close_shared_async_client()
+            return client, same
+
+        client, same = asyncio.run(run())
+        self.assertTrue(same)
+        self.assertTrue(client.is_closed)
+
+
+class TestAsyncRequestLayers(unittest.TestCase):
+
+    def setUp(self):
+        RESILIENCE.reset()
+        self.addCleanup(RESILIENCE.reset)
+        CONDITIONAL_CACHE.clear()
+        self.addCleanup(CONDITIONAL_CACHE.clear)
+
+    @patch('api.resilience.asyncio.sleep', new_callable=AsyncMock)
+    def test_temporary_errors_are_retried(self, mock_sleep):
+        statuses = [503, 200]
+
+        async def run():
+            handler = lambda request: httpx.Response(statuses.pop(0), json={'ok': True})
+            async with mock_client(handler) as client:
+                return await EchoAPIClient('https://api.example.com', client=client, cache=ResponseCache()).get('other')
+
+        self.assertEqual(asyncio.run(run()), {'ok': True})
+        self.assertEqual(statuses, [])
+        mock_sleep.assert_awaited_once()
+
+    def test_identical_requests_are_coalesced(self):
+        requests_seen = []
+
+        async def handler(request):
+            requests_seen.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={'n': len(requests_seen)})
+
+        async def run():
+            async with mock_client(handler) as client:
+                api = EchoAPIClient('https://api.example.com', client=client, cache=ResponseCache())
+                return await asyncio.gather(*(api.get('other', {'q': 'a'}) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(run()), [{'n': 1}] * 3)
+        self.assertEqual(len(requests_seen), 1)
+
+    def test_rate_limited_request_is_not_sent(self):
+        requests_seen = []
+
+        async def run():
+            async with mock_client(lambda request: requests_seen.append(request) or httpx.Response(200, json={})) as client:
+                api = EchoAPIClient('https://api.example.com', client=client, cache=ResponseCache())
+                api.rate_limit = TokenBucket('example', RateLimit(1, 24 * 60 * 60))
+                await api.get('other')
+                await api.get('other')
+
+        with self.assertRaises(RateLimitExceeded):
+            asyncio.run(run())
+        self.assertEqual(len(requests_seen), 1)
+
+    def test_not_modified_response_returns_stored_value(self):
+        etags = []
+
+        def handler(request):
+            etags.append(request.headers.get('If-None-Match'))
+            if request.headers.get('If-None-Match') == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json={'value': 1}, headers={'ETag': '"v1"'})
+
+        async def run():
+            async with mock_client(handler) as client:
+                api = EchoAPIClient('https://api.example.com', client=client, cache=ResponseCache())
+                return [await api.get('cached', use_cache=False), await api.get('cached', use_cache=False)]
+
+        self.assertEqual(asyncio.run(run()), [{'value': 1}, {'value': 1}])
+        self.assertEqual(etags, [None, '"v1"'])
+
+    def test_failed_request_serves_persistent_cache(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = PersistentCache(os.path.join(directory.name, 'api_cache.sqlite3'), max_stale=0)
+        self.addCleanup(cache.close)
+        statuses = [200, 404]
+
+        async def run():
+            handler = lambda request: httpx.Response(statuses.pop(0), json={'value': len(statuses)})
+            async with mock_client(handler) as client:
+                api = EchoAPIClient('https://api.example.com', client=client, cache=ResponseCache(),
+                                    persistent_cache=cache)
+                first = await api.get('cached')
+                # Expired in the response cache and on disk, the failed request falls back to the stored response
+                with patch('api.persistent_cache.time.time', return_value=10 ** 10):
+                    api.cache.clear()
+                    return first, await api.get('cached')
+
+        self.assertEqual(asyncio.run(run()), ({'value': 1}, {'value': 1}))
+        self.assertEqual(statuses, [])
+
+    def test_cancelled_token_aborts_request(self):
+        token = CancellationToken()
+        started = threading.Event()
+
+        async def handler(request):
+            started.set()
+            await asyncio.sleep(10)
+            return httpx.Response(200, json={})
+
+        async def run():
+            set_current_token(token)
+            async with mock_client(handler) as client:
+                request = asyncio.ensure_future(
+                    EchoAPIClient('https://api.example.com', client=client, cache=ResponseCache()).get('other'))
+                while not started.is_set():
+                    await asyncio.sleep(0.01)
+                token.cancel("test")
+                await request
+
+        with self.assertRaises(OperationCancelled):
+            asyncio.run(run())
+
+
+class TestAsyncClients(unittest.TestCase):
+
+    def test_weather_daily_forecast(self):
+        forecast = {'list': [
+            {'dt_txt': '2024-12-02 09:00:00', 'main': {'temp': 4.0, 'temp_min': 3.0, 'temp_max': 5.0},
+             'weather': [{'id': 804, 'icon': '04d', 'description': 'clouds'}]},
+            {'dt_txt': '2024-12-02 12:00:00', 'main': {'temp': 8.0, 'temp_min': 7.0, 'temp_max': 9.0},
+             'weather': [{'id': 500, 'icon': '10d', 'description': 'rain'}]},
+        ]}
+
+        async def run():
+            async with mock_client(lambda request: httpx.Response(200, json=forecast)) as client:
+                api = AsyncWeatherAPI('key', client=client)
+                api.cache = ResponseCache()
+                return await api.get_daily_forecast('Stuttgart', datetime.date(2024, 12, 2))
+
+        self.assertEqual(asyncio.run(run())['max_temp'], 9.0)
+
+    def test_finance_reuses_query_methods(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(request)
+            return httpx.Response(200, json={'Symbol': 'IBM'})
+
+        async def run():
+            async with mock_client(handler) as client:
+                api = AsyncFinanceAPI('key', client=client)
+                api.cache = ResponseCache()
+                return await api.company_overview('IBM')
+
+        self.assertEqual(asyncio.run(run()), {'Symbol': 'IBM'})
+        params = requests_seen[0].url.params
+        self.assertEqual((params['function'], params['symbol'], params['apikey']), ('OVERVIEW', 'IBM', 'key'))
+
+    def test_spotify_playback_without_json_body(self):
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(204)
+
+        async def run():
+            async with mock_client(handler) as client:
+                api = AsyncSpotifyAPI('id', 'secret', client=client)
+                api.authenticate = lambda: 'token'
+                await api.start_playback('playlist', 'device')
+                return api.headers
+
+        self.assertEqual(asyncio.run(run()), {'Authorization': 'Bearer token'})
+        self.assertEqual(bodies[0]['context_uri'], 'spotify:playlist:playlist')
+
+    def test_vvs_stations_by_name(self):
+        async def run():
+            response = {'locations': [{'id': 'de:08111:6118', 'name': 'Stuttgart Hauptbahnhof', 'type': 'stop'}]}
+            async with mock_client(lambda request: httpx.Response(200, json=response)) as client:
+                return await AsyncVVSAPI(client=client).get_stations_by_name('Hauptbahnhof')
+
+        stations = asyncio.run(run())
+        self.assertEqual(stations[0].name, 'Stuttgart Hauptbahnhof')
+
+    def test_trip_params_use_check_time(self):
+        params = trip_params('de:08111:6118', 'de:08111:2', datetime.datetime(2024, 12, 2, 7, 45))
+
+        self.assertEqual((params['itdDate'], params['itdTime']), ('20241202', '0745'))
+        self.assertEqual((params['name_origin'], params['name_destination']), ('de:08111:6118', 'de:08111:2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
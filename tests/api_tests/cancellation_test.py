@@ -0,0 +1,128 @@
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+from api.api_client import APIClient, DEFAULT_TIMEOUT
+from api.cancellation import DEFAULT_WORKERS, CancellationToken, OperationCancelled, current_token, run_cancellable, set_current_token
+from tests.api_tests.fake_responses import json_response
+
+
+class DummyAPIClient(APIClient):
+    def authenticate(self):
+        pass
+
+
+class TestCancellationToken(unittest.TestCase):
+
+    def test_run_returns_result(self):
+        token = CancellationToken()
+        self.assertEqual(token.run(lambda a, b: a + b, 1, b=2), 3)
+
+    def test_run_propagates_exceptions(self):
+        token = CancellationToken()
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            token.run(fail)
+
+    def test_run_is_interrupted_while_the_call_blocks(self):
+        token = CancellationToken()
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def blocking_call():
+            started.set()
+            release.wait(5)
+
+        threading.Thread(target=lambda: started.wait(1) and token.cancel("test"), daemon=True).start()
+        with self.assertRaises(OperationCancelled):
+            token.run(blocking_call)
+        # The call is still blocked, run returned because of the cancellation
+        self.assertTrue(started.is_set())
+        self.assertFalse(release.is_set())
+
+    def test_run_uses_a_shared_worker_pool(self):
+        token = CancellationToken()
+        thread_names = {token.run(lambda: threading.current_thread().name) for _ in range(20)}
+
+        self.assertTrue(all(name.startswith('cancellable-call') for name in thread_names))
+        self.assertLessEqual(len(thread_names), DEFAULT_WORKERS)
+
+    def test_cancelled_call_that_has_not_started_does_not_run(self):
+        token = CancellationToken()
+        token.cancel()
+        call = MagicMock()
+
+        with self.assertRaises(OperationCancelled):
+            token.run(call)
+        call.assert_not_called()
+
+    def test_callbacks(self):
+        token = CancellationToken()
+        callback = MagicMock()
+        removed = MagicMock()
+        token.add_callback(callback)
+        token.add_callback(removed)
+        token.remove_callback(removed)
+
+        token.cancel()
+        token.cancel()
+        late = MagicMock()
+        token.add_callback(late)
+
+        callback.assert_called_once()
+        removed.assert_not_called()
+        late.assert_called_once()
+
+    def test_not_swallowed_by_except_exception(self):
+        token = CancellationToken()
+        token.cancel()
+        with self.assertRaises(OperationCancelled):
+            try:
+                token.raise_if_cancelled()
+            except Exception:
+                self.fail("OperationCancelled was caught by except Exception")
+
+    def test_run_cancellable_without_token_runs_directly(self):
+        set_current_token(None)
+        thread_names = []
+        run_cancellable(lambda: thread_names.append(threading.current_thread().name))
+        self.assertEqual(thread_names, [threading.current_thread().name])
+
+
+class TestCancellableAPIClient(unittest.TestCase):
+
+    def tearDown(self):
+        set_current_token(None)
+
+    @patch('requests.Session.get')
+    def test_get_is_interrupted(self, mock_get):
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+        mock_get.side_effect = lambda *args, **kwargs: started.set() or release.wait(5)
+        client = DummyAPIClient('https://api.example.com')
+        token = CancellationToken()
+        set_current_token(token)
+        threading.Thread(target=lambda: started.wait(1) and token.cancel(), daemon=True).start()
+
+        with self.assertRaises(OperationCancelled):
+            client.get('endpoint')
+        mock_get.assert_called_once()
+        self.assertFalse(release.is_set())
+
+    @patch('requests.Session.get')
+    def test_get_with_token(self, mock_get):
+        mock_get.return_value = json_response({'key': 'value'})
+        client = DummyAPIClient('https://api.example.com')
+        set_current_token(CancellationToken())
+
+        self.assertEqual(client.get('endpoint', params={'q': 1}), {'key': 'value'})
+        mock_get.assert_called_once_with('https://api.example.com/endpoint', headers={}, params={'q': 1}, timeout=DEFAULT_TIMEOUT)
+        self.assertIsNotNone(current_token())
+
+
+if __name__ == '__main__':
+    unittest.main()
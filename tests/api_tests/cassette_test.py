@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import requests
+from api.api_client import APIClient
+from api.cassette import RECORD, REPLAY, CassetteMiss, normalize_url, use_cassette
+from api.resilience import RESILIENCE
+from api.response_cache import ResponseCache
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        body = json.dumps({'path': self.path, 'count': len(self.requests_seen)}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        body = self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Content-Length', str(len(body) * 2))
+        self.end_headers()
+        self.wfile.write(body * 2)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalAPIClient(APIClient):
+    def authenticate(self):
+        pass
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cassettes', 'test.json.gz')
+        Handler.requests_seen = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        RESILIENCE.reset()
+        self.addCleanup(RESILIENCE.reset)
+
+    def test_record_and_replay_without_server(self):
+        client = LocalAPIClient(self.base_url, cache=ResponseCache())
+        with use_cassette(self.path, RECORD):
+            recorded = client.get('data', {'q': 'Stuttgart', 'appid': 'secret'})
+            audio = requests.post(f'{self.base_url}/speech', json={'text': 'Hallo'}, stream=True)
+            audio_chunks = list(audio.iter_content(chunk_size=4))
+            with httpx.Client() as http:
+                chat = http.get(f'{self.base_url}/api/chat').json()
+        self.server.shutdown()
+
+        with use_cassette(self.path, REPLAY, latency=0) as cassette:
+            self.assertEqual(client.get('data', {'q': 'Stuttgart', 'appid': 'other-key'}), recorded)
+            replayed_audio = requests.post(f'{self.base_url}/speech', json={'text': 'Hallo'}, stream=True)
+            self.assertEqual(list(replayed_audio.iter_content(chunk_size=4)), audio_chunks)
+            with httpx.Client() as http:
+                self.assertEqual(http.get(f'{self.base_url}/api/chat').json(), chat)
+            self.assertRaises(CassetteMiss, requests.get, f'{self.base_url}/unknown')
+
+        self.assertEqual(len(cassette.interactions), 3)
+        self.assertEqual(len(Handler.requests_seen), 2)
+        with open(self.path, 'rb') as f:
+            self.assertNotIn(b'secret', f.read())
+
+    def test_repeated_requests_replay_in_order(self):
+        url = f'{self.base_url}/headlines'
+        with use_cassette(self.path, RECORD):
+            counts = [requests.get(url).json()['count'] for _ in range(2)]
+
+        with use_cassette(self.path, REPLAY, latency=0):
+            self.assertEqual([requests.get(url).json()['count'] for _ in range(3)], counts + counts[-1:])
+
+    def test_async_clients_are_replayed(self):
+        url = f'{self.base_url}/forecast'
+
+        async def fetch():
+            async with httpx.AsyncClient() as client:
+                return (await client.get(url)).json()
+
+        with use_cassette(self.path, RECORD):
+            recorded = asyncio.run(fetch())
+        with use_cassette(self.path, REPLAY, latency=0):
+            self.assertEqual(asyncio.run(fetch()), recorded)
+        self.assertEqual(len(Handler.requests_seen), 1)
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url('https://api.example.com/query?symbol=IBM&apikey=abc&function=OVERVIEW'),
+                         'https://api.example.com/query?function=OVERVIEW&symbol=IBM')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from api.api_client import APIClient, DEFAULT_TIMEOUT
+from api.calendar_api import rapla
+from api.calendar_api.cal import Calendar
+from api.conditional_get import CONDITIONAL_CACHE, ConditionalGetCache
+from api.response_cache import ResponseCache
+
+
+def make_response(status_code, text='', headers=None, json_data=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = (json.dumps(json_data) if json_data is not None else text).encode('utf-8')
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    return response
+
+
+class ValidatedAPIClient(APIClient):
+    cache_ttls = {'forecast': 60}
+
+    def authenticate(self):
+        pass
+
+
+class TestConditionalGetCache(unittest.TestCase):
+
+    def test_not_modified_returns_parsed_value(self):
+        cache = ConditionalGetCache()
+        send = MagicMock(side_effect=[
+            make_response(200, 'body', {'ETag': '"v1"', 'Last-Modified': 'Mon, 02 Dec 2024 08:00:00 GMT'}),
+            make_response(304),
+        ])
+        parse = MagicMock(return_value={'parsed': True})
+
+        first = cache.get(send, 'https://example.com/page', parse)
+        second = cache.get(send, 'https://example.com/page', parse)
+
+        self.assertIs(second, first)
+        parse.assert_called_once()
+        send.assert_called_with('https://example.com/page', headers={
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 02 Dec 2024 08:00:00 GMT'})
+        self.assertEqual(cache.not_modified, 1)
+
+    def test_response_without_validators_is_not_stored(self):
+        cache = ConditionalGetCache()
+        send = MagicMock(return_value=make_response(200, 'body'))
+
+        cache.get(send, 'https://example.com/page', lambda response: response.text)
+        cache.get(send, 'https://example.com/page', lambda response: response.text)
+
+        send.assert_called_with('https://example.com/page')
+        self.assertEqual(len(cache), 0)
+
+    def test_not_modified_after_eviction_is_requested_again(self):
+        cache = ConditionalGetCache()
+        cache.get(MagicMock(return_value=make_response(200, 'first', {'ETag': '"v1"'})), 'https://example.com/page',
+                  lambda response: response.text)
+        responses = iter([make_response(304), make_response(200, 'second', {'ETag': '"v2"'})])
+
+        def send(url, **kwargs):
+            # The entry is dropped while the conditional request is sent, e.g. by requests of other threads
+            cache.clear()
+            return next(responses)
+
+        send = MagicMock(side_effect=send)
+        self.assertEqual(cache.get(send, 'https://example.com/page', lambda response: response.text), 'second')
+        self.assertEqual(send.call_args_list[0].kwargs, {'headers': {'If-None-Match': '"v1"'}})
+        send.assert_called_with('https://example.com/page')
+
+
+class TestConditionalAPIClient(unittest.TestCase):
+
+    def setUp(self):
+        CONDITIONAL_CACHE.clear()
+        self.addCleanup(CONDITIONAL_CACHE.clear)
+
+    @patch('requests.Session.get')
+    def test_cached_endpoint_is_revalidated(self, mock_get):
+        mock_get.side_effect = [make_response(200, headers={'ETag': '"abc"'}, json_data={'list': [1]}), make_response(304)]
+        client = ValidatedAPIClient('https://api.example.com', headers={'Accept': 'application/json'}, cache=ResponseCache())
+
+        client.get('forecast', {'q': 'Berlin'})
+        self.assertEqual(client.get('forecast', {'q': 'Berlin'}, use_cache=False), {'list': [1]})
+
+        self.assertEqual(mock_get.call_args.kwargs['headers'], {'Accept': 'application/json', 'If-None-Match': '"abc"'})
+        self.assertEqual(client.headers, {'Accept': 'application/json'})
+
+
+class TestConditionalRapla(unittest.TestCase):
+
+    def setUp(self):
+        CONDITIONAL_CACHE.clear()
+        self.addCleanup(CONDITIONAL_CACHE.clear)
+        self.addCleanup(rapla._parse_lectures.cache_clear)
+
+    @patch('api.calendar_api.rapla.BeautifulSoup')
+    @patch('requests.get')
+    def test_unchanged_page_is_not_parsed_again(self, mock_get, mock_soup):
+        mock_get.side_effect = [make_response(200, '<html></html>', {'ETag': '"week"'}), make_response(304)]
+        mock_soup.return_value.find_all.return_value = []
+        url = 'https://rapla.example.com/calendar?year=2024'
+
+        rapla.create_calendar_from_rapla(url, Calendar([]))
+        calendar = rapla.create_calendar_from_rapla(url, Calendar([]))
+
+        self.assertIsInstance(calendar, Calendar)
+        mock_soup.assert_called_once()
+        mock_get.assert_called_with(url, headers={'If-None-Match': '"week"'}, timeout=DEFAULT_TIMEOUT)
+
+    @patch('requests.get')
+    def test_parsed_pages_are_bounded(self, mock_get):
+        weeks = rapla.PARSED_PAGES_MAX + 2
+        mock_get.side_effect = [make_response(200, f'<html>{week}</html>') for week in range(weeks)]
+
+        for week in range(weeks):
+            rapla.create_calendar_from_rapla(f'https://rapla.example.com/calendar?day={week}&year=2024', Calendar([]))
+
+        self.assertEqual(rapla._parse_lectures.cache_info().currsize, rapla.PARSED_PAGES_MAX)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import json
+from typing import Any, Dict, Optional
+import requests
+
+
+def text_response(text: str, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    """
+    Returns a real response with the given body, status and headers, as returned by the patched session methods.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = text.encode('utf-8')
+    response.encoding = 'utf-8'
+    response.headers.update(headers or {})
+    return response
+
+
+def json_response(data: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    """
+    Returns a real response with the JSON encoded data as body.
+    """
+    return text_response(json.dumps(data), status_code, {'Content-Type': 'application/json', **(headers or {})})
@@ -1,6 +1,10 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
+from api.api_client import DEFAULT_TIMEOUT
 from api.finance_api import FinanceAPI, Interval
+from api.rate_limiter import RateLimitExceeded
+from api.response_cache import RESPONSE_CACHE
+from tests.api_tests.fake_responses import json_response
 
 class TestFinanceAPI(unittest.TestCase):
 
@@ -8,16 +12,17 @@ class TestFinanceAPI(unittest.TestCase):
         self.api_key = 'test_key'
         self.finance_api = FinanceAPI(self.api_key)
         self.url = 'https://www.alphavantage.co/query'
+        RESPONSE_CACHE.clear()
+        self.addCleanup(RESPONSE_CACHE.clear)
 
     def test_initialization(self):
         self.assertEqual(self.finance_api.api_key, self.api_key)
         self.assertEqual(self.finance_api.base_url, 'https://www.alphavantage.co')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_stock_intraday(self, mock_get):
-        mock_response = MagicMock()
         expected_data = {'Time Series (1min)': {'2021-01-01 09:30:00': {'1. open': '150.00'}}}
-        mock_response.json.return_value = expected_data
+        mock_response = json_response(expected_data)
         mock_get.return_value = mock_response
 
         stock_data = self.finance_api.get_stock_intraday('AAPL', Interval.ONE_MIN)
@@ -30,14 +35,14 @@ class TestFinanceAPI(unittest.TestCase):
                 'symbol': 'AAPL',
                 'interval': '1min',
                 'apikey': self.api_key
-            }
+            },
+            timeout=DEFAULT_TIMEOUT
         )
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_stock_daily(self, mock_get):
-        mock_response = MagicMock()
         expected_data = {'Time Series (Daily)': {'2021-01-01': {'1. open': '150.00'}}}
-        mock_response.json.return_value = expected_data
+        mock_response = json_response(expected_data)
         mock_get.return_value = mock_response
 
         stock_data = self.finance_api.get_stock_daily('AAPL')
@@ -50,14 +55,14 @@ class TestFinanceAPI(unittest.TestCase):
                 'symbol': 'AAPL',
                 'outputsize': 'compact',
                 'apikey': self.api_key
-            }
+            },
+            timeout=DEFAULT_TIMEOUT
         )
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_stock_latest(self, mock_get):
-        mock_response = MagicMock()
         expected_data = {'Global Quote': {'01. symbol': 'AAPL', '05. price': '150.00'}}
-        mock_response.json.return_value = expected_data
+        mock_response = json_response(expected_data)
         mock_get.return_value = mock_response
 
         stock_data = self.finance_api.get_stock_latest('AAPL')
@@ -69,14 +74,14 @@ class TestFinanceAPI(unittest.TestCase):
                 'function': 'GLOBAL_QUOTE',
                 'symbol': 'AAPL',
                 'apikey': self.api_key
-            }
+            },
+            timeout=DEFAULT_TIMEOUT
         )
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_search_symbols(self, mock_get):
-        mock_response = MagicMock()
         expected_data = {'bestMatches': [{'1. symbol': 'AAPL', '2. name': 'Apple Inc.'}]}
-        mock_response.json.return_value = expected_data
+        mock_response = json_response(expected_data)
         mock_get.return_value = mock_response
 
         search_results = self.finance_api.search_symbols('Apple')
@@ -88,14 +93,14 @@ class TestFinanceAPI(unittest.TestCase):
                 'function': 'SYMBOL_SEARCH',
                 'keywords': 'Apple',
                 'apikey': self.api_key
-            }
+            },
+            timeout=DEFAULT_TIMEOUT
         )
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_market_status(self, mock_get):
-        mock_response = MagicMock()
         expected_data = {'marketStatus': 'open'}
-        mock_response.json.return_value = expected_data
+        mock_response = json_response(expected_data)
         mock_get.return_value = mock_response
 
         market_status = self.finance_api.get_market_status()
@@ -106,5 +111,27 @@ class TestFinanceAPI(unittest.TestCase):
             params={
                 'function': 'MARKET_STATUS',
                 'apikey': self.api_key
-            }
-        )
\ No newline at end of file
+            },
+            timeout=DEFAULT_TIMEOUT
+        )
+
+    @patch('requests.Session.get')
+    def test_company_overview_is_cached(self, mock_get):
+        mock_get.return_value = json_response({'Symbol': 'AAPL'})
+
+        self.finance_api.company_overview('AAPL')
+        overview = self.finance_api.company_overview('AAPL')
+
+        self.assertEqual(overview, {'Symbol': 'AAPL'})
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_rate_limit_note_is_not_cached(self, mock_get):
+        mock_get.return_value = json_response({'Note': 'Thank you for using Alpha Vantage!'})
+
+        with self.assertRaises(RateLimitExceeded):
+            self.finance_api.company_overview('AAPL')
+        with self.assertRaises(RateLimitExceeded):
+            self.finance_api.company_overview('AAPL')
+
+        self.assertEqual(mock_get.call_count, 2)
@@ -0,0 +1,76 @@
+import json
+import unittest
+from unittest.mock import patch
+from api.api_client import APIClient
+from api.json_decoder import decode_response, loads, select
+from api.response_cache import ResponseCache
+from api.vvs_api.vvs_api_lib_fix import TRIP_FIELDS, get_trips
+from tests.api_tests.fake_responses import json_response
+
+LEG = {
+    "duration": 600,
+    "origin": {"id": "5006115", "name": "Hauptbahnhof", "departureTimePlanned": "2024-11-25T06:00:00Z",
+               "departureTimeEstimated": "2024-11-25T06:02:00Z", "parent": {"name": "Stuttgart"}},
+    "destination": {"id": "5006465", "name": "Zuffenhausen", "arrivalTimePlanned": "2024-11-25T06:10:00Z",
+                    "arrivalTimeEstimated": "2024-11-25T06:12:00Z"},
+    "transportation": {"number": "S6", "operator": {"name": "DB"}},
+    "coords": [[48.78, 9.18]] * 100,
+    "stopSequence": [{"name": "Nordbahnhof"}] * 10,
+}
+
+
+class FieldsAPIClient(APIClient):
+    response_fields = {'forecast': {'list': {'dt_txt': None, 'main': {'temp': None}}}}
+
+    def authenticate(self):
+        pass
+
+
+class TestJsonDecoder(unittest.TestCase):
+
+    def test_select_keeps_only_given_fields(self):
+        data = {'list': [{'dt_txt': 'a', 'main': {'temp': 1, 'humidity': 80}, 'wind': {}}, {'dt_txt': 'b'}], 'cod': '200'}
+
+        self.assertEqual(select(data, {'list': {'dt_txt': None, 'main': {'temp': None}}}),
+                         {'list': [{'dt_txt': 'a', 'main': {'temp': 1}}, {'dt_txt': 'b'}]})
+        self.assertIs(select(data, None), data)
+
+    def test_decoder_without_orjson(self):
+        with patch('api.json_decoder.orjson', None):
+            self.assertEqual(loads(b'{"temp": 1.5}'), {'temp': 1.5})
+            self.assertRaises(json.JSONDecodeError, loads, b'{')
+        self.assertRaises(json.JSONDecodeError, loads, b'{')
+
+    def test_response_body_is_decoded_with_given_decoder(self):
+        response = json_response({'key': 'värde'})
+
+        self.assertEqual(decode_response(response), {'key': 'värde'})
+        self.assertEqual(decode_response(response, json.loads), {'key': 'värde'})
+
+    @patch('requests.Session.get')
+    def test_client_keeps_response_fields(self, mock_get):
+        mock_get.return_value = json_response({'list': [{'dt_txt': 'a', 'main': {'temp': 1, 'pressure': 1015}}],
+                                               'city': {'name': 'Stuttgart'}})
+        client = FieldsAPIClient('https://api.example.com', cache=ResponseCache())
+
+        self.assertEqual(client.get('forecast'), {'list': [{'dt_txt': 'a', 'main': {'temp': 1}}]})
+        self.assertEqual(client.get('weather'), {'list': [{'dt_txt': 'a', 'main': {'temp': 1, 'pressure': 1015}}],
+                                                 'city': {'name': 'Stuttgart'}})
+
+    @patch('requests.get')
+    def test_trips_from_selected_fields(self, mock_get):
+        mock_get.return_value = json_response({'journeys': [{'legs': [LEG], 'fare': {'zones': [{'zones': [['1']]}],
+                                                                                     'tickets': [{}] * 5}}]})
+
+        trip = get_trips('5006115', '5006465', fields=TRIP_FIELDS)[0]
+
+        self.assertEqual(trip.duration, 600)
+        self.assertEqual(trip.zones, [['1']])
+        self.assertEqual(trip.connections[0].transportation.number, 'S6')
+        self.assertEqual(trip.connections[0].origin.delay, 2)
+        self.assertIsNone(trip.connections[0].coords)
+        self.assertNotIn('tickets', trip.fare)
+
+
+if __name__ == '__main__':
+    unittest.main()
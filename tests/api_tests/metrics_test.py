@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import urllib.request
+from unittest.mock import patch
+from api.api_client import APIClient
+from api.metrics import API_REQUEST_SECONDS, Histogram, JsonlMetricsWriter, MetricsRegistry, MetricsServer, timed
+from tests.api_tests.fake_responses import json_response
+
+
+class DummyAPIClient(APIClient):
+    def authenticate(self):
+        pass
+
+
+class TestHistogram(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.histogram = self.registry.histogram("request_seconds", "Test histogram.", ["client"], buckets=(0.1, 1.0))
+
+    def test_observe_counts_cumulative_buckets(self):
+        for value in (0.05, 0.5, 0.7, 3.0):
+            self.histogram.observe(value, "weather")
+
+        labels, cumulative, total = self.histogram.samples()[0]
+        self.assertEqual(labels, {"client": "weather"})
+        self.assertEqual(cumulative, [1, 3, 4])
+        self.assertAlmostEqual(total, 4.25)
+
+    def test_render_prometheus(self):
+        self.histogram.observe(0.5, "weather")
+        text = self.registry.render_prometheus()
+
+        self.assertIn("# TYPE request_seconds histogram", text)
+        self.assertIn('request_seconds_bucket{client="weather",le="0.1"} 0', text)
+        self.assertIn('request_seconds_bucket{client="weather",le="+Inf"} 1', text)
+        self.assertIn('request_seconds_count{client="weather"} 1', text)
+
+    def test_timed_decorator(self):
+        @timed(self.histogram, "decorated")
+        def work():
+            return 42
+
+        self.assertEqual(work(), 42)
+        self.assertEqual(self.histogram.labels("decorated").collect()[0][-1], 1)
+
+    def test_observe_is_cheap(self):
+        histogram = Histogram("cheap_seconds", "Overhead test.", ["client"])
+        start = time.perf_counter()
+        for _ in range(10000):
+            with histogram.time("weather"):
+                pass
+        # A few microseconds per span, far below the duration of a request
+        self.assertLess((time.perf_counter() - start) / 10000, 50e-6)
+
+
+class TestExporters(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.histogram("state_on_enter_seconds", "Test histogram.", ["state"]).observe(0.2, "news")
+
+    def test_metrics_server(self):
+        server = MetricsServer(self.registry, port=0)
+        server.start()
+        self.addCleanup(server.stop)
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+        self.assertIn('state_on_enter_seconds_count{state="news"} 1', body)
+
+    def test_jsonl_writer(self):
+        path = os.path.join(tempfile.mkdtemp(), "metrics.jsonl")
+        writer = JsonlMetricsWriter(path, self.registry, interval=0.01)
+        writer.start()
+        time.sleep(0.05)
+        writer.stop()
+
+        with open(path, encoding="utf-8") as file:
+            lines = [json.loads(line) for line in file]
+        self.assertGreaterEqual(len(lines), 2)
+        self.assertEqual(lines[-1]["metrics"]["state_on_enter_seconds"][0]["count"], 1)
+
+
+class TestAPIClientMetrics(unittest.TestCase):
+
+    @patch('requests.Session.get')
+    def test_get_is_timed(self, mock_get):
+        child = API_REQUEST_SECONDS.labels("DummyAPIClient", "GET")
+        before = child.collect()[0][-1]
+        mock_get.return_value = json_response({})
+
+        DummyAPIClient('https://api.example.com').get('endpoint')
+
+        self.assertEqual(child.collect()[0][-1], before + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
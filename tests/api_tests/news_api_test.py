@@ -62,6 +62,7 @@ class TestNewsAPI(unittest.TestCase):
             def __init__(self, status_code, text):
                 self.status_code = status_code
                 self.text = text
+                self.headers = {}
 
         mock_client.return_value = MockResponse(69420, '-')
         fetcher = NewsAPI()
@@ -0,0 +1,64 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from loguru import logger
+from benchmarks import parsing, payloads
+
+# Two tiny inputs per case keep the smoke test fast and still give a growth exponent
+TINY_CASES = {name: case._replace(sizes=(1, 2)) for name, case in parsing.CASES.items()}
+
+
+class TestParsingBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        # main disables the log output of the measured packages
+        self.addCleanup(logger.enable, 'api')
+        self.addCleanup(logger.enable, 'usecases')
+
+    def run_main(self, *argv):
+        results = os.path.join(self.directory, 'parsing.json')
+        with patch.dict(parsing.CASES, TINY_CASES), contextlib.redirect_stdout(io.StringIO()) as output:
+            parsing.main([*argv, '--repeat', '1', '--json', results])
+        with open(results, encoding='utf-8') as f:
+            return json.load(f), output.getvalue()
+
+    def test_all_cases_on_tiny_inputs(self):
+        report, output = self.run_main()
+
+        self.assertEqual(list(report), list(parsing.CASES))
+        for name, case in report.items():
+            self.assertEqual(case['unit'], parsing.CASES[name].unit)
+            self.assertEqual(list(case['sizes']), ['1', '2'])
+            for result in case['sizes'].values():
+                self.assertGreater(result['median_ms'], 0)
+                self.assertGreaterEqual(result['p95_ms'], result['median_ms'])
+                self.assertIn('per_unit_ms', result)
+            self.assertIn(f'{name} (size in {case["unit"]} units)', output)
+
+    def test_recorded_fixture_is_measured_instead_of_built_inputs(self):
+        page = os.path.join(self.directory, 'petrol.html')
+        with open(page, 'w', encoding='utf-8') as f:
+            f.write(payloads.petrol_page(3))
+
+        report, _ = self.run_main('--cases', 'petrol', '--fixture', f'petrol={page}')
+
+        self.assertEqual(list(report['petrol']['sizes']), ['recorded'])
+        self.assertNotIn('per_unit_ms', report['petrol']['sizes']['recorded'])
+        self.assertNotIn('growth_exponent', report['petrol'])
+
+    def test_growth_exponent(self):
+        self.assertAlmostEqual(parsing.growth_exponent([(10, 1.0), (100, 10.0)]), 1.0)
+        self.assertAlmostEqual(parsing.growth_exponent([(10, 1.0), (50, 5.0), (100, 100.0)]), 2.0)
+        self.assertIsNone(parsing.growth_exponent([(10, 1.0), (10, 2.0)]))
+        self.assertIsNone(parsing.growth_exponent([(10, 0.0), (100, 1.0)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+from api.api_client import APIClient
+from api.cancellation import CancellationToken, current_token, set_current_token
+from api.persistent_cache import PersistentCache, cached_fetch, default_cache, set_default_cache
+from api.rate_limiter import Priority, current_priority, request_priority
+from api.response_cache import ResponseCache
+from tests.api_tests.fake_responses import json_response
+
+
+class PersistedAPIClient(APIClient):
+    cache_ttls = {'data': 60}
+
+    def authenticate(self):
+        pass
+
+    def is_cacheable(self, data) -> bool:
+        return 'error' not in data
+
+
+class TestPersistentCache(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache', 'api_cache.sqlite3')
+        self.cache = PersistentCache(self.path, max_stale=60)
+        self.addCleanup(self.cache.close)
+
+    def test_entries_survive_reopening(self):
+        self.cache.put('key', {'value': [1, 2]}, ttl=60)
+        self.cache.close()
+
+        reopened = PersistentCache(self.path)
+        self.addCleanup(reopened.close)
+        entry = reopened.get('key')
+        self.assertEqual(entry.value, {'value': [1, 2]})
+        self.assertTrue(entry.fresh)
+        self.assertEqual(reopened._connect().execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+
+    def test_stale_entry_is_served_and_refreshed(self):
+        with patch('api.persistent_cache.time.time', return_value=1000.0):
+            self.cache.put('key', 'old', ttl=10)
+        refreshed = threading.Event()
+
+        def fetch():
+            refreshed.set()
+            return 'new'
+
+        with patch('api.persistent_cache.time.time', return_value=1020.0):
+            self.assertEqual(self.cache.get_or_fetch('key', fetch, ttl=10).value, 'old')
+        self.assertTrue(refreshed.wait(1))
+        for _ in range(100):
+            if not self.cache._revalidating:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(self.cache.get('key').value, 'new')
+
+    def test_refresh_keeps_priority_and_cancellation_token(self):
+        self.cache.put('key', 'old', ttl=60)
+        token = CancellationToken()
+        seen = {}
+        refreshed = threading.Event()
+
+        def fetch():
+            seen['priority'] = current_priority()
+            seen['token'] = current_token()
+            refreshed.set()
+            return 'new'
+
+        set_current_token(token)
+        self.addCleanup(set_current_token, None)
+        with request_priority(Priority.PREFETCH):
+            self.assertTrue(self.cache.revalidate('key', fetch, ttl=60))
+        self.assertTrue(refreshed.wait(1))
+
+        self.assertEqual(seen, {'priority': Priority.PREFETCH, 'token': token})
+
+    def test_old_entry_is_fallback_if_fetch_fails(self):
+        with patch('api.persistent_cache.time.time', return_value=1000.0):
+            self.cache.put('key', 'old', ttl=10)
+
+        with patch('api.persistent_cache.time.time', return_value=5000.0):
+            entry = self.cache.get_or_fetch('key', MagicMock(side_effect=ConnectionError('offline')), ttl=10)
+            self.assertEqual(entry.value, 'old')
+            entry = self.cache.get_or_fetch('key', MagicMock(return_value='rate limit'), ttl=10,
+                                            is_valid=lambda value: value != 'rate limit')
+            self.assertEqual(entry.value, 'old')
+
+        with self.assertRaises(ConnectionError):
+            self.cache.get_or_fetch('other', MagicMock(side_effect=ConnectionError('offline')), ttl=10)
+
+    def test_cached_fetch_without_default_cache(self):
+        self.assertIsNone(default_cache())
+        fetch = MagicMock(return_value='value')
+
+        self.assertEqual(cached_fetch('key', fetch, ttl=60), 'value')
+        self.assertEqual(cached_fetch('key', fetch, ttl=60), 'value')
+        self.assertEqual(fetch.call_count, 2)
+
+    @patch('requests.Session.get')
+    def test_api_client_uses_last_known_response(self, mock_get):
+        set_default_cache(self.cache)
+        self.addCleanup(set_default_cache, None)
+        mock_get.return_value = json_response({'temp': 20})
+        PersistedAPIClient('https://api.example.com', cache=ResponseCache()).get('data', {'q': 'Berlin', 'appid': 'secret'})
+
+        # New process: empty memory cache, the API only returns an error
+        mock_get.return_value = json_response({'error': 'rate limit'})
+        client = PersistedAPIClient('https://api.example.com', cache=ResponseCache())
+        self.assertEqual(client.get('data', {'q': 'Berlin', 'appid': 'secret'}), {'temp': 20})
+        self.assertEqual(client.get('data', {'q': 'Berlin', 'appid': 'secret'}, use_cache=False), {'error': 'rate limit'})
+        self.assertEqual(mock_get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,25 @@
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
+import requests
 from bs4 import BeautifulSoup
 
+from api.conditional_get import CONDITIONAL_CACHE
+from api.persistent_cache import PersistentCache, set_default_cache
+from api.petrol_api import petrol
 from api.petrol_api.main import PetrolAPI
 from api.petrol_api.petrol import GasStation, get_soup, get_average_price, get_gas_stations
+from api.resilience import RESILIENCE
+from benchmarks import payloads
+
+
+def page_response(status_code: int, text: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = text.encode("utf-8")
+    response.encoding = "utf-8"
+    return response
 
 
 class TestPetrol(unittest.TestCase):
@@ -43,6 +60,42 @@ class TestPetrol(unittest.TestCase):
         self.assertIn("Fuel type invalid-fuel not found", str(excinfo.exception))
 
 
+class TestPetrolOffline(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = PersistentCache(os.path.join(directory.name, 'api_cache.sqlite3'))
+        set_default_cache(self.cache)
+        self.addCleanup(set_default_cache, None)
+        for cleanup in (RESILIENCE.reset, CONDITIONAL_CACHE.clear, petrol._station_prices.cache_clear):
+            cleanup()
+            self.addCleanup(cleanup)
+
+    @patch('requests.get')
+    def test_error_page_is_not_cached(self, mock_get):
+        mock_get.return_value = page_response(404, "<html>Wartungsarbeiten</html>")
+        with self.assertRaises(requests.HTTPError):
+            get_gas_stations("Stuttgart", "super-e10", 5)
+
+        mock_get.return_value = page_response(200, payloads.petrol_page(3))
+        self.assertEqual(len(get_gas_stations("Stuttgart", "super-e10", 5)), 3)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.get')
+    def test_callers_get_their_own_stations(self, mock_get):
+        mock_get.return_value = page_response(200, payloads.petrol_page(3))
+        stations = get_gas_stations("Stuttgart", "super-e10", 5)
+        stations[0].price = 0.0
+        stations.clear()
+
+        again = get_gas_stations("Stuttgart", "super-e10", 5)
+        self.assertEqual(len(again), 3)
+        self.assertNotEqual(again[0].price, 0.0)
+        self.assertEqual(petrol._station_prices.cache_info().hits, 1)
+        self.assertIsNot(get_soup("Stuttgart", "super-e10", 5), get_soup("Stuttgart", "super-e10", 5))
+
+
 class TestPetrolAPI(unittest.TestCase):
     # Testen der PetrolAPI-Klasse
     def test_petrol_api(self):
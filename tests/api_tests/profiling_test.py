@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from api import profiling
+from api.profiling import Profiler, configure_profiling, disable_profiling, enable_profiling, profile_api_call, profile_state
+
+
+def busy_function():
+    return sum(i * i for i in range(10000))
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.addCleanup(disable_profiling)
+
+    def files(self, suffix):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(suffix))
+
+    def test_hooks_are_no_ops_while_disabled(self):
+        self.assertIs(profile_state('welcome'), profile_state('news'))
+        self.assertIs(profile_api_call('WeatherAPI', 'data/2.5/forecast'), profiling._DISABLED)
+
+    def test_profile_per_state_entry_with_summary_and_rotation(self):
+        enable_profiling(self.directory, keep=2)
+
+        for state in ('welcome', 'news', 'idle'):
+            with profile_state(state):
+                busy_function()
+
+        profiles = self.files('.prof')
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(profiles[0].endswith('state-news.prof'))
+        self.assertEqual(len(self.files('.txt')), 2)
+        with open(os.path.join(self.directory, self.files('.txt')[-1]), encoding='utf-8') as f:
+            summary = f.read()
+        self.assertTrue(summary.startswith('state idle: '))
+        self.assertIn('busy_function', summary)
+
+    def test_only_selected_api_calls_outside_of_states_are_profiled(self):
+        enable_profiling(self.directory, api_clients=['WeatherAPI'])
+
+        with profile_api_call('VVSAPI', 'XML_STOPFINDER_REQUEST'):
+            busy_function()
+        with profile_api_call('WeatherAPI', 'data/2.5/forecast'):
+            busy_function()
+        with profile_state('welcome'):
+            with profile_api_call('WeatherAPI', 'data/2.5/weather'):
+                busy_function()
+
+        profiles = self.files('.prof')
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(profiles[0].endswith('api-WeatherAPI.data_2.5_forecast.prof'))
+        self.assertTrue(profiles[1].endswith('state-welcome.prof'))
+
+    def test_configure_from_preferences_and_environment(self):
+        self.assertIsNone(configure_profiling({'profile_dir': ''}))
+
+        profiler = configure_profiling({'profile_dir': self.directory, 'profile_keep': 5, 'profile_api_calls': 'VVSAPI, WeatherAPI'})
+        self.assertIsInstance(profiler, Profiler)
+        self.assertEqual(profiler.keep, 5)
+        self.assertTrue(profiler.profiles_api_calls_of('WeatherAPI'))
+        self.assertFalse(profiler.profiles_api_calls_of('FinanceAPI'))
+
+        with patch.dict(os.environ, {'ASWE_PROFILE_DIR': self.directory, 'ASWE_PROFILE_API_CALLS': '*'}):
+            self.assertTrue(configure_profiling({}).profiles_api_calls_of('FinanceAPI'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import httpx
+from api.api_client import APIClient
+from api.async_api_client import AsyncAPIClient
+from api.api_factory import APIFactory
+from api.finance_api import FinanceAPI
+from api.persistent_cache import PersistentCache, set_default_cache
+from api.rate_limiter import (API_RATE_LIMITED, Priority, RateLimit, RateLimiter, RateLimitExceeded, RequestLedger,
+                              TokenBucket, request_priority)
+from api.response_cache import RESPONSE_CACHE, ResponseCache
+from tests.api_tests.fake_responses import json_response
+
+
+class LimitedAPIClient(APIClient):
+    cache_ttls = {'data': 60}
+
+    def authenticate(self):
+        pass
+
+
+class LimitedAsyncAPIClient(AsyncAPIClient):
+
+    def authenticate(self):
+        pass
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'rate_limits.sqlite3')
+
+    @patch('api.rate_limiter.time.time', return_value=1000.0)
+    def test_prefetch_backs_off_before_interactive_requests(self, _):
+        bucket = TokenBucket('finance', RateLimit(4, 400, prefetch_reserve=0.5))
+        before = API_RATE_LIMITED.value('finance', 'prefetch')
+
+        with request_priority(Priority.PREFETCH):
+            self.assertEqual([bucket.try_acquire() for _ in range(3)], [True, True, False])
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [True, True, False])
+        self.assertEqual(API_RATE_LIMITED.value('finance', 'prefetch') - before, 1)
+
+    def test_bucket_refills_over_time(self):
+        bucket = TokenBucket('fitbit', RateLimit(2, 100))
+        with patch('api.rate_limiter.time.time', return_value=1000.0):
+            bucket.try_acquire(2)
+            with self.assertRaises(RateLimitExceeded) as context:
+                bucket.acquire()
+        self.assertAlmostEqual(context.exception.retry_after, 50.0)
+
+        with patch('api.rate_limiter.time.time', return_value=1050.0):
+            self.assertTrue(bucket.try_acquire())
+
+    def test_ledger_survives_restart(self):
+        ledger = RequestLedger(self.path)
+        with patch('api.rate_limiter.time.time', return_value=1000.0):
+            bucket = TokenBucket('news', RateLimit(100, 100 * 60), ledger)
+            for _ in range(30):
+                bucket.try_acquire()
+        ledger.close()
+
+        reopened = RequestLedger(self.path)
+        self.addCleanup(reopened.close)
+        with patch('api.rate_limiter.time.time', return_value=1060.0):
+            bucket = TokenBucket('news', RateLimit(100, 100 * 60), reopened)
+            # 70 left, one refilled in the minute since
+            self.assertAlmostEqual(bucket.available(), 71.0)
+            self.assertEqual(bucket.used, 30)
+
+
+class TestRateLimitedClients(unittest.TestCase):
+
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+        self.addCleanup(RESPONSE_CACHE.clear)
+
+    @patch('requests.Session.get')
+    def test_blocked_request_is_not_sent(self, mock_get):
+        client = LimitedAPIClient('https://api.example.com', cache=ResponseCache())
+        client.rate_limit = TokenBucket('example', RateLimit(1, 24 * 60 * 60))
+        mock_get.return_value = json_response({'value': 1})
+
+        client.get('other')
+        with self.assertRaises(RateLimitExceeded):
+            client.get('other')
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_async_client_takes_from_the_same_quota(self, mock_get):
+        bucket = TokenBucket('example', RateLimit(1, 24 * 60 * 60))
+        client = LimitedAPIClient('https://api.example.com', cache=ResponseCache())
+        requests_sent = []
+        transport = httpx.MockTransport(lambda request: requests_sent.append(request) or httpx.Response(200, json={'value': 1}))
+        async_client = LimitedAsyncAPIClient('https://api.example.com', client=httpx.AsyncClient(transport=transport),
+                                             cache=ResponseCache())
+        client.rate_limit = async_client.rate_limit = bucket
+
+        self.assertEqual(asyncio.run(async_client.get('other')), {'value': 1})
+        with self.assertRaises(RateLimitExceeded):
+            client.get('other')
+        self.assertEqual(len(requests_sent), 1)
+        mock_get.assert_not_called()
+
+    @patch('requests.Session.get')
+    def test_blocked_request_serves_cached_data(self, mock_get):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = PersistentCache(os.path.join(directory.name, 'api_cache.sqlite3'), max_stale=0)
+        set_default_cache(cache)
+        self.addCleanup(set_default_cache, None)
+        mock_get.return_value = json_response({'value': 1})
+        client = LimitedAPIClient('https://api.example.com', cache=ResponseCache())
+        client.rate_limit = TokenBucket('example', RateLimit(1, 24 * 60 * 60))
+
+        with patch('api.persistent_cache.time.time', return_value=1000.0):
+            client.get('data')
+        with patch('api.persistent_cache.time.time', return_value=5000.0):
+            self.assertEqual(client.get('data'), {'value': 1})
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_finance_quota_message_empties_bucket(self, mock_get):
+        finance_api = FinanceAPI('key')
+        bucket = TokenBucket('finance', RateLimit(25, 24 * 60 * 60))
+        finance_api.rate_limit = bucket
+        self.addCleanup(setattr, finance_api, 'rate_limit', None)
+        mock_get.return_value = json_response({'Information': 'Our standard API rate limit is 25 requests per day.'})
+
+        with self.assertRaises(RateLimitExceeded):
+            finance_api.get_market_status()
+        with self.assertRaises(RateLimitExceeded):
+            finance_api.get_market_status()
+
+        mock_get.assert_called_once()
+        self.assertLess(bucket.available(), 1)
+
+    def test_factory_assigns_buckets(self):
+        factory = APIFactory({}, rate_limiter=RateLimiter({'finance': RateLimit(25, 24 * 60 * 60)}))
+        finance_api, vvs_api = MagicMock(rate_limit=None), MagicMock(rate_limit=None)
+        instances = patch.dict(APIFactory._instances, clear=True)
+        instances.start()
+        self.addCleanup(instances.stop)
+
+        with patch.object(APIFactory, '_create_instance', side_effect=[finance_api, vvs_api]):
+            factory.get_instance('finance')
+            factory.get_instance('vvs')
+
+        self.assertIs(finance_api.rate_limit, factory.rate_limiter.bucket('finance'))
+        self.assertIsNone(vvs_api.rate_limit)
+        factory.configure_rate_limits(None)
+        self.assertIsNone(finance_api.rate_limit)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch, AsyncMock, MagicMock
+import httpx
+import requests
+from api.metrics import Histogram
+from api.resilience import API_RESILIENCE_EVENTS, CircuitBreaker, CircuitOpenError, Resilience, retry_after_seconds
+
+
+def make_response(status_code, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    @patch('api.resilience.time.monotonic')
+    def test_breaker_opens_and_recovers(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        breaker = CircuitBreaker('api.example.com', failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError) as context:
+            breaker.before_call()
+        self.assertAlmostEqual(context.exception.retry_after, 30.0)
+
+        # One trial request after the reset timeout, a second caller is rejected until it is done
+        mock_monotonic.return_value = 131.0
+        breaker.before_call()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_retry_after_header(self):
+        self.assertEqual(retry_after_seconds(make_response(429, {'Retry-After': '3'})), 3.0)
+        self.assertIsNone(retry_after_seconds(make_response(429)))
+        with patch('api.resilience.time.time', return_value=0.0):
+            self.assertEqual(retry_after_seconds(make_response(429, {'Retry-After': 'Thu, 01 Jan 1970 00:00:05 GMT'})), 5.0)
+
+
+@patch('api.resilience.time.sleep')
+class TestResilience(unittest.TestCase):
+
+    def setUp(self):
+        self.resilience = Resilience(max_attempts=3, failure_threshold=3)
+        self.url = 'https://api.example.com/forecast'
+
+    def test_temporary_errors_are_retried(self, mock_sleep):
+        send = MagicMock(side_effect=[requests.exceptions.ConnectionError('reset'), make_response(503),
+                                      make_response(200)])
+        before = API_RESILIENCE_EVENTS.value('api.example.com', 'retry')
+
+        response = self.resilience.send(send, self.url, params={'q': 'Stuttgart'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(send.call_count, 3)
+        send.assert_called_with(self.url, params={'q': 'Stuttgart'})
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertTrue(all(0 <= call.args[0] <= 2.0 for call in mock_sleep.call_args_list))
+        self.assertEqual(API_RESILIENCE_EVENTS.value('api.example.com', 'retry') - before, 2)
+
+    def test_retry_after_is_respected(self, mock_sleep):
+        send = MagicMock(side_effect=[make_response(429, {'Retry-After': '2'}), make_response(200)])
+
+        self.assertEqual(self.resilience.send(send, self.url).status_code, 200)
+        mock_sleep.assert_called_once_with(2.0)
+
+    def test_long_retry_after_returns_response(self, mock_sleep):
+        send = MagicMock(return_value=make_response(429, {'Retry-After': '3600'}))
+
+        self.assertEqual(self.resilience.send(send, self.url).status_code, 429)
+        send.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_other_errors_are_not_retried(self, mock_sleep):
+        send = MagicMock(return_value=make_response(500))
+
+        self.assertEqual(self.resilience.send(send, self.url).status_code, 500)
+        send.assert_called_once()
+
+    def test_post_is_not_sent_twice(self, mock_sleep):
+        send = MagicMock(side_effect=[make_response(503), requests.exceptions.ReadTimeout('slow')])
+
+        self.assertEqual(self.resilience.send(send, self.url, idempotent=False).status_code, 503)
+        self.assertRaises(requests.exceptions.ReadTimeout, self.resilience.send, send, self.url, idempotent=False)
+        self.assertEqual(send.call_count, 2)
+        mock_sleep.assert_not_called()
+
+    def test_open_circuit_fails_fast(self, mock_sleep):
+        send = MagicMock(side_effect=requests.exceptions.ConnectionError('offline'))
+
+        self.assertRaises(requests.exceptions.ConnectionError, self.resilience.send, send, self.url)
+        self.assertRaises(CircuitOpenError, self.resilience.send, send, self.url)
+        self.assertEqual(send.call_count, 3)
+        # Other hosts are not affected
+        self.resilience.send(MagicMock(return_value=make_response(200)), 'https://other.example.com')
+
+    def test_slow_request_is_hedged(self, mock_sleep):
+        latency = Histogram('latency', 'Test histogram.', [], buckets=(0.01, 0.1, 1.0)).labels()
+        for _ in range(20):
+            latency.observe(0.005)
+        release, calls = threading.Event(), []
+        slow, fast = make_response(200), make_response(200)
+
+        def send(url, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                release.wait(2)
+                return slow
+            return fast
+
+        self.resilience.hedge_min_delay = 0.01
+        self.assertIs(self.resilience.send(send, self.url, latency=latency), fast)
+        release.set()
+        self.assertEqual(len(calls), 2)
+
+
+@patch('api.resilience.asyncio.sleep', new_callable=AsyncMock)
+class TestResilienceAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.resilience = Resilience(max_attempts=3, failure_threshold=3)
+        self.url = 'https://api.example.com/forecast'
+
+    def test_temporary_errors_are_retried(self, mock_sleep):
+        send = AsyncMock(side_effect=[httpx.ConnectError('reset'), httpx.Response(503), httpx.Response(200)])
+
+        response = asyncio.run(self.resilience.send_async(send, self.url, params={'q': 'Stuttgart'}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(send.await_count, 3)
+        send.assert_awaited_with(self.url, params={'q': 'Stuttgart'})
+        self.assertEqual(mock_sleep.await_count, 2)
+
+    def test_retry_after_is_respected(self, mock_sleep):
+        send = AsyncMock(side_effect=[httpx.Response(429, headers={'Retry-After': '2'}), httpx.Response(200)])
+
+        self.assertEqual(asyncio.run(self.resilience.send_async(send, self.url)).status_code, 200)
+        mock_sleep.assert_awaited_once_with(2.0)
+
+    def test_post_is_not_sent_twice(self, mock_sleep):
+        send = AsyncMock(side_effect=httpx.ReadTimeout('slow'))
+
+        with self.assertRaises(httpx.ReadTimeout):
+            asyncio.run(self.resilience.send_async(send, self.url, idempotent=False))
+        send.assert_awaited_once()
+        mock_sleep.assert_not_awaited()
+
+    def test_open_circuit_fails_fast(self, mock_sleep):
+        send = AsyncMock(side_effect=httpx.ConnectError('offline'))
+
+        with self.assertRaises(httpx.ConnectError):
+            asyncio.run(self.resilience.send_async(send, self.url))
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(self.resilience.send_async(send, self.url))
+        self.assertEqual(send.await_count, 3)
+
+    def test_slow_request_is_hedged_and_cancelled(self, mock_sleep):
+        latency = Histogram('latency_async', 'Test histogram.', [], buckets=(0.01, 0.1, 1.0)).labels()
+        for _ in range(20):
+            latency.observe(0.005)
+        calls, cancelled = [], []
+        fast = httpx.Response(200)
+
+        async def send(url, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                try:
+                    await asyncio.Event().wait()
+                except asyncio.CancelledError:
+                    cancelled.append(url)
+                    raise
+            return fast
+
+        self.resilience.hedge_min_delay = 0.01
+        self.assertIs(asyncio.run(self.resilience.send_async(send, self.url, latency=latency)), fast)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cancelled, [self.url])
+
+
+class TestHistogramQuantile(unittest.TestCase):
+
+    def test_quantile_is_upper_bucket_bound(self):
+        histogram = Histogram('quantile', 'Test histogram.', [], buckets=(0.1, 0.5, 1.0)).labels()
+        self.assertIsNone(histogram.quantile(0.95))
+        for value in [0.05] * 90 + [0.3] * 10:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.95), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import patch
+from api.api_client import APIClient
+from api.response_cache import ResponseCache, make_key
+from tests.api_tests.fake_responses import json_response
+
+
+class CachedAPIClient(APIClient):
+    cache_ttls = {'data': 60, 'data/live': 0}
+
+    def authenticate(self):
+        pass
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_key_ignores_order_and_credentials(self):
+        first = make_key('WeatherAPI', 'data/2.5/forecast', {'q': 'Berlin', 'units': 'metric', 'appid': 'secret'})
+        second = make_key('WeatherAPI', '/data/2.5/forecast', {'units': 'metric', 'q': 'Berlin', 'appid': 'other'})
+
+        self.assertEqual(first, second)
+        self.assertNotIn('secret', repr(first))
+        self.assertNotEqual(first, make_key('FinanceAPI', 'data/2.5/forecast', {'q': 'Berlin', 'units': 'metric'}))
+
+    def test_expired_entries_are_misses(self):
+        cache = ResponseCache()
+        with patch('api.response_cache.time.monotonic', return_value=100.0):
+            cache.put('key', {'value': 1}, ttl=10)
+        with patch('api.response_cache.time.monotonic', return_value=105.0):
+            self.assertEqual(cache.get('key'), {'value': 1})
+        with patch('api.response_cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('key'))
+
+        self.assertEqual(cache.stats(), {'entries': 0, 'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put('a', 1, ttl=60)
+        cache.put('b', 2, ttl=60)
+        cache.get('a')
+        cache.put('c', 3, ttl=60)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.evictions, 1)
+
+
+class TestCachedAPIClient(unittest.TestCase):
+
+    def setUp(self):
+        self.client = CachedAPIClient('https://api.example.com', cache=ResponseCache())
+
+    @patch('requests.Session.get')
+    def test_get_uses_endpoint_policy(self, mock_get):
+        mock_get.return_value = json_response({'key': 'value'})
+
+        self.client.get('data/forecast', params={'q': 'Berlin', 'apikey': 'a'})
+        self.client.get('data/forecast', params={'apikey': 'b', 'q': 'Berlin'})
+        self.client.get('data/live')
+        self.client.get('data/live')
+        self.client.get('other')
+
+        self.assertEqual(mock_get.call_count, 4)
+        self.assertEqual(self.client.cache.hits, 1)
+
+    @patch('requests.Session.get')
+    def test_get_without_cache_refreshes_entry(self, mock_get):
+        mock_get.side_effect = [json_response({'version': 1}), json_response({'version': 2})]
+
+        self.client.get('data')
+        self.assertEqual(self.client.get('data', use_cache=False), {'version': 2})
+        self.assertEqual(self.client.get('data'), {'version': 2})
+        self.assertEqual(mock_get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import httpx
+import requests
+from api.api_client import APIClient
+from api.api_factory.main import APIFactory
+from api.petrol_api.petrol import BASE_URL as PETROL_URL, get_gas_stations
+from api.resilience import RESILIENCE
+from api.response_cache import ResponseCache
+from api.service_redirect import redirect_url
+from api.tts_api import TTSAPI
+from benchmarks.stand_in import StandInServer
+
+CONFIG = {'weather_api_key': 'key', 'finance_api_key': 'key'}
+
+
+class LocalWeatherClient(APIClient):
+    def authenticate(self):
+        pass
+
+
+class TestServiceRedirect(unittest.TestCase):
+
+    def setUp(self):
+        self.stand_in = StandInServer().start()
+        self.addCleanup(self.stand_in.stop)
+        RESILIENCE.reset()
+        self.addCleanup(RESILIENCE.reset)
+
+    def test_redirect_url(self):
+        url = 'https://api.openweathermap.org/data/2.5/weather?q=Stuttgart'
+        self.assertEqual(redirect_url(url, None), url)
+        self.assertEqual(redirect_url(url, 'http://127.0.0.1:8765/'),
+                         'http://127.0.0.1:8765/weather/data/2.5/weather?q=Stuttgart')
+        self.assertEqual(redirect_url('https://www3.vvs.de', 'http://127.0.0.1:8765'), 'http://127.0.0.1:8765/vvs')
+        self.assertEqual(redirect_url('http://localhost:11434/api/chat', 'http://127.0.0.1:8765'),
+                         'http://127.0.0.1:8765/ollama/api/chat')
+        self.assertEqual(redirect_url('https://example.com/page', 'http://127.0.0.1:8765'), 'https://example.com/page')
+
+    def test_factory_creates_the_clients_with_the_urls_of_the_stand_in(self):
+        sends = (requests.Session.send, httpx.Client.send, httpx.AsyncClient.send)
+        factory = APIFactory({**CONFIG, 'api_base_url': self.stand_in.base_url})
+
+        weather = factory.create_api('weather')
+        forecast = weather.get('data/2.5/forecast', params={'q': 'Stuttgart', 'appid': 'key'}, use_cache=False)
+        trips = factory.create_api('vvs').calc_trip_time('5006115', '5006465')
+        stations = get_gas_stations('Standin', 'super-e10', 5, factory.service_url(PETROL_URL))
+        news = factory.create_api('news')
+        headlines = news.load_top_headlines()
+        article = news.load_article(headlines['articles'][0]['url'])
+        summary = news.llmclient.get_response('llama3.2:1b', 'Fasse zusammen')
+        audio = requests.post(f"{factory.service_url(TTSAPI.BASE_URL)}/v1/text-to-speech/voice", json={'text': 'Hallo'},
+                              stream=True)
+
+        self.assertEqual(weather.base_url, f"{self.stand_in.base_url}/weather")
+        self.assertEqual(len(forecast['list']), 40)
+        self.assertEqual(len(trips), 6)
+        self.assertEqual(len(stations), 20)
+        self.assertEqual(headlines['status'], 'ok')
+        self.assertTrue(article)
+        self.assertTrue(summary.startswith('Dies ist eine Zusammenfassung'))
+        self.assertEqual(sum(len(chunk) for chunk in audio.iter_content(chunk_size=1024)), 32 * 1024)
+        self.assertEqual(set(self.stand_in.requests),
+                         {'weather', 'vvs', 'petrol', 'news', 'articles', 'ollama', 'elevenlabs'})
+        # Nothing is patched, other clients of the process still use the real services
+        self.assertEqual((requests.Session.send, httpx.Client.send, httpx.AsyncClient.send), sends)
+        self.assertEqual(APIFactory(CONFIG).service_url('https://api.openweathermap.org'), 'https://api.openweathermap.org')
+        self.assertIsNot(factory._instances, APIFactory._instances)
+
+    def test_injected_errors(self):
+        self.stand_in.error_rate = 1.0
+        self.stand_in.error_status = 500
+        weather = LocalWeatherClient(f"{self.stand_in.base_url}/weather", cache=ResponseCache())
+
+        with self.assertRaises(requests.HTTPError) as context:
+            weather.get('data/2.5/weather', params={'q': 'Stuttgart'})
+        self.assertEqual(context.exception.response.status_code, 500)
+        self.assertEqual(self.stand_in.errors['weather'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from api.api_client import APIClient
+from api.cancellation import CancellationToken, OperationCancelled, set_current_token
+from api.metrics import API_COALESCED_REQUESTS, MetricsRegistry
+from api.response_cache import ResponseCache
+from api.single_flight import SingleFlight
+from tests.api_tests.fake_responses import json_response
+
+
+class DummyAPIClient(APIClient):
+    def authenticate(self):
+        pass
+
+
+def blocking_fetch(release: threading.Event, result):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+    return fetch, calls
+
+
+def wait_for_waiters(label: str, count: int, before: float):
+    for _ in range(200):
+        if API_COALESCED_REQUESTS.value(label) - before >= count:
+            return
+        threading.Event().wait(0.005)
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_identical_calls_share_one_fetch(self):
+        flight, release = SingleFlight(), threading.Event()
+        fetch, calls = blocking_fetch(release, {'temp': 20})
+        before = API_COALESCED_REQUESTS.value('flight-test')
+
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(flight.do, 'forecast', fetch, 'flight-test') for _ in range(4)]
+            wait_for_waiters('flight-test', 3, before)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(API_COALESCED_REQUESTS.value('flight-test') - before, 3)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_error_is_shared_and_next_call_fetches_again(self):
+        flight, release = SingleFlight(), threading.Event()
+        fetch, calls = blocking_fetch(release, ConnectionError('offline'))
+        before = API_COALESCED_REQUESTS.value('error-test')
+
+        with ThreadPoolExecutor(2) as pool:
+            futures = [pool.submit(flight.do, 'trips', fetch, 'error-test') for _ in range(2)]
+            wait_for_waiters('error-test', 1, before)
+            release.set()
+            for future in futures:
+                self.assertRaises(ConnectionError, future.result)
+
+        self.assertEqual(flight.do('trips', lambda: 'fresh'), 'fresh')
+        self.assertEqual(len(calls), 1)
+
+    def test_cancelled_waiter_does_not_cancel_the_call(self):
+        flight, release = SingleFlight(), threading.Event()
+        fetch, calls = blocking_fetch(release, 'result')
+        token = CancellationToken()
+        before = API_COALESCED_REQUESTS.value('cancel-test')
+
+        def cancelled_waiter():
+            set_current_token(token)
+            return flight.do('key', fetch, 'cancel-test')
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(flight.do, 'key', fetch, 'cancel-test')
+            for _ in range(200):
+                if calls:
+                    break
+                threading.Event().wait(0.005)
+            waiter = pool.submit(cancelled_waiter)
+            wait_for_waiters('cancel-test', 1, before)
+            token.cancel('test')
+            self.assertRaises(OperationCancelled, waiter.result)
+            release.set()
+            self.assertEqual(leader.result(), 'result')
+
+    @patch('requests.Session.get')
+    def test_api_client_coalesces_concurrent_gets(self, mock_get):
+        release = threading.Event()
+        response = json_response({'list': []})
+
+        def slow_get(*args, **kwargs):
+            release.wait(2)
+            return response
+        mock_get.side_effect = slow_get
+        client = DummyAPIClient('https://api.example.com', cache=ResponseCache())
+        before = API_COALESCED_REQUESTS.value('DummyAPIClient')
+
+        with ThreadPoolExecutor(3) as pool:
+            futures = [pool.submit(client.get, 'forecast', {'q': 'Stuttgart'}) for _ in range(3)]
+            wait_for_waiters('DummyAPIClient', 2, before)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, [{'list': []}] * 3)
+        self.assertEqual(mock_get.call_count, 1)
+
+
+class TestCounter(unittest.TestCase):
+
+    def test_counter_is_exported(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('coalesced_total', 'Test counter.', ['client'])
+        counter.inc('WeatherAPI')
+        counter.inc('WeatherAPI')
+
+        self.assertIn('# TYPE coalesced_total counter', registry.render_prometheus())
+        self.assertIn('coalesced_total{client="WeatherAPI"} 2', registry.render_prometheus())
+        self.assertEqual(registry.snapshot()['coalesced_total'], [{'labels': {'client': 'WeatherAPI'}, 'value': 2}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ import requests
 from io import StringIO
 from api.api_client import APIClient
 from api.spotify_api.main import SpotifyAPI
-from api.spotify_api.spotify_auth import generate_auth_url, get_initial_token, refresh_token, save_token, get_access_token, TOKEN_FILE
+from api.spotify_api.spotify_auth import generate_auth_url, get_initial_token, refresh_token, save_token, get_access_token, TOKEN_FILE, TOKEN_URL
 from api.api_factory import APIFactory
 from config.config import CONFIG
 
@@ -406,7 +406,7 @@ class TestSpotifyAuth(unittest.TestCase):
 
         access_token = get_access_token('client_id', 'client_secret')
 
-        mock_refresh_token.assert_called_once_with('client_id', 'client_secret')
+        mock_refresh_token.assert_called_once_with('client_id', 'client_secret', TOKEN_URL)
 
         self.assertEqual(access_token, 'access_token_value')
 
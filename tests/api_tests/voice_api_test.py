@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import patch, MagicMock, mock_open
+import requests
 from api.tts_api import TTSAPI
+from api.tts_api.main import SYNTHESIS_TIMEOUT
 import pyttsx3
 import speech_recognition as sr
 from config import CONFIG
@@ -83,6 +85,7 @@ class TestVoiceInterface(unittest.TestCase):
                 "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
             },
             headers=vi.headers,
+            timeout=SYNTHESIS_TIMEOUT,
         )
 
         # Check if the file was opened and written to correctly
@@ -97,6 +100,20 @@ class TestVoiceInterface(unittest.TestCase):
         # Check that get_busy() was called and it returned False
         mock_get_busy.assert_called_once()
 
+    @patch('requests.post', side_effect=requests.ReadTimeout("read timed out"))
+    def test_speak_elevenlabs_timeout_uses_local_voice(self, mock_requests_post):
+        """
+        Test that the local voice speaks the text if the ElevenLabs synthesis times out
+        """
+        vi = TTSAPI(api_key="mock_api_key", state_machine=None)
+        vi.toggle_elevenlabs = True
+
+        vi.speak("Ein langer Text")
+
+        mock_requests_post.assert_called_once()
+        vi.engine.say.assert_called_with("Ein langer Text")
+        vi.engine.runAndWait.assert_called_once()
+
     @patch("pygame.mixer.init")
     @patch("pygame.mixer.Sound")
     @patch("pygame.time.wait")
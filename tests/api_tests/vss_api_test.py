@@ -6,6 +6,7 @@ from vvspy.enums import Station
 from api.vvs_api import VVSAPI, VSSStationType
 from api.vvs_api.stop import Stop, parse_stop_info
 from api.vvs_api.vvs_api_lib_fix import get_trips
+from api.resilience import RESILIENCE
 
 class TestVVSAPI(unittest.TestCase):
 
@@ -159,6 +160,11 @@ class TestStop(unittest.TestCase):
 class TestVVSApiLibFix(unittest.TestCase):
     REQUESTS_GET = 'requests.get'
 
+    def setUp(self):
+        # Failed requests of other tests must not leave the circuit of the VVS host open
+        RESILIENCE.reset()
+        self.addCleanup(RESILIENCE.reset)
+
     def test_get_trips_success(self):
         with patch.object(VVSAPI, 'get', return_value=MagicMock(status_code=200, json=lambda: {"trips": []})):
             result = get_trips(Station.CANNSTATTER_WASEN, Station.DITZINGEN_HERDWEG)
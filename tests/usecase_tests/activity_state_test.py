@@ -416,3 +416,47 @@ class TestActivityState(unittest.TestCase):
         # Assert neither method is called
         self.mock_state_machine.idle_activity.assert_not_called()
         self.mock_spotify_api.pause_spotify_playback.assert_not_called()
+
+    @patch('datetime.datetime')
+    def test_check_trigger_activity_fires_once_per_window(self, mock_datetime):
+        """Test that a trigger fires only once although the check runs every second."""
+        mock_datetime.now.return_value = datetime(2024, 11, 29, 22, 0, 1)
+        self.activity_state.check_trigger_activity()
+        mock_datetime.now.return_value = datetime(2024, 11, 29, 22, 0, 30)
+        self.activity_state.check_trigger_activity()
+
+        self.mock_state_machine.idle_activity.assert_called_once()
+        self.assertEqual(self.activity_state.timers["sleep"], int(datetime(2024, 11, 30, 22, 0).timestamp()))
+
+    @patch('datetime.datetime')
+    def test_check_trigger_activity_pauses_playback_after_midnight(self, mock_datetime):
+        """Test the playback pause one hour after a sleep time shortly before midnight."""
+        self.mock_state_machine.preferences = {"sleep_time": "23:30"}
+        mock_datetime.now.return_value = datetime(2024, 11, 30, 0, 30, 5)
+
+        self.activity_state.check_trigger_activity()
+
+        self.mock_spotify_api.pause_playback.assert_called_once()
+        self.mock_state_machine.idle_activity.assert_not_called()
+
+    @patch('datetime.datetime')
+    def test_check_trigger_activity_recomputes_timers_on_preference_change(self, mock_datetime):
+        """Test that the timers follow changes of the sleep time preference."""
+        mock_datetime.now.return_value = datetime(2024, 11, 29, 21, 0)
+        self.activity_state.check_trigger_activity()
+        self.assertEqual(self.activity_state.timers["sleep"], int(datetime(2024, 11, 29, 22, 0).timestamp()))
+
+        self.mock_state_machine.preferences = {"sleep_time": "21:30", "default_alarm_time": "07:00"}
+        self.activity_state.check_trigger_activity()
+        self.assertEqual(self.activity_state.timers["sleep"], int(datetime(2024, 11, 29, 21, 30).timestamp()))
+        self.assertNotIn("alarm", self.activity_state.timers)
+
+    @patch('datetime.datetime')
+    def test_check_trigger_activity_ignores_default_alarm_time(self, mock_datetime):
+        """Test that the default alarm time does not start the morning routine."""
+        self.mock_state_machine.preferences = {"sleep_time": "22:00", "default_alarm_time": "07:00"}
+        mock_datetime.now.return_value = datetime(2024, 11, 30, 7, 0, 10)
+
+        self.activity_state.check_trigger_activity()
+
+        self.mock_state_machine.start.assert_not_called()
@@ -0,0 +1,170 @@
+import asyncio
+import datetime
+import unittest
+from unittest.mock import patch, AsyncMock, MagicMock
+from usecases.async_runtime import AsyncStateRuntime
+from usecases.welcome_state import WelcomeState
+
+
+class TestAsyncStateRuntime(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = AsyncStateRuntime()
+
+    def tearDown(self):
+        self.runtime.stop()
+
+    def test_run_returns_result(self):
+        async def coroutine():
+            await asyncio.sleep(0.01)
+            return 'news_idle'
+
+        self.assertEqual(self.runtime.run(coroutine()), 'news_idle')
+
+    def test_run_propagates_exceptions(self):
+        async def coroutine():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.runtime.run(coroutine())
+
+    def test_loop_is_reused(self):
+        async def get_loop():
+            return asyncio.get_running_loop()
+
+        self.assertIs(self.runtime.run(get_loop()), self.runtime.run(get_loop()))
+
+
+class TestWelcomeStateAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.tts_api = MagicMock()
+        self.tts_api.toggle_elevenlabs = False
+        self.weather_api = MagicMock()
+        self.rapla_api = MagicMock()
+        self.transit_api = MagicMock()
+        self.async_weather_api = MagicMock()
+        self.async_transit_api = MagicMock()
+
+        async def speak_async(text):
+            self.events.append(('speak_start', text))
+            await asyncio.sleep(0.05)
+            self.events.append(('speak_end', text))
+
+        def speak(text):
+            self.events.append(('speak_start', text))
+            self.events.append(('speak_end', text))
+
+        def get_best_trip(start, end, arrival_time):
+            self.events.append(('trip_start', None))
+            return -1
+
+        async def get_best_trip_async(start, end, arrival_time):
+            self.events.append(('trip_start', None))
+            return None
+
+        async def ask_yes_no_async(text):
+            return True
+
+        appointment = MagicMock()
+        appointment.datetime_start = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=2)
+        appointment.room = "A1"
+
+        self.tts_api.speak_async = speak_async
+        self.tts_api.ask_yes_no_async = ask_yes_no_async
+        self.tts_api.speak.side_effect = speak
+        self.tts_api.ask_yes_no.return_value = True
+        self.transit_api.get_best_trip.side_effect = get_best_trip
+        self.weather_api.get_daily_forecast.return_value = {'min_temp': 10, 'max_temp': 20, 'avg_condition': 'sonnig'}
+        self.weather_api.get_weather.return_value = {'main': {'temp': 15}}
+        self.async_transit_api.get_best_trip = get_best_trip_async
+        self.async_weather_api.get_daily_forecast = AsyncMock(return_value=self.weather_api.get_daily_forecast.return_value)
+        self.async_weather_api.get_weather = AsyncMock(return_value=self.weather_api.get_weather.return_value)
+        self.rapla_api.get_todays_appointments.return_value = [appointment]
+        self.rapla_api.get_tomorrows_appointments.return_value = []
+
+        state_machine = MagicMock()
+        state_machine.emit_event.side_effect = lambda event, data: self.events.append((event, data))
+        state_machine.preferences = {
+            "default_alarm_time": "09:00",
+            "home_location": {"vvs_code": "home_code"},
+            "default_destination": {"vvs_code": "destination_code"}
+        }
+        state_machine.api_factory.create_api.side_effect = lambda api_type, state_machine=None: {
+            "tts": self.tts_api,
+            "weather": self.weather_api,
+            "rapla": self.rapla_api,
+            "vvs": self.transit_api,
+        }[api_type]
+        state_machine.api_factory.create_async_api.side_effect = lambda api_type: {
+            "weather": self.async_weather_api,
+            "vvs": self.async_transit_api,
+        }[api_type]
+        self.state_machine = state_machine
+        self.welcome_state = WelcomeState(state_machine)
+
+    def test_on_enter_async_returns_next_trigger(self):
+        next_trigger = asyncio.run(self.welcome_state.on_enter_async())
+
+        self.assertEqual(next_trigger, 'morning_news')
+        self.state_machine.emit_event.assert_called_once_with("alarm_time_changed", datetime.time(9, 0))
+        spoken = [text for event, text in self.events if event == 'speak_start']
+        self.assertTrue(spoken[0].startswith("Guten Morgen!"))
+        self.assertEqual(spoken[-1], "Es konnte keine passende Verbindung gefunden werden.")
+
+    def test_sync_and_async_paths_run_the_same_steps(self):
+        # Only the time of the fetches differs, the events and sentences are the same
+        asyncio.run(self.welcome_state.on_enter_async())
+        async_events = [event for event in self.events if event[0] not in ('speak_end', 'trip_start')]
+        self.events.clear()
+        self.welcome_state.briefing.clear()
+
+        self.welcome_state.on_enter()
+        sync_events = [event for event in self.events if event[0] not in ('speak_end', 'trip_start')]
+
+        self.assertEqual(sync_events[0], ("alarm_time_changed", datetime.time(9, 0)))
+        self.assertEqual(async_events, sync_events)
+        self.state_machine.morning_news.assert_called_once()
+
+    def test_network_fetches_use_the_async_clients(self):
+        asyncio.run(self.welcome_state.on_enter_async())
+
+        self.async_weather_api.get_daily_forecast.assert_awaited_once()
+        self.async_weather_api.get_weather.assert_awaited_once_with("Stuttgart")
+        self.weather_api.get_daily_forecast.assert_not_called()
+        self.weather_api.get_weather.assert_not_called()
+        self.transit_api.get_best_trip.assert_not_called()
+        self.assertIn(('trip_start', None), self.events)
+
+    def test_trip_is_fetched_while_speaking(self):
+        asyncio.run(self.welcome_state.on_enter_async())
+
+        first_speech_end = self.events.index(next(e for e in self.events if e[0] == 'speak_end'))
+        self.assertLess(self.events.index(('trip_start', None)), first_speech_end)
+
+    def test_state_machine_runs_coroutine_when_runtime_enabled(self):
+        from usecases.state_machine import StateMachine
+        from usecases.idle_state import IdleState
+        IdleState._instance = None
+        self.addCleanup(setattr, IdleState, '_instance', None)
+
+        with patch('api.api_factory.APIFactory.create_api', return_value=MagicMock()):
+            state_machine = StateMachine()
+        state_machine.testing = True
+        state_machine.async_runtime = AsyncStateRuntime()
+        self.addCleanup(state_machine.async_runtime.stop)
+
+        async def on_enter_async():
+            return 'exit'
+
+        with patch.object(state_machine.welcome, 'on_enter_async', new=on_enter_async, create=True), \
+             patch.object(state_machine.welcome, 'on_enter') as mock_on_enter:
+            state_machine.start()
+
+        mock_on_enter.assert_not_called()
+        self.assertEqual(state_machine.state, 'idle')
+
+
+if __name__ == '__main__':
+    unittest.main()
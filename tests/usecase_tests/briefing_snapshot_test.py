@@ -0,0 +1,105 @@
+import datetime
+import unittest
+from unittest.mock import patch, MagicMock
+from usecases.briefing_snapshot import BriefingSnapshot, seconds_until_prefetch
+from usecases.welcome_state import WelcomeState
+
+
+class TestBriefingSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = BriefingSnapshot({"forecast": 60, "trip": 60})
+
+    def test_fresh_item_is_reused(self):
+        self.snapshot.put("forecast", {"min_temp": 10})
+        fetch = MagicMock()
+
+        self.assertEqual(self.snapshot.get_or_fetch("forecast", fetch), {"min_temp": 10})
+        fetch.assert_not_called()
+
+    def test_stale_item_is_refetched(self):
+        with patch('usecases.briefing_snapshot.time.monotonic', return_value=100.0):
+            self.snapshot.put("forecast", {"min_temp": 10})
+        fetch = MagicMock(return_value={"min_temp": 12})
+
+        with patch('usecases.briefing_snapshot.time.monotonic', return_value=161.0):
+            self.assertFalse(self.snapshot.is_fresh("forecast"))
+            self.assertEqual(self.snapshot.get_or_fetch("forecast", fetch), {"min_temp": 12})
+        fetch.assert_called_once()
+
+    def test_key_mismatch_is_refetched(self):
+        self.snapshot.put("trip", "old trip", key="08:00")
+
+        self.assertEqual(self.snapshot.get("trip", key="08:00"), "old trip")
+        self.assertIsNone(self.snapshot.get("trip", key="10:00"))
+        self.assertEqual(self.snapshot.get_or_fetch("trip", lambda: "new trip", key="10:00"), "new trip")
+
+    def test_unknown_item_is_never_fresh(self):
+        self.snapshot.put("news", ["headline"])
+        self.assertFalse(self.snapshot.is_fresh("news"))
+
+    def test_seconds_until_prefetch(self):
+        now = datetime.datetime(2024, 5, 6, 7, 0)
+        self.assertEqual(seconds_until_prefetch("08:00", 10, now), 50 * 60)
+        # Prefetch time already passed today -> tomorrow
+        self.assertEqual(seconds_until_prefetch("07:05", 10, now), 24 * 60 * 60 - 5 * 60)
+
+
+class TestWelcomeStatePrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.tts_api = MagicMock()
+        self.tts_api.toggle_elevenlabs = False
+        self.weather_api = MagicMock()
+        self.rapla_api = MagicMock()
+        self.transit_api = MagicMock()
+        self.weather_api.get_daily_forecast.return_value = {'min_temp': 10, 'max_temp': 20, 'avg_condition': 'sonnig'}
+        self.weather_api.get_weather.return_value = {'main': {'temp': 15}}
+        appointment = MagicMock()
+        appointment.datetime_start = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=2)
+        self.rapla_api.get_todays_appointments.return_value = [appointment]
+        self.rapla_api.get_tomorrows_appointments.return_value = []
+        self.transit_api.get_best_trip.return_value = -1
+
+        state_machine = MagicMock()
+        state_machine.preferences = {
+            "default_alarm_time": "09:00",
+            "home_location": {"vvs_code": "home_code"},
+            "default_destination": {"vvs_code": "destination_code"}
+        }
+        state_machine.api_factory.create_api.side_effect = lambda api_type, state_machine=None: {
+            "tts": self.tts_api,
+            "weather": self.weather_api,
+            "rapla": self.rapla_api,
+            "vvs": self.transit_api,
+        }[api_type]
+        self.welcome_state = WelcomeState(state_machine)
+
+    def test_on_enter_uses_prefetched_briefing(self):
+        self.welcome_state.prefetch_briefing()
+        self.welcome_state.on_enter()
+
+        self.weather_api.get_daily_forecast.assert_called_once()
+        self.weather_api.get_weather.assert_called_once()
+        self.rapla_api.get_todays_appointments.assert_called_once()
+        self.transit_api.get_best_trip.assert_called_once()
+        self.tts_api.speak.assert_any_call("Es konnte keine passende Verbindung gefunden werden.")
+
+    def test_on_enter_refetches_stale_items(self):
+        self.welcome_state.prefetch_briefing()
+        self.welcome_state.briefing.max_age["current_weather"] = -1
+        self.welcome_state.on_enter()
+
+        self.weather_api.get_daily_forecast.assert_called_once()
+        self.assertEqual(self.weather_api.get_weather.call_count, 2)
+
+    def test_prefetch_errors_are_not_raised(self):
+        self.rapla_api.get_todays_appointments.side_effect = Exception("Rapla down")
+        self.welcome_state.prefetch_briefing()
+
+        self.assertTrue(self.welcome_state.briefing.is_fresh("forecast"))
+        self.assertFalse(self.welcome_state.briefing.is_fresh("appointments"))
+
+
+if __name__ == '__main__':
+    unittest.main()
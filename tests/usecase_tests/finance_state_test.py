@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock, mock_open, Mock
 from usecases.financetracker_state import FinanceState
 from usecases.state_machine import StateMachine
+from api.rate_limiter import RateLimitExceeded
 import json
 
 class TestFinanceState(unittest.TestCase):
@@ -122,10 +123,8 @@ class TestFinanceState(unittest.TestCase):
 
 #%%%%%%%%%%%%%%%%%%%%%tests für get_information%%%%%%%%%%%%%%%%%%%%%%%%%%%%
     def test_rate_limit_reached(self):
-        # Simuliert die Rückgabe der Rate-Limit-Nachricht
-        self.finance_state.stock_api.company_overview.return_value = {
-            "Information": "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. Please subscribe to any of the premium plans at https://www.alphavantage.co/premium/ to instantly remove all daily rate limits."
-        }
+        # Simuliert das erreichte Rate-Limit
+        self.finance_state.stock_api.company_overview.side_effect = RateLimitExceeded('finance')
         result = self.finance_state.get_information("AAPL")
         self.assertEqual(result, {})
 
@@ -142,21 +141,17 @@ class TestFinanceState(unittest.TestCase):
         self.assertEqual(result, "Apple Inc.")
 
 #%%%%%%%%%%%%%%%%%%%%%tests für on_enter%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    @patch("os.makedirs")  # Mock os.makedirs
-    @patch("builtins.open", new_callable=mock_open)
-    @patch("os.path.join", return_value="temp.json")
-    @patch("json.dump")
     @patch.object(FinanceState, "get_information")  # Mock der get_information Methode
-    #@patch.object(FinanceState, "stock_api")  # Mock für die stock_api
-    def test_on_enter_valid_data(self, mock_get_information, mock_json_dump, mock_path_join, mock_open_file, mock_makedirs):
+    def test_on_enter_valid_data(self, mock_get_information):
         # Simuliert die Antwort der API
         self.finance_state.stock_api = Mock()
 
-        self.finance_state.stock_api.get_top_gainers_losers.return_value = {
+        response = {
             "most_actively_traded": [
                 {"ticker": "AAPL"}, {"ticker": "MSFT"}, {"ticker": "GOOG"}
             ]
         }
+        self.finance_state.stock_api.get_top_gainers_losers.return_value = response
 
         # Simuliert die Rückgabe von get_information für die Ticker
         def mock_get_info_side_effect(symbol):
@@ -171,7 +166,6 @@ class TestFinanceState(unittest.TestCase):
         # Setzen des Mocks für get_information
         mock_get_information.side_effect = mock_get_info_side_effect
 
-        print(type(mock_get_information))
         # Mock für round_numbers_for_speech, um die erwarteten gerundeten Daten zurückzugeben
         mock_round_numbers = MagicMock(return_value=[
             {"name": "Apple Inc.", "price": 150, "change_amount": 2, "change_percentage": "1.5", "volume": "10 Mio."},
@@ -188,7 +182,10 @@ class TestFinanceState(unittest.TestCase):
         mock_get_information.assert_any_call("AAPL")
         mock_get_information.assert_any_call("MSFT")
         mock_get_information.assert_any_call("GOOG")
-        
+        mock_round_numbers.assert_called_once_with([{"name": "Apple Inc."}, {"name": "Microsoft Corp."}, {"name": "Google LLC"}])
+        # Die (gecachte) Antwort der API darf nicht verändert werden
+        self.assertEqual(response["most_actively_traded"][0], {"ticker": "AAPL"})
+
         # Überprüfen, ob die tts_api die korrekte Nachricht spricht
         self.finance_state.tts_api.speak.assert_any_call("Die drei Meistgehandelten Aktien heute sind Apple Inc., Microsoft Corp. und Google LLC.")
         self.finance_state.tts_api.speak.assert_any_call(
@@ -198,51 +195,40 @@ class TestFinanceState(unittest.TestCase):
         self.finance_state.tts_api.speak.assert_any_call(
             "Hier ist dein tägliches Update für die Google LLC-Aktie. Der aktuelle Kurs liegt bei 2800 Dollar. Heute hat sich der Kurs um 15 Dollar geändert, was eine Änderung von 0,5 Prozent bedeutet. Das Handelsvolumen liegt bei 8 Mio. gehandelten Aktien.")
 
-        # Überprüfen, ob json.dump einmal aufgerufen wurde
-        mock_json_dump.assert_called_once()
-
         # Überprüfen, ob exit_finance aufgerufen wurde
         self.finance_state.state_machine.exit_finance.assert_called_once()
 
-    @patch("os.makedirs")  # Mock os.makedirs
-    @patch("builtins.open", new_callable=mock_open, read_data=json.dumps([
-            {"name": "Apple Inc.", "price": 150, "change_amount": 2, "change_percentage": "1.5%", "volume": 10000000},
-            {"name": "Microsoft Corp.", "price": 250, "change_amount": -1, "change_percentage": "-0.4%", "volume": 12000000},
-            {"name": "Google LLC", "price": 2800, "change_amount": 15, "change_percentage": "0.5%", "volume": 8000000}
-        ]))
-    @patch("os.path.join", return_value="temp.json")
-    def test_on_enter_no_data(self, mock_path_join, mock_open_file, mock_makedirs):
-        # Simuliert keine Daten von der API
-        self.finance_state.stock_api.get_top_gainers_losers.return_value = {}
+    def test_on_enter_company_overview_rate_limit(self):
+        # Ohne Firmendaten (Rate-Limit) wird der Ticker als Name verwendet
+        self.finance_state.stock_api.get_top_gainers_losers.return_value = {
+            "most_actively_traded": [
+                {"ticker": ticker, "price": "1", "change_amount": "0", "change_percentage": "0%", "volume": "1"}
+                for ticker in ("AAPL", "MSFT", "GOOG")
+            ]
+        }
+        self.finance_state.stock_api.company_overview.side_effect = RateLimitExceeded('finance')
 
         self.finance_state.on_enter()
 
-        # Prüfen, ob Fallback-Daten geladen wurden
-        mock_open_file.assert_any_call("temp.json", "r")
-        self.finance_state.tts_api.speak.assert_any_call("Die drei Meistgehandelten Aktien heute sind Apple Inc., Microsoft Corp. und Google LLC.")
+        self.finance_state.tts_api.speak.assert_any_call("Die drei Meistgehandelten Aktien heute sind AAPL, MSFT und GOOG.")
 
+    def test_on_enter_no_data(self):
+        # Simuliert keine Daten von der API (und keine gespeicherten Daten)
+        self.finance_state.stock_api.get_top_gainers_losers.return_value = {}
 
-    
-    @patch("os.makedirs")  # Mock os.makedirs
-    @patch("builtins.open", new_callable=mock_open, read_data=json.dumps([
-            {"name": "Apple Inc.", "price": 150, "change_amount": 2, "change_percentage": "1.5%", "volume": 10000000},
-            {"name": "Microsoft Corp.", "price": 250, "change_amount": -1, "change_percentage": "-0.4%", "volume": 12000000},
-            {"name": "Google LLC", "price": 2800, "change_amount": 15, "change_percentage": "0.5%", "volume": 8000000}
-        ]))
-    @patch("os.path.join", return_value="temp.json")
-    @patch("json.dump")
-    def test_on_enter_rate_limit(self, mock_json_dump, mock_path_join, mock_open_file, mock_makedirs):
-        # Simuliert Rate-Limit-Meldung von der API
-        self.finance_state.stock_api.get_top_gainers_losers.return_value = {
-            "Information": "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. Please subscribe to any of the premium plans at https://www.alphavantage.co/premium/ to instantly remove all daily rate limits."
-        }
+        self.finance_state.on_enter()
+
+        self.finance_state.tts_api.speak.assert_called_once_with("Die Aktiendaten sind gerade leider nicht verfügbar.")
+        self.finance_state.state_machine.exit_finance.assert_called_once()
+
+    def test_on_enter_rate_limit(self):
+        # Simuliert das erreichte Rate-Limit (ohne gespeicherte Daten)
+        self.finance_state.stock_api.get_top_gainers_losers.side_effect = RateLimitExceeded('finance')
 
         self.finance_state.on_enter()
 
-        # Überprüfen, ob Fallback-Daten geladen wurden
-        mock_open_file.assert_any_call("temp.json", "r")
-        self.finance_state.tts_api.speak.assert_any_call("Die drei Meistgehandelten Aktien heute sind Apple Inc., Microsoft Corp. und Google LLC.")
-        mock_json_dump.assert_called_once()
+        self.finance_state.tts_api.speak.assert_called_once_with("Die Aktiendaten sind gerade leider nicht verfügbar.")
+        self.finance_state.state_machine.exit_finance.assert_called_once()
 
 
 if __name__ == '__main__':
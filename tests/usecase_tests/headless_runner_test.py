@@ -0,0 +1,75 @@
+import io
+import json
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+from usecases.event_sink import CallbackEventSink, JsonLinesEventSink, EVENT_STATE_CHANGED
+from usecases.headless_runner import HeadlessRunner
+from usecases.idle_state import IdleState
+from usecases.state_machine import StateMachine
+
+
+class TestEventSinks(unittest.TestCase):
+
+    def test_json_lines_event_sink(self):
+        stream = io.StringIO()
+        JsonLinesEventSink(stream).on_event(EVENT_STATE_CHANGED, "welcome")
+
+        event = json.loads(stream.getvalue())
+        self.assertEqual(event["event"], "state_changed")
+        self.assertEqual(event["data"], "welcome")
+
+    def test_failing_sink_does_not_break_state_machine(self):
+        with patch('api.api_factory.APIFactory.create_api', return_value=MagicMock()):
+            state_machine = StateMachine()
+        events = []
+        state_machine.add_event_sink(CallbackEventSink(MagicMock(side_effect=Exception("broken sink"))))
+        state_machine.add_event_sink(CallbackEventSink(lambda event, data: events.append((event, data))))
+
+        state_machine.emit_event(EVENT_STATE_CHANGED, "news")
+
+        self.assertEqual(events, [(EVENT_STATE_CHANGED, "news")])
+
+
+class TestHeadlessRunner(unittest.TestCase):
+
+    def setUp(self):
+        IdleState._instance = None
+        self.addCleanup(setattr, IdleState, '_instance', None)
+        patcher = patch('api.api_factory.APIFactory.create_api', return_value=MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.events = []
+        state_machine = StateMachine()
+        state_machine.testing = True
+        self.runner = HeadlessRunner(state_machine, [CallbackEventSink(lambda event, data: self.events.append((event, data)))])
+
+    def test_state_changes_reach_event_sink(self):
+        with patch.object(self.runner.state_machine.welcome, 'on_enter', return_value='exit'):
+            self.runner.state_machine.start()
+
+        states = [data for event, data in self.events if event == EVENT_STATE_CHANGED]
+        self.assertEqual(states, ['welcome', 'idle'])
+
+    def test_cli_queues_transitions(self):
+        output = io.StringIO()
+        self.runner.run_cli(io.StringIO("triggers\ninteract\nunknown\nstate\nquit\nstart\n"), output)
+
+        lines = output.getvalue().splitlines()
+        self.assertIn("interact", lines[0].split())
+        self.assertEqual(lines[1], "Unknown transition: unknown")
+        self.assertEqual(lines[2], "idle")
+        self.assertIn("interact", self.runner.state_machine.transition_queue)
+        self.assertNotIn("start", self.runner.state_machine.transition_queue)
+
+    def test_state_machine_does_not_import_qt(self):
+        code = "import sys, usecases.headless_runner; print(any(m.startswith('PyQt5') for m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+        self.assertEqual(result.stdout.strip().splitlines()[-1], "False", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, patch, call
 from usecases.news_state import NewsState
 from api.llm_api.llm_api import LLMApi
 from api.news_api.main import NewsAPI
+from api.rate_limiter import RateLimitExceeded
 from api.tts_api.main import TTSAPI
 from usecases.state_machine import StateMachine
 
@@ -79,6 +80,15 @@ class TestNewsState(unittest.TestCase):
         # Verify state machine transitions back to idle
         self.mock_state_machine.news_idle.assert_called_once()
 
+    def test_on_enter_rate_limit_reached(self):
+        # Simuliert das erreichte Rate-Limit ohne gespeicherte Schlagzeilen
+        self.mock_news_api.fetch_top_headlines.side_effect = RateLimitExceeded('news')
+
+        self.news_state.on_enter()
+
+        self.mock_tts_api.speak.assert_called_once_with("Es tut mir leid, es sind keine Nachrichten verfügbar.")
+        self.mock_state_machine.news_idle.assert_called_once()
+
     def test_read_article_edge_cases(self):
         # Test with empty headlines
         result_empty = self.news_state.read_article([])
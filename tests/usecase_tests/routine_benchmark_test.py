@@ -0,0 +1,56 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from api.cassette import RECORD, REPLAY, use_cassette
+from api.resilience import RESILIENCE
+from benchmarks import routine
+from benchmarks.harness import ScriptedTTS, use_token_copies
+from benchmarks.stand_in import StandInServer
+from usecases.idle_state import IdleState
+
+
+class TestRoutineBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cassette = os.path.join(directory.name, 'morning.json.gz')
+        RESILIENCE.reset()
+        self.addCleanup(RESILIENCE.reset)
+        self.addCleanup(setattr, IdleState, '_instance', None)
+
+    def run_morning_route(self, base_url):
+        tts, events = ScriptedTTS(), []
+        state_machine = routine.create_state_machine(tts, events, base_url)
+        try:
+            return routine.run_route(state_machine, tts, events, 'morning')
+        finally:
+            state_machine.stop()
+
+    def test_replayed_run_reports_time_to_first_speech(self):
+        # Recorded from the stand-in, which is stopped before the replay, so every response comes from the cassette
+        with use_token_copies():
+            with StandInServer(latency=0) as stand_in, use_cassette(self.cassette, RECORD):
+                self.run_morning_route(stand_in.base_url)
+            # The clients use the same URLs as during the recording, which are only on the cassette now
+            with use_cassette(self.cassette, REPLAY, latency=0):
+                run = self.run_morning_route(stand_in.base_url)
+
+        report = routine.aggregate([run])
+        self.assertEqual(list(report), ['welcome', 'news', 'idle', 'total'])
+        first_speech = report['total']['first_speech']
+        self.assertLessEqual(0, first_speech['median_ms'])
+        self.assertEqual(first_speech['median_ms'], first_speech['p95_ms'])
+        self.assertEqual(first_speech['median_ms'], first_speech['p99_ms'])
+        self.assertLessEqual(first_speech['median_ms'], report['total']['duration']['median_ms'])
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            routine.print_report({'runs': 1, 'routes': {'morning': report}})
+        self.assertRegex(output.getvalue(), r'total\s+first_speech\s+p50\s+[\d.]+ ms\s+p95\s+[\d.]+ ms\s+p99\s+[\d.]+ ms')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from usecases.scheduler import Scheduler
+from usecases.idle_state import IdleState
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler()
+
+    def test_run_pending_runs_only_due_jobs(self):
+        due_job = MagicMock()
+        later_job = MagicMock()
+        self.scheduler.add_job(due_job, delay=0)
+        self.scheduler.add_job(later_job, delay=60)
+
+        executed = self.scheduler.run_pending()
+
+        self.assertEqual(executed, 1)
+        due_job.assert_called_once()
+        later_job.assert_not_called()
+
+    def test_periodic_job_is_rescheduled(self):
+        job = MagicMock()
+        self.scheduler.add_job(job, interval=60)
+
+        self.scheduler.run_pending()
+        self.scheduler.run_pending()
+
+        job.assert_called_once()
+        self.assertGreater(self.scheduler.seconds_until_next_job(), 59)
+
+    def test_cancelled_job_is_not_run(self):
+        job = MagicMock()
+        scheduled = self.scheduler.add_job(job)
+        self.scheduler.cancel(scheduled)
+
+        self.assertEqual(self.scheduler.run_pending(), 0)
+        self.assertIsNone(self.scheduler.seconds_until_next_job())
+
+    def test_failing_job_does_not_stop_other_jobs(self):
+        failing_job = MagicMock(side_effect=RuntimeError("boom"))
+        job = MagicMock()
+        self.scheduler.add_job(failing_job)
+        self.scheduler.add_job(job)
+
+        self.assertEqual(self.scheduler.run_pending(), 2)
+        job.assert_called_once()
+
+    def test_wait_blocks_until_next_job(self):
+        self.scheduler.add_job(MagicMock(), delay=0.2)
+        self.scheduler.wait(timeout=0)  # consume the wake-up caused by add_job
+
+        start = time.monotonic()
+        woken = self.scheduler.wait()
+
+        self.assertFalse(woken)
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_wake_interrupts_wait(self):
+        self.scheduler.add_job(MagicMock(), delay=60)
+        self.scheduler.wait(timeout=0)
+
+        threading.Timer(0.05, self.scheduler.wake).start()
+        start = time.monotonic()
+        woken = self.scheduler.wait()
+
+        self.assertTrue(woken)
+        self.assertLess(time.monotonic() - start, 1)
+
+
+class TestIdleStateScheduling(unittest.TestCase):
+
+    def setUp(self):
+        IdleState._instance = None
+        self.state_machine = MagicMock()
+        self.state_machine.testing = False
+        self.state_machine.running = True
+        self.state_machine.state = 'idle'
+        self.state_machine.scheduler = Scheduler()
+        self.state_machine.pop_transition.return_value = None
+        self.idle_state = IdleState(self.state_machine)
+        self.idle_state.is_first_run = False
+
+    def tearDown(self):
+        IdleState._instance = None
+
+    def test_idle_loop_does_not_busy_spin(self):
+        check = MagicMock()
+        self.state_machine.scheduler.add_job(check, interval=0.1)
+
+        thread = threading.Thread(target=self.idle_state.on_enter, daemon=True)
+        thread.start()
+        time.sleep(0.35)
+        self.state_machine.running = False
+        self.state_machine.scheduler.wake()
+        thread.join(timeout=1)
+
+        self.assertFalse(thread.is_alive())
+        # One call per interval instead of one per loop iteration
+        self.assertLessEqual(check.call_count, 6)
+        self.assertLess(self.state_machine.pop_transition.call_count, 20)
+
+    def test_queued_transition_wakes_idle_thread(self):
+        transitions = ['start']
+        self.state_machine.pop_transition.side_effect = lambda: transitions.pop() if transitions else None
+        called = threading.Event()
+        self.state_machine.start.side_effect = lambda: called.set()
+
+        thread = threading.Thread(target=self.idle_state.on_enter, daemon=True)
+        thread.start()
+        self.assertTrue(called.wait(timeout=1))
+        self.state_machine.running = False
+        self.state_machine.scheduler.wake()
+        thread.join(timeout=1)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,25 @@
+import os
+import sys
+import tempfile
+import threading
+import tracemalloc
 import unittest
 from unittest.mock import patch, MagicMock
+from loguru import logger
+from api import profiling
+from api.cancellation import run_cancellable
 from usecases.state_machine import StateMachine
+from usecases.idle_state import IdleState
+
+
+def stack_depth() -> int:
+    """Returns the number of frames on the current call stack."""
+    depth = 0
+    frame = sys._getframe()
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
 
 class TestStateMachine(unittest.TestCase):
 
@@ -24,5 +43,164 @@ class TestStateMachine(unittest.TestCase):
         state_machine.goto_idle()
         self.assertEqual(state_machine.state, 'idle')
 
+
+class TestLazyStartup(unittest.TestCase):
+
+    def setUp(self):
+        IdleState._instance = None
+        self.addCleanup(setattr, IdleState, '_instance', None)
+        patcher = patch('api.api_factory.APIFactory.create_api', return_value=MagicMock())
+        self.mock_create_api = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_states_are_built_on_first_access(self):
+        with patch.object(StateMachine.welcome, 'state_class') as mock_welcome_state:
+            state_machine = StateMachine()
+            mock_welcome_state.assert_not_called()
+            self.mock_create_api.assert_not_called()
+
+            self.assertIs(state_machine.welcome, mock_welcome_state.return_value)
+            self.assertIs(state_machine.welcome, mock_welcome_state.return_value)
+            mock_welcome_state.assert_called_once_with(state_machine)
+
+    def test_warm_up_builds_all_states(self):
+        state_machine = StateMachine()
+        state_machine.start_warm_up().join(timeout=5)
+
+        for name in ('idle', 'news', 'speach', 'welcome', 'finance', 'activity', 'petrol_checker'):
+            self.assertIn(name, state_machine.__dict__)
+
+
+class TestInterrupt(unittest.TestCase):
+
+    def setUp(self):
+        IdleState._instance = None
+        self.addCleanup(setattr, IdleState, '_instance', None)
+        patcher = patch('api.api_factory.APIFactory.create_api', return_value=MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        logger.disable("usecases")
+        self.addCleanup(logger.enable, "usecases")
+
+        self.state_machine = StateMachine()
+        self.state_machine.testing = True
+
+    def test_interrupt_cancels_running_state(self):
+        state_machine = self.state_machine
+        entered_speach = threading.Event()
+        summary_started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+        news_idle = MagicMock()
+
+        def summarize():
+            summary_started.set()
+            release.wait(5)
+
+        def read_news():
+            # Long running work of the state, e.g. the LLM summary of an article
+            run_cancellable(summarize)
+            news_idle()
+
+        with patch.object(state_machine.news, 'on_enter', new=read_news), \
+             patch.object(state_machine.speach, 'on_enter', new=entered_speach.set):
+            thread = threading.Thread(target=state_machine.to_news, daemon=True)
+            thread.start()
+            self.assertTrue(summary_started.wait(1))
+            state_machine.interrupt('to_speach')
+            self.assertTrue(entered_speach.wait(1))
+            thread.join(1)
+
+        # The state was left while the summary was still running
+        self.assertFalse(release.is_set())
+        news_idle.assert_not_called()
+        self.assertEqual(state_machine.state, 'speach')
+
+    def test_interrupt_while_idle_only_queues(self):
+        self.state_machine.interrupt('to_speach')
+
+        self.assertFalse(self.state_machine.cancel_token.cancelled)
+        self.assertIn('to_speach', self.state_machine.transition_queue)
+
+
+class TestTrampolinedDispatch(unittest.TestCase):
+
+    def setUp(self):
+        IdleState._instance = None
+        patcher = patch('api.api_factory.APIFactory.create_api', return_value=MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        logger.disable("usecases")
+        self.addCleanup(logger.enable, "usecases")
+
+        self.state_machine = StateMachine()
+        self.state_machine.testing = True
+        self.state_machine.main_window = MagicMock()
+
+    def tearDown(self):
+        IdleState._instance = None
+
+    def run_morning_cycles(self, cycles: int, depths: list):
+        """Drives idle -> welcome -> news -> idle `cycles` times, states request their next transition."""
+        state_machine = self.state_machine
+        remaining = [cycles]
+
+        def idle_on_enter():
+            depths.append(stack_depth())
+            if remaining[0] > 0:
+                remaining[0] -= 1
+                state_machine.start()
+
+        # Plain functions instead of mocks, mocks would record every call and grow the memory
+        with patch.object(state_machine.idle, 'on_enter', new=idle_on_enter), \
+             patch.object(state_machine.welcome, 'on_enter', new=lambda: state_machine.morning_news()), \
+             patch.object(state_machine.news, 'on_enter', new=lambda: state_machine.news_idle()):
+            state_machine.to_idle()
+
+    def test_stack_depth_stays_flat(self):
+        depths = []
+        self.run_morning_cycles(500, depths)
+
+        self.assertEqual(self.state_machine.state, 'idle')
+        self.assertEqual(len(depths), 501)
+        self.assertEqual(min(depths), max(depths))
+
+    def test_returned_trigger_is_fired(self):
+        with patch.object(self.state_machine.welcome, 'on_enter', return_value='interaction'), \
+             patch.object(self.state_machine.speach, 'on_enter', return_value='goto_idle') as mock_speach_on_enter:
+            self.state_machine.start()
+
+        mock_speach_on_enter.assert_called_once()
+        self.assertEqual(self.state_machine.state, 'idle')
+
+    def test_state_entries_are_profiled_when_enabled(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        profiling.enable_profiling(directory.name)
+        self.addCleanup(profiling.disable_profiling)
+
+        with patch.object(self.state_machine.welcome, 'on_enter', return_value='to_idle'):
+            self.state_machine.start()
+
+        profiles = sorted(name for name in os.listdir(directory.name) if name.endswith('.prof'))
+        self.assertEqual([name.split('-', 3)[3] for name in profiles], ['state-welcome.prof', 'state-idle.prof'])
+
+    def test_soak_memory_stays_flat(self):
+        # Warm up caches of transitions/loguru before measuring
+        self.run_morning_cycles(200, [])
+
+        tracemalloc.start()
+        try:
+            self.run_morning_cycles(200, [])
+            baseline, _ = tracemalloc.get_traced_memory()
+            self.run_morning_cycles(2000, [])
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # 10x more cycles must not retain memory per cycle
+        self.assertLess(current - baseline, 64 * 1024)
+
+
 if __name__ == '__main__':
     unittest.main()
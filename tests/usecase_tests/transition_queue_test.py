@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+from usecases.transition_queue import TransitionQueue, PRIORITY_USER, PRIORITY_DEFAULT, PRIORITY_BACKGROUND
+
+
+class TestTransitionQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = TransitionQueue()
+
+    def test_fifo_within_priority(self):
+        self.queue.put('start')
+        self.queue.put('to_speach')
+
+        self.assertEqual(self.queue.get_nowait(), 'start')
+        self.assertEqual(self.queue.get_nowait(), 'to_speach')
+        self.assertIsNone(self.queue.get_nowait())
+
+    def test_higher_priority_first(self):
+        self.queue.put('idle_activity', PRIORITY_BACKGROUND)
+        self.queue.put('start', PRIORITY_DEFAULT)
+        self.queue.put('to_speach', PRIORITY_USER)
+
+        self.assertEqual(self.queue.get_nowait(), 'to_speach')
+        self.assertEqual(self.queue.get_nowait(), 'start')
+        self.assertEqual(self.queue.get_nowait(), 'idle_activity')
+
+    def test_duplicates_are_coalesced(self):
+        self.assertTrue(self.queue.put('to_speach'))
+        self.assertFalse(self.queue.put('to_speach'))
+
+        self.assertEqual(len(self.queue), 1)
+        self.assertEqual(self.queue.get_nowait(), 'to_speach')
+        self.assertIsNone(self.queue.get_nowait())
+
+    def test_duplicate_with_higher_priority_moves_forward(self):
+        self.queue.put('idle_activity', PRIORITY_BACKGROUND)
+        self.queue.put('start', PRIORITY_DEFAULT)
+        self.assertTrue(self.queue.put('idle_activity', PRIORITY_USER))
+
+        self.assertEqual(len(self.queue), 2)
+        self.assertEqual(self.queue.get_nowait(), 'idle_activity')
+        self.assertEqual(self.queue.get_nowait(), 'start')
+        self.assertIsNone(self.queue.get_nowait())
+
+    def test_wait_for_transition_times_out(self):
+        start = time.monotonic()
+        self.assertIsNone(self.queue.wait_for_transition(timeout=0.05))
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_wait_for_transition_wakes_on_put(self):
+        threading.Timer(0.05, self.queue.put, args=('to_speach',)).start()
+
+        start = time.monotonic()
+        trigger = self.queue.wait_for_transition(timeout=2)
+
+        self.assertEqual(trigger, 'to_speach')
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_clear(self):
+        self.queue.put('start')
+        self.queue.clear()
+
+        self.assertEqual(len(self.queue), 0)
+        self.assertNotIn('start', self.queue)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import datetime
+import functools
 import os
 from loguru import logger
 from typing import Optional
+from api.api_client import fan_out
 from api.fitbit_api.main import FitbitAPI
 import pandas as pd
 from api.spotify_api.main import SpotifyAPI
@@ -11,6 +13,11 @@ class ActivityState:
     Represents the activity/health use case.
     """
 
+    # Length of the window in which a time based trigger may fire (the preferences have minute resolution)
+    TRIGGER_WINDOW_SECONDS = 60
+    # Directory of the activity data CSV files written by calculate_daily_stress_level
+    DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api", "fitbit_api", "data")
+
     def __init__(self, state_machine):
         # Initialize the state and required APIs
         self.running = True
@@ -20,6 +27,12 @@ class ActivityState:
         self.spotify_api = self.state_machine.api_factory.create_api(api_type="spotify")
         self.last_activated_at = datetime.datetime.min.strftime('%Y-%m-%d %H:%M')
         self.last_playback_stop_activated_at = datetime.datetime.min.strftime('%Y-%m-%d %H:%M')
+
+        # Time based triggers: name -> epoch timestamp of the next execution, see update_timers
+        self.timers = {}
+        self._timer_specs = {}  # name -> (time of day, offset in minutes)
+        self._next_timer_at = 0
+        self._timer_preferences = None
         logger.info("ActivityState initialized")
 
     def on_enter(self):
@@ -85,10 +98,8 @@ class ActivityState:
 
             # Save processed data to a CSV file for further analysis or debugging
             df = pd.DataFrame(records)
-            project_dir = os.path.dirname(os.path.abspath(__file__))
-            output_dir = os.path.join(project_dir, "..", "api", "fitbit_api", "data")            
-            os.makedirs(output_dir, exist_ok=True) 
-            output_file = os.path.join(output_dir, f"activity_data_{date}.csv")
+            os.makedirs(self.DATA_DIR, exist_ok=True)
+            output_file = os.path.join(self.DATA_DIR, f"activity_data_{date}.csv")
             df.to_csv(output_file, index=False)
             logger.info(f"Activity data saved to {output_file}")
             
@@ -163,11 +174,11 @@ class ActivityState:
         """
         today = datetime.date.today()
         sleep_start_times = []
+        dates = [(today - datetime.timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+        # The days are independent requests, they are sent at the same time (errors are handled per day)
+        results = fan_out([functools.partial(self.get_sleep_start_time, date) for date in dates], return_errors=False)
 
-        for i in range(days):
-            date = (today - datetime.timedelta(days=i)).strftime('%Y-%m-%d')
-            sleep_start_time = self.get_sleep_start_time(date)
-
+        for date, sleep_start_time in zip(dates, results):
             if sleep_start_time:
                 # Convert sleep start time into minutes since midnight
                 try:
@@ -244,17 +255,68 @@ class ActivityState:
         return one_hour_after_sleep_time
 
 
-    def check_trigger_activity(self):
-        #trigger Activity Use Case
-        # calculated_sleep_time = self.average_sleep_time(days=2) 
-        default_sleep_time = self.state_machine.preferences.get("sleep_time")
+    def next_fire_time(self, time_of_day: str, now: datetime.datetime, offset_minutes: int = 0) -> int:
+        """
+        Calculates the next execution of a daily trigger whose window has not ended yet.
 
-        current_day_and_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
-        current_time = current_day_and_time.split(" ")[1]
+        :param time_of_day: Time of the trigger in HH:MM format (e.g. the "sleep_time" preference).
+        :param now: Current local time.
+        :param offset_minutes: Minutes added to the time of day (e.g. 60 for one hour after the sleep time).
+        :return: Epoch timestamp of the start of the next trigger window.
+        """
+        hour, minute = (int(part) for part in time_of_day.split(":"))
+        # Start one day early, so triggers that wrap around midnight (23:30 + 1h) are not skipped
+        fire_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0) \
+            + datetime.timedelta(minutes=offset_minutes) - datetime.timedelta(days=1)
+        now_timestamp = now.timestamp()
+        while fire_at.timestamp() + self.TRIGGER_WINDOW_SECONDS <= now_timestamp:
+            fire_at += datetime.timedelta(days=1)
+        return int(fire_at.timestamp())
+
+    def update_timers(self, now: datetime.datetime):
+        """
+        Recalculates the time based triggers from the "sleep_time" preference.
+        """
+        sleep_time = self.state_machine.preferences.get("sleep_time")
+        self._timer_specs = {}
+        if sleep_time:
+            self._timer_specs["sleep"] = (sleep_time, 0)
+            self._timer_specs["pause_playback"] = (sleep_time, 60)
+        self.timers = {name: self.next_fire_time(time_of_day, now, offset)
+                       for name, (time_of_day, offset) in self._timer_specs.items()}
+        self._timer_preferences = sleep_time
+        self._next_timer_at = min(self.timers.values(), default=float("inf"))
+        logger.debug(f"Activity timers updated: {self.timers}")
 
-        one_hour_after_sleep_time = self.get_one_hour_after_sleep_time(default_sleep_time)
+    def check_trigger_activity(self):
+        """
+        Fires the time based triggers (sleep time, playback pause one hour later) that are due.
+        Runs every second while idle, so the common case is a single comparison with the next timer.
+        """
+        now = datetime.datetime.now()
+        now_timestamp = now.timestamp()
+        if self._timer_preferences != self.state_machine.preferences.get("sleep_time") \
+                or self._next_timer_at - now_timestamp > 24 * 60 * 60 + self.TRIGGER_WINDOW_SECONDS:
+            # Preferences changed or the clock was set back
+            self.update_timers(now)
+        if now_timestamp < self._next_timer_at:
+            return
 
-        if current_time == default_sleep_time and current_day_and_time != self.last_activated_at:
-            self.state_machine.idle_activity()
-        elif current_time == one_hour_after_sleep_time and current_day_and_time != self.last_playback_stop_activated_at:
-            self.pause_spotify_playback()
+        for name, fire_at in sorted(self.timers.items(), key=lambda item: item[1]):
+            if fire_at > now_timestamp:
+                break
+            # Reschedule first, a trigger fires at most once per window
+            time_of_day, offset = self._timer_specs[name]
+            self.timers[name] = self.next_fire_time(time_of_day, now + datetime.timedelta(seconds=self.TRIGGER_WINDOW_SECONDS), offset)
+            self._next_timer_at = min(self.timers.values())
+            if now_timestamp >= fire_at + self.TRIGGER_WINDOW_SECONDS:
+                # Missed (e.g. another state was active during the whole minute)
+                logger.debug(f"Skipped missed trigger {name}")
+                continue
+            logger.info(f"Time based trigger {name} fired")
+            if name == "sleep":
+                self.state_machine.idle_activity()
+            elif name == "pause_playback":
+                self.pause_spotify_playback()
+            # At most one trigger per check, the next one fires on the next check
+            return
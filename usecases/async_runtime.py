@@ -0,0 +1,81 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+from loguru import logger
+from api.async_api_client import close_shared_async_client
+from api.cancellation import CancellationToken, OperationCancelled
+
+
+class AsyncStateRuntime:
+    """
+    Optional asyncio runtime for the state machine.
+
+    States that implement `on_enter_async` are executed as coroutines on a single event loop that runs
+    in a background thread. The dispatch thread of the state machine blocks until the coroutine is done,
+    so the order of the states is the same as with the synchronous runtime, but inside a state network
+    fetches for the next sentence can run while the current sentence is spoken.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the event loop thread (if it is not running yet).
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name="async-state-runtime", daemon=True)
+            self._thread.start()
+            logger.info("Async state runtime started")
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coroutine: Coroutine, token: Optional[CancellationToken] = None) -> Any:
+        """
+        Runs a coroutine on the event loop and blocks until it is done.
+
+        :param coroutine: Coroutine to run, e.g. `state.on_enter_async()`.
+        :param token: Optional cancellation token, cancelling it cancels the task of the coroutine.
+        :return: Result of the coroutine.
+        :raises OperationCancelled: If the token was cancelled before the coroutine was done.
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        if token is None:
+            return future.result()
+        token.add_callback(future.cancel)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise OperationCancelled(token.reason)
+        finally:
+            token.remove_callback(future.cancel)
+
+    def stop(self):
+        """
+        Stops the event loop and waits for the loop thread to finish.
+        """
+        with self._lock:
+            if self.loop is None:
+                return
+            if self._thread is not None and self._thread.is_alive():
+                # Closes the connections of the async API clients on this loop
+                try:
+                    asyncio.run_coroutine_threadsafe(close_shared_async_client(), self.loop).result(timeout=5)
+                except Exception as e:
+                    logger.warning(f"Error closing the shared HTTP client: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            if self._thread is not None:
+                self._thread.join(timeout=5)
+            self.loop.close()
+            self.loop = None
+            self._thread = None
+            logger.info("Async state runtime stopped")
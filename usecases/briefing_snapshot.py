@@ -0,0 +1,119 @@
+import datetime
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from loguru import logger
+
+# Seconds a prefetched briefing item stays usable
+DEFAULT_MAX_AGE = {
+    "forecast": 3 * 60 * 60,
+    "current_weather": 20 * 60,
+    "appointments": 30 * 60,
+    "trip": 10 * 60,
+}
+
+
+class BriefingSnapshot:
+    """
+    Thread-safe snapshot of the inputs of the morning briefing (weather, appointments, trip).
+
+    Every item is stored together with the time it was fetched. Items that are older than their
+    freshness limit count as missing, so the welcome state only refetches what has gone stale.
+    """
+
+    def __init__(self, max_age: Optional[Dict[str, float]] = None):
+        """
+        :param max_age: Freshness limit in seconds per item name, defaults to DEFAULT_MAX_AGE.
+        """
+        self.max_age = dict(DEFAULT_MAX_AGE if max_age is None else max_age)
+        self._items: Dict[str, tuple] = {}  # name -> (value, key, monotonic fetch time)
+        self._lock = threading.Lock()
+
+    def put(self, name: str, value: Any, key: Hashable = None):
+        """
+        Stores an item.
+
+        :param name: Name of the item, e.g. "forecast".
+        :param value: Fetched value.
+        :param key: Optional input the value depends on (e.g. the arrival time of a trip).
+        """
+        with self._lock:
+            self._items[name] = (value, key, time.monotonic())
+
+    def age(self, name: str) -> Optional[float]:
+        """
+        :return: Seconds since the item was fetched, None if it is not in the snapshot.
+        """
+        with self._lock:
+            item = self._items.get(name)
+        return None if item is None else time.monotonic() - item[2]
+
+    def is_fresh(self, name: str, key: Hashable = None) -> bool:
+        """
+        :return: True if the item is in the snapshot, was fetched for the same key and is within its freshness limit.
+        """
+        with self._lock:
+            item = self._items.get(name)
+        if item is None or item[1] != key:
+            return False
+        return time.monotonic() - item[2] <= self.max_age.get(name, 0)
+
+    def get(self, name: str, key: Hashable = None, default: Any = None) -> Any:
+        """
+        :return: The stored value if it is fresh, `default` otherwise.
+        """
+        with self._lock:
+            item = self._items.get(name)
+        if item is None or item[1] != key or time.monotonic() - item[2] > self.max_age.get(name, 0):
+            return default
+        return item[0]
+
+    def get_or_fetch(self, name: str, fetch: Callable[[], Any], key: Hashable = None) -> Any:
+        """
+        Returns the stored value if it is fresh, otherwise fetches and stores it.
+
+        :param name: Name of the item.
+        :param fetch: Callable returning the current value.
+        :param key: Optional input the value depends on.
+        """
+        if self.is_fresh(name, key):
+            logger.debug(f"Using prefetched {name} ({self.age(name):.0f}s old)")
+            return self.get(name, key)
+        value = fetch()
+        self.put(name, value, key)
+        return value
+
+    async def get_or_fetch_async(self, name: str, fetch_async: Callable[[], Awaitable], key: Hashable = None) -> Any:
+        """
+        Coroutine variant of `get_or_fetch`, `fetch_async` returns an awaitable.
+        """
+        if self.is_fresh(name, key):
+            logger.debug(f"Using prefetched {name} ({self.age(name):.0f}s old)")
+            return self.get(name, key)
+        value = await fetch_async()
+        self.put(name, value, key)
+        return value
+
+    def clear(self):
+        """
+        Drops all items.
+        """
+        with self._lock:
+            self._items.clear()
+
+
+def seconds_until_prefetch(alarm_time: str, lead_minutes: float, now: Optional[datetime.datetime] = None) -> float:
+    """
+    Calculates the delay until the next prefetch run, `lead_minutes` before the next occurrence of `alarm_time`.
+
+    :param alarm_time: Alarm time in HH:MM format (the "default_alarm_time" preference).
+    :param lead_minutes: Minutes before the alarm the briefing should be prefetched.
+    :param now: Current local time, defaults to datetime.datetime.now().
+    :return: Seconds until the next prefetch run.
+    """
+    now = now or datetime.datetime.now()
+    alarm = datetime.datetime.strptime(alarm_time, "%H:%M").time()
+    prefetch_at = datetime.datetime.combine(now.date(), alarm) - datetime.timedelta(minutes=lead_minutes)
+    if prefetch_at <= now:
+        prefetch_at += datetime.timedelta(days=1)
+    return (prefetch_at - now).total_seconds()
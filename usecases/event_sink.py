@@ -0,0 +1,70 @@
+import datetime
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, TextIO
+from loguru import logger
+
+# Events emitted by the state machine and the states
+EVENT_STATE_CHANGED = "state_changed"          # data: name of the new state
+EVENT_ALARM_TIME_CHANGED = "alarm_time_changed"  # data: datetime.time of the calculated alarm
+
+
+class EventSink:
+    """
+    Receiver of the events of the state machine (e.g. state changes).
+
+    The frontend registers a Qt sink that re-emits the events as signals, headless runs use one of the
+    sinks below. The base class ignores all events.
+    """
+
+    def on_event(self, event: str, data: Any = None):
+        """
+        Called for every event, from the thread of the state machine.
+
+        :param event: Name of the event, one of the EVENT_* constants.
+        :param data: Payload of the event.
+        """
+
+
+class LoggingEventSink(EventSink):
+    """
+    Writes all events to the log.
+    """
+
+    def on_event(self, event: str, data: Any = None):
+        logger.info(f"Event {event}: {data}")
+
+
+class CallbackEventSink(EventSink):
+    """
+    Calls a function for every event, e.g. to collect the events in tests or benchmarks.
+    """
+
+    def __init__(self, callback: Callable[[str, Any], None]):
+        self.callback = callback
+
+    def on_event(self, event: str, data: Any = None):
+        self.callback(event, data)
+
+
+class JsonLinesEventSink(EventSink):
+    """
+    Writes every event as one JSON object per line (`{"time": ..., "event": ..., "data": ...}`).
+    """
+
+    def __init__(self, stream: TextIO = sys.stdout):
+        """
+        :param stream: Text stream to write to, e.g. stdout or an opened file.
+        """
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def on_event(self, event: str, data: Any = None):
+        if isinstance(data, (datetime.date, datetime.time)):
+            data = data.isoformat()
+        line = json.dumps({"time": time.time(), "event": event, "data": data}, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
@@ -1,8 +1,10 @@
 
+import functools
+from api.api_client import fan_out
 from api.api_factory import APIFactory
+from api.rate_limiter import RateLimitExceeded
+from loguru import logger
 from typing import Dict
-import json
-import os
 import re
 class FinanceState:
     """
@@ -52,30 +54,33 @@ class FinanceState:
         """
         print("FinanceTrackerState entered")
         
-        file_path = os.path.join(os.getcwd(), "ASWE-Projekt", "usecases", "temp.json")
-        data = self.stock_api.get_top_gainers_losers()
-        if data == {} or data == {"Information": "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. Please subscribe to any of the premium plans at https://www.alphavantage.co/premium/ to instantly remove all daily rate limits."}:
-            with open(file_path, "r") as file:
-                data = json.load(file)
-                print("laden1")
-        else:
-            top_three_actively_traded = data["most_actively_traded"][:3]
-            data = []
-            print(top_three_actively_traded)
-            for stock in top_three_actively_traded:
-                name = self.get_information(stock["ticker"])
-                if name != {}:
-                    stock["name"] = name
-                    del stock["ticker"]
-                    data.append(stock)
-                else:
-                    with open(file_path, "r") as file:
-                        data = json.load(file)
-                        print("laden2")
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w") as file:
-            json.dump(data, file, indent=4)
-            print("data dumped")
+        # The finance API falls back to the last stored response if the rate limit is reached (see api.persistent_cache),
+        # so the data is only missing if it was never loaded
+        try:
+            data = self.stock_api.get_top_gainers_losers()
+        except RateLimitExceeded as e:
+            logger.warning(e)
+            data = None
+        if not data or "most_actively_traded" not in data:
+            self.tts_api.speak("Die Aktiendaten sind gerade leider nicht verfügbar.")
+            self.state_machine.exit_finance()
+            return
+
+        top_three_actively_traded = data["most_actively_traded"][:3]
+        data = []
+        print(top_three_actively_traded)
+        # The company overviews are independent requests, they are sent at the same time
+        names = fan_out([functools.partial(self.get_information, stock["ticker"]) for stock in top_three_actively_traded])
+        for stock, name in zip(top_three_actively_traded, names):
+            if isinstance(name, Exception):
+                logger.error(f"Error retrieving company overview of {stock['ticker']}: {name}")
+                name = None
+            # Copy, the response is shared through the response cache
+            stock = dict(stock)
+            ticker = stock.pop("ticker")
+            # Without the company overview (rate limit) the ticker is used as name
+            stock["name"] = name or ticker
+            data.append(stock)
 
         data = self.round_numbers_for_speech(data)
 
@@ -88,10 +93,12 @@ class FinanceState:
         self.state_machine.exit_finance()
 
     def get_information(self, symbol):
-        data = self.stock_api.company_overview(symbol)
-        if data == {"Information": "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. Please subscribe to any of the premium plans at https://www.alphavantage.co/premium/ to instantly remove all daily rate limits."}:
+        try:
+            data = self.stock_api.company_overview(symbol)
+        except RateLimitExceeded as e:
+            logger.warning(e)
             return {}
-        elif data == {}:
+        if data == {}:
             return symbol
         else:
 
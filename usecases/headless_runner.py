@@ -0,0 +1,89 @@
+import threading
+from typing import Iterable, List, Optional, TextIO
+from loguru import logger
+from .event_sink import EventSink
+from .state_machine import StateMachine
+from .transition_queue import PRIORITY_USER
+
+
+class HeadlessRunner:
+    """
+    Runs the state machine without a window (e.g. on headless boxes or in benchmarks).
+
+    The state machine runs in its own thread like in main.py, events are passed to the given event sinks
+    and transitions are requested through the transition queue.
+    """
+
+    def __init__(self, state_machine: Optional[StateMachine] = None, event_sinks: Iterable[EventSink] = ()):
+        """
+        :param state_machine: State machine to run, a new one is created if None.
+        :param event_sinks: Receivers of the events of the state machine.
+        """
+        self.state_machine = state_machine or StateMachine()
+        for event_sink in event_sinks:
+            self.state_machine.add_event_sink(event_sink)
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self, warm_up: bool = True) -> threading.Thread:
+        """
+        Starts the state machine thread.
+
+        :param warm_up: Create the states and API clients in the background (see StateMachine.warm_up).
+        :return: The state machine thread.
+        """
+        logger.info("Starting headless state machine")
+        self.state_machine.open_api_cache()
+        self.state_machine.open_rate_limits()
+        self.thread = threading.Thread(target=self.state_machine.to_idle, name="state-machine", daemon=True)
+        self.thread.start()
+        if warm_up:
+            self.state_machine.start_warm_up()
+        return self.thread
+
+    def triggers(self) -> List[str]:
+        """
+        :return: Names of all transitions of the state machine.
+        """
+        return sorted(self.state_machine.machine.events)
+
+    def trigger(self, transition: str, priority: int = PRIORITY_USER) -> bool:
+        """
+        Queues a transition, it is executed as soon as the state machine is idle.
+
+        :param transition: Name of the transition (e.g. 'interact').
+        :param priority: Priority of the transition, see usecases.transition_queue.
+        :return: False if the transition does not exist.
+        """
+        if transition not in self.state_machine.machine.events:
+            logger.warning(f"Unknown transition: {transition}")
+            return False
+        self.state_machine.queue_transition(transition, priority)
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stops the state machine and waits for its thread (the current state has to finish first).
+        """
+        self.state_machine.stop()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def run_cli(self, input_stream: TextIO, output_stream: TextIO):
+        """
+        Reads commands line by line until "quit" or the end of the input.
+
+        Commands: the name of a transition, "state", "triggers", "quit".
+        """
+        for line in input_stream:
+            command = line.strip()
+            if not command:
+                continue
+            if command == "quit":
+                break
+            elif command == "state":
+                output_stream.write(f"{self.state_machine.state}\n")
+            elif command == "triggers":
+                output_stream.write(" ".join(self.triggers()) + "\n")
+            elif not self.trigger(command):
+                output_stream.write(f"Unknown transition: {command}\n")
+            output_stream.flush()
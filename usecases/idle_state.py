@@ -37,19 +37,23 @@ class IdleState:
             self.state_machine.start()
         logger.info("IdleState entered")
         
-        while not self.state_machine.testing:
+        # Return as soon as a transition left the idle state, the dispatch loop of the state machine enters the next state
+        while self.state_machine.running and not self.state_machine.testing and self.state_machine.state == 'idle':
             self.check_triggers()
+            if self.state_machine.state != 'idle':
+                break
+            # Block until the next scheduled check is due or a transition is queued
+            queue = self.state_machine.transition_queue
+            self.state_machine.scheduler.wait(until=lambda: len(queue) > 0)
             
     def check_triggers(self):
         """
         Check if a trigger is activated.
         """
-        queue = self.state_machine.transition_queue
-        if len(queue) > 0:
-            trigger = queue.pop(0)
-            
+        trigger = self.state_machine.pop_transition()
+        if trigger:
             # Call the transition method directly
             getattr(self.state_machine, trigger)()
             #self.state_machine.transition(trigger)
-        self.state_machine.activity.check_trigger_activity()
-        self.state_machine.petrol_checker.check_progress()
+        # Run the time based checks (activity trigger, petrol price) that are due
+        self.state_machine.scheduler.run_pending()
@@ -0,0 +1,49 @@
+import threading
+import time
+from loguru import logger
+
+
+class LazyState:
+    """
+    Descriptor that builds a state object of the state machine on first access.
+
+    `StateMachine.welcome` etc. are declared as `LazyState(WelcomeState)`. The state object is created
+    with the state machine as argument the first time the attribute is read and cached on the instance,
+    so the state machine (and with it the window) starts without waiting for the constructors of all states.
+    Assigning the attribute (e.g. in tests) replaces the cached object.
+    """
+
+    def __init__(self, state_class):
+        """
+        :param state_class: Class of the state, called with the state machine as only argument.
+        """
+        self.state_class = state_class
+        self.name = None
+        self._lock = threading.RLock()
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        with self._lock:
+            # Another thread might have built the state while this one was waiting for the lock
+            if self.name not in instance.__dict__:
+                start = time.perf_counter()
+                instance.__dict__[self.name] = self.state_class(instance)
+                logger.debug(f"Built state {self.name} in {(time.perf_counter() - start) * 1000:.1f} ms")
+            return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+    def is_built(self, instance) -> bool:
+        """
+        :return: True if the state object of the given state machine was already built.
+        """
+        return self.name in instance.__dict__
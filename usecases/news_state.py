@@ -3,6 +3,7 @@ from loguru import logger
 import re
 from api.news_api.main import NewsAPI
 from api.llm_api.llm_api import LLMApi
+from api.rate_limiter import RateLimitExceeded
 
 
 class NewsState:
@@ -31,8 +32,13 @@ class NewsState:
         """
         logger.info("NewsState entered")
 
-        # Retrieve the latest headlines from the NewsAPI client
-        headlines = self.news_api.fetch_top_headlines()
+        # Retrieve the latest headlines from the NewsAPI client. The last stored headlines are served if the rate
+        # limit is reached (see api.persistent_cache), so they are only missing if they were never loaded
+        try:
+            headlines = self.news_api.fetch_top_headlines()
+        except RateLimitExceeded as e:
+            logger.warning(e)
+            headlines = None
 
         if headlines:
             logger.info("Enter if state for headlines")
@@ -12,7 +12,8 @@ class PetrolChecker:
         fuel_radius = int(self.state_machine.preferences['fuel_radius'])
         self.petrol_api = petrol.PetrolAPI(city=city,
                                            fuel_name=fuel_name,
-                                           range_km=fuel_radius)
+                                           range_km=fuel_radius,
+                                           base_url=self.state_machine.api_factory.service_url(petrol.BASE_URL))
         self.notifier = notifier.PushNotifierAPI()
         self.notified = False
         self.last_notified_threshold = 0
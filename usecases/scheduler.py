@@ -0,0 +1,139 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, List, Optional
+from loguru import logger
+
+
+class Job:
+    """
+    A timed job managed by the Scheduler.
+    """
+
+    def __init__(self, func: Callable, next_run: float, interval: Optional[float] = None, name: Optional[str] = None):
+        """
+        :param func: Callable that is executed when the job is due.
+        :param next_run: Monotonic timestamp of the next execution.
+        :param interval: Seconds between two executions, None for one-shot jobs.
+        :param name: Name of the job (used for logging).
+        """
+        self.func = func
+        self.next_run = next_run
+        self.interval = interval
+        self.name = name or getattr(func, '__name__', 'job')
+        self.cancelled = False
+
+    def __repr__(self) -> str:
+        return f"Job({self.name}, next_run={self.next_run:.3f}, interval={self.interval})"
+
+
+class Scheduler:
+    """
+    Heap of timed jobs with a wake-up condition.
+
+    The idle thread blocks in `wait` until either the next job is due or another thread
+    calls `wake` (e.g. when a transition was queued), so no CPU is burned while idling.
+    """
+
+    def __init__(self, condition: Optional[threading.Condition] = None):
+        """
+        :param condition: Optional condition variable to share with other wake-up sources.
+        """
+        self.condition = condition or threading.Condition()
+        self._jobs: List = []
+        self._counter = itertools.count()
+        self._woken = False
+
+    def add_job(self, func: Callable, interval: Optional[float] = None, delay: float = 0.0, name: Optional[str] = None) -> Job:
+        """
+        Registers a job.
+
+        :param func: Callable that is executed when the job is due.
+        :param interval: Seconds between two executions, None to run the job only once.
+        :param delay: Seconds until the first execution.
+        :param name: Name of the job (used for logging).
+        :return: The registered job, can be passed to `cancel`.
+        """
+        job = Job(func, time.monotonic() + delay, interval, name)
+        with self.condition:
+            self._push(job)
+            # A new job might be due earlier than the one the idle thread is waiting for
+            self._woken = True
+            self.condition.notify_all()
+        logger.debug(f"Scheduled {job}")
+        return job
+
+    def cancel(self, job: Job):
+        """
+        Cancels a job. The job is dropped lazily the next time it reaches the top of the heap.
+        """
+        with self.condition:
+            job.cancelled = True
+
+    def _push(self, job: Job):
+        heapq.heappush(self._jobs, (job.next_run, next(self._counter), job))
+
+    def _drop_cancelled(self):
+        while self._jobs and self._jobs[0][2].cancelled:
+            heapq.heappop(self._jobs)
+
+    def seconds_until_next_job(self) -> Optional[float]:
+        """
+        :return: Seconds until the next job is due (0 if overdue), None if no job is scheduled.
+        """
+        with self.condition:
+            self._drop_cancelled()
+            if not self._jobs:
+                return None
+            return max(0.0, self._jobs[0][0] - time.monotonic())
+
+    def run_pending(self) -> int:
+        """
+        Runs all jobs that are due. Periodic jobs are rescheduled relative to their due time.
+
+        :return: Number of executed jobs.
+        """
+        executed = 0
+        while True:
+            with self.condition:
+                self._drop_cancelled()
+                if not self._jobs or self._jobs[0][0] > time.monotonic():
+                    return executed
+                _, _, job = heapq.heappop(self._jobs)
+                if job.interval is not None:
+                    # Skip missed runs instead of executing them back to back
+                    job.next_run = max(job.next_run + job.interval, time.monotonic())
+                    self._push(job)
+
+            try:
+                job.func()
+            except Exception as e:
+                logger.error(f"Error running scheduled job {job.name}: {e}")
+            executed += 1
+
+    def wake(self):
+        """
+        Wakes up the thread blocked in `wait`.
+        """
+        with self.condition:
+            self._woken = True
+            self.condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None, until: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Blocks until the next job is due, `wake` is called or the timeout expires.
+
+        :param timeout: Maximum number of seconds to block, None to wait for the next job.
+        :param until: Optional predicate that also ends the wait, e.g. a non-empty transition queue
+                      that notifies the shared condition.
+        :return: True if the scheduler was woken up (or the predicate became true), False otherwise.
+        """
+        with self.condition:
+            self._drop_cancelled()
+            if self._jobs:
+                until_next = max(0.0, self._jobs[0][0] - time.monotonic())
+                timeout = until_next if timeout is None else min(timeout, until_next)
+            woken = self.condition.wait_for(lambda: self._woken or (until is not None and until()), timeout)
+            self._woken = False
+            return bool(woken)
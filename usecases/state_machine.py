@@ -1,26 +1,35 @@
+import threading
+import time
+from typing import Iterable, Optional
 from loguru import logger
 from transitions import Machine, State
 from config import CONFIG
-from frontend.config_manager import load_preferences_file
-from PyQt5.QtCore import QObject, pyqtSignal
+from config.preferences import load_preferences_file
 from api.api_factory import APIFactory
+from api.cancellation import CancellationToken, OperationCancelled, set_current_token
+from api import metrics, persistent_cache, profiling
+from api.rate_limiter import Priority, RateLimiter, RequestLedger, request_priority
 from usecases.activity_state import ActivityState
 from .idle_state import IdleState
 from .welcome_state import WelcomeState
 from .speach_state import SpeachState
-from frontend.config_manager import load_preferences_file
 from .news_state import NewsState
 from.financetracker_state import FinanceState
 from .news_state import NewsState
 from.financetracker_state import FinanceState
 from .petrol_checker import PetrolChecker
+from .scheduler import Scheduler
+from .briefing_snapshot import seconds_until_prefetch
+from .async_runtime import AsyncStateRuntime
+from .transition_queue import TransitionQueue, PRIORITY_DEFAULT, PRIORITY_USER
+from .lazy_state import LazyState
+from .event_sink import EventSink, EVENT_STATE_CHANGED
 
-class StateMachine(QObject):
+class StateMachine:
     """
     State machine that controls the flow of the application.
+    It does not depend on Qt, the frontend (or a headless runner) receives its events through event sinks.
     """
-    # Signal that is emitted when the state changes (used to inform the frontend)
-    state_changed = pyqtSignal(str)
     
     # Define states
     states = [
@@ -31,32 +40,67 @@ class StateMachine(QObject):
         State(name='finance', on_enter='on_enter'),
         State(name='activity', on_enter='on_enter'),
     ]
+
+    # State objects, built on first access (see usecases.lazy_state)
+    idle = LazyState(IdleState)
+    news = LazyState(NewsState)
+    speach = LazyState(SpeachState)
+    welcome = LazyState(WelcomeState)
+    finance = LazyState(FinanceState)
+    activity = LazyState(ActivityState)
+    petrol_checker = LazyState(PetrolChecker)
+
+    # Seconds between two checks of the time based activity trigger
+    ACTIVITY_CHECK_INTERVAL = 1
+    # Seconds between two petrol price checks (each check scrapes clever-tanken)
+    PETROL_CHECK_INTERVAL = 60
+    # Default minutes before the default alarm time the morning briefing is prefetched
+    BRIEFING_PREFETCH_LEAD_MINUTES = 10
     
-    def __init__(self):
-        super(StateMachine, self).__init__()  # Call the superclass __init__ method
+    def __init__(self, event_sinks: Optional[Iterable[EventSink]] = None, api_base_url: Optional[str] = None):
+        """
+        :param event_sinks: Receivers of the events of the state machine, more can be added with add_event_sink.
+        :param api_base_url: Base URL of a stand-in server the API clients use instead of the external services,
+            defaults to config['api_base_url'] (see api.api_factory.APIFactory).
+        """
+        startup_start = time.perf_counter()
         
-        logger.info("StateMachine initialized")
         self.machine = Machine(model=self, states=self.states, initial='idle')
         
         self.testing = False
         self.running = True
+        self.event_sinks = list(event_sinks or [])
+        # Cancellation token of the current state, see interrupt
+        self.cancel_token = CancellationToken()
         
-        self.transition_queue = []
+        # State of the trampolined on_enter dispatch loop
+        self._dispatching = False
+        self._enter_pending = False
+
+        # Timed background jobs and wake-up condition for the idle thread
+        self.scheduler = Scheduler()
+        # Transitions queued by other threads (e.g. the frontend), shares the wake-up condition of the scheduler
+        self.transition_queue = TransitionQueue(self.scheduler.condition)
 
         # User preferences, hover over function to see details. This dictionary is kept up to date with the frontend.
         self.preferences = load_preferences_file()
         self.testing = False
         
-        self.api_factory = APIFactory(CONFIG)
+        # API clients are created on first use (or by warm_up), e.g. RaplaAPI scrapes the calendar in its constructor
+        self.api_factory = APIFactory(CONFIG, lazy=True, base_url=api_base_url)
+
+        # Optional exporters of the latency histograms (see api.metrics)
+        self.metrics_server = None
+        self.metrics_writer = None
+        self._start_metrics_exporters()
+        # Optional cProfile profile per state entry ("profile_dir" preference or ASWE_PROFILE_DIR, see api.profiling)
+        profiling.configure_profiling(self.preferences)
+
+        # Optional asyncio runtime, states with an on_enter_async coroutine overlap their I/O with the speech output
+        self.async_runtime = AsyncStateRuntime() if self.preferences.get("enable_async_runtime", 0) else None
         
-        # Initialize states
-        self.idle = IdleState(self)
-        self.news = NewsState(self)
-        self.speach = SpeachState(self)
-        self.welcome = WelcomeState(self)
-        self.finance = FinanceState(self)
-        self.activity = ActivityState(self)
-        self.petrol_checker = PetrolChecker(self)
+        # States are built on first access, the background checks only touch them when they are due
+        self._schedule_background_checks()
         
         # Setup transitions
         self.machine.add_transition('start', 'idle', 'welcome')
@@ -82,56 +126,245 @@ class StateMachine(QObject):
         self.machine.add_transition(trigger='goto_finance', source='speach', dest='finance')
         self.machine.add_transition(trigger='exit_finance', source='finance', dest='idle')
 
-    def stop(self):
+        logger.info(f"StateMachine initialized in {(time.perf_counter() - startup_start) * 1000:.1f} ms")
+
+    def warm_up(self):
         """
-        Stop the state machine.
+        Builds all states and creates their API clients in parallel, so the first transitions do not wait
+        for the network. Meant to run in the background after the window is shown (see start_warm_up).
         """
-        self.running = False
-        print("State machine stopped")
-        
-    def queue_transition(self, transition: str):
-        """Queue a transition to be executed when the current state is idle."""
-        logger.info(f"Queueing transition: {transition}")
-        if self.state == 'idle':
-            getattr(self, transition)()
-        else:
-            self.transition_queue.append(transition)
+        start = time.perf_counter()
+        for name, attribute in vars(StateMachine).items():
+            if isinstance(attribute, LazyState):
+                try:
+                    getattr(self, name)
+                except Exception as e:
+                    logger.error(f"Error building state {name}: {e}")
+        self.api_factory.warm_up()
+        logger.info(f"Warm-up finished in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def start_warm_up(self) -> threading.Thread:
+        """
+        Runs warm_up in a background thread.
+
+        :return: The started thread.
+        """
+        thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        thread.start()
+        return thread
 
     def stop(self):
         """
         Stop the state machine.
         """
         self.running = False
+        # Wake up the idle thread so it notices that the machine was stopped
+        self.scheduler.wake()
+        if self.async_runtime is not None:
+            self.async_runtime.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.metrics_writer is not None:
+            self.metrics_writer.stop()
         print("State machine stopped")
         
-    def queue_transition(self, transition: str):
-        """Queue a transition to be executed when the current state is idle."""
+    def add_event_sink(self, event_sink: EventSink):
+        """
+        Registers a receiver for the events of the state machine.
+        """
+        self.event_sinks.append(event_sink)
+
+    def emit_event(self, event: str, data=None):
+        """
+        Passes an event to all event sinks. Errors of a sink are logged and do not affect the state machine.
+
+        :param event: Name of the event, see usecases.event_sink.
+        :param data: Payload of the event.
+        """
+        for event_sink in self.event_sinks:
+            try:
+                event_sink.on_event(event, data)
+            except Exception as e:
+                logger.error(f"Error in event sink {event_sink}: {e}")
+
+    def queue_transition(self, transition: str, priority: int = PRIORITY_DEFAULT):
+        """
+        Queue a transition to be executed by the idle thread.
+        The idle thread is woken up immediately, so the transition starts within milliseconds.
+        A transition that is already queued is not queued a second time.
+
+        :param transition: Name of the trigger (e.g. 'to_speach').
+        :param priority: Priority of the transition, see usecases.transition_queue.
+        """
         logger.info(f"Queueing transition: {transition}")
-        if self.state == 'idle':
-            getattr(self, transition)()
-        else:
-            self.transition_queue.append(transition)
+        if not self.transition_queue.put(transition, priority):
+            logger.debug(f"Transition {transition} is already queued")
+
+    def interrupt(self, transition: Optional[str] = None, priority: int = PRIORITY_USER):
+        """
+        Interrupts the current state and queues a transition (e.g. the microphone button while the news are read).
+        In-flight HTTP requests, LLM calls and the speech output of the state are cancelled, the state machine
+        returns to idle and executes the queued transition from there.
+
+        :param transition: Name of the trigger to execute after the interrupt, None to only return to idle.
+        :param priority: Priority of the transition, see usecases.transition_queue.
+        """
+        if transition is not None:
+            self.queue_transition(transition, priority)
+        if self.state != 'idle':
+            self.cancel_token.cancel(f"interrupted by {transition or 'user'}")
+
+    def pop_transition(self):
+        """
+        Pops the next queued transition.
+
+        :return: Name of the next transition or None if the queue is empty.
+        """
+        return self.transition_queue.get_nowait()
+
+    def wait_for_transition(self, timeout: float = None):
+        """
+        Blocks until a transition is queued and pops it.
+
+        :param timeout: Maximum number of seconds to block, None to block indefinitely.
+        :return: Name of the next transition or None if the timeout expired.
+        """
+        return self.transition_queue.wait_for_transition(timeout)
+
+    def _start_metrics_exporters(self):
+        """
+        Starts the Prometheus endpoint ("metrics_port" preference) and the JSONL writer ("metrics_file" preference)
+        if they are configured. The histograms themselves are always recorded.
+        """
+        port = self.preferences.get("metrics_port", 0)
+        if port:
+            try:
+                self.metrics_server = metrics.MetricsServer(port=int(port))
+                self.metrics_server.start()
+            except OSError as e:
+                logger.error(f"Could not start metrics endpoint on port {port}: {e}")
+                self.metrics_server = None
+        metrics_file = self.preferences.get("metrics_file", "")
+        if metrics_file:
+            self.metrics_writer = metrics.JsonlMetricsWriter(metrics_file, interval=self.preferences.get("metrics_interval", 60))
+            self.metrics_writer.start()
+
+    def open_api_cache(self):
+        """
+        Enables the persistent API cache ("enable_api_cache" preference), so the API clients and scrapers serve the
+        data of the last run right after startup. Called by the entry points, not in the constructor, so tests that
+        create a state machine never touch the cache file.
+        """
+        if self.preferences.get("enable_api_cache", 1):
+            cache = persistent_cache.PersistentCache()
+            persistent_cache.set_default_cache(cache)
+            logger.info(f"Using persistent API cache {cache.path}")
+
+    def open_rate_limits(self):
+        """
+        Enables the quotas of the APIs ("enable_rate_limits" preference) with the ledger in data/rate_limits.sqlite3,
+        so the used quota is kept across restarts. Called by the entry points, like `open_api_cache`.
+        """
+        if self.preferences.get("enable_rate_limits", 1):
+            ledger = RequestLedger()
+            self.api_factory.configure_rate_limits(RateLimiter(ledger=ledger))
+            logger.info(f"Using API rate limits with ledger {ledger.path}")
+
+    def _schedule_background_checks(self):
+        """
+        Registers the periodic checks that run while the machine is idle.
+        """
+        self.scheduler.add_job(lambda: self.activity.check_trigger_activity(),
+                               interval=self.ACTIVITY_CHECK_INTERVAL, name="check_trigger_activity")
+        self.scheduler.add_job(lambda: self.petrol_checker.check_progress(),
+                               interval=self.PETROL_CHECK_INTERVAL, name="check_petrol_progress")
+        self._schedule_briefing_prefetch()
+
+    def _schedule_briefing_prefetch(self):
+        """
+        Schedules the next prefetch of the morning briefing, a few minutes before the default alarm time.
+        The time is read from the preferences each time, so changes in the frontend apply from the next run on.
+        """
+        alarm_time = self.preferences.get("default_alarm_time", "09:00")
+        lead_minutes = self.preferences.get("briefing_prefetch_lead_minutes", self.BRIEFING_PREFETCH_LEAD_MINUTES)
+        try:
+            delay = seconds_until_prefetch(alarm_time, lead_minutes)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid alarm time for briefing prefetch: {e}")
+            return
+        self.scheduler.add_job(self._run_briefing_prefetch, delay=delay, name="prefetch_briefing")
+
+    def _run_briefing_prefetch(self):
+        """
+        Runs the briefing prefetch in a background thread (so the idle thread keeps reacting to transitions)
+        and schedules the run for the next day. Its requests have prefetch priority, so they stop early when
+        a quota runs low and the rest is kept for the user (see api.rate_limiter).
+        """
+        def prefetch():
+            with request_priority(Priority.PREFETCH):
+                self.welcome.prefetch_briefing()
+
+        threading.Thread(target=prefetch, name="briefing-prefetch", daemon=True).start()
+        self._schedule_briefing_prefetch()
 
     def on_enter(self):
         """
         Callback method that is called when entering a state.
-        It maps the current state to the corresponding state object and calls its on_enter method.
+
+        Transitions requested while a state is running (e.g. `self.state_machine.news_idle()` at the end of
+        `NewsState.on_enter`) only mark the new state as pending and return immediately. The outermost call
+        runs the pending states one after another (trampoline), so the call stack stays flat no matter how
+        many idle -> welcome -> news -> idle cycles are executed.
+        """
+        self._enter_pending = True
+        if self._dispatching:
+            # The running dispatch loop enters the new state once the current state has returned
+            return
+
+        self._dispatching = True
+        try:
+            while self._enter_pending:
+                self._enter_pending = False
+                self._enter_current_state()
+        finally:
+            self._dispatching = False
+
+    def _enter_current_state(self):
+        """
+        Maps the current state to the corresponding state object and calls its on_enter method.
+        A state can either request its next transition directly or return the name of the trigger to fire.
         """
         logger.info(f"Entering state: {self.state}")
-        # Get the current state and map it to the corresponding state object
-        state_dict = {
-            'idle': self.idle,
-            'welcome': self.welcome,
-            'speach': self.speach,
-            'news': self.news,
-            'finance': self.finance,
-            'activity': self.activity,
-        }
-        # Inform the frontend about the state change
-        self.state_changed.emit(self.state)
-        # Call the on_enter method of the state object
-        state_dict[self.state].on_enter()
+        dispatch_start = time.perf_counter()
+        metrics.begin_state(self.state)
+        # Get the state object of the current state (the attributes are named like the states and built on first access)
+        state = getattr(self, self.state)
+        # Inform the frontend (or the headless runner) about the state change
+        self.emit_event(EVENT_STATE_CHANGED, self.state)
+        # Every state gets its own cancellation token, API clients and the speech output pick it up from the context
+        self.cancel_token = CancellationToken()
+        set_current_token(self.cancel_token)
+        entered_state = self.state
+        on_enter_start = time.perf_counter()
+        metrics.STATE_DISPATCH_SECONDS.observe(on_enter_start - dispatch_start, entered_state)
+        try:
+            # Call the on_enter method of the state object (as coroutine if the async runtime is enabled).
+            # Profiled if enabled, coroutines run on the thread of the async runtime and are not in the profile.
+            with profiling.profile_state(entered_state):
+                if self.async_runtime is not None and hasattr(state, 'on_enter_async'):
+                    next_trigger = self.async_runtime.run(state.on_enter_async(), self.cancel_token)
+                else:
+                    next_trigger = state.on_enter()
+        except OperationCancelled:
+            logger.info(f"State {self.state} was interrupted")
+            # Return to idle, the idle state executes the transition queued by interrupt
+            next_trigger = 'to_idle' if self.state != 'idle' else None
+        finally:
+            metrics.STATE_ON_ENTER_SECONDS.observe(time.perf_counter() - on_enter_start, entered_state)
+        if isinstance(next_trigger, str) and not self._enter_pending:
+            getattr(self, next_trigger)()
         # Process queued transitions if the current state is idle
-        if self.state == 'idle' and self.transition_queue:
-            next_transition = self.transition_queue.pop(0)
-            getattr(self, next_transition)()
+        if self.state == 'idle' and not self._enter_pending:
+            next_transition = self.pop_transition()
+            if next_transition:
+                getattr(self, next_transition)()
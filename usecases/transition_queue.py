@@ -0,0 +1,94 @@
+import itertools
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+# Priorities of queued transitions (lower value wins)
+PRIORITY_USER = 0        # e.g. the microphone button in the frontend
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2  # e.g. time based checks running while idle
+
+
+class TransitionQueue:
+    """
+    Thread-safe queue for transitions that are waiting to be executed by the idle thread.
+
+    - One deque per priority, so put and get are O(1).
+    - Duplicate triggers are coalesced: a trigger is pending at most once. Queuing it again with a
+      higher priority moves it forward, the old entry is skipped lazily when it is popped.
+    - Consumers can block in `wait_for_transition` instead of polling.
+    """
+
+    def __init__(self, condition: Optional[threading.Condition] = None):
+        """
+        :param condition: Condition variable used to notify waiting consumers. Sharing it with the
+                          scheduler lets the idle thread wait for jobs and transitions at the same time.
+        """
+        self.condition = condition or threading.Condition()
+        self._queues: Dict[int, deque] = {}
+        self._pending: Dict[str, Tuple[int, int]] = {}  # trigger -> (sequence number of its valid entry, priority)
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        with self.condition:
+            return len(self._pending)
+
+    def __contains__(self, trigger: str) -> bool:
+        with self.condition:
+            return trigger in self._pending
+
+    def put(self, trigger: str, priority: int = PRIORITY_DEFAULT) -> bool:
+        """
+        Queues a trigger and wakes up waiting consumers.
+
+        :param trigger: Name of the transition trigger (e.g. 'to_speach').
+        :param priority: Priority of the trigger, one of the PRIORITY_* constants.
+        :return: False if the trigger was already pending with the same or a higher priority.
+        """
+        with self.condition:
+            current = self._pending.get(trigger)
+            if current is not None and current[1] <= priority:
+                return False
+
+            seq = next(self._counter)
+            self._pending[trigger] = (seq, priority)
+            self._queues.setdefault(priority, deque()).append((seq, trigger))
+            self.condition.notify_all()
+            return True
+
+    def get_nowait(self) -> Optional[str]:
+        """
+        Pops the pending trigger with the highest priority (FIFO within a priority).
+
+        :return: Name of the trigger or None if the queue is empty.
+        """
+        with self.condition:
+            for priority in sorted(self._queues):
+                queue = self._queues[priority]
+                while queue:
+                    seq, trigger = queue.popleft()
+                    # Skip entries that were superseded by a higher priority entry
+                    if self._pending.get(trigger, (None,))[0] == seq:
+                        del self._pending[trigger]
+                        return trigger
+            return None
+
+    def wait_for_transition(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Blocks until a trigger is queued and pops it.
+
+        :param timeout: Maximum number of seconds to block, None to block indefinitely.
+        :return: Name of the trigger or None if the timeout expired.
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self._pending) > 0, timeout):
+                return None
+            return self.get_nowait()
+
+    def clear(self):
+        """
+        Drops all pending triggers.
+        """
+        with self.condition:
+            self._queues.clear()
+            self._pending.clear()
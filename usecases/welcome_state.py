@@ -1,7 +1,38 @@
-from typing import Dict
+from typing import Any, Awaitable, Callable, Dict, Generator, Hashable, List, NamedTuple, Optional, Union
+import asyncio
 import datetime
 from unittest.mock import MagicMock
 from loguru import logger
+from api.api_client import fan_out
+from .briefing_snapshot import BriefingSnapshot
+from .event_sink import EVENT_ALARM_TIME_CHANGED
+
+
+class Fetch(NamedTuple):
+    """Step of the briefing that starts fetching a value."""
+    name: Optional[str]  # item of the briefing snapshot, None if the value is not stored
+    call: Callable[[], Any]
+    key: Hashable = None
+    call_async: Optional[Callable[[], Awaitable]] = None  # used by the async runtime instead of `call` if set
+
+
+class Wait(NamedTuple):
+    """Step of the briefing that waits for the values of fetches."""
+    handles: tuple
+
+
+class Speak(NamedTuple):
+    """Step of the briefing that speaks a sentence."""
+    text: str
+
+
+class Ask(NamedTuple):
+    """Step of the briefing that asks a yes/no question."""
+    question: str
+
+
+Step = Union[Fetch, Wait, Speak, Ask]
+
 
 class WelcomeState:
     """
@@ -15,12 +46,18 @@ class WelcomeState:
         self.transit_api = self.state_machine.api_factory.create_api(api_type="vvs")
         self.weather_api = self.state_machine.api_factory.create_api(api_type="weather")
         self.rapla_api = self.state_machine.api_factory.create_api(api_type="rapla")
+        # Clients of the async runtime, their requests share the connections of one httpx client instead of a thread each
+        self.async_transit_api = self.state_machine.api_factory.create_async_api(api_type="vvs")
+        self.async_weather_api = self.state_machine.api_factory.create_async_api(api_type="weather")
         
         default_alarm_time = self.state_machine.preferences.get("default_alarm_time", "09:00")
         if isinstance(default_alarm_time, MagicMock):
             default_alarm_time = "09:00"
         self.default_wakeup_time = datetime.datetime.strptime(default_alarm_time, "%H:%M").time()
         
+        # Inputs of the briefing, filled by the prefetch job ahead of the default alarm time
+        self.briefing = BriefingSnapshot()
+        
         logger.info("WelcomeState initialized")
     
     def on_enter(self):
@@ -29,26 +66,189 @@ class WelcomeState:
         It sets up the alarm, retrieves the weather forecast, and informs the user about their schedule.
         """
         logger.info("WelcomeState entered")
-        
+        next_trigger = self.run_briefing(self.briefing_steps())
+        getattr(self.state_machine, next_trigger)()
+
+    async def on_enter_async(self):
+        """
+        Coroutine variant of `on_enter` used by the async state runtime.
+        The same steps are run, but the network fetches for the next sentence run while the current sentence is spoken.
+
+        :return: Name of the next trigger.
+        """
+        logger.info("WelcomeState entered (async)")
+        return await self.run_briefing_async(self.briefing_steps())
+
+    def briefing_steps(self) -> Generator[Step, Any, str]:
+        """
+        Steps of the morning briefing, shared by `on_enter` and `on_enter_async` so both run them in the same order.
+        Yields a Fetch to start fetching a value (the driver sends back a handle), a Wait for the values of handles,
+        a Speak and an Ask (the driver sends back the answer).
+
+        :return: Name of the next trigger.
+        """
+        start_location = self.state_machine.preferences.get("home_location", None)
+        end_location = self.state_machine.preferences.get("default_destination", None)
+
+        # Start all independent fetches (items prefetched by the briefing job are reused while fresh)
+        alarm = yield Fetch(None, self.calc_alarm_time)
+        forecast = yield Fetch("forecast", lambda: self.weather_api.get_daily_forecast("Stuttgart", datetime.datetime.today()),
+                               call_async=lambda: self.async_weather_api.get_daily_forecast("Stuttgart", datetime.datetime.today()))
+        current_weather = yield Fetch("current_weather", lambda: self.weather_api.get_weather("Stuttgart"),
+                                      call_async=lambda: self.async_weather_api.get_weather("Stuttgart"))
+        appointments = yield Fetch("appointments", self.rapla_api.get_todays_appointments)
+
         # ---------- Alarm clock ----------
-        # Calculate wake-up time based on the first calendar appointment
-        wakeup_time = self.calc_alarm_time()
-        # Set the alarm clock
-        self.state_machine.main_window.update_alarm_label(wakeup_time)
+        # Calculate wake-up time based on the first calendar appointment and set the alarm clock
+        wakeup_time, = yield Wait((alarm,))
+        self.state_machine.emit_event(EVENT_ALARM_TIME_CHANGED, wakeup_time)
         logger.info(f"Wake-up time set to: {wakeup_time}")
 
         # TODO: Set the alarm using the calculated wakeup_time
 
         # ---------- Weather information ----------
-        # Retrieve the current weather forecast
         logger.debug("Retrieving weather forecast for Stuttgart")
-        weather_forecast = self.weather_api.get_daily_forecast("Stuttgart", datetime.datetime.today()) # Using tomorrow's date
+        weather_forecast, current_weather = yield Wait((forecast, current_weather))
+        weather_message = self.build_weather_message(weather_forecast, current_weather)
+        logger.debug(f"Speaking weather information: {weather_message}")
+        yield Speak(weather_message)
+
+        # ---------- Calendar information ----------
+        # Provide the user with the information about their first appointment that hasn't already passed
+        logger.debug("Retrieving today's appointments")
+        appointments, = yield Wait((appointments,))
+        upcoming_appointment = self.get_upcoming_appointment(appointments)
+
+        if upcoming_appointment:
+            logger.debug(f"Upcoming appointment: {upcoming_appointment}")
+            # ---------- Transport information ----------
+            # Get rides to get for the first appointment (fetched while the appointment is spoken)
+            logger.debug(f"Calculating trip time from {start_location} to {end_location}")
+            arrival_time = upcoming_appointment.datetime_start + datetime.timedelta(hours=1)
+            trip = yield Fetch("trip", lambda: self.transit_api.get_best_trip(start_location['vvs_code'], end_location['vvs_code'], arrival_time), key=arrival_time,
+                               call_async=lambda: self.async_transit_api.get_best_trip(start_location['vvs_code'], end_location['vvs_code'], arrival_time))
+            yield Speak(self.build_appointment_message(upcoming_appointment))
+            trip, = yield Wait((trip,))
+            yield Speak(self.build_trip_message(trip, upcoming_appointment, start_location, end_location))
+        else:
+            logger.debug("No upcoming appointments found for today")
+            yield Speak(self.build_no_upcoming_appointment_message(appointments))
+
+        # ---------- Morning news ----------
+        # Ask the user if they want to start the next use case (e.g., Nachrichtenassistent)
+        logger.debug("Asking user if they want to hear the news")
+        if (yield Ask("Möchten Sie die Nachrichten hören?")):
+            logger.debug("User wants to hear the news")
+            return 'morning_news'
+        logger.debug("User does not want to hear the news")
+        yield Speak("Okay, lassen Sie mich wissen wenn ich Ihnen helfen kann!")
+        return 'interaction'
+
+    def run_briefing(self, steps: Generator[Step, Any, str]) -> str:
+        """
+        Runs the steps blocking: a fetch runs when it is waited for, the fetches of one Wait at the same time.
+
+        :return: Name of the next trigger.
+        """
+        answer = None
+        while True:
+            try:
+                step = steps.send(answer)
+            except StopIteration as stop:
+                return stop.value
+            if isinstance(step, Fetch):
+                answer = self._fetch_call(step)
+            elif isinstance(step, Wait):
+                answer = fan_out(list(step.handles), return_errors=False)
+            elif isinstance(step, Speak):
+                answer = self.tts_api.speak(step.text)
+            else:
+                answer = self.tts_api.ask_yes_no(step.question)
+
+    async def run_briefing_async(self, steps: Generator[Step, Any, str]) -> str:
+        """
+        Runs the steps as coroutine: every fetch starts at once (on the async clients, blocking calls in a worker
+        thread), a sentence is spoken while the next steps run and is awaited before the next sentence or question.
+
+        :return: Name of the next trigger.
+        """
+        answer = None
+        speech = None
+        while True:
+            try:
+                step = steps.send(answer)
+            except StopIteration as stop:
+                if speech is not None:
+                    await speech
+                return stop.value
+            if isinstance(step, Fetch):
+                answer = asyncio.create_task(self._fetch_async(step))
+            elif isinstance(step, Wait):
+                answer = await asyncio.gather(*step.handles)
+            else:
+                # One sentence at a time
+                if speech is not None:
+                    await speech
+                    speech = None
+                if isinstance(step, Speak):
+                    speech = asyncio.create_task(self.tts_api.speak_async(step.text))
+                    answer = None
+                else:
+                    answer = await self.tts_api.ask_yes_no_async(step.question)
+
+    def _fetch_call(self, fetch: Fetch) -> Callable[[], Any]:
+        """
+        :return: Function that returns the value of the fetch, from the briefing snapshot while it is fresh.
+        """
+        if fetch.name is None:
+            return fetch.call
+        return lambda: self.briefing.get_or_fetch(fetch.name, fetch.call, key=fetch.key)
+
+    async def _fetch_async(self, fetch: Fetch) -> Any:
+        """
+        :return: Value of the fetch, from the briefing snapshot while it is fresh.
+        """
+        if fetch.call_async is None:
+            return await asyncio.to_thread(self._fetch_call(fetch))
+        if fetch.name is None:
+            return await fetch.call_async()
+        return await self.briefing.get_or_fetch_async(fetch.name, fetch.call_async, key=fetch.key)
+
+    def prefetch_briefing(self):
+        """
+        Fetches all inputs of the morning briefing into the snapshot, so `on_enter` can start speaking
+        without waiting for the network. Runs in the background ahead of the default alarm time.
+        """
+        logger.info("Prefetching morning briefing")
+        try:
+            self.briefing.put("forecast", self.weather_api.get_daily_forecast("Stuttgart", datetime.datetime.today()))
+            self.briefing.put("current_weather", self.weather_api.get_weather("Stuttgart"))
+            appointments = self.rapla_api.get_todays_appointments()
+            self.briefing.put("appointments", appointments)
+
+            upcoming_appointment = self.get_upcoming_appointment(appointments)
+            start_location = self.state_machine.preferences.get("home_location", None)
+            end_location = self.state_machine.preferences.get("default_destination", None)
+            if upcoming_appointment and start_location is not None and end_location is not None:
+                arrival_time = upcoming_appointment.datetime_start + datetime.timedelta(hours=1)
+                trip = self.transit_api.get_best_trip(start_location['vvs_code'], end_location['vvs_code'], arrival_time)
+                self.briefing.put("trip", trip, key=arrival_time)
+        except Exception as e:
+            # Whatever is missing is fetched when the state is entered
+            logger.error(f"Error prefetching morning briefing: {e}")
+
+    def build_weather_message(self, weather_forecast: Dict, current_weather: Dict) -> str:
+        """
+        Builds the good morning message with the time and weather information.
+
+        :param weather_forecast: Daily forecast as returned by WeatherAPI.get_daily_forecast.
+        :param current_weather: Current weather as returned by WeatherAPI.get_weather.
+        :return: Message to speak.
+        """
         min_temp = round(weather_forecast.get('min_temp', None), 1) if weather_forecast.get('min_temp', None) is not None else None
         max_temp = round(weather_forecast.get('max_temp', None), 1) if weather_forecast.get('max_temp', None) is not None else None
         condition = weather_forecast.get('avg_condition', None)
         
-        current_weather = self.weather_api.get_weather("Stuttgart")
-        
         # Build a string with the populated elements and provide the user with the weather and timeinformation
         if self.tts_api.toggle_elevenlabs:
             good_morning_message = f"Guten Morgen! Es ist {datetime.datetime.now().strftime('%H:%M').replace(':','Uhr ')}. "
@@ -77,64 +277,47 @@ class WelcomeState:
         if current_weather:
             current_weather_info = f" Im Moment sind es {int(current_weather['main']['temp'])} {grad_format}."
         
-        logger.debug(f"Speaking weather information: {good_morning_message + weather_info + current_weather_info}")
-        self.tts_api.speak(good_morning_message + weather_info + current_weather_info)        
-        
-        # ---------- Calendar information ----------
-        # Provide the user with the information about their first appointment that hasn't already passed
-        logger.debug("Retrieving today's appointments")
-        appointments = self.rapla_api.get_todays_appointments()
-        
+        return good_morning_message + weather_info + current_weather_info
+
+    def get_upcoming_appointment(self, appointments: List):
+        """
+        Returns the first appointment that hasn't already passed or None.
+        """
         now = datetime.datetime.now(datetime.timezone.utc)
-        upcoming_appointment = next((appt for appt in appointments if appt.datetime_start > now), None)
-        
-        if upcoming_appointment:
-            logger.debug(f"Upcoming appointment: {upcoming_appointment}")
-            self.tts_api.speak(f"Ihr erster Termin ist um {upcoming_appointment.datetime_start.strftime('%H:%M')} im {upcoming_appointment.room}.")
-            
-            # ---------- Transport information ----------
-            # Get rides to get for the first appointment
-            start_location = self.state_machine.preferences.get("home_location", None)
-            end_location = self.state_machine.preferences.get("default_destination", None)
-            logger.debug(f"Calculating trip time from {start_location} to {end_location}")
-            
-            arrival_time = upcoming_appointment.datetime_start + datetime.timedelta(hours=1)
-            
-            trip = self.transit_api.get_best_trip(start_location['vvs_code'], end_location['vvs_code'], arrival_time)
-        
-            if trip != -1 and start_location is not None and end_location is not None:
-                transport_type = trip.connections[0].transportation.number
-                departure_time = trip.connections[0].origin.departure_time_planned.replace(tzinfo=datetime.timezone.utc).strftime("%H:%M")
-                arrival_time_time_aware = trip.connections[-1].destination.arrival_time_estimated.replace(tzinfo=datetime.timezone.utc)
-                logger.debug(f"Departure time: {departure_time}, Arrival time: {arrival_time_time_aware}")
-                                
-                time_to_start = (upcoming_appointment.datetime_start.replace(tzinfo=datetime.timezone.utc) - arrival_time_time_aware).seconds // 60
-                logger.debug(f"Um rechtzeitig zu Ihrem Termin zu kommen, sollten Sie die {transport_type} um {departure_time} Uhr nehmen. \
-                                   Damit kommen sie {time_to_start} Minuten vor Ihrem Termin an.")
-                self.tts_api.speak(f"Um rechtzeitig zu Ihrem Termin zu kommen, sollten Sie die {transport_type} um {departure_time} Uhr nehmen. \
-                                   Damit kommen sie {time_to_start} Minuten vor Ihrem Termin an.")
-            else:
-                logger.debug("No suitable connection found")
-                self.tts_api.speak("Es konnte keine passende Verbindung gefunden werden.")
-        else:
-            logger.debug("No upcoming appointments found for today")
-            if len(appointments) > 0:
-                self.tts_api.speak("Alle Termine für heute sind bereits vorüber.")
-            else:
-                self.tts_api.speak("Sie haben heute keine Termine.")
-            
-        # ---------- Morning news ----------
-        # Ask the user if they want to start the next use case (e.g., Nachrichtenassistent)
-        logger.debug("Asking user if they want to hear the news")
-        user_response = self.tts_api.ask_yes_no("Möchten Sie die Nachrichten hören?")
-        if user_response:
-            logger.debug("User wants to hear the news")
-            self.state_machine.morning_news()
-        else:
-            logger.debug("User does not want to hear the news")
-            self.tts_api.speak("Okay, lassen Sie mich wissen wenn ich Ihnen helfen kann!")
-            self.state_machine.interaction()
-        
+        return next((appt for appt in appointments if appt.datetime_start > now), None)
+
+    def build_appointment_message(self, upcoming_appointment) -> str:
+        """
+        Builds the message about the first upcoming appointment.
+        """
+        return f"Ihr erster Termin ist um {upcoming_appointment.datetime_start.strftime('%H:%M')} im {upcoming_appointment.room}."
+
+    def build_trip_message(self, trip, upcoming_appointment, start_location: Dict, end_location: Dict) -> str:
+        """
+        Builds the message about the connection to take to arrive in time for the appointment.
+        """
+        if trip not in (-1, None) and start_location is not None and end_location is not None:
+            transport_type = trip.connections[0].transportation.number
+            departure_time = trip.connections[0].origin.departure_time_planned.replace(tzinfo=datetime.timezone.utc).strftime("%H:%M")
+            arrival_time_time_aware = trip.connections[-1].destination.arrival_time_estimated.replace(tzinfo=datetime.timezone.utc)
+            logger.debug(f"Departure time: {departure_time}, Arrival time: {arrival_time_time_aware}")
+                            
+            time_to_start = (upcoming_appointment.datetime_start.replace(tzinfo=datetime.timezone.utc) - arrival_time_time_aware).seconds // 60
+            logger.debug(f"Um rechtzeitig zu Ihrem Termin zu kommen, sollten Sie die {transport_type} um {departure_time} Uhr nehmen. \
+                               Damit kommen sie {time_to_start} Minuten vor Ihrem Termin an.")
+            return f"Um rechtzeitig zu Ihrem Termin zu kommen, sollten Sie die {transport_type} um {departure_time} Uhr nehmen. \
+                               Damit kommen sie {time_to_start} Minuten vor Ihrem Termin an."
+        logger.debug("No suitable connection found")
+        return "Es konnte keine passende Verbindung gefunden werden."
+
+    def build_no_upcoming_appointment_message(self, appointments: List) -> str:
+        """
+        Builds the message if there is no upcoming appointment today.
+        """
+        if len(appointments) > 0:
+            return "Alle Termine für heute sind bereits vorüber."
+        return "Sie haben heute keine Termine."
+
     def calc_alarm_time(self):
         """
         Calculate the time for the alarm clock based on the first appointment of the user's calendar.